@@ -0,0 +1,46 @@
+"""Add shopify_inventory_levels
+
+Last per-location `available` from inventory_levels/update webhooks, so
+the webhook service can move the variant total in shopify_inventory by the
+change at one location instead of overwriting it.
+
+Revision ID: 3314c9eee686
+Revises: f29c0d3e4b5c
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = '3314c9eee686'
+down_revision: Union[str, None] = 'f29c0d3e4b5c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table_name):
+    bind = op.get_bind()
+    insp = inspect(bind)
+    return table_name in insp.get_table_names()
+
+
+def upgrade() -> None:
+    if _has_table('shopify_inventory_levels'):
+        return
+    op.create_table(
+        'shopify_inventory_levels',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('shopify_inventory_item_id', sa.BigInteger(), nullable=False, index=True),
+        sa.Column('location_id', sa.BigInteger(), nullable=False),
+        sa.Column('available', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('shopify_inventory_item_id', 'location_id', name='uq_shopify_inventory_level'),
+    )
+
+
+def downgrade() -> None:
+    if _has_table('shopify_inventory_levels'):
+        op.drop_table('shopify_inventory_levels')
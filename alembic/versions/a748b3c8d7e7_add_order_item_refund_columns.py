@@ -0,0 +1,61 @@
+"""Materialize refunds per line item on shopify_order_items
+
+Adds refunded_quantity / refunded_amount (sums of shopify_refund_line_items
+per line_item_id) so sales readers no longer group the whole refund history
+on every request. Backfilled here for items that have refunds; kept current
+by the Shopify order/refund saves and checked nightly by
+RefundRollupService.verify().
+
+Revision ID: a748b3c8d7e7
+Revises: z637a2b7c6d6
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'a748b3c8d7e7'
+down_revision: Union[str, None] = 'z637a2b7c6d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column(table_name, column_name):
+    """Check if a column already exists in the table."""
+    bind = op.get_bind()
+    insp = inspect(bind)
+    columns = [c['name'] for c in insp.get_columns(table_name)]
+    return column_name in columns
+
+
+def upgrade() -> None:
+    if not _has_column('shopify_order_items', 'refunded_quantity'):
+        op.add_column('shopify_order_items', sa.Column(
+            'refunded_quantity', sa.Integer(), nullable=False, server_default='0'))
+    if not _has_column('shopify_order_items', 'refunded_amount'):
+        op.add_column('shopify_order_items', sa.Column(
+            'refunded_amount', sa.Numeric(10, 2), nullable=False, server_default='0'))
+
+    op.execute("""
+        UPDATE shopify_order_items
+        SET refunded_quantity = COALESCE((
+                SELECT SUM(r.quantity) FROM shopify_refund_line_items r
+                WHERE r.line_item_id = shopify_order_items.line_item_id
+            ), 0),
+            refunded_amount = COALESCE((
+                SELECT SUM(r.subtotal) FROM shopify_refund_line_items r
+                WHERE r.line_item_id = shopify_order_items.line_item_id
+            ), 0)
+        WHERE line_item_id IN (
+            SELECT line_item_id FROM shopify_refund_line_items WHERE line_item_id IS NOT NULL
+        )
+    """)
+
+
+def downgrade() -> None:
+    for column in ('refunded_amount', 'refunded_quantity'):
+        if _has_column('shopify_order_items', column):
+            op.drop_column('shopify_order_items', column)
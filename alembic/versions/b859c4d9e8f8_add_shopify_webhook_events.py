@@ -0,0 +1,52 @@
+"""Add shopify_webhook_events
+
+Queue of verified Shopify webhook deliveries (orders/create, orders/updated,
+refunds/create, inventory_levels/update). Drained by ShopifyWebhookService
+through the normal save path; unique webhook_id dedupes redeliveries.
+
+Revision ID: b859c4d9e8f8
+Revises: a748b3c8d7e7
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'b859c4d9e8f8'
+down_revision: Union[str, None] = 'a748b3c8d7e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table_name):
+    bind = op.get_bind()
+    insp = inspect(bind)
+    return table_name in insp.get_table_names()
+
+
+def upgrade() -> None:
+    if _has_table('shopify_webhook_events'):
+        return
+    op.create_table(
+        'shopify_webhook_events',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('webhook_id', sa.String(), nullable=True, unique=True, index=True),
+        sa.Column('topic', sa.String(), nullable=False, index=True),
+        sa.Column('shop_domain', sa.String(), nullable=True),
+        sa.Column('resource_id', sa.BigInteger(), nullable=True),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False, server_default='pending', index=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('received_at', sa.DateTime(), nullable=False, index=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_shopify_webhook_events_status_id', 'shopify_webhook_events', ['status', 'id'])
+
+
+def downgrade() -> None:
+    if _has_table('shopify_webhook_events'):
+        op.drop_table('shopify_webhook_events')
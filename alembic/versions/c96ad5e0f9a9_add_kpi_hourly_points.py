@@ -0,0 +1,47 @@
+"""Add kpi_hourly_points
+
+Hourly KPI time-series store for continuous monitoring: additive measures
+(revenue, orders, sessions, ad spend, abandoned checkouts, email opens) per
+UTC hour. Filled and kept current by KpiTimeSeriesService.
+
+Revision ID: c96ad5e0f9a9
+Revises: b859c4d9e8f8
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'c96ad5e0f9a9'
+down_revision: Union[str, None] = 'b859c4d9e8f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table_name):
+    bind = op.get_bind()
+    insp = inspect(bind)
+    return table_name in insp.get_table_names()
+
+
+def upgrade() -> None:
+    if _has_table('kpi_hourly_points'):
+        return
+    op.create_table(
+        'kpi_hourly_points',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('metric', sa.String(), nullable=False),
+        sa.Column('hour', sa.DateTime(), nullable=False),
+        sa.Column('value', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint('metric', 'hour', name='uq_kpi_hourly_metric_hour'),
+    )
+    op.create_index('ix_kpi_hourly_hour', 'kpi_hourly_points', ['hour'])
+
+
+def downgrade() -> None:
+    if _has_table('kpi_hourly_points'):
+        op.drop_table('kpi_hourly_points')
@@ -0,0 +1,57 @@
+"""Add shopify_order_attribution
+
+Order → Google Ads campaign attribution index: the normalized
+gad_campaign_id / utm_campaign of each attributable order, the campaign ids
+they resolve to, and the match tier. Maintained by
+ShopifyRevenueAttributionService at order save and campaign import time.
+
+Revision ID: d07ae6f1a0fa
+Revises: c96ad5e0f9a9
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'd07ae6f1a0fa'
+down_revision: Union[str, None] = 'c96ad5e0f9a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table_name):
+    bind = op.get_bind()
+    insp = inspect(bind)
+    return table_name in insp.get_table_names()
+
+
+def upgrade() -> None:
+    if _has_table('shopify_order_attribution'):
+        return
+    op.create_table(
+        'shopify_order_attribution',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('shopify_order_id', sa.BigInteger(), nullable=False),
+        sa.Column('gad_campaign_id', sa.String(), nullable=True),
+        sa.Column('utm_name', sa.String(), nullable=True),
+        sa.Column('utm_campaign_id', sa.String(), nullable=True),
+        sa.Column('campaign_id', sa.String(), nullable=True),
+        sa.Column('match_tier', sa.String(), nullable=True),
+        sa.Column('resolved_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_shopify_order_attribution_shopify_order_id', 'shopify_order_attribution',
+                    ['shopify_order_id'], unique=True)
+    op.create_index('ix_shopify_order_attribution_gad_campaign_id', 'shopify_order_attribution',
+                    ['gad_campaign_id'])
+    op.create_index('ix_shopify_order_attribution_utm_campaign_id', 'shopify_order_attribution',
+                    ['utm_campaign_id'])
+    op.create_index('ix_shopify_order_attribution_campaign_id', 'shopify_order_attribution',
+                    ['campaign_id'])
+
+
+def downgrade() -> None:
+    if _has_table('shopify_order_attribution'):
+        op.drop_table('shopify_order_attribution')
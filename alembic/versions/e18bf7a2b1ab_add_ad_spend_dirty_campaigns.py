@@ -0,0 +1,46 @@
+"""Add ad_spend_dirty_campaigns
+
+Campaign days touched by Google Ads imports and Shopify order saves since
+the last AdSpendProcessor run, so the processor recomputes only the
+affected campaigns.
+
+Revision ID: e18bf7a2b1ab
+Revises: d07ae6f1a0fa
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'e18bf7a2b1ab'
+down_revision: Union[str, None] = 'd07ae6f1a0fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table_name):
+    bind = op.get_bind()
+    insp = inspect(bind)
+    return table_name in insp.get_table_names()
+
+
+def upgrade() -> None:
+    if _has_table('ad_spend_dirty_campaigns'):
+        return
+    op.create_table(
+        'ad_spend_dirty_campaigns',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('campaign_id', sa.String(), nullable=True),
+        sa.Column('date', sa.Date(), nullable=True),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('marked_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_ad_spend_dirty_campaigns_campaign_id', 'ad_spend_dirty_campaigns', ['campaign_id'])
+
+
+def downgrade() -> None:
+    if _has_table('ad_spend_dirty_campaigns'):
+        op.drop_table('ad_spend_dirty_campaigns')
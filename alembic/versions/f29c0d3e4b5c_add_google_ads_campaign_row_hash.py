@@ -0,0 +1,38 @@
+"""Add google_ads_campaigns.row_hash
+
+Hash of the imported metric values per (campaign, date), so the sheet
+import writes only rows whose values changed.
+
+Revision ID: f29c0d3e4b5c
+Revises: e18bf7a2b1ab
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'f29c0d3e4b5c'
+down_revision: Union[str, None] = 'e18bf7a2b1ab'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column(table_name, column_name):
+    """Check if a column already exists in the table."""
+    bind = op.get_bind()
+    insp = inspect(bind)
+    columns = [c['name'] for c in insp.get_columns(table_name)]
+    return column_name in columns
+
+
+def upgrade() -> None:
+    if not _has_column('google_ads_campaigns', 'row_hash'):
+        op.add_column('google_ads_campaigns', sa.Column('row_hash', sa.String(16), nullable=True))
+
+
+def downgrade() -> None:
+    if _has_column('google_ads_campaigns', 'row_hash'):
+        op.drop_column('google_ads_campaigns', 'row_hash')
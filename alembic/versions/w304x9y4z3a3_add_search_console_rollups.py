@@ -0,0 +1,82 @@
+"""Add Search Console daily / weekly / monthly rollup tables
+
+Pre-aggregated query-level and page-level daily rollups plus query x page
+week/month rollups, with impression-weighted position stored as
+SUM(position * impressions). Populate with
+scripts/rebuild_search_console_rollups.py; the daily sync keeps them fresh.
+
+Revision ID: w304x9y4z3a3
+Revises: v293w8x3y1z2
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'w304x9y4z3a3'
+down_revision: Union[str, None] = 'v293w8x3y1z2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table_name):
+    bind = op.get_bind()
+    insp = inspect(bind)
+    return table_name in insp.get_table_names()
+
+
+def upgrade() -> None:
+    if not _has_table('search_console_query_daily'):
+        op.create_table(
+            'search_console_query_daily',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('date', sa.Date(), nullable=False, index=True),
+            sa.Column('query', sa.String(), nullable=False, index=True),
+            sa.Column('clicks', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('impressions', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('weighted_position_sum', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+            sa.UniqueConstraint('date', 'query', name='uq_sc_query_daily_date_query'),
+        )
+        op.create_index('ix_sc_query_daily_query_date', 'search_console_query_daily', ['query', 'date'])
+
+    if not _has_table('search_console_page_daily'):
+        op.create_table(
+            'search_console_page_daily',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('date', sa.Date(), nullable=False, index=True),
+            sa.Column('page', sa.String(), nullable=False, index=True),
+            sa.Column('clicks', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('impressions', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('weighted_position_sum', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+            sa.UniqueConstraint('date', 'page', name='uq_sc_page_daily_date_page'),
+        )
+        op.create_index('ix_sc_page_daily_page_date', 'search_console_page_daily', ['page', 'date'])
+
+    if not _has_table('search_console_query_page_rollups'):
+        op.create_table(
+            'search_console_query_page_rollups',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('grain', sa.String(), nullable=False),
+            sa.Column('period_start', sa.Date(), nullable=False, index=True),
+            sa.Column('query', sa.String(), nullable=False, index=True),
+            sa.Column('page', sa.String(), nullable=True, index=True),
+            sa.Column('clicks', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('impressions', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('weighted_position_sum', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+            sa.UniqueConstraint('grain', 'period_start', 'query', 'page',
+                                name='uq_sc_qp_rollup_grain_period_query_page'),
+        )
+        op.create_index('ix_sc_qp_rollup_grain_period', 'search_console_query_page_rollups',
+                        ['grain', 'period_start'])
+
+
+def downgrade() -> None:
+    for table in ('search_console_query_page_rollups', 'search_console_page_daily', 'search_console_query_daily'):
+        if _has_table(table):
+            op.drop_table(table)
@@ -0,0 +1,64 @@
+"""Add query_class (brand / spam / non_brand) to Search Console query tables
+
+Classification is written at ingestion by QueryClassifier so brand and
+non-brand filters are indexed equality predicates. Existing rows are
+classified by the next daily sync, or immediately with
+scripts/rebuild_search_console_rollups.py --reclassify.
+
+Revision ID: x415y0z5a4b4
+Revises: w304x9y4z3a3
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'x415y0z5a4b4'
+down_revision: Union[str, None] = 'w304x9y4z3a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_TABLES = (
+    'search_console_queries',
+    'search_console_query_daily',
+    'search_console_query_page_rollups',
+)
+
+
+def _has_column(table_name, column_name):
+    """Check if a column already exists in the table."""
+    bind = op.get_bind()
+    insp = inspect(bind)
+    columns = [c['name'] for c in insp.get_columns(table_name)]
+    return column_name in columns
+
+
+def _has_index(table_name, index_name):
+    bind = op.get_bind()
+    insp = inspect(bind)
+    return index_name in [ix['name'] for ix in insp.get_indexes(table_name)]
+
+
+def upgrade() -> None:
+    for table in _TABLES:
+        if not _has_column(table, 'query_class'):
+            op.add_column(table, sa.Column('query_class', sa.String(), nullable=True))
+        index_name = f'ix_{table}_query_class'
+        if not _has_index(table, index_name):
+            op.create_index(index_name, table, ['query_class'])
+
+    if not _has_index('search_console_query_daily', 'ix_sc_query_daily_class_date'):
+        op.create_index(
+            'ix_sc_query_daily_class_date', 'search_console_query_daily', ['query_class', 'date']
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sc_query_daily_class_date', table_name='search_console_query_daily')
+    for table in reversed(_TABLES):
+        op.drop_index(f'ix_{table}_query_class', table_name=table)
+        op.drop_column(table, 'query_class')
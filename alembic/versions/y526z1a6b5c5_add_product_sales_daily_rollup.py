@@ -0,0 +1,53 @@
+"""Add shopify_product_sales_daily rollup
+
+Per-day (date x product x financial_status) rollup of shopify_order_items
+used by monitoring product checks. Populated by the Shopify order sync;
+scripts/backfill_order_items.py rebuilds it from history.
+
+Revision ID: y526z1a6b5c5
+Revises: x415y0z5a4b4
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'y526z1a6b5c5'
+down_revision: Union[str, None] = 'x415y0z5a4b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table_name):
+    bind = op.get_bind()
+    insp = inspect(bind)
+    return table_name in insp.get_table_names()
+
+
+def upgrade() -> None:
+    if not _has_table('shopify_product_sales_daily'):
+        op.create_table(
+            'shopify_product_sales_daily',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('date', sa.Date(), nullable=False, index=True),
+            sa.Column('shopify_product_id', sa.BigInteger(), nullable=True, index=True),
+            sa.Column('financial_status', sa.String(), nullable=True),
+            sa.Column('title', sa.String(), nullable=True),
+            sa.Column('units', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('gross_revenue', sa.Numeric(12, 2), nullable=False, server_default='0'),
+            sa.Column('discounts', sa.Numeric(12, 2), nullable=False, server_default='0'),
+            sa.Column('order_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+            sa.UniqueConstraint('date', 'shopify_product_id', 'financial_status',
+                                name='uq_product_sales_daily_date_product_status'),
+        )
+        op.create_index('ix_product_sales_daily_product_date', 'shopify_product_sales_daily',
+                        ['shopify_product_id', 'date'])
+
+
+def downgrade() -> None:
+    if _has_table('shopify_product_sales_daily'):
+        op.drop_table('shopify_product_sales_daily')
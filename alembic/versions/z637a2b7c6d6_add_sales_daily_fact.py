@@ -0,0 +1,92 @@
+"""Add shopify_sales_daily_fact and shopify_vendor_orders_daily
+
+Daily sales fact table (date x vendor x product x SKU x financial_status)
+with revenue, discounts, refunds (by order date), units and COGS measures,
+plus distinct orders per vendor-day. Read by brand intelligence, finance
+COGS and the chat sales lookups; refreshed after Shopify order/refund syncs
+and rebuilt from history by scripts/backfill_order_items.py.
+
+Revision ID: z637a2b7c6d6
+Revises: y526z1a6b5c5
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'z637a2b7c6d6'
+down_revision: Union[str, None] = 'y526z1a6b5c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table_name):
+    bind = op.get_bind()
+    insp = inspect(bind)
+    return table_name in insp.get_table_names()
+
+
+def _money(name, precision=12):
+    return sa.Column(name, sa.Numeric(precision, 2), nullable=False, server_default='0')
+
+
+def _count(name):
+    return sa.Column(name, sa.Integer(), nullable=False, server_default='0')
+
+
+def upgrade() -> None:
+    if not _has_table('shopify_sales_daily_fact'):
+        op.create_table(
+            'shopify_sales_daily_fact',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('date', sa.Date(), nullable=False, index=True),
+            sa.Column('vendor', sa.String(), nullable=True),
+            sa.Column('shopify_product_id', sa.BigInteger(), nullable=True),
+            sa.Column('sku', sa.String(), nullable=True),
+            sa.Column('financial_status', sa.String(), nullable=True),
+            sa.Column('title', sa.String(), nullable=True),
+            _count('units'),
+            _count('refund_units'),
+            _money('gross_revenue'),
+            _money('discounts'),
+            _money('refunds'),
+            _money('net_revenue'),
+            _money('cogs'),
+            _money('refund_cogs'),
+            _count('units_with_cost'),
+            _money('costed_revenue'),
+            _money('costed_discounts'),
+            _money('costed_refunds'),
+            _count('line_count'),
+            _money('price_total', 14),
+            _count('order_count'),
+            sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+            sa.UniqueConstraint('date', 'vendor', 'shopify_product_id', 'sku', 'financial_status',
+                                name='uq_sales_daily_fact_grain'),
+        )
+        op.create_index('ix_sales_daily_fact_vendor_date', 'shopify_sales_daily_fact', ['vendor', 'date'])
+        op.create_index('ix_sales_daily_fact_product_date', 'shopify_sales_daily_fact',
+                        ['shopify_product_id', 'date'])
+        op.create_index('ix_sales_daily_fact_sku_date', 'shopify_sales_daily_fact', ['sku', 'date'])
+
+    if not _has_table('shopify_vendor_orders_daily'):
+        op.create_table(
+            'shopify_vendor_orders_daily',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('date', sa.Date(), nullable=False, index=True),
+            sa.Column('vendor', sa.String(), nullable=True),
+            sa.Column('financial_status', sa.String(), nullable=True),
+            _count('order_count'),
+            sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+            sa.UniqueConstraint('date', 'vendor', 'financial_status', name='uq_vendor_orders_daily_grain'),
+        )
+        op.create_index('ix_vendor_orders_daily_vendor_date', 'shopify_vendor_orders_daily', ['vendor', 'date'])
+
+
+def downgrade() -> None:
+    for table in ('shopify_vendor_orders_daily', 'shopify_sales_daily_fact'):
+        if _has_table(table):
+            op.drop_table(table)
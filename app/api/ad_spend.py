@@ -3,13 +3,18 @@ Ad Spend Optimization Intelligence API
 
 Endpoints for analyzing ad spend efficiency and waste.
 """
+import asyncio
+import time
+
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
 from typing import Optional
 
+from app.config import get_settings
 from app.models.base import get_db
 from app.models.google_ads_data import GoogleAdsCampaign
 from app.services.ad_spend_service import AdSpendService
+from app.services.ads_analysis_context import run_sections
 from app.services.ad_spend_processor import AdSpendProcessor
 from app.services.campaign_strategy import format_why_now, STRATEGY_THRESHOLDS
 from app.services.llm_service import LLMService
@@ -32,6 +37,7 @@ def _get_ads_period_end(db: Session) -> date:
 @router.post("/process")
 def process_ad_spend_data(
     days: int = Query(30, description="Number of trailing days to process"),
+    full: bool = Query(False, description="Recompute every campaign, not just those changed since the last run"),
     db: Session = Depends(get_db),
 ):
     """
@@ -39,12 +45,14 @@ def process_ad_spend_data(
 
     Aggregates google_ads_campaigns rows, computes ROAS / waste / optimizations,
     and populates campaign_performance, ad_waste, ad_spend_optimizations.
+    Only campaigns changed since the last run are recomputed unless full=true
+    (use it after product cost or overhead changes).
 
     Idempotent — safe to re-run.
     """
     try:
         processor = AdSpendProcessor(db)
-        result = processor.process(days=days)
+        result = processor.process(days=days, full=full)
 
         # Snapshot decisions for feedback loop
         try:
@@ -597,21 +605,52 @@ async def get_enhanced_dashboard(
     try:
         service = AdSpendService(db)
 
-        # Fetch all data sections in parallel-ish (they share db session so sequential)
-        campaigns = await service.get_campaign_performance(days)
-        health_scores = await service.calculate_health_scores(days)
-        deep_metrics = await service.get_campaign_deep_metrics(days)
-        concentration = await service.calculate_concentration_risk(days)
-        break_even = await service.calculate_break_even(days)
-        diminishing = await service.analyze_diminishing_returns(days * 3)
-        competitor = await service.calculate_competitor_pressure(days * 3)
-        type_comparison = await service.compare_campaign_types(days)
-        anomalies = await service.detect_anomalies(days)
-        forecast = await service.forecast_performance(days * 3)
-        google_vs_reality = await service.get_google_vs_reality(days)
-        waste = await service.detect_ad_waste(days)
-        reallocations = await service.calculate_budget_reallocations(days)
-        products = await service.get_product_ad_performance(days)
+        # Load campaign snapshots and daily rows once for every window the
+        # sections read; the in-memory sections then run on a thread pool
+        # while the table-specific ones use the request session.
+        ctx = service.load_analysis_context(days)
+        timings = {"load_context": round(ctx.load_seconds * 1000, 1)}
+        try:
+            sections, section_timings = await asyncio.to_thread(run_sections, {
+                "campaigns": lambda: service.get_campaign_performance(days),
+                "health_scores": lambda: service.calculate_health_scores(days),
+                "deep_metrics": lambda: service.get_campaign_deep_metrics(days),
+                "concentration": lambda: service.calculate_concentration_risk(days),
+                "break_even": lambda: service.calculate_break_even(days),
+                "diminishing_returns": lambda: service.analyze_diminishing_returns(days * 3),
+                "competitor_pressure": lambda: service.calculate_competitor_pressure(days * 3),
+                "type_comparison": lambda: service.compare_campaign_types(days),
+                "anomalies": lambda: service.detect_anomalies(days),
+                "forecast": lambda: service.forecast_performance(days * 3),
+                "google_vs_reality": lambda: service.get_google_vs_reality(days),
+            }, get_settings().ads_dashboard_workers)
+            timings.update(section_timings)
+
+            for name, method in (
+                ("waste", service.detect_ad_waste),
+                ("reallocations", service.calculate_budget_reallocations),
+                ("products", service.get_product_ad_performance),
+            ):
+                started = time.perf_counter()
+                sections[name] = await method(days)
+                timings[name] = round((time.perf_counter() - started) * 1000, 1)
+        finally:
+            service.detach_analysis_context()
+
+        campaigns = sections["campaigns"]
+        health_scores = sections["health_scores"]
+        deep_metrics = sections["deep_metrics"]
+        concentration = sections["concentration"]
+        break_even = sections["break_even"]
+        diminishing = sections["diminishing_returns"]
+        competitor = sections["competitor_pressure"]
+        type_comparison = sections["type_comparison"]
+        anomalies = sections["anomalies"]
+        forecast = sections["forecast"]
+        google_vs_reality = sections["google_vs_reality"]
+        waste = sections["waste"]
+        reallocations = sections["reallocations"]
+        products = sections["products"]
         quick_wins = service._identify_quick_wins({
             'waste_identified': waste,
             'scaling_opportunities': [],
@@ -664,7 +703,7 @@ async def get_enhanced_dashboard(
         # ── Campaign Diagnostics: per-campaign working/not-working/actions ──
         try:
             from app.services.campaign_diagnostics import CampaignDiagnosticsService
-            ads_end = service._get_ads_data_end_date()
+            ads_end = ctx.end_date
             period_start = ads_end - timedelta(days=days - 1)
             diag_service = CampaignDiagnosticsService(db)
             diagnostics = diag_service.diagnose_all(campaigns, period_start, ads_end)
@@ -702,7 +741,7 @@ async def get_enhanced_dashboard(
         total_waste = sum(w['waste_metrics']['monthly_waste'] for w in waste)
 
         # Data freshness
-        ads_end = service._get_ads_data_end_date()
+        ads_end = ctx.end_date
         data_as_of = str(ads_end) if ads_end else None
 
         result = {
@@ -733,6 +772,7 @@ async def get_enhanced_dashboard(
                 "products": products,
                 "quick_wins": quick_wins,
                 "period_days": days,
+                "timings": timings,
             }
         }
         response_cache.set(cache_key, result, ttl=300)
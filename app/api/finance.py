@@ -110,28 +110,25 @@ async def calculate_pl(
 @router.post("/pl/calculate-all")
 async def calculate_all_pl(
     months: int = Query(6, description="Number of months back to calculate"),
+    force: bool = Query(False, description="Recompute closed months even if no source changed"),
     db: Session = Depends(get_db)
 ):
-    """Calculate P&L for the last N months."""
+    """
+    Calculate P&L for the last N months.
+
+    The current month is always recomputed; closed months only when late
+    refunds, order edits, ad data or expense imports touched them since
+    their last calculation (or with force=true).
+    """
     service = FinanceService(db)
-    results = []
-
-    today = date.today()
-    for i in range(months):
-        m = today.month - i
-        y = today.year
-        while m <= 0:
-            m += 12
-            y -= 1
-        month_date = date(y, m, 1)
-        result = service.calculate_monthly_pl(month_date)
-        results.append(result)
+    result = service.refresh_pl(months, force=force)
 
     return {
         "success": True,
         "data": {
-            "months_calculated": len(results),
-            "months": list(reversed(results)),
+            "months_calculated": len(result["recomputed"]),
+            "recomputed": result["recomputed"],
+            "months": result["months"],
         }
     }
 
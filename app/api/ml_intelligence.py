@@ -4,6 +4,8 @@ ML Intelligence API
 Endpoints for forecasting, anomaly detection, revenue drivers,
 tracking health, inventory suggestions, and inventory intelligence.
 """
+import asyncio
+
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
 from typing import Optional
@@ -271,13 +273,11 @@ async def get_inventory_data_quality(
 
 
 @router.post("/run")
-async def run_ml_pipeline(
-    db: Session = Depends(get_db),
-):
-    """Manually trigger the full ML pipeline."""
+async def run_ml_pipeline():
+    """Manually trigger the full ML pipeline (stages run in worker processes)."""
+    from app.services.ml_pipeline_runner import run_ml_pipeline as run_pipeline
     try:
-        service = MLIntelligenceService(db)
-        results = service.run_daily_ml_pipeline()
+        results = await asyncio.to_thread(run_pipeline)
 
         return {"success": True, "data": results}
     except Exception as e:
@@ -7,6 +7,9 @@ Endpoints for pricing intelligence:
 - Unmatchable revenue risk report
 - LLM-powered pricing insights
 """
+import asyncio
+import io
+
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from datetime import datetime, date, timedelta
@@ -30,9 +33,9 @@ def _parse_date(value: str) -> date:
     return datetime.strptime(value, "%Y-%m-%d").date()
 
 
-def _latest_pricing_date(db: Session) -> date | None:
+def _latest_pricing_date(db: Session, use_cache: bool = True) -> date | None:
     """Cached latest pricing date — changes at most once per day."""
-    cached = get_cached("pricing_latest_date")
+    cached = get_cached("pricing_latest_date") if use_cache else _MISS
     if cached is not _MISS:
         return cached
     val = db.query(func.max(CompetitivePricing.pricing_date)).scalar()
@@ -305,225 +308,255 @@ async def get_brand_report(
     Per-brand pricing report: category breakdown, collection breakdown,
     competitor activity, monthly trends, heavily discounted SKUs.
     """
-    cached = get_cached(f"pricing_brand|{brand}")
-    if cached is not _MISS:
-        return cached
-
     try:
-        latest_date = _latest_pricing_date(db)
-        if not latest_date:
-            return {"success": True, "data": {"brand": brand, "error": "No pricing data"}}
+        return build_brand_report(db, brand)
+    except Exception as e:
+        log.error(f"Error in /pricing/brand-report: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Latest snapshot for this brand
-        brand_rows = (
-            db.query(CompetitivePricing)
-            .filter(
-                CompetitivePricing.pricing_date == latest_date,
-                CompetitivePricing.vendor == brand,
-            )
-            .all()
-        )
-        if not brand_rows:
-            return {"success": True, "data": {"brand": brand, "error": "Brand not found"}}
 
-        analyzed = _analyze_snapshot(brand_rows)
+def build_brand_report(db: Session, brand: str, use_cache: bool = True) -> dict:
+    """
+    Build the brand report payload (cached for 5 minutes).
 
-        # KPIs
-        with_discount = [a for a in analyzed if a["discount_pct"] is not None]
-        avg_discount = round(sum(a["discount_pct"] for a in with_discount) / len(with_discount), 1) if with_discount else 0
-        below_floor = [a for a in analyzed if a["below_floor"]]
-        total_gap = round(sum(a["gap_below"] for a in below_floor), 2)
+    Shared by the JSON endpoint, the PDF download and the scheduled PDF
+    pre-render. use_cache=False reads the current pricing rows (the result is
+    still cached for later reads).
+    """
+    cached = get_cached(f"pricing_brand|{brand}") if use_cache else _MISS
+    if cached is not _MISS:
+        return cached
 
-        # Category breakdown
-        cat_map = defaultdict(list)
-        for a in analyzed:
-            cat_map[a["category"]].append(a)
-        category_breakdown = []
-        for cat, items in cat_map.items():
-            wd = [i for i in items if i["discount_pct"] is not None]
-            bf = [i for i in items if i["below_floor"]]
-            comp_counter = Counter(i["cheapest_competitor"] for i in bf if i["cheapest_competitor"])
-            most_agg = comp_counter.most_common(1)[0][0] if comp_counter else None
-            category_breakdown.append({
-                "category": cat,
-                "sku_count": len(items),
-                "avg_discount_pct": round(sum(i["discount_pct"] for i in wd) / len(wd), 1) if wd else 0,
-                "max_discount_pct": round(max((i["discount_pct"] for i in wd), default=0), 1),
-                "skus_below_floor": len(bf),
-                "avg_gap_below": round(sum(i["gap_below"] for i in bf) / len(bf), 2) if bf else 0,
-                "most_aggressive": most_agg,
-            })
-        category_breakdown.sort(key=lambda x: x["avg_discount_pct"], reverse=True)
+    latest_date = _latest_pricing_date(db, use_cache=use_cache)
+    if not latest_date:
+        return {"success": True, "data": {"brand": brand, "error": "No pricing data"}}
 
-        # Collection breakdown
-        col_map = defaultdict(list)
-        for a in analyzed:
-            col_map[a["collection"]].append(a)
-        collection_breakdown = []
-        for col, items in col_map.items():
-            wd = [i for i in items if i["discount_pct"] is not None]
-            bf = [i for i in items if i["below_floor"]]
-            comp_counter = Counter(i["cheapest_competitor"] for i in bf if i["cheapest_competitor"])
-            most_agg = comp_counter.most_common(1)[0][0] if comp_counter else None
-            collection_breakdown.append({
-                "collection": col,
-                "sku_count": len(items),
-                "avg_discount_pct": round(sum(i["discount_pct"] for i in wd) / len(wd), 1) if wd else 0,
+    # Latest snapshot for this brand
+    brand_rows = (
+        db.query(CompetitivePricing)
+        .filter(
+            CompetitivePricing.pricing_date == latest_date,
+            CompetitivePricing.vendor == brand,
+        )
+        .all()
+    )
+    if not brand_rows:
+        return {"success": True, "data": {"brand": brand, "error": "Brand not found"}}
+
+    analyzed = _analyze_snapshot(brand_rows)
+
+    # KPIs
+    with_discount = [a for a in analyzed if a["discount_pct"] is not None]
+    avg_discount = round(sum(a["discount_pct"] for a in with_discount) / len(with_discount), 1) if with_discount else 0
+    below_floor = [a for a in analyzed if a["below_floor"]]
+    total_gap = round(sum(a["gap_below"] for a in below_floor), 2)
+
+    # Category breakdown
+    cat_map = defaultdict(list)
+    for a in analyzed:
+        cat_map[a["category"]].append(a)
+    category_breakdown = []
+    for cat, items in cat_map.items():
+        wd = [i for i in items if i["discount_pct"] is not None]
+        bf = [i for i in items if i["below_floor"]]
+        comp_counter = Counter(i["cheapest_competitor"] for i in bf if i["cheapest_competitor"])
+        most_agg = comp_counter.most_common(1)[0][0] if comp_counter else None
+        category_breakdown.append({
+            "category": cat,
+            "sku_count": len(items),
+            "avg_discount_pct": round(sum(i["discount_pct"] for i in wd) / len(wd), 1) if wd else 0,
+            "max_discount_pct": round(max((i["discount_pct"] for i in wd), default=0), 1),
+            "skus_below_floor": len(bf),
+            "avg_gap_below": round(sum(i["gap_below"] for i in bf) / len(bf), 2) if bf else 0,
+            "most_aggressive": most_agg,
+        })
+    category_breakdown.sort(key=lambda x: x["avg_discount_pct"], reverse=True)
+
+    # Collection breakdown
+    col_map = defaultdict(list)
+    for a in analyzed:
+        col_map[a["collection"]].append(a)
+    collection_breakdown = []
+    for col, items in col_map.items():
+        wd = [i for i in items if i["discount_pct"] is not None]
+        bf = [i for i in items if i["below_floor"]]
+        comp_counter = Counter(i["cheapest_competitor"] for i in bf if i["cheapest_competitor"])
+        most_agg = comp_counter.most_common(1)[0][0] if comp_counter else None
+        collection_breakdown.append({
+            "collection": col,
+            "sku_count": len(items),
+            "avg_discount_pct": round(sum(i["discount_pct"] for i in wd) / len(wd), 1) if wd else 0,
+            "skus_below_floor": len(bf),
+            "avg_gap_below": round(sum(i["gap_below"] for i in bf) / len(bf), 2) if bf else 0,
+            "most_aggressive": most_agg,
+        })
+    collection_breakdown.sort(key=lambda x: x["avg_discount_pct"], reverse=True)
+
+    # Competitor activity
+    comp_data = defaultdict(lambda: {"below": 0, "gaps": [], "cats": [], "cols": []})
+    for a in analyzed:
+        if not a["below_floor"]:
+            continue
+        for cp in a["competitor_prices"]:
+            if a["our_min"] and cp["price"] < a["our_min"]:
+                c = comp_data[cp["competitor"]]
+                c["below"] += 1
+                c["gaps"].append(a["our_min"] - cp["price"])
+                c["cats"].append(a["category"])
+                c["cols"].append(a["collection"])
+    competitor_activity = []
+    for comp, info in comp_data.items():
+        top_cat = Counter(info["cats"]).most_common(1)
+        top_col = Counter(info["cols"]).most_common(1)
+        competitor_activity.append({
+            "competitor": comp,
+            "times_below_floor": info["below"],
+            "avg_gap_when_below": round(sum(info["gaps"]) / len(info["gaps"]), 2) if info["gaps"] else 0,
+            "max_gap": round(max(info["gaps"], default=0), 2),
+            "top_category": top_cat[0][0] if top_cat else None,
+            "top_collection": top_col[0][0] if top_col else None,
+        })
+    competitor_activity.sort(key=lambda x: x["times_below_floor"], reverse=True)
+
+    # Monthly trends — use SQL aggregation instead of loading all rows
+    # This avoids OOM/timeout on large brands with 100k+ historical rows
+    from sqlalchemy import cast, String
+    monthly_agg = (
+        db.query(
+            func.max(CompetitivePricing.pricing_date).label("latest_date"),
+            func.count(CompetitivePricing.variant_sku).label("total_skus"),
+        )
+        .filter(CompetitivePricing.vendor == brand)
+        .group_by(CompetitivePricing.pricing_date)
+        .order_by(CompetitivePricing.pricing_date)
+        .all()
+    )
+
+    # Get latest snapshot per month
+    month_latest = {}  # "YYYY-MM" -> latest pricing_date in that month
+    for row in monthly_agg:
+        m = str(row.latest_date)[:7]
+        if m not in month_latest or str(row.latest_date) > str(month_latest[m]):
+            month_latest[m] = row.latest_date
+
+    MONTH_NAMES = {
+        "01": "Jan", "02": "Feb", "03": "Mar", "04": "Apr",
+        "05": "May", "06": "Jun", "07": "Jul", "08": "Aug",
+        "09": "Sep", "10": "Oct", "11": "Nov", "12": "Dec",
+    }
+
+    # Fill gaps between first and last month
+    sorted_months = sorted(month_latest.keys())
+    all_months = []
+    if sorted_months:
+        first = sorted_months[0].split("-")
+        last = sorted_months[-1].split("-")
+        y, m = int(first[0]), int(first[1])
+        end_y, end_m = int(last[0]), int(last[1])
+        while (y, m) <= (end_y, end_m):
+            all_months.append(f"{y:04d}-{m:02d}")
+            m += 1
+            if m > 12:
+                m = 1
+                y += 1
+
+    monthly_trends = []
+    for month in all_months:
+        mm = month.split("-")[1]
+        yyyy = month.split("-")[0]
+        if month in month_latest:
+            # Only load the latest snapshot for this month (one date)
+            snap_rows = (
+                db.query(CompetitivePricing)
+                .filter(
+                    CompetitivePricing.vendor == brand,
+                    CompetitivePricing.pricing_date == month_latest[month],
+                )
+                .all()
+            )
+            snap = _analyze_snapshot(snap_rows)
+            wd = [a for a in snap if a["discount_pct"] is not None]
+            bf = [a for a in snap if a["below_floor"]]
+            monthly_trends.append({
+                "month": month,
+                "month_name": f"{MONTH_NAMES.get(mm, mm)} {yyyy}",
+                "avg_discount_pct": round(sum(a["discount_pct"] for a in wd) / len(wd), 1) if wd else 0,
                 "skus_below_floor": len(bf),
-                "avg_gap_below": round(sum(i["gap_below"] for i in bf) / len(bf), 2) if bf else 0,
-                "most_aggressive": most_agg,
+                "avg_gap_below": round(sum(a["gap_below"] for a in bf) / len(bf), 2) if bf else 0,
+                "total_skus": len(snap),
+                "snapshot_count": 1,
             })
-        collection_breakdown.sort(key=lambda x: x["avg_discount_pct"], reverse=True)
-
-        # Competitor activity
-        comp_data = defaultdict(lambda: {"below": 0, "gaps": [], "cats": [], "cols": []})
-        for a in analyzed:
-            if not a["below_floor"]:
-                continue
-            for cp in a["competitor_prices"]:
-                if a["our_min"] and cp["price"] < a["our_min"]:
-                    c = comp_data[cp["competitor"]]
-                    c["below"] += 1
-                    c["gaps"].append(a["our_min"] - cp["price"])
-                    c["cats"].append(a["category"])
-                    c["cols"].append(a["collection"])
-        competitor_activity = []
-        for comp, info in comp_data.items():
-            top_cat = Counter(info["cats"]).most_common(1)
-            top_col = Counter(info["cols"]).most_common(1)
-            competitor_activity.append({
-                "competitor": comp,
-                "times_below_floor": info["below"],
-                "avg_gap_when_below": round(sum(info["gaps"]) / len(info["gaps"]), 2) if info["gaps"] else 0,
-                "max_gap": round(max(info["gaps"], default=0), 2),
-                "top_category": top_cat[0][0] if top_cat else None,
-                "top_collection": top_col[0][0] if top_col else None,
+            del snap_rows, snap  # free memory
+        else:
+            monthly_trends.append({
+                "month": month,
+                "month_name": f"{MONTH_NAMES.get(mm, mm)} {yyyy}",
+                "avg_discount_pct": 0,
+                "skus_below_floor": 0,
+                "avg_gap_below": 0,
+                "total_skus": 0,
+                "snapshot_count": 0,
             })
-        competitor_activity.sort(key=lambda x: x["times_below_floor"], reverse=True)
 
-        # Monthly trends — use SQL aggregation instead of loading all rows
-        # This avoids OOM/timeout on large brands with 100k+ historical rows
-        from sqlalchemy import cast, String
-        monthly_agg = (
-            db.query(
-                func.max(CompetitivePricing.pricing_date).label("latest_date"),
-                func.count(CompetitivePricing.variant_sku).label("total_skus"),
-            )
-            .filter(CompetitivePricing.vendor == brand)
-            .group_by(CompetitivePricing.pricing_date)
-            .order_by(CompetitivePricing.pricing_date)
-            .all()
-        )
+    # Heavily discounted SKUs (top 50)
+    heavily_discounted = sorted(
+        [a for a in analyzed if a["discount_pct"] is not None],
+        key=lambda x: x["discount_pct"],
+        reverse=True,
+    )[:50]
+
+    result = {
+        "success": True,
+        "data": {
+            "brand": brand,
+            "snapshot_date": str(latest_date),
+            "total_skus": len(analyzed),
+            "kpis": {
+                "avg_market_discount_pct": avg_discount,
+                "skus_below_floor": len(below_floor),
+                "skus_with_rrp": len(with_discount),
+                "total_gap_below_floor": total_gap,
+            },
+            "category_breakdown": category_breakdown,
+            "collection_breakdown": collection_breakdown,
+            "competitor_activity": competitor_activity,
+            "monthly_trends": monthly_trends,
+            "heavily_discounted_skus": [{
+                "sku": a["sku"],
+                "title": a["title"],
+                "collection": a["collection"],
+                "category": a["category"],
+                "rrp": a["rrp"],
+                "our_min": a["our_min"],
+                "market_lowest": a["market_lowest"],
+                "market_discount_pct": a["discount_pct"],
+                "below_floor": a["below_floor"],
+                "gap": a["gap_below"],
+                "cheapest_competitor": a["cheapest_competitor"],
+            } for a in heavily_discounted],
+        },
+    }
+    set_cached(f"pricing_brand|{brand}", result, 300)
+    return result
+
+
+def brand_report_data(db: Session, brand: str) -> dict:
+    """
+    Report payload for a PDF render, always built from the current pricing
+    rows: the PDF is cached under the data version, so it must never be
+    rendered from a payload cached before the latest import.
+    """
+    return build_brand_report(db, brand, use_cache=False).get("data", {})
 
-        # Get latest snapshot per month
-        month_latest = {}  # "YYYY-MM" -> latest pricing_date in that month
-        for row in monthly_agg:
-            m = str(row.latest_date)[:7]
-            if m not in month_latest or str(row.latest_date) > str(month_latest[m]):
-                month_latest[m] = row.latest_date
-
-        MONTH_NAMES = {
-            "01": "Jan", "02": "Feb", "03": "Mar", "04": "Apr",
-            "05": "May", "06": "Jun", "07": "Jul", "08": "Aug",
-            "09": "Sep", "10": "Oct", "11": "Nov", "12": "Dec",
-        }
 
-        # Fill gaps between first and last month
-        sorted_months = sorted(month_latest.keys())
-        all_months = []
-        if sorted_months:
-            first = sorted_months[0].split("-")
-            last = sorted_months[-1].split("-")
-            y, m = int(first[0]), int(first[1])
-            end_y, end_m = int(last[0]), int(last[1])
-            while (y, m) <= (end_y, end_m):
-                all_months.append(f"{y:04d}-{m:02d}")
-                m += 1
-                if m > 12:
-                    m = 1
-                    y += 1
-
-        monthly_trends = []
-        for month in all_months:
-            mm = month.split("-")[1]
-            yyyy = month.split("-")[0]
-            if month in month_latest:
-                # Only load the latest snapshot for this month (one date)
-                snap_rows = (
-                    db.query(CompetitivePricing)
-                    .filter(
-                        CompetitivePricing.vendor == brand,
-                        CompetitivePricing.pricing_date == month_latest[month],
-                    )
-                    .all()
-                )
-                snap = _analyze_snapshot(snap_rows)
-                wd = [a for a in snap if a["discount_pct"] is not None]
-                bf = [a for a in snap if a["below_floor"]]
-                monthly_trends.append({
-                    "month": month,
-                    "month_name": f"{MONTH_NAMES.get(mm, mm)} {yyyy}",
-                    "avg_discount_pct": round(sum(a["discount_pct"] for a in wd) / len(wd), 1) if wd else 0,
-                    "skus_below_floor": len(bf),
-                    "avg_gap_below": round(sum(a["gap_below"] for a in bf) / len(bf), 2) if bf else 0,
-                    "total_skus": len(snap),
-                    "snapshot_count": 1,
-                })
-                del snap_rows, snap  # free memory
-            else:
-                monthly_trends.append({
-                    "month": month,
-                    "month_name": f"{MONTH_NAMES.get(mm, mm)} {yyyy}",
-                    "avg_discount_pct": 0,
-                    "skus_below_floor": 0,
-                    "avg_gap_below": 0,
-                    "total_skus": 0,
-                    "snapshot_count": 0,
-                })
-
-        # Heavily discounted SKUs (top 50)
-        heavily_discounted = sorted(
-            [a for a in analyzed if a["discount_pct"] is not None],
-            key=lambda x: x["discount_pct"],
-            reverse=True,
-        )[:50]
-
-        result = {
-            "success": True,
-            "data": {
-                "brand": brand,
-                "snapshot_date": str(latest_date),
-                "total_skus": len(analyzed),
-                "kpis": {
-                    "avg_market_discount_pct": avg_discount,
-                    "skus_below_floor": len(below_floor),
-                    "skus_with_rrp": len(with_discount),
-                    "total_gap_below_floor": total_gap,
-                },
-                "category_breakdown": category_breakdown,
-                "collection_breakdown": collection_breakdown,
-                "competitor_activity": competitor_activity,
-                "monthly_trends": monthly_trends,
-                "heavily_discounted_skus": [{
-                    "sku": a["sku"],
-                    "title": a["title"],
-                    "collection": a["collection"],
-                    "category": a["category"],
-                    "rrp": a["rrp"],
-                    "our_min": a["our_min"],
-                    "market_lowest": a["market_lowest"],
-                    "market_discount_pct": a["discount_pct"],
-                    "below_floor": a["below_floor"],
-                    "gap": a["gap_below"],
-                    "cheapest_competitor": a["cheapest_competitor"],
-                } for a in heavily_discounted],
-            },
-        }
-        set_cached(f"pricing_brand|{brand}", result, 300)
-        return result
-    except Exception as e:
-        log.error(f"Error in /pricing/brand-report: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+def _build_report_data(brand: str) -> dict:
+    """brand_report_data on its own session (for asyncio.to_thread)."""
+    from app.models.base import SessionLocal
+    db = SessionLocal()
+    try:
+        return brand_report_data(db, brand)
+    finally:
+        db.close()
 
 
 @router.get("/brand-report/pdf")
@@ -531,22 +564,28 @@ async def brand_report_pdf(
     brand: str = Query(..., description="Brand/vendor name"),
     db: Session = Depends(get_db),
 ):
-    """Generate a downloadable PDF report for a brand."""
-    try:
-        # Re-use the brand-report logic
-        report_response = await get_brand_report(brand=brand, db=db)
-        data = report_response.get("data", {})
-        if data.get("error"):
-            raise HTTPException(status_code=404, detail=data["error"])
+    """
+    Download the brand report PDF.
 
-        from app.services.brand_report_pdf import generate_brand_report_pdf
-        pdf_buf = generate_brand_report_pdf(data)
+    Served from the pre-rendered artifact cache when the brand's pricing data
+    hasn't changed; otherwise rendered in the report worker pool.
+    """
+    try:
+        from app.services.brand_report_render_service import BrandReportRenderService
+        renderer = BrandReportRenderService(db)
+        pdf = renderer.get_cached_pdf(brand)
+        if pdf is None:
+            # Payload queries run off the event loop; the render runs in the pool
+            data = await asyncio.to_thread(_build_report_data, brand)
+            if data.get("error"):
+                raise HTTPException(status_code=404, detail=data["error"])
+            pdf = await renderer.render(brand, data)
 
         safe_brand = brand.replace(" ", "_").replace("/", "_")
         filename = f"Pricing_Report_{safe_brand}_{date.today().isoformat()}.pdf"
 
         return StreamingResponse(
-            pdf_buf,
+            io.BytesIO(pdf),
             media_type="application/pdf",
             headers={"Content-Disposition": f'attachment; filename="{filename}"'},
         )
@@ -0,0 +1,65 @@
+"""
+Shopify Webhooks API
+
+Receives Shopify webhook deliveries (orders/create, orders/updated,
+refunds/create, inventory_levels/update). Deliveries are authenticated by
+their HMAC signature rather than a session, queued in
+shopify_webhook_events and applied after the response is sent. While
+SHOPIFY_WEBHOOKS_ENABLED is off, deliveries are acknowledged but not queued.
+"""
+import json
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.base import get_db
+from app.services.shopify_webhook_service import (
+    SUPPORTED_TOPICS,
+    ShopifyWebhookService,
+    drain_shopify_webhooks,
+    verify_webhook_hmac,
+)
+from app.utils.logger import log
+
+router = APIRouter(prefix="/webhooks", tags=["webhooks"])
+
+
+@router.post("/shopify")
+async def receive_shopify_webhook(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    """Verify and enqueue one Shopify webhook delivery."""
+    settings = get_settings()
+    body = await request.body()
+    secret = settings.shopify_webhook_secret or settings.shopify_api_secret
+    if not verify_webhook_hmac(body, request.headers.get("X-Shopify-Hmac-Sha256"), secret):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    topic = request.headers.get("X-Shopify-Topic", "")
+    if not settings.shopify_webhooks_enabled:
+        # The polling sync owns Shopify data; nothing would drain or prune the queue
+        return {"accepted": False, "topic": topic, "reason": "webhooks disabled"}
+    if topic not in SUPPORTED_TOPICS:
+        # Acknowledge so Shopify doesn't keep retrying a topic we don't use
+        return {"accepted": False, "topic": topic}
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+
+    event = ShopifyWebhookService(db).enqueue(
+        topic,
+        payload,
+        webhook_id=request.headers.get("X-Shopify-Webhook-Id"),
+        shop_domain=request.headers.get("X-Shopify-Shop-Domain"),
+    )
+    if event is None:
+        log.info(f"Duplicate Shopify webhook ignored ({topic})")
+        return {"accepted": True, "duplicate": True}
+
+    background_tasks.add_task(drain_shopify_webhooks)
+    return {"accepted": True, "duplicate": False}
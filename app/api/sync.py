@@ -528,17 +528,22 @@ async def sync_search_console_quick():
 async def backfill_search_console(
     months: int = Query(16, description="Months to backfill (max 16)", ge=1, le=16),
     window_days: int = Query(14, description="Days per fetch window (7-30)", ge=7, le=30),
-    delay: float = Query(2.0, description="Seconds between windows (rate limit protection)", ge=0, le=10)
+    delay: float = Query(2.0, description="Seconds between windows (rate limit protection)", ge=0, le=10),
+    concurrency: Optional[int] = Query(None, description="Windows fetched in parallel (1-8)", ge=1, le=8),
+    resume: bool = Query(True, description="Resume the latest unfinished backfill from its checkpoint")
 ):
     """
     Backfill Search Console historical data.
 
-    Fetches data in chunks to avoid rate limits. Progress is logged per window.
-    Errors in individual windows don't stop the entire backfill.
+    Fetches data in windows, several at a time under a shared rate limiter.
+    Each completed window is checkpointed, so an interrupted backfill resumes
+    where it stopped. Errors in individual windows don't stop the entire backfill.
 
     - **months**: How far back to backfill (Search Console max is 16 months)
     - **window_days**: Size of each fetch window (smaller = more API calls, larger = risk of timeouts)
-    - **delay**: Pause between windows to respect rate limits
+    - **delay**: Pause between windows per worker
+    - **concurrency**: Parallel windows (default from GSC_BACKFILL_CONCURRENCY)
+    - **resume**: Skip windows already completed by an unfinished backfill
 
     Example: POST /sync/search-console/backfill?months=16&window_days=14
     """
@@ -546,7 +551,9 @@ async def backfill_search_console(
         result = await _get_data_sync().backfill_search_console(
             months=months,
             window_days=window_days,
-            delay_between_windows=delay
+            delay_between_windows=delay,
+            concurrency=concurrency,
+            resume=resume
         )
         return result
     except Exception as e:
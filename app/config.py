@@ -30,6 +30,9 @@ class Settings(BaseSettings):
     shopify_api_secret: str
     shopify_access_token: str
     shopify_api_version: str = "2024-01"
+    shopify_webhooks_enabled: bool = False  # Apply order/refund/inventory changes from webhooks
+    shopify_webhook_secret: str = ""  # Webhook signing key (defaults to shopify_api_secret)
+    shopify_reconcile_minutes: int = 60  # Full polling sweep interval when webhooks are enabled
 
     # Klaviyo
     klaviyo_api_key: str
@@ -54,6 +57,9 @@ class Settings(BaseSettings):
     gsc_backfill_window_days: int = 14  # Days per fetch window (7-30)
     gsc_backfill_delay_seconds: float = 2.0  # Delay between windows
     gsc_backfill_max_retries: int = 3  # Retries per window on failure
+    gsc_backfill_concurrency: int = 4  # Windows fetched in parallel
+    gsc_backfill_stale_minutes: int = 30  # A "running" backfill with no checkpoint for this long is resumable
+    gsc_api_queries_per_minute: int = 600  # Shared limiter budget (GSC quota is 1,200 QPM per site)
     # Daily sync settings
     gsc_daily_sync_days: int = 3  # Days to sync in daily job (1-7)
     # Brand terms to exclude from non-brand query analysis (comma-separated)
@@ -73,6 +79,11 @@ class Settings(BaseSettings):
     google_ads_sheet_id: Optional[str] = None  # Spreadsheet ID for ads data
     google_ads_sheet_tab: str = "Campaign Data"  # Tab name in the sheet
 
+    # Caprice pricing import (inbox files under imports/new-sheets)
+    caprice_import_workers: int = 2  # Files read in parallel worker processes
+    report_render_workers: int = 2  # Worker processes rendering brand report PDFs
+    ads_dashboard_workers: int = 4  # Threads computing Ads enhanced dashboard sections
+
     # Google Merchant Center
     merchant_center_id: str = ""
     merchant_center_credentials_path: str = "./credentials/google-sheets-sa.json"
@@ -99,6 +110,10 @@ class Settings(BaseSettings):
     ml_training_interval: int = 86400
     churn_prediction_threshold: float = 0.7
     anomaly_detection_sensitivity: float = 0.05
+    anomaly_detection_workers: int = 2  # Worker processes fitting per-family anomaly models
+    ml_pipeline_workers: int = 3  # Worker processes running nightly ML pipeline stages
+    seo_audit_concurrency: int = 50  # Page fetches in flight during an SEO audit
+    seo_audit_per_host: int = 8  # Concurrent fetches per host during an SEO audit
 
     # Alerts
     alert_email_from: Optional[str] = None
@@ -22,6 +22,7 @@ from app.models.google_ads_data import (
     GoogleAdsSearchTerm, GoogleAdsClick
 )
 from app.config import get_settings
+from app.services.ad_spend_changes import SOURCE_GOOGLE_ADS, SOURCE_GOOGLE_ADS_PRODUCTS, mark_dirty
 from app.utils.logger import log
 
 settings = get_settings()
@@ -235,6 +236,7 @@ class GoogleAdsConnector(BaseConnector):
             response = ga_service.search(customer_id=self.customer_id, query=query)
 
             records_synced = 0
+            touched = set()
 
             for row in response:
                 campaign = row.campaign
@@ -263,12 +265,14 @@ class GoogleAdsConnector(BaseConnector):
 
                 self.db.merge(record)
                 records_synced += 1
+                touched.add((record.campaign_id, record.date))
 
                 # Commit every 100 records
                 if records_synced % 100 == 0:
                     self.db.commit()
 
             # Final commit
+            mark_dirty(self.db, touched, SOURCE_GOOGLE_ADS)
             self.db.commit()
 
             log.info(f"Synced {records_synced} Google Ads campaigns")
@@ -365,6 +369,7 @@ class GoogleAdsConnector(BaseConnector):
             response = ga_service.search(customer_id=self.customer_id, query=query)
 
             records_synced = 0
+            touched = set()
 
             for row in response:
                 segments = row.segments
@@ -386,10 +391,12 @@ class GoogleAdsConnector(BaseConnector):
 
                 self.db.merge(record)
                 records_synced += 1
+                touched.add((None, record.date))
 
                 if records_synced % 100 == 0:
                     self.db.commit()
 
+            mark_dirty(self.db, touched, SOURCE_GOOGLE_ADS_PRODUCTS)
             self.db.commit()
 
             log.info(f"Synced {records_synced} Google Ads products")
@@ -24,6 +24,8 @@ class SearchConsoleConnector(BaseConnector):
         self.credentials_path = settings.gsc_credentials_path
         self.site_url = settings.gsc_site_url
         self.service = None
+        # Optional shared AsyncRateLimiter (set by concurrent backfills)
+        self.rate_limiter = None
 
     async def connect(self) -> bool:
         """Establish connection to Search Console"""
@@ -71,7 +73,18 @@ class SearchConsoleConnector(BaseConnector):
         }
         return data
 
-    async def _fetch_query_performance(self, start_date: datetime, end_date: datetime) -> Dict:
+    async def _execute(self, request):
+        """
+        Run a googleapiclient request off the event loop, under the shared
+        rate limiter when one is set.
+        """
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        return await asyncio.to_thread(request.execute)
+
+    async def _fetch_query_performance(
+        self, start_date: datetime, end_date: datetime, raise_errors: bool = False
+    ) -> Dict:
         """Fetch top queries with their performance"""
         try:
             all_queries = []
@@ -87,10 +100,10 @@ class SearchConsoleConnector(BaseConnector):
                     'startRow': start_row
                 }
 
-                response = self.service.searchanalytics().query(
+                response = await self._execute(self.service.searchanalytics().query(
                     siteUrl=self.site_url,
                     body=request
-                ).execute()
+                ))
 
                 rows = response.get('rows', [])
                 if not rows:
@@ -126,10 +139,14 @@ class SearchConsoleConnector(BaseConnector):
             }
 
         except Exception as e:
+            if raise_errors:
+                raise
             log.error(f"Error fetching Search Console queries: {str(e)}")
             return {"queries": [], "total_queries": 0}
 
-    async def _fetch_page_performance(self, start_date: datetime, end_date: datetime) -> Dict:
+    async def _fetch_page_performance(
+        self, start_date: datetime, end_date: datetime, raise_errors: bool = False
+    ) -> Dict:
         """Fetch page-level performance"""
         try:
             all_pages = []
@@ -145,10 +162,10 @@ class SearchConsoleConnector(BaseConnector):
                     'startRow': start_row
                 }
 
-                response = self.service.searchanalytics().query(
+                response = await self._execute(self.service.searchanalytics().query(
                     siteUrl=self.site_url,
                     body=request
-                ).execute()
+                ))
 
                 rows = response.get('rows', [])
                 if not rows:
@@ -177,6 +194,8 @@ class SearchConsoleConnector(BaseConnector):
             }
 
         except Exception as e:
+            if raise_errors:
+                raise
             log.error(f"Error fetching Search Console pages: {str(e)}")
             return {"pages": [], "total_pages": 0}
 
@@ -427,9 +446,10 @@ class SearchConsoleConnector(BaseConnector):
 
         for attempt in range(max_retries):
             try:
-                # Fetch query and page performance for this window
-                query_result = await self._fetch_query_performance(start_date, end_date)
-                page_result = await self._fetch_page_performance(start_date, end_date)
+                # Fetch query and page performance for this window. Errors
+                # propagate so a failed fetch is retried, not saved as empty.
+                query_result = await self._fetch_query_performance(start_date, end_date, raise_errors=True)
+                page_result = await self._fetch_page_performance(start_date, end_date, raise_errors=True)
 
                 return {
                     "success": True,
@@ -449,6 +469,8 @@ class SearchConsoleConnector(BaseConnector):
                 if e.resp.status == 429:  # Rate limited
                     delay = (2 ** attempt) * 5  # Exponential backoff: 5, 10, 20 seconds
                     log.warning(f"Rate limited on window sync, waiting {delay}s (attempt {attempt + 1}/{max_retries})")
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.penalize(delay)
                     await asyncio.sleep(delay)
                 elif e.resp.status >= 500:  # Server error
                     delay = (2 ** attempt) * 2
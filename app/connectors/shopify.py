@@ -546,6 +546,11 @@ class ShopifyConnector(BaseConnector):
             )
             self.db.add(order_item)
 
+        # Re-created line items start at zero refunds; restore their totals
+        from app.services.refund_rollup_service import RefundRollupService
+        RefundRollupService(self.db).refresh_line_items(
+            (item.get("id") for item in line_items), commit=False
+        )
         self.db.commit()
 
     async def _save_product(self, product_data: Dict) -> ShopifyProduct:
@@ -14,7 +14,7 @@ from app.utils.logger import log
 from app import __version__
 
 # Import routers
-from app.api import health, insights, sync, llm, monitoring, profitability, attribution, data_quality, seo, email, journey, user_behavior, ad_spend, weekly_brief, content_gap, code_health, redirect_health, ml_intelligence, pricing_impact, performance, customer_intelligence, merchant_center_intelligence, strategic_intelligence, finance, site_health, auth, brand_intelligence, competitor_blog, stock_worthiness, brand_portal
+from app.api import health, insights, sync, llm, monitoring, profitability, attribution, data_quality, seo, email, journey, user_behavior, ad_spend, weekly_brief, content_gap, code_health, redirect_health, ml_intelligence, pricing_impact, performance, customer_intelligence, merchant_center_intelligence, strategic_intelligence, finance, site_health, auth, brand_intelligence, competitor_blog, stock_worthiness, brand_portal, shopify_webhooks
 from app.middleware.auth_middleware import AuthMiddleware
 from app.middleware.security_middleware import SecurityMiddleware
 
@@ -51,6 +51,8 @@ async def lifespan(app: FastAPI):
     yield
 
     log.info("Shutting down application")
+    from app.services.brand_report_render_service import shutdown_render_pool
+    shutdown_render_pool()
 
 
 # Create FastAPI app
@@ -134,6 +136,7 @@ app.include_router(brand_intelligence.router)
 app.include_router(competitor_blog.router)
 app.include_router(stock_worthiness.router)
 app.include_router(brand_portal.router)
+app.include_router(shopify_webhooks.router)
 
 
 @app.get("/robots.txt", response_class=PlainTextResponse)
@@ -23,6 +23,7 @@ PUBLIC_PREFIXES = (
     "/redoc",
     "/site-health/track",   # RUM telemetry from Shopify storefront (no cookie)
     "/sync",                # Sync endpoints — protected by Basic Auth only
+    "/webhooks/shopify",    # Shopify webhooks — authenticated by HMAC signature
 )
 
 # Dashboard (HTML) paths - unauthenticated users get redirected to login
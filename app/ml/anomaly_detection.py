@@ -2,19 +2,114 @@
 Anomaly Detection Module
 Detects unusual patterns in campaigns, traffic, revenue, and other metrics
 """
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
 from scipy import stats
 from pyod.models.iforest import IForest
 from pyod.models.knn import KNN
 
+from app.ml.model_registry import fingerprint_frame
 from app.utils.logger import log
 from app.config import get_settings
 
 settings = get_settings()
 
+# MAD * 1.4826 estimates the standard deviation of normally distributed data
+MAD_SCALE = 1.4826
+# Series are windowed in column blocks so the windowed copies stay bounded
+SERIES_BLOCK = 2048
+# Isolation Forest needs a minimum number of points per family
+MIN_FAMILY_POINTS = 10
+# Single-series forests are fit and scored on the same series, so they are
+# only worth reusing for a repeat of that series: kept in memory, not versioned
+FOREST_CACHE_SIZE = 64
+_forest_cache: "OrderedDict[str, IForest]" = OrderedDict()
+_forest_lock = threading.Lock()
+
+
+def stack_series(
+    frame: pd.DataFrame,
+    value_column: str,
+    series_columns: List[str],
+    date_column: str = 'date'
+) -> Tuple[np.ndarray, np.ndarray, pd.DataFrame]:
+    """
+    Arrange many series into one (observation x series) matrix
+
+    Each series keeps its non-null points in date order and is right-aligned,
+    so the last row holds every series' latest point and a window over rows
+    is the preceding N observations of that same series.
+
+    Returns (values, rows, sorted_frame): `rows` maps each matrix cell to its
+    row in sorted_frame (-1 for padding).
+    """
+    df = (
+        frame.dropna(subset=[value_column])
+        .sort_values(series_columns + [date_column])
+        .reset_index(drop=True)
+    )
+    if df.empty:
+        return np.empty((0, 0)), np.empty((0, 0), dtype=np.int64), df
+
+    codes = df.groupby(series_columns, sort=True).ngroup().to_numpy()
+    lengths = np.bincount(codes)
+    depth = int(lengths.max())
+    positions = df.groupby(codes).cumcount().to_numpy() + (depth - lengths[codes])
+
+    values = np.full((depth, len(lengths)), np.nan)
+    values[positions, codes] = df[value_column].to_numpy(dtype=float)
+    rows = np.full(values.shape, -1, dtype=np.int64)
+    rows[positions, codes] = np.arange(len(df))
+    return values, rows, df
+
+
+def rolling_baselines(
+    values: np.ndarray,
+    window: int,
+    robust: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Baseline center and scale of every point from its preceding window
+
+    Computed for all series (columns) at once. Mean and sample std by
+    default; median and scaled MAD when robust=True. Points without a full
+    window of preceding observations get NaN.
+    """
+    center = np.full(values.shape, np.nan)
+    scale = np.full(values.shape, np.nan)
+    depth, n_series = values.shape
+    if window < 1 or depth <= window:
+        return center, scale
+
+    with np.errstate(invalid='ignore'):
+        for lo in range(0, n_series, SERIES_BLOCK):
+            hi = lo + SERIES_BLOCK
+            # windows[k] holds rows k .. k+window-1, the baseline of row k+window
+            windows = sliding_window_view(values[:-1, lo:hi], window, axis=0)
+            if robust:
+                mid = np.median(windows, axis=-1)
+                spread = np.median(np.abs(windows - mid[..., None]), axis=-1) * MAD_SCALE
+            else:
+                mid = windows.mean(axis=-1)
+                spread = windows.std(axis=-1, ddof=1) if window > 1 else np.zeros_like(mid)
+            center[window:, lo:hi] = mid
+            scale[window:, lo:hi] = spread
+    return center, scale
+
+
+def _fit_family(features: np.ndarray, contamination: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Worker entry point: fit one Isolation Forest and score its points."""
+    clf = IForest(contamination=contamination, random_state=42)
+    clf.fit(features)
+    return clf.decision_scores_, clf.labels_
+
 
 class AnomalyDetector:
     """
@@ -76,6 +171,171 @@ class AnomalyDetector:
 
         return anomalies
 
+    def _as_long(
+        self,
+        frame: pd.DataFrame,
+        value_column: Optional[str],
+        series_columns: Optional[List[str]],
+        date_column: str
+    ) -> Tuple[pd.DataFrame, str, List[str]]:
+        """Read a wide date x metric frame as long (metric, date, value) rows"""
+        if series_columns:
+            return frame, value_column, list(series_columns)
+
+        if date_column not in frame.columns:
+            frame = frame.rename_axis(date_column).reset_index()
+        metric_columns = [c for c in frame.columns if c != date_column]
+        long = frame.melt(
+            id_vars=[date_column], value_vars=metric_columns,
+            var_name='metric', value_name='value'
+        )
+        return long, 'value', ['metric']
+
+    def score_series(
+        self,
+        frame: pd.DataFrame,
+        value_column: Optional[str] = None,
+        series_columns: Optional[List[str]] = None,
+        date_column: str = 'date',
+        baseline_window: int = 7,
+        robust: bool = False
+    ) -> pd.DataFrame:
+        """
+        Rolling z-scores for every point of many series at once
+
+        Args:
+            frame: Long frame (one row per series and date, series identified
+                by series_columns, e.g. ['campaign_id'] or ['brand']) or wide
+                frame (date column/index plus one column per metric)
+            value_column: Value column of a long frame
+            series_columns: Key columns of a long frame; None reads it as wide
+            date_column: Name of the date column
+            baseline_window: Preceding observations compared against
+            robust: Median/MAD baselines instead of mean/std
+
+        Returns:
+            One row per point: series keys, date, value, expected_value, scale,
+            z_score (NaN without a full baseline or with a flat one),
+            points_from_end (0 = latest point) and history (series length)
+        """
+        long, value_column, series_columns = self._as_long(frame, value_column, series_columns, date_column)
+        values, rows, df = stack_series(long, value_column, series_columns, date_column)
+        columns = series_columns + [date_column, 'value', 'expected_value', 'scale',
+                                    'z_score', 'points_from_end', 'history']
+        if df.empty:
+            return pd.DataFrame(columns=columns)
+
+        center, scale = rolling_baselines(values, baseline_window, robust)
+        # Flat baselines (float noise around a constant) carry no signal
+        flat = ~(scale > 1e-9 * np.maximum(np.abs(center), 1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_scores = np.where(flat, np.nan, (values - center) / scale)
+
+        valid = rows >= 0
+        depth = values.shape[0]
+        from_end = np.broadcast_to((depth - 1 - np.arange(depth))[:, None], values.shape)
+        history = np.broadcast_to(valid.sum(axis=0), values.shape)
+
+        out = df.iloc[rows[valid]][series_columns + [date_column]].reset_index(drop=True)
+        out['value'] = values[valid]
+        out['expected_value'] = center[valid]
+        out['scale'] = scale[valid]
+        out['z_score'] = z_scores[valid]
+        out['points_from_end'] = from_end[valid]
+        out['history'] = history[valid]
+        return out
+
+    def detect_series_anomalies(
+        self,
+        frame: pd.DataFrame,
+        value_column: Optional[str] = None,
+        series_columns: Optional[List[str]] = None,
+        date_column: str = 'date',
+        baseline_window: int = 7,
+        lookback_days: int = 14,
+        threshold: float = 2.5,
+        robust: bool = False
+    ) -> pd.DataFrame:
+        """
+        Rolling z-score anomalies in the recent points of many series
+
+        Same input as score_series(). Checks the last lookback_days points of
+        every series with at least baseline_window + lookback_days points and
+        keeps those with |z| >= threshold.
+
+        Returns:
+            One row per anomaly: series keys, date, value, expected_value,
+            z_score, deviation_pct, direction, severity and baseline_window
+        """
+        points = self.score_series(frame, value_column, series_columns, date_column, baseline_window, robust)
+        abs_z = points['z_score'].abs()
+        recent = points[
+            (points['points_from_end'] < lookback_days)
+            & (points['history'] >= baseline_window + lookback_days)
+            & (abs_z >= threshold)
+        ].copy()
+
+        expected = recent['expected_value'].to_numpy(dtype=float)
+        actual = recent['value'].to_numpy(dtype=float)
+        abs_z = abs_z[recent.index].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            recent['deviation_pct'] = np.where(expected != 0, (actual - expected) / expected * 100, 0.0)
+        recent['direction'] = np.where(recent['z_score'] > 0, 'spike', 'drop')
+        recent['severity'] = np.select([abs_z >= 4, abs_z >= 3], ['critical', 'high'], 'medium')
+        recent['baseline_window'] = baseline_window
+
+        log.info(f"Found {len(recent)} rolling z-score anomalies ({baseline_window}-point baseline)")
+        return recent.drop(columns=['scale', 'points_from_end', 'history']).reset_index(drop=True)
+
+    def score_series_families(
+        self,
+        points: pd.DataFrame,
+        family_column: str,
+        workers: int = None
+    ) -> pd.DataFrame:
+        """
+        Fit one Isolation Forest per series family and score its points
+
+        points is score_series() output where family_column is one of the
+        series keys (e.g. series_columns=['campaign_type', 'campaign_id']).
+        Features are scale-free (z-score and relative deviation from each
+        series' own baseline), so one model covers every series in a family.
+        Families are fit in parallel worker processes.
+
+        Adds anomaly_score and is_outlier columns; points without a baseline
+        or in families under MIN_FAMILY_POINTS scored points get NaN / False.
+        """
+        points = points.reset_index(drop=True)
+        points['anomaly_score'] = np.nan
+        points['is_outlier'] = False
+
+        expected = points['expected_value'].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative = np.where(expected != 0, (points['value'].to_numpy(dtype=float) - expected) / np.abs(expected), 0.0)
+        features = np.column_stack([points['z_score'].to_numpy(dtype=float), relative])
+        scored = np.isfinite(features).all(axis=1)
+
+        families = {}
+        for family, index in points[scored].groupby(family_column).groups.items():
+            if len(index) >= MIN_FAMILY_POINTS:
+                families[family] = index
+
+        workers = min(len(families), max(1, workers or settings.anomaly_detection_workers))
+        if workers < 2:
+            results = {f: _fit_family(features[idx], self.sensitivity) for f, idx in families.items()}
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {f: pool.submit(_fit_family, features[idx], self.sensitivity) for f, idx in families.items()}
+                results = {f: future.result() for f, future in futures.items()}
+
+        for family, (scores, labels) in results.items():
+            index = families[family]
+            points.loc[index, 'anomaly_score'] = scores
+            points.loc[index, 'is_outlier'] = labels == 1
+
+        log.info(f"Scored {len(results)} series families with Isolation Forest ({workers} workers)")
+        return points
+
     def _detect_zscore_anomalies(
         self,
         df: pd.DataFrame,
@@ -172,6 +432,9 @@ class AnomalyDetector:
     ) -> List[Dict]:
         """
         Detect anomalies using Isolation Forest (ML-based)
+
+        Fitted forests are kept in a process-wide LRU keyed on the series
+        fingerprint, so the same series (and sensitivity) is fit once.
         """
         values = df[metric_name].values.reshape(-1, 1)
 
@@ -179,9 +442,18 @@ class AnomalyDetector:
             log.warning("Insufficient data for Isolation Forest (need at least 10 points)")
             return []
 
-        # Train Isolation Forest
-        clf = IForest(contamination=self.sensitivity)
-        clf.fit(values)
+        key = fingerprint_frame(df[[metric_name]], extra={'contamination': self.sensitivity})
+        with _forest_lock:
+            clf = _forest_cache.get(key)
+            if clf is not None:
+                _forest_cache.move_to_end(key)
+        if clf is None:
+            clf = IForest(contamination=self.sensitivity, random_state=42)
+            clf.fit(values)
+            with _forest_lock:
+                _forest_cache[key] = clf
+                while len(_forest_cache) > FOREST_CACHE_SIZE:
+                    _forest_cache.popitem(last=False)
 
         # Predict anomalies (-1 = anomaly, 1 = normal)
         predictions = clf.predict(values)
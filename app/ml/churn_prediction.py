@@ -1,32 +1,64 @@
 """
 Customer Churn Prediction Module
 Predicts which customers are likely to churn using ML
+
+Fitted models are versioned in the ModelRegistry under CHURN_MODEL_NAME,
+fingerprinted on the raw customer records they were trained on, so train()
+only refits when that data changes and predict() loads the model once per
+process.
 """
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 import joblib
 from pathlib import Path
 
+from app.ml.model_registry import ModelRegistry, fingerprint_frame
 from app.utils.logger import log
 from app.config import get_settings
 
 settings = get_settings()
 
+CHURN_MODEL_NAME = "churn"
+
+FEATURE_COLUMNS = [
+    'days_since_last_order',
+    'orders_count',
+    'total_spent',
+    'average_order_value',
+    'customer_lifetime_days',
+    'accepts_marketing',
+    'klaviyo_engaged',
+    'days_since_email_open',
+    'purchase_frequency',
+    'engagement_score'
+]
+
+# Customer record fields the features and labels are derived from
+RAW_COLUMNS = [
+    'last_order_date', 'created_at', 'orders_count', 'total_spent', 'average_order_value',
+    'accepts_marketing', 'klaviyo_engaged', 'last_email_open_date'
+]
+
+MODEL_PARAMS = {'n_estimators': 100, 'learning_rate': 0.1, 'max_depth': 5, 'random_state': 42}
+
 
 class ChurnPredictor:
     """
     Predicts customer churn probability using behavioral features
     """
 
-    def __init__(self):
+    def __init__(self, registry: Optional[ModelRegistry] = None):
         self.model = None
         self.scaler = StandardScaler()
         self.feature_names = []
+        self.model_version = None
+        self.registry = registry or ModelRegistry()
+        # Unversioned pickles written before the registry; read if nothing is registered
         self.model_path = Path(settings.ml_model_path) / "churn_model.pkl"
         self.scaler_path = Path(settings.ml_model_path) / "churn_scaler.pkl"
 
@@ -34,7 +66,14 @@ class ChurnPredictor:
         """
         Engineer features from customer data for churn prediction
         """
-        df = pd.DataFrame(customer_data)
+        return self.features_from_frame(pd.DataFrame(customer_data))
+
+    def features_from_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Engineer features from a frame of customer records (RAW_COLUMNS),
+        e.g. one built column-wise from SQL instead of per-customer dicts
+        """
+        df = df.copy()
 
         # Convert dates
         df['last_order_date'] = pd.to_datetime(df.get('last_order_date'))
@@ -75,21 +114,8 @@ class ChurnPredictor:
         )
 
         # Select features for model
-        feature_cols = [
-            'days_since_last_order',
-            'orders_count',
-            'total_spent',
-            'average_order_value',
-            'customer_lifetime_days',
-            'accepts_marketing',
-            'klaviyo_engaged',
-            'days_since_email_open',
-            'purchase_frequency',
-            'engagement_score'
-        ]
-
-        self.feature_names = feature_cols
-        return df[feature_cols].fillna(0)
+        self.feature_names = list(FEATURE_COLUMNS)
+        return df[FEATURE_COLUMNS].fillna(0)
 
     def create_training_labels(self, customer_data: List[Dict]) -> np.ndarray:
         """
@@ -113,10 +139,43 @@ class ChurnPredictor:
 
         return churned.values
 
-    def train(self, customer_data: List[Dict]) -> Dict:
+    def training_fingerprint(self, customer_data: List[Dict]) -> str:
+        """Fingerprint of the raw fields training uses, independent of record order."""
+        df = pd.DataFrame(customer_data).reindex(columns=['id'] + RAW_COLUMNS)
+        df = df.astype(str).sort_values(['id'] + RAW_COLUMNS, kind='mergesort')
+        return fingerprint_frame(df, extra=MODEL_PARAMS)
+
+    def train(self, customer_data: List[Dict], force: bool = False) -> Dict:
         """
         Train churn prediction model
+
+        Reuses the registered model when it was trained on the same customer
+        data (same fingerprint) unless force=True.
         """
+        outcome = {}
+
+        def fit():
+            result = self._fit(customer_data)
+            outcome.update(result)
+            if not result["success"]:
+                return None
+            metrics = {k: v for k, v in result.items() if k != "success"}
+            return {"model": self.model, "scaler": self.scaler}, metrics
+
+        stored = self.registry.get_or_train(
+            CHURN_MODEL_NAME, self.training_fingerprint(customer_data), FEATURE_COLUMNS, fit, force=force
+        )
+        if stored is None:
+            return outcome
+
+        artifact, entry, retrained = stored
+        self._use(artifact, entry)
+        if not retrained:
+            log.info(f"Churn model v{entry['version']} is current for this data, skipping training")
+        return {"success": True, **entry["metrics"], "model_version": entry["version"], "retrained": retrained}
+
+    def _fit(self, customer_data: List[Dict]) -> Dict:
+        """Fit a new model and scaler on customer_data."""
         log.info("Training churn prediction model...")
 
         # Prepare features and labels
@@ -141,17 +200,13 @@ class ChurnPredictor:
             X, y, test_size=0.2, random_state=42, stratify=y
         )
 
-        # Scale features
+        # Scale features (a fresh scaler: the current one may be a registered version's)
+        self.scaler = StandardScaler()
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
 
         # Train model (using Gradient Boosting for better performance)
-        self.model = GradientBoostingClassifier(
-            n_estimators=100,
-            learning_rate=0.1,
-            max_depth=5,
-            random_state=42
-        )
+        self.model = GradientBoostingClassifier(**MODEL_PARAMS)
         self.model.fit(X_train_scaled, y_train)
 
         # Evaluate
@@ -159,21 +214,18 @@ class ChurnPredictor:
         test_score = self.model.score(X_test_scaled, y_test)
 
         # Feature importance
-        feature_importance = dict(zip(
-            self.feature_names,
-            self.model.feature_importances_
-        ))
+        feature_importance = {
+            name: float(importance)
+            for name, importance in zip(self.feature_names, self.model.feature_importances_)
+        }
 
         log.info(f"Model trained - Train accuracy: {train_score:.3f}, Test accuracy: {test_score:.3f}")
 
-        # Save model
-        self.save_model()
-
         return {
             "success": True,
-            "train_accuracy": train_score,
-            "test_accuracy": test_score,
-            "churn_rate": churn_rate,
+            "train_accuracy": float(train_score),
+            "test_accuracy": float(test_score),
+            "churn_rate": float(churn_rate),
             "feature_importance": feature_importance,
             "samples_trained": len(X_train)
         }
@@ -182,8 +234,8 @@ class ChurnPredictor:
         """
         Predict churn probability for customers
         """
-        if self.model is None:
-            self.load_model()
+        # Cheap when current: the registry reads each version once per process
+        self.load_model()
 
         if self.model is None:
             log.error("No trained model available")
@@ -220,6 +272,17 @@ class ChurnPredictor:
         log.info(f"Predicted churn for {len(results)} customers")
         return results
 
+    def score_frame(self, df: pd.DataFrame) -> Optional[np.ndarray]:
+        """
+        Churn probability for each row of a customer frame (RAW_COLUMNS),
+        or None when no trained model is available
+        """
+        self.load_model()
+        if self.model is None:
+            return None
+        X = self.features_from_frame(df)
+        return self.model.predict_proba(self.scaler.transform(X))[:, 1]
+
     def get_high_risk_customers(self, customer_data: List[Dict], threshold: float = 0.7) -> List[Dict]:
         """
         Get customers at high risk of churning
@@ -254,15 +317,32 @@ class ChurnPredictor:
 
         return predicted_ltv
 
-    def save_model(self):
-        """Save trained model to disk"""
-        Path(settings.ml_model_path).mkdir(parents=True, exist_ok=True)
-        joblib.dump(self.model, self.model_path)
-        joblib.dump(self.scaler, self.scaler_path)
-        log.info(f"Model saved to {self.model_path}")
+    def _use(self, artifact: Dict, entry: Dict):
+        self.model = artifact["model"]
+        self.scaler = artifact["scaler"]
+        self.feature_names = list(entry["feature_schema"])
+        self.model_version = entry["version"]
+
+    def save_model(self, customer_data: List[Dict], metrics: Optional[Dict] = None) -> Dict:
+        """Register the current model as a new version trained on customer_data"""
+        entry = self.registry.register(
+            CHURN_MODEL_NAME,
+            {"model": self.model, "scaler": self.scaler},
+            FEATURE_COLUMNS,
+            self.training_fingerprint(customer_data),
+            metrics,
+        )
+        self.model_version = entry["version"]
+        return entry
 
     def load_model(self):
-        """Load trained model from disk"""
+        """Load the latest registered model (or a legacy pickle when none is registered)"""
+        loaded = self.registry.load(CHURN_MODEL_NAME, FEATURE_COLUMNS)
+        if loaded is not None:
+            self._use(*loaded)
+            return
+        if self.model is not None:
+            return
         try:
             if self.model_path.exists():
                 self.model = joblib.load(self.model_path)
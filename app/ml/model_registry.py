@@ -0,0 +1,244 @@
+"""
+Model Registry
+
+Versioned store for fitted models under settings.ml_model_path/registry:
+
+    <name>/manifest.json   one entry per version (newest last): version,
+                           feature schema, training-data fingerprint,
+                           training metrics, trained_at
+    <name>/v<N>.joblib     the fitted artifact of version N
+
+get_or_train() refits only when the training-data fingerprint or the
+feature schema differs from the latest version. load() reads the latest
+artifact once per process; it is read again only when the manifest changes
+on disk (another process registered a newer version).
+
+register() holds an exclusive flock on <name>/.lock while it reads the
+manifest, writes the next version and rewrites the manifest, so workers in
+different processes (nightly pipeline pool, API) never claim the same
+version number.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import joblib
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+from app.utils.logger import log
+from app.config import get_settings
+
+settings = get_settings()
+
+# Versions kept on disk per model name (older artifacts are deleted)
+KEEP_VERSIONS = 3
+
+# Per-process caches keyed by file path: (mtime_ns, manifest) and
+# (manifest mtime_ns, version, artifact)
+_manifests: Dict[str, Tuple[int, List[Dict]]] = {}
+_artifacts: Dict[str, Tuple[int, int, Any]] = {}
+_lock = threading.RLock()
+
+
+def fingerprint_frame(frame: pd.DataFrame, extra: Optional[Dict] = None) -> str:
+    """
+    Stable hash of a training frame's columns, dtypes and values (plus any
+    `extra` parameters that change the fitted model, e.g. contamination).
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(
+        [list(map(str, frame.columns)), [str(t) for t in frame.dtypes], extra or {}],
+        sort_keys=True, default=str,
+    ).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:32]
+
+
+def model_slug(name: str) -> str:
+    """File-system safe model name."""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or 'model'
+
+
+class ModelRegistry:
+    """
+    Versioned fitted models with feature schema and training-data fingerprint
+    """
+
+    def __init__(self, root: Optional[str] = None, keep_versions: int = KEEP_VERSIONS):
+        self.root = Path(root or settings.ml_model_path) / "registry"
+        self.keep_versions = max(1, keep_versions)
+
+    def _dir(self, name: str) -> Path:
+        return self.root / model_slug(name)
+
+    def _manifest_path(self, name: str) -> Path:
+        return self._dir(name) / "manifest.json"
+
+    def versions(self, name: str) -> List[Dict]:
+        """Manifest entries of `name`, oldest first ([] when never registered)."""
+        path = self._manifest_path(name)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+        key = str(path)
+        with _lock:
+            cached = _manifests.get(key)
+            if cached and cached[0] == mtime:
+                return cached[1]
+            try:
+                entries = json.loads(path.read_text())
+            except (OSError, ValueError) as e:
+                log.error(f"Unreadable model manifest {path}: {e}")
+                return []
+            _manifests[key] = (mtime, entries)
+            return entries
+
+    def _read_manifest(self, name: str) -> List[Dict]:
+        """Manifest entries straight from disk (no mtime cache), for register()."""
+        path = self._manifest_path(name)
+        try:
+            return json.loads(path.read_text())
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            log.error(f"Unreadable model manifest {path}: {e}")
+            return []
+
+    def latest(self, name: str) -> Optional[Dict]:
+        """Newest manifest entry of `name`, or None."""
+        entries = self.versions(name)
+        return entries[-1] if entries else None
+
+    def register(
+        self,
+        name: str,
+        artifact: Any,
+        feature_schema: List[str],
+        fingerprint: str,
+        metrics: Optional[Dict] = None,
+    ) -> Dict:
+        """Store `artifact` as the next version of `name` and return its manifest entry."""
+        directory = self._dir(name)
+        directory.mkdir(parents=True, exist_ok=True)
+        with _lock, _directory_lock(directory):
+            entries = self._read_manifest(name)
+            version = entries[-1]['version'] + 1 if entries else 1
+            filename = f"v{version}.joblib"
+            _atomic_write(directory / filename, lambda f: joblib.dump(artifact, f))
+
+            entry = {
+                'version': version,
+                'file': filename,
+                'feature_schema': list(feature_schema),
+                'fingerprint': fingerprint,
+                'metrics': metrics or {},
+                'trained_at': datetime.utcnow().isoformat(),
+            }
+            entries.append(entry)
+            stale, entries = entries[:-self.keep_versions], entries[-self.keep_versions:]
+            manifest = self._manifest_path(name)
+            _atomic_write(manifest, lambda f: f.write(json.dumps(entries, indent=2, default=str).encode()))
+            for old in stale:
+                (directory / old['file']).unlink(missing_ok=True)
+
+            mtime = manifest.stat().st_mtime_ns
+            _manifests[str(manifest)] = (mtime, entries)
+            _artifacts[str(manifest)] = (mtime, version, artifact)
+
+        log.info(f"Registered model {name} v{version} ({len(feature_schema)} features)")
+        return entry
+
+    def load(self, name: str, feature_schema: Optional[List[str]] = None) -> Optional[Tuple[Any, Dict]]:
+        """
+        (artifact, manifest entry) of the latest version, read from disk at
+        most once per process and manifest change. None when nothing is
+        registered or the stored feature schema differs from `feature_schema`.
+        """
+        entry = self.latest(name)
+        if entry is None:
+            return None
+        if feature_schema is not None and entry['feature_schema'] != list(feature_schema):
+            log.warning(f"Model {name} v{entry['version']} was trained on a different feature schema")
+            return None
+
+        manifest = self._manifest_path(name)
+        key = str(manifest)
+        with _lock:
+            mtime = manifest.stat().st_mtime_ns
+            cached = _artifacts.get(key)
+            if cached and cached[0] == mtime and cached[1] == entry['version']:
+                return cached[2], entry
+            try:
+                artifact = joblib.load(self._dir(name) / entry['file'])
+            except Exception as e:
+                log.error(f"Error loading model {name} v{entry['version']}: {e}")
+                return None
+            _artifacts[key] = (mtime, entry['version'], artifact)
+
+        log.info(f"Loaded model {name} v{entry['version']}")
+        return artifact, entry
+
+    def get_or_train(
+        self,
+        name: str,
+        fingerprint: str,
+        feature_schema: List[str],
+        train: Callable[[], Optional[Tuple[Any, Dict]]],
+        force: bool = False,
+    ) -> Optional[Tuple[Any, Dict, bool]]:
+        """
+        (artifact, manifest entry, retrained) for training data `fingerprint`.
+
+        Reuses the latest version when its fingerprint and feature schema
+        match; otherwise calls train() -> (artifact, metrics) and registers
+        the result. Returns None when train() returns None (e.g. too little data).
+        """
+        entry = self.latest(name)
+        if not force and entry and entry['fingerprint'] == fingerprint:
+            loaded = self.load(name, feature_schema)
+            if loaded is not None:
+                return loaded[0], loaded[1], False
+
+        trained = train()
+        if trained is None:
+            return None
+        artifact, metrics = trained
+        return artifact, self.register(name, artifact, feature_schema, fingerprint, metrics), True
+
+
+@contextmanager
+def _directory_lock(directory: Path):
+    """Exclusive lock on a model directory shared by every process (flock on .lock)."""
+    with open(directory / ".lock", "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def _atomic_write(path: Path, write: Callable) -> None:
+    """Write via a temp file in the same directory so readers never see a partial file."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
@@ -1,18 +1,192 @@
 """
 SEO Analysis Module
 Analyzes website for SEO issues, technical problems, and optimization opportunities
+
+Site audits fetch pages concurrently with aiohttp (settings.seo_audit_concurrency
+in flight, seo_audit_per_host per host) and parse each page once with lxml:
+extract_page() collects title, meta tags, headings, images, links and
+content stats in a single tree walk. Parsed pages are cached by URL and
+ETag, so a re-audit revalidates with If-None-Match and skips the parse
+when the page is unchanged.
 """
+import asyncio
+import contextlib
 import re
-from typing import Dict, List, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 import advertools as adv
-from bs4 import BeautifulSoup
+import aiohttp
+import lxml.html
+from lxml import etree
 import requests
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 
+from app.config import get_settings
+from app.utils.cache import get_cached, set_cached, _MISS
 from app.utils.logger import log
 
+settings = get_settings()
+
+# Parsed pages are kept this long; within it, a matching ETag skips the parse
+PAGE_CACHE_SECONDS = 24 * 3600
+FETCH_TIMEOUT_SECONDS = 10
+# Same policy as the requests session: 3 retries on these statuses, 0.3s backoff
+RETRY_STATUSES = (500, 502, 504)
+FETCH_RETRIES = 3
+RETRY_BACKOFF = 0.3
+
+
+class _FetchSlots:
+    """
+    Caps fetches in flight overall and per host. A request holding a slot
+    never queues for a pooled connection, so its timing is the fetch alone.
+    """
+
+    def __init__(self, concurrency: int, per_host: int):
+        self.overall = asyncio.Semaphore(concurrency)
+        self.per_host = per_host
+        self.hosts: Dict[str, asyncio.Semaphore] = {}
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, url: str):
+        host = self.hosts.setdefault(urlparse(url).netloc, asyncio.Semaphore(self.per_host))
+        async with host, self.overall:
+            yield
+
+
+def _page_cache_key(url: str) -> str:
+    return f"seo_page:{url}"
+
+
+def _rel_tokens(element) -> List[str]:
+    return (element.get('rel') or '').split()
+
+
+def extract_page(html: bytes, url: str) -> Dict:
+    """
+    Parse a page with lxml and collect everything the SEO checks read in
+    one walk over the tree: title, meta description, headings, images,
+    links, content stats and the head tags behind the technical/mobile
+    checks (canonical, robots, viewport, JSON-LD schema).
+    """
+    try:
+        root = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        root = None
+
+    title = None
+    meta = {}
+    headings = {'h1': [], 'h2': [], 'h3': []}
+    total_images = images_without_alt = images_without_title = 0
+    base_domain = urlparse(url).netloc
+    total_links = internal_links = external_links = nofollow_links = 0
+    has_canonical = has_schema = False
+    text = []
+
+    # start/end events keep text in document order: an element's text,
+    # then its children, then its tail
+    walk = etree.iterwalk(root, events=('start', 'end', 'comment', 'pi')) if root is not None else ()
+    for event, element in walk:
+        if event != 'start':
+            if element.tail:
+                text.append(element.tail)
+            continue
+        tag = element.tag
+        if tag not in ('script', 'style') and element.text:
+            text.append(element.text)
+
+        if tag == 'a':
+            if 'href' not in element.attrib:
+                continue
+            total_links += 1
+            href = element.get('href', '')
+            # Skip anchors and javascript
+            if href.startswith('#') or href.startswith('javascript:'):
+                continue
+            link_domain = urlparse(href).netloc
+            if link_domain == base_domain or not link_domain:
+                internal_links += 1
+            else:
+                external_links += 1
+            if 'nofollow' in _rel_tokens(element):
+                nofollow_links += 1
+        elif tag == 'img':
+            total_images += 1
+            if not element.get('alt'):
+                images_without_alt += 1
+            if not element.get('title'):
+                images_without_title += 1
+        elif tag in headings:
+            headings[tag].append(element.text_content().strip())
+        elif tag == 'meta':
+            name = element.get('name')
+            if name in ('description', 'robots', 'viewport') and name not in meta:
+                meta[name] = element.get('content', '')
+        elif tag == 'title':
+            if title is None:
+                title = element.text_content()
+        elif tag == 'link':
+            has_canonical = has_canonical or 'canonical' in _rel_tokens(element)
+        elif tag == 'script':
+            has_schema = has_schema or element.get('type') == 'application/ld+json'
+
+    title = title or ""
+    description = meta.get('description', "")
+    content = ''.join(text)
+    word_count = len(content.split())
+
+    return {
+        'title': {
+            'text': title,
+            'length': len(title),
+            'exists': bool(title),
+            'optimal_length': 30 <= len(title) <= 60,
+            'has_keywords': len(title.split()) >= 3
+        },
+        'meta_description': {
+            'text': description,
+            'length': len(description),
+            'exists': bool(description),
+            'optimal_length': 120 <= len(description) <= 160,
+        },
+        'headings': {
+            'h1_count': len(headings['h1']),
+            'h2_count': len(headings['h2']),
+            'h3_count': len(headings['h3']),
+            'has_single_h1': len(headings['h1']) == 1,
+            'has_hierarchy': len(headings['h1']) > 0 and len(headings['h2']) > 0,
+            'headings': headings
+        },
+        'images': {
+            'total_images': total_images,
+            'images_without_alt': images_without_alt,
+            'images_without_title': images_without_title,
+            'alt_text_coverage': ((total_images - images_without_alt) / total_images * 100) if total_images else 100
+        },
+        'links': {
+            'total_links': total_links,
+            'internal_links': internal_links,
+            'external_links': external_links,
+            'nofollow_links': nofollow_links,
+            'has_sufficient_internal_links': internal_links >= 3
+        },
+        'content': {
+            'word_count': word_count,
+            'sufficient_content': word_count >= 300,
+            'character_count': len(content),
+        },
+        'head': {
+            'has_canonical': has_canonical,
+            'has_robots_meta': 'robots' in meta,
+            'robots_content': meta.get('robots', ""),
+            'has_schema_markup': has_schema,
+            'has_viewport': 'viewport' in meta,
+            'viewport_content': meta.get('viewport', ""),
+        },
+    }
+
 
 class SEOAnalyzer:
     """
@@ -37,36 +211,19 @@ class SEOAnalyzer:
 
     def analyze_page(self, url: str) -> Dict:
         """
-        Comprehensive analysis of a single page
+        Comprehensive analysis of a single page (blocking; audits use audit_site_async)
         """
         log.info(f"Analyzing SEO for: {url}")
 
         try:
-            response = self.session.get(url, timeout=10)
+            response = self.session.get(url, timeout=FETCH_TIMEOUT_SECONDS)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            analysis = {
-                'url': url,
-                'status_code': response.status_code,
-                'title': self._analyze_title(soup),
-                'meta_description': self._analyze_meta_description(soup),
-                'headings': self._analyze_headings(soup),
-                'images': self._analyze_images(soup),
-                'links': self._analyze_links(soup, url),
-                'content': self._analyze_content(soup),
-                'technical': self._analyze_technical(response, soup),
-                'mobile': self._analyze_mobile(soup),
-                'performance': self._analyze_performance(response),
-                'issues': [],
-                'warnings': [],
-                'score': 0
-            }
-
-            # Calculate issues and score
-            analysis['issues'], analysis['warnings'] = self._identify_issues(analysis)
-            analysis['score'] = self._calculate_seo_score(analysis)
+            page = extract_page(response.content, url)
+            analysis = self._build_analysis(
+                url, response.status_code, page, response.url,
+                response.elapsed.total_seconds(), len(response.content)
+            )
 
             log.info(f"SEO analysis complete for {url} - Score: {analysis['score']}")
             return analysis
@@ -79,168 +236,61 @@ class SEOAnalyzer:
                 'score': 0
             }
 
-    def _analyze_title(self, soup: BeautifulSoup) -> Dict:
-        """Analyze page title"""
-        title_tag = soup.find('title')
-        title = title_tag.get_text() if title_tag else ""
-
-        return {
-            'text': title,
-            'length': len(title),
-            'exists': bool(title),
-            'optimal_length': 30 <= len(title) <= 60,
-            'has_keywords': len(title.split()) >= 3
+    def _build_analysis(
+        self,
+        url: str,
+        status_code: int,
+        page: Dict,
+        final_url: str,
+        response_time: float,
+        page_size: int,
+        cached: bool = False
+    ) -> Dict:
+        """Assemble the per-page analysis from extract_page() output and response facts"""
+        head = page['head']
+        analysis = {
+            'url': url,
+            'status_code': status_code,
+            'title': page['title'],
+            'meta_description': page['meta_description'],
+            'headings': page['headings'],
+            'images': page['images'],
+            'links': page['links'],
+            'content': page['content'],
+            'technical': {
+                'has_ssl': final_url.startswith('https://'),
+                'has_canonical': head['has_canonical'],
+                'has_robots_meta': head['has_robots_meta'],
+                'robots_content': head['robots_content'],
+                'has_schema_markup': head['has_schema_markup'],
+                'has_viewport': head['has_viewport'],
+                'response_time': response_time
+            },
+            'mobile': self._analyze_mobile(head),
+            'performance': self._analyze_performance(response_time, page_size),
+            'cached': cached,
+            'issues': [],
+            'warnings': [],
+            'score': 0
         }
 
-    def _analyze_meta_description(self, soup: BeautifulSoup) -> Dict:
-        """Analyze meta description"""
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        description = meta_desc.get('content', '') if meta_desc else ""
+        # Calculate issues and score
+        analysis['issues'], analysis['warnings'] = self._identify_issues(analysis)
+        analysis['score'] = self._calculate_seo_score(analysis)
+        return analysis
 
-        return {
-            'text': description,
-            'length': len(description),
-            'exists': bool(description),
-            'optimal_length': 120 <= len(description) <= 160,
-        }
-
-    def _analyze_headings(self, soup: BeautifulSoup) -> Dict:
-        """Analyze heading structure"""
-        headings = {
-            'h1': [h.get_text().strip() for h in soup.find_all('h1')],
-            'h2': [h.get_text().strip() for h in soup.find_all('h2')],
-            'h3': [h.get_text().strip() for h in soup.find_all('h3')],
-        }
-
-        return {
-            'h1_count': len(headings['h1']),
-            'h2_count': len(headings['h2']),
-            'h3_count': len(headings['h3']),
-            'has_single_h1': len(headings['h1']) == 1,
-            'has_hierarchy': len(headings['h1']) > 0 and len(headings['h2']) > 0,
-            'headings': headings
-        }
-
-    def _analyze_images(self, soup: BeautifulSoup) -> Dict:
-        """Analyze images for SEO"""
-        images = soup.find_all('img')
-
-        images_without_alt = 0
-        images_without_title = 0
-        large_images = 0
-
-        for img in images:
-            if not img.get('alt'):
-                images_without_alt += 1
-            if not img.get('title'):
-                images_without_title += 1
-
-        return {
-            'total_images': len(images),
-            'images_without_alt': images_without_alt,
-            'images_without_title': images_without_title,
-            'alt_text_coverage': ((len(images) - images_without_alt) / len(images) * 100) if images else 100
-        }
-
-    def _analyze_links(self, soup: BeautifulSoup, base_url: str) -> Dict:
-        """Analyze internal and external links"""
-        links = soup.find_all('a', href=True)
-        base_domain = urlparse(base_url).netloc
-
-        internal_links = 0
-        external_links = 0
-        broken_links = 0
-        nofollow_links = 0
-
-        for link in links:
-            href = link.get('href', '')
-
-            # Skip anchors and javascript
-            if href.startswith('#') or href.startswith('javascript:'):
-                continue
-
-            link_domain = urlparse(href).netloc
-
-            if link_domain == base_domain or not link_domain:
-                internal_links += 1
-            else:
-                external_links += 1
-
-            if link.get('rel') and 'nofollow' in link.get('rel'):
-                nofollow_links += 1
-
-        return {
-            'total_links': len(links),
-            'internal_links': internal_links,
-            'external_links': external_links,
-            'nofollow_links': nofollow_links,
-            'has_sufficient_internal_links': internal_links >= 3
-        }
-
-    def _analyze_content(self, soup: BeautifulSoup) -> Dict:
-        """Analyze page content"""
-        # Remove script and style elements
-        for script in soup(['script', 'style']):
-            script.decompose()
-
-        text = soup.get_text()
-        words = text.split()
-
-        return {
-            'word_count': len(words),
-            'sufficient_content': len(words) >= 300,
-            'character_count': len(text),
-        }
-
-    def _analyze_technical(self, response: requests.Response, soup: BeautifulSoup) -> Dict:
-        """Analyze technical SEO factors"""
-        # Check SSL
-        has_ssl = response.url.startswith('https://')
-
-        # Check canonical tag
-        canonical = soup.find('link', rel='canonical')
-        has_canonical = bool(canonical)
-
-        # Check robots meta
-        robots_meta = soup.find('meta', attrs={'name': 'robots'})
-        robots_content = robots_meta.get('content', '') if robots_meta else ""
-
-        # Check schema markup
-        has_schema = bool(soup.find('script', type='application/ld+json'))
-
-        # Check viewport meta
-        viewport = soup.find('meta', attrs={'name': 'viewport'})
-        has_viewport = bool(viewport)
-
-        return {
-            'has_ssl': has_ssl,
-            'has_canonical': has_canonical,
-            'has_robots_meta': bool(robots_meta),
-            'robots_content': robots_content,
-            'has_schema_markup': has_schema,
-            'has_viewport': has_viewport,
-            'response_time': response.elapsed.total_seconds()
-        }
-
-    def _analyze_mobile(self, soup: BeautifulSoup) -> Dict:
+    def _analyze_mobile(self, head: Dict) -> Dict:
         """Analyze mobile-friendliness"""
-        viewport = soup.find('meta', attrs={'name': 'viewport'})
-        has_viewport = bool(viewport)
-
-        viewport_content = viewport.get('content', '') if viewport else ""
-        has_responsive_viewport = 'width=device-width' in viewport_content
+        has_responsive_viewport = 'width=device-width' in head['viewport_content']
 
         return {
-            'has_viewport': has_viewport,
+            'has_viewport': head['has_viewport'],
             'has_responsive_viewport': has_responsive_viewport,
             'likely_mobile_friendly': has_responsive_viewport
         }
 
-    def _analyze_performance(self, response: requests.Response) -> Dict:
+    def _analyze_performance(self, response_time: float, page_size: int) -> Dict:
         """Analyze performance metrics"""
-        response_time = response.elapsed.total_seconds()
-        page_size = len(response.content)
-
         return {
             'response_time_seconds': response_time,
             'page_size_bytes': page_size,
@@ -249,6 +299,59 @@ class SEOAnalyzer:
             'reasonable_size': page_size < 2 * 1024 * 1024  # Less than 2MB
         }
 
+    async def _fetch(
+        self,
+        session: aiohttp.ClientSession,
+        slots: _FetchSlots,
+        url: str,
+        etag: Optional[str]
+    ) -> Tuple[int, bytes, Optional[str], str, float]:
+        """GET with retries: (status, body, etag, final url, seconds)"""
+        headers = {'If-None-Match': etag} if etag else None
+        for attempt in range(FETCH_RETRIES + 1):
+            async with slots.acquire(url):
+                started = time.perf_counter()
+                async with session.get(url, headers=headers) as response:
+                    body = await response.read()
+                    elapsed = time.perf_counter() - started
+                    status = response.status
+                    result = status, body, response.headers.get('ETag'), str(response.url), elapsed
+            if status in RETRY_STATUSES and attempt < FETCH_RETRIES:
+                await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+                continue
+            return result
+
+    async def _audit_page(self, session: aiohttp.ClientSession, slots: _FetchSlots, url: str) -> Dict:
+        """Fetch and analyze one page, reusing the cached parse when the ETag matches"""
+        key = _page_cache_key(url)
+        cached = get_cached(key)
+        cached = None if cached is _MISS else cached
+        try:
+            status, body, etag, final_url, elapsed = await self._fetch(
+                session, slots, url, cached['etag'] if cached else None
+            )
+            if status == 304 and cached:
+                return self._build_analysis(url, 200, cached['page'], final_url, elapsed, cached['size'], cached=True)
+            if status >= 400:
+                raise aiohttp.ClientError(f"{status} Error for url: {url}")
+
+            if cached and etag and cached['etag'] == etag:
+                page, is_cached = cached['page'], True
+            else:
+                # Parsing is CPU-bound; keep it off the event loop so fetches continue
+                page, is_cached = await asyncio.to_thread(extract_page, body, url), False
+            if etag:
+                set_cached(key, {'etag': etag, 'page': page, 'size': len(body)}, PAGE_CACHE_SECONDS)
+            return self._build_analysis(url, status, page, final_url, elapsed, len(body), cached=is_cached)
+
+        except Exception as e:
+            log.error(f"Error analyzing {url}: {str(e) or type(e).__name__}")
+            return {
+                'url': url,
+                'error': str(e) or type(e).__name__,
+                'score': 0
+            }
+
     def _identify_issues(self, analysis: Dict) -> tuple[List[Dict], List[Dict]]:
         """Identify SEO issues and warnings"""
         issues = []
@@ -325,19 +428,48 @@ class SEOAnalyzer:
 
         return max(0, score)
 
-    def audit_site(self, urls: List[str]) -> Dict:
+    async def audit_site_async(
+        self,
+        urls: List[str],
+        concurrency: Optional[int] = None,
+        per_host: Optional[int] = None
+    ) -> Dict:
         """
-        Audit multiple pages and generate summary
+        Audit multiple pages concurrently and generate summary
+
+        At most `concurrency` fetches are in flight, `per_host` of them to
+        any one host, over pooled keep-alive connections.
         """
-        log.info(f"Starting SEO audit for {len(urls)} pages")
+        concurrency = max(1, concurrency or settings.seo_audit_concurrency)
+        per_host = max(1, per_host or settings.seo_audit_per_host)
+        log.info(f"Starting SEO audit for {len(urls)} pages ({concurrency} concurrent, {per_host} per host)")
+        started = time.perf_counter()
+
+        slots = _FetchSlots(concurrency, per_host)
+        connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=FETCH_TIMEOUT_SECONDS)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            results = await asyncio.gather(*(self._audit_page(session, slots, url) for url in urls))
+
+        summary = self._summarize(urls, list(results))
+        summary['duration_seconds'] = round(time.perf_counter() - started, 2)
+        summary['pages_from_cache'] = sum(1 for r in results if r.get('cached'))
+        log.info(
+            f"SEO audit complete - Average score: {summary['average_score']:.1f} "
+            f"({len(urls)} pages in {summary['duration_seconds']}s, {summary['pages_from_cache']} unchanged)"
+        )
+        return summary
 
-        results = []
-        for url in urls:
-            result = self.analyze_page(url)
-            results.append(result)
+    def audit_site(self, urls: List[str]) -> Dict:
+        """
+        Audit multiple pages and generate summary (blocking wrapper for
+        audit_site_async; async callers should await that directly)
+        """
+        return asyncio.run(self.audit_site_async(urls))
 
-        # Calculate summary statistics
-        avg_score = sum(r.get('score', 0) for r in results) / len(results)
+    def _summarize(self, urls: List[str], results: List[Dict]) -> Dict:
+        """Summary statistics over per-page results"""
+        avg_score = sum(r.get('score', 0) for r in results) / len(results) if results else 0
         total_issues = sum(len(r.get('issues', [])) for r in results)
         total_warnings = sum(len(r.get('warnings', [])) for r in results)
 
@@ -357,7 +489,7 @@ class SEOAnalyzer:
             reverse=True
         )[:5]
 
-        summary = {
+        return {
             'total_pages_analyzed': len(urls),
             'average_score': avg_score,
             'total_issues': total_issues,
@@ -365,6 +497,3 @@ class SEOAnalyzer:
             'common_issues': [{'issue': k, 'count': v} for k, v in common_issues],
             'pages': results
         }
-
-        log.info(f"SEO audit complete - Average score: {avg_score:.1f}")
-        return summary
@@ -26,6 +26,8 @@ from app.models.data_quality import (
     TrackingAlert
 )
 
+from app.models.kpi_timeseries import KpiHourlyPoint
+
 from app.models.seo import (
     SearchQuery,
     PageSEO,
@@ -41,7 +43,13 @@ from app.models.shopify import (
     ShopifyCustomer,
     ShopifyRefund,
     ShopifyRefundLineItem,
-    ShopifyInventory
+    ShopifyInventory,
+    ShopifyInventoryLevel,
+    ShopifyProductSalesDaily,
+    ShopifySalesDailyFact,
+    ShopifyVendorOrdersDaily,
+    ShopifyWebhookEvent,
+    ShopifyOrderAttribution
 )
 
 from app.models.product_cost import ProductCost
@@ -78,7 +86,8 @@ from app.models.ad_spend import (
     AdSpendOptimization,
     AdWaste,
     ProductAdPerformance,
-    AdSpendInsight
+    AdSpendInsight,
+    AdSpendDirtyCampaign
 )
 
 from app.models.weekly_brief import (
@@ -144,7 +153,10 @@ from app.models.search_console_data import (
     SearchConsolePage,
     SearchConsoleIndexCoverage,
     SearchConsoleSitemap,
-    SearchConsoleRichResult
+    SearchConsoleRichResult,
+    SearchConsoleQueryDaily,
+    SearchConsolePageDaily,
+    SearchConsoleQueryPageRollup
 )
 
 from app.models.klaviyo_data import (
@@ -4,7 +4,7 @@ Ad Spend Optimization Intelligence Models
 Analyzes Google Ads performance with true ROAS calculations.
 Answers: "Where am I wasting ad spend? Where should I scale?"
 """
-from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, JSON, Boolean, Text, Numeric
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, DateTime, JSON, Boolean, Text, Numeric
 from datetime import datetime
 from decimal import Decimal
 
@@ -382,3 +382,23 @@ class AdSpendInsight(Base):
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class AdSpendDirtyCampaign(Base):
+    """
+    Campaign days changed since AdSpendProcessor last ran.
+
+    Written by the Google Ads imports (campaign rows) and the Shopify order
+    save path (attributed orders); consumed by the next incremental
+    AdSpendProcessor run. campaign_id is null for product-level changes;
+    date is null when every day of the campaign is affected.
+    """
+    __tablename__ = "ad_spend_dirty_campaigns"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    campaign_id = Column(String, index=True, nullable=True)
+    date = Column(Date, nullable=True)
+    source = Column(String, nullable=False)  # google_ads, google_ads_products, shopify
+
+    marked_at = Column(DateTime, default=datetime.utcnow, nullable=False)
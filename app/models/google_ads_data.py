@@ -50,6 +50,8 @@ class GoogleAdsCampaign(Base):
     search_rank_lost_impression_share = Column(Float, nullable=True)
 
     # Metadata
+    row_hash = Column(String(16), nullable=True)
+    # Hash of the imported values (sheet import) — unchanged rows are skipped
     synced_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
@@ -0,0 +1,35 @@
+"""
+KPI Time-Series Model
+
+Hourly buckets of the additive measures behind the monitoring KPIs
+(revenue, orders, sessions, ad spend, abandoned checkouts, email opens).
+Rolling windows, baselines and trends are summed from these points instead
+of re-aggregating the source tables on every monitoring check.
+"""
+from sqlalchemy import Column, Integer, String, Float, DateTime, UniqueConstraint, Index
+from datetime import datetime
+
+from app.models.base import Base
+
+
+class KpiHourlyPoint(Base):
+    """
+    One measure for one UTC hour.
+
+    Sources with daily granularity (GA4, Google Ads) are stored in the
+    midnight bucket of their date.
+    """
+    __tablename__ = "kpi_hourly_points"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    metric = Column(String, nullable=False)
+    hour = Column(DateTime, nullable=False)  # Bucket start (UTC, naive)
+    value = Column(Float, nullable=False, default=0.0)
+
+    refreshed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('metric', 'hour', name='uq_kpi_hourly_metric_hour'),
+        Index('ix_kpi_hourly_hour', 'hour'),
+    )
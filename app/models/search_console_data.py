@@ -3,7 +3,7 @@ Google Search Console Data Models
 
 Stores query performance and index coverage data.
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, JSON, ForeignKey, Date, Numeric
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, JSON, ForeignKey, Date, Numeric, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -24,6 +24,8 @@ class SearchConsoleQuery(Base):
     # Search query
     page = Column(String, index=True, nullable=True)
     # Landing page URL
+    query_class = Column(String, index=True, nullable=True)
+    # Types: brand, spam, non_brand (set at ingestion by QueryClassifier)
 
     # Dimensions
     device = Column(String, nullable=True)
@@ -76,6 +78,108 @@ class SearchConsolePage(Base):
         return f"<SearchConsolePage {self.page} - {self.date}>"
 
 
+class SearchConsoleQueryDaily(Base):
+    """
+    Daily query-level rollup of search_console_queries.
+
+    Collapses page/device/country rows to one row per (date, query).
+    Position is stored as an impression-weighted sum so any window can be
+    re-aggregated exactly: SUM(weighted_position_sum) / SUM(impressions).
+    Maintained by SearchConsoleRollupService.
+    """
+    __tablename__ = "search_console_query_daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    date = Column(Date, index=True, nullable=False)
+    query = Column(String, index=True, nullable=False)
+    query_class = Column(String, index=True, nullable=True)
+    # Types: brand, spam, non_brand
+
+    clicks = Column(Integer, default=0, nullable=False)
+    impressions = Column(Integer, default=0, nullable=False)
+    weighted_position_sum = Column(Float, default=0.0, nullable=False)
+    # SUM(position * impressions)
+
+    refreshed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('date', 'query', name='uq_sc_query_daily_date_query'),
+        Index('ix_sc_query_daily_query_date', 'query', 'date'),
+        Index('ix_sc_query_daily_class_date', 'query_class', 'date'),
+    )
+
+    def __repr__(self):
+        return f"<SearchConsoleQueryDaily '{self.query}' - {self.date}>"
+
+
+class SearchConsolePageDaily(Base):
+    """
+    Daily page-level rollup of search_console_pages.
+
+    One row per (date, page) with impression-weighted position.
+    Maintained by SearchConsoleRollupService.
+    """
+    __tablename__ = "search_console_page_daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    date = Column(Date, index=True, nullable=False)
+    page = Column(String, index=True, nullable=False)
+
+    clicks = Column(Integer, default=0, nullable=False)
+    impressions = Column(Integer, default=0, nullable=False)
+    weighted_position_sum = Column(Float, default=0.0, nullable=False)
+    # SUM(position * impressions)
+
+    refreshed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('date', 'page', name='uq_sc_page_daily_date_page'),
+        Index('ix_sc_page_daily_page_date', 'page', 'date'),
+    )
+
+    def __repr__(self):
+        return f"<SearchConsolePageDaily {self.page} - {self.date}>"
+
+
+class SearchConsoleQueryPageRollup(Base):
+    """
+    Weekly / monthly query x page rollup of search_console_queries.
+
+    grain is 'week' (period_start = Monday) or 'month' (period_start = 1st).
+    Used for cannibalization, monthly trends and sparklines.
+    Maintained by SearchConsoleRollupService.
+    """
+    __tablename__ = "search_console_query_page_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    grain = Column(String, nullable=False)
+    # Types: week, month
+    period_start = Column(Date, index=True, nullable=False)
+
+    query = Column(String, index=True, nullable=False)
+    page = Column(String, index=True, nullable=True)
+    query_class = Column(String, index=True, nullable=True)
+    # Types: brand, spam, non_brand
+
+    clicks = Column(Integer, default=0, nullable=False)
+    impressions = Column(Integer, default=0, nullable=False)
+    weighted_position_sum = Column(Float, default=0.0, nullable=False)
+    # SUM(position * impressions)
+
+    refreshed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('grain', 'period_start', 'query', 'page', name='uq_sc_qp_rollup_grain_period_query_page'),
+        Index('ix_sc_qp_rollup_grain_period', 'grain', 'period_start'),
+    )
+
+    def __repr__(self):
+        return f"<SearchConsoleQueryPageRollup {self.grain} {self.period_start} '{self.query}'>"
+
+
 class SearchConsoleIndexCoverage(Base):
     """Index coverage status from Search Console"""
     __tablename__ = "search_console_index_coverage"
@@ -4,7 +4,7 @@ Shopify Data Models
 Stores data pulled from Shopify Admin API.
 Source of truth for orders, products, and customers.
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Boolean, Text, BigInteger, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, JSON, Boolean, Text, BigInteger, ForeignKey, Numeric, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from decimal import Decimal
@@ -227,6 +227,11 @@ class ShopifyOrderItem(Base):
     # For profitability (if available)
     cost_per_item = Column(Numeric(10, 2), nullable=True)  # COGS per unit
 
+    # Refunds against this line item (all time, summed from shopify_refund_line_items).
+    # Maintained by RefundRollupService so readers never GROUP BY the refund history.
+    refunded_quantity = Column(Integer, nullable=False, default=0, server_default='0')
+    refunded_amount = Column(Numeric(10, 2), nullable=False, default=0, server_default='0')
+
     # Order context (denormalized for fast filtering)
     financial_status = Column(String, index=True, nullable=True)
     fulfillment_status = Column(String, nullable=True)
@@ -239,6 +244,38 @@ class ShopifyOrderItem(Base):
                          primaryjoin="ShopifyOrderItem.shopify_order_id == ShopifyOrder.shopify_order_id")
 
 
+class ShopifyProductSalesDaily(Base):
+    """
+    Per-day product sales rollup of shopify_order_items.
+
+    One row per (day, product, financial_status) so monitoring checks and
+    product dashboards read a handful of pre-aggregated rows instead of
+    re-aggregating line items (or line_items JSON) on every request.
+    Maintained by ProductSalesRollupService after each Shopify order sync.
+    """
+    __tablename__ = "shopify_product_sales_daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    date = Column(Date, index=True, nullable=False)
+    shopify_product_id = Column(BigInteger, index=True, nullable=True)
+    financial_status = Column(String, nullable=True)
+    title = Column(String, nullable=True)
+
+    units = Column(Integer, default=0, nullable=False)
+    gross_revenue = Column(Numeric(12, 2), default=0, nullable=False)  # SUM(quantity * price)
+    discounts = Column(Numeric(12, 2), default=0, nullable=False)
+    order_count = Column(Integer, default=0, nullable=False)
+
+    refreshed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('date', 'shopify_product_id', 'financial_status',
+                         name='uq_product_sales_daily_date_product_status'),
+        Index('ix_product_sales_daily_product_date', 'shopify_product_id', 'date'),
+    )
+
+
 class ShopifyRefund(Base):
     """
     Shopify refunds
@@ -331,3 +368,167 @@ class ShopifyInventory(Base):
     # Timestamps
     updated_at = Column(DateTime, index=True)
     synced_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ShopifyInventoryLevel(Base):
+    """
+    Per-location stock level reported by inventory_levels/update webhooks.
+
+    shopify_inventory.inventory_quantity is the variant total across
+    locations (from the full inventory sync), while each webhook carries
+    one location's `available`. The webhook service keeps the last level
+    per location here and moves the total by the change at that location.
+    The full sync replaces the total and clears these rows.
+    """
+    __tablename__ = "shopify_inventory_levels"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    shopify_inventory_item_id = Column(BigInteger, index=True, nullable=False)
+    location_id = Column(BigInteger, nullable=False)
+    available = Column(Integer, nullable=False)
+
+    updated_at = Column(DateTime, nullable=True)  # Shopify's updated_at for the level
+
+    __table_args__ = (
+        UniqueConstraint('shopify_inventory_item_id', 'location_id', name='uq_shopify_inventory_level'),
+    )
+
+
+class ShopifySalesDailyFact(Base):
+    """
+    Daily sales fact table: one row per (day, vendor, product, SKU,
+    financial_status) with every additive sales measure pre-summed.
+
+    Refunds are attributed to the *order* date of the refunded line item, so
+    a window's net revenue matches the raw line-item queries it replaces.
+    COGS and the "costed" measures only count line items that carry a
+    cost_per_item, which lets readers compute margins like-for-like.
+
+    Brand intelligence, finance COGS and the chat sales lookups aggregate
+    these rows instead of joining shopify_order_items to refunds on every
+    request. Maintained by SalesFactService after each order/refund sync.
+    """
+    __tablename__ = "shopify_sales_daily_fact"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    date = Column(Date, index=True, nullable=False)
+    vendor = Column(String, nullable=True)
+    shopify_product_id = Column(BigInteger, nullable=True)
+    sku = Column(String, nullable=True)
+    financial_status = Column(String, nullable=True)
+    title = Column(String, nullable=True)
+
+    units = Column(Integer, default=0, nullable=False)
+    refund_units = Column(Integer, default=0, nullable=False)
+    gross_revenue = Column(Numeric(12, 2), default=0, nullable=False)  # SUM(quantity * price)
+    discounts = Column(Numeric(12, 2), default=0, nullable=False)
+    refunds = Column(Numeric(12, 2), default=0, nullable=False)
+    net_revenue = Column(Numeric(12, 2), default=0, nullable=False)  # gross - discounts - refunds
+
+    cogs = Column(Numeric(12, 2), default=0, nullable=False)  # cost_per_item * quantity
+    refund_cogs = Column(Numeric(12, 2), default=0, nullable=False)  # cost_per_item * refunded qty
+    units_with_cost = Column(Integer, default=0, nullable=False)
+    costed_revenue = Column(Numeric(12, 2), default=0, nullable=False)
+    costed_discounts = Column(Numeric(12, 2), default=0, nullable=False)
+    costed_refunds = Column(Numeric(12, 2), default=0, nullable=False)
+
+    line_count = Column(Integer, default=0, nullable=False)
+    price_total = Column(Numeric(14, 2), default=0, nullable=False)  # SUM(price), for average unit price
+    order_count = Column(Integer, default=0, nullable=False)
+
+    refreshed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('date', 'vendor', 'shopify_product_id', 'sku', 'financial_status',
+                         name='uq_sales_daily_fact_grain'),
+        Index('ix_sales_daily_fact_vendor_date', 'vendor', 'date'),
+        Index('ix_sales_daily_fact_product_date', 'shopify_product_id', 'date'),
+        Index('ix_sales_daily_fact_sku_date', 'sku', 'date'),
+    )
+
+
+class ShopifyVendorOrdersDaily(Base):
+    """
+    Distinct orders per (day, vendor, financial_status).
+
+    Companion to ShopifySalesDailyFact: distinct order counts are not
+    additive across products, but an order has a single date and status,
+    so these rows can be summed over any day window for a brand.
+    """
+    __tablename__ = "shopify_vendor_orders_daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    date = Column(Date, index=True, nullable=False)
+    vendor = Column(String, nullable=True)
+    financial_status = Column(String, nullable=True)
+    order_count = Column(Integer, default=0, nullable=False)
+
+    refreshed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('date', 'vendor', 'financial_status',
+                         name='uq_vendor_orders_daily_grain'),
+        Index('ix_vendor_orders_daily_vendor_date', 'vendor', 'date'),
+    )
+
+
+class ShopifyWebhookEvent(Base):
+    """
+    Inbound Shopify webhook deliveries (change feed queue).
+
+    The webhook endpoint verifies the HMAC and stores the raw payload here;
+    ShopifyWebhookService drains pending rows through the normal order /
+    refund / inventory save path. webhook_id (X-Shopify-Webhook-Id) makes
+    Shopify's at-least-once redelivery idempotent.
+    """
+    __tablename__ = "shopify_webhook_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    webhook_id = Column(String, unique=True, index=True, nullable=True)
+    topic = Column(String, index=True, nullable=False)  # orders/create, refunds/create, ...
+    shop_domain = Column(String, nullable=True)
+    resource_id = Column(BigInteger, nullable=True)  # order / refund / inventory item id
+    payload = Column(JSON, nullable=False)
+
+    status = Column(String, index=True, nullable=False, default='pending')  # pending, processed, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+
+    received_at = Column(DateTime, index=True, nullable=False, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_shopify_webhook_events_status_id', 'status', 'id'),
+    )
+
+
+class ShopifyOrderAttribution(Base):
+    """
+    Order → Google Ads campaign attribution index.
+
+    One row per order carrying a gad_campaign_id or utm_campaign, resolved
+    when the order is saved and re-resolved when campaign names change
+    (ShopifyRevenueAttributionService). Lets per-campaign revenue and COGS
+    be one grouped query instead of matching every order in Python.
+    """
+    __tablename__ = "shopify_order_attribution"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    shopify_order_id = Column(BigInteger, unique=True, index=True, nullable=False)
+
+    # Tier 1: normalized gad_campaign_id from the landing URL
+    gad_campaign_id = Column(String, index=True, nullable=True)
+    # Tier 2: normalized utm_campaign and the campaign id it names
+    utm_name = Column(String, nullable=True)
+    utm_campaign_id = Column(String, index=True, nullable=True)
+
+    # Best resolution against known campaigns
+    campaign_id = Column(String, index=True, nullable=True)
+    match_tier = Column(String, nullable=True)  # gad_campaign_id, utm_campaign, or null (unmatched)
+
+    resolved_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -118,6 +118,7 @@ async def sync_google_ads():
                 ))
             except Exception:
                 pass
+            await _process_ad_spend()
         else:
             log.error(f"Google Ads sync failed: {result.get('error')}")
             try:
@@ -437,14 +438,11 @@ async def sync_github():
 
 async def run_ml_intelligence():
     """Run ML intelligence pipeline (daily at 3am)"""
-    from app.services.ml_intelligence_service import MLIntelligenceService
-    from app.models.base import get_db
+    from app.services.ml_pipeline_runner import run_ml_pipeline
     try:
         log.info("Starting ML intelligence pipeline...")
-        db = next(get_db())
-
-        service = MLIntelligenceService(db)
-        result = service.run_daily_ml_pipeline()
+        # Stages run in worker processes; waiting on them stays off the event loop
+        result = await asyncio.to_thread(run_ml_pipeline)
 
         forecasts = result.get('forecasts', {})
         anomalies = result.get('anomalies', {})
@@ -458,12 +456,32 @@ async def run_ml_intelligence():
             f"({inventory.get('critical_count', 0)} critical)"
         )
 
-        db.close()
-
     except Exception as e:
         log.error(f"ML intelligence pipeline error: {str(e)}")
 
 
+async def run_churn_scoring():
+    """Score every customer's churn risk into shopify_customers (daily at 3:30am)"""
+    from app.models.base import SessionLocal
+    from app.services.churn_scoring import ChurnScoringService
+
+    def _run():
+        db = SessionLocal()
+        try:
+            return ChurnScoringService(db).score_all()
+        finally:
+            db.close()
+
+    try:
+        result = await asyncio.to_thread(_run)
+        log.info(
+            f"Churn scoring completed: {result['customers_scored']} customers, "
+            f"{result['at_risk']} at risk"
+        )
+    except Exception as e:
+        log.error(f"Churn scoring error: {str(e)}")
+
+
 async def sync_shopify():
     """Sync Shopify orders and order items (every 2 hours)"""
     from app.services.data_sync_service import DataSyncService
@@ -479,6 +497,8 @@ async def sync_shopify():
                 f"{result.get('orders_saved', 0)} new, "
                 f"{result.get('orders_updated', 0)} updated in {result.get('duration', 0):.1f}s"
             )
+            # DB-heavy; runs on its own session off the event loop
+            await asyncio.to_thread(_precompute_brand_details)
         else:
             log.error(f"Shopify sync failed: {result.get('error')}")
 
@@ -531,6 +551,7 @@ async def sync_shippit():
 async def sync_caprice_pricing():
     """Import new Caprice pricing files (daily at 1pm)"""
     from app.services.caprice_import_service import CapriceImportService
+    from app.utils.cache import clear_for_source
     try:
         log.info("Starting Caprice pricing import...")
         service = CapriceImportService()
@@ -545,6 +566,10 @@ async def sync_caprice_pricing():
             f"Caprice import completed: {imported} files imported "
             f"({total_rows} rows), {skipped} skipped, {failed} failed"
         )
+        if imported:
+            # Drop pricing / brand payloads cached before this import
+            clear_for_source("caprice")
+            await _prerender_brand_reports()
 
     except Exception as e:
         log.error(f"Caprice pricing import error: {str(e)}")
@@ -593,6 +618,9 @@ async def sync_shopify_full():
             response_cache.invalidate("profitability:")
             response_cache.invalidate("customers:")
             response_cache.invalidate("monitor:")
+            # DB-heavy; runs on its own session off the event loop
+            await asyncio.to_thread(_precompute_brand_details)
+            await _prerender_brand_reports()
         else:
             log.error(f"Shopify full sync failed: {result.get('error')}")
 
@@ -600,6 +628,81 @@ async def sync_shopify_full():
         log.error(f"Shopify full sync error: {str(e)}")
 
 
+def _precompute_brand_details():
+    """Warm the brand detail cache for the top brands after a Shopify sync"""
+    from app.models.base import SessionLocal
+    from app.services.brand_intelligence_service import BrandIntelligenceService
+    db = SessionLocal()
+    try:
+        BrandIntelligenceService(db).precompute_top_brand_details()
+    except Exception as e:
+        log.error(f"Brand detail precompute error: {str(e)}")
+    finally:
+        db.close()
+
+
+async def _prerender_brand_reports():
+    """Render brand report PDFs for every portal brand whose pricing data changed"""
+    from app.models.base import SessionLocal
+    from app.api.pricing_impact import brand_report_data
+    from app.services.brand_portal_service import BrandPortalService
+    from app.services.brand_report_render_service import BrandReportRenderService
+
+    def _run():
+        db = SessionLocal()
+        try:
+            brands = [b["brand"] for b in BrandPortalService(db).get_brands()]
+            BrandReportRenderService(db).prerender(brands, lambda brand: brand_report_data(db, brand))
+        finally:
+            db.close()
+
+    try:
+        # Payload queries and waiting on the render pool stay off the event loop
+        await asyncio.to_thread(_run)
+    except Exception as e:
+        log.error(f"Brand report pre-render error: {str(e)}")
+
+
+async def verify_refund_rollup():
+    """Check materialized refund totals against raw refund rows (daily at 7:45am AEST)"""
+    from app.models.base import SessionLocal
+    from app.services.refund_rollup_service import RefundRollupService
+    db = SessionLocal()
+    try:
+        result = RefundRollupService(db).verify(fix=True)
+        log.info(
+            f"Refund rollup verification: {result['checked']} items checked, "
+            f"{result['mismatched']} mismatched, {result['fixed']} fixed, "
+            f"{result['orphan_refund_lines']} orphan refund lines"
+        )
+    except Exception as e:
+        log.error(f"Refund rollup verification error: {str(e)}")
+    finally:
+        db.close()
+
+
+async def _process_ad_spend():
+    """Recompute campaign_performance for campaigns changed by the last Ads sync"""
+    from app.models.base import SessionLocal
+    from app.services.ad_spend_processor import AdSpendProcessor
+
+    def _run():
+        db = SessionLocal()
+        try:
+            return AdSpendProcessor(db).process()
+        finally:
+            db.close()
+
+    try:
+        result = await asyncio.to_thread(_run)
+        log.info(
+            f"Ad spend processing ({result.get('mode', 'full')}): "
+            f"{result['campaigns_processed']} campaigns recomputed"
+        )
+    except Exception as e:
+        log.error(f"Ad spend processing error: {str(e)}")
+
+
 async def sync_google_ads_sheet():
     """Import Google Ads data from Google Sheet (daily at 6am AEST)"""
     from app.services.google_ads_sheet_import import GoogleAdsSheetImportService
@@ -678,6 +781,7 @@ async def sync_google_ads_sheet():
         clear_for_source("google_ads")
         response_cache.invalidate("ads:")
         response_cache.invalidate("monitor:")
+        await _process_ad_spend()
 
     except Exception as e:
         log.error(f"Google Ads Sheet import error: {str(e)}")
@@ -764,6 +868,7 @@ def setup_scheduler():
     Sync Frequencies (overnight only):
     - Shopify orders:     9pm, 11pm, 5am, 7am  (4x/night, orders + order_items)
     - Shopify full:       1:00am               (includes products/variants catalog)
+    - Refund rollup check: 7:45am              (materialized refunds vs raw rows)
     - Google Ads (Sheet): 6:00am               (campaign + product data from Sheets)
       OR Google Ads API:  9:30pm, 12:30am, 3:30am, 6:30am (4x/night)
     - Cost Sheet (NETT):  4:30am               (product costs from Google Sheets)
@@ -801,6 +906,17 @@ def setup_scheduler():
         coalesce=True,
     )
 
+    # Refund totals per line item — verified after the last overnight Shopify run
+    scheduler.add_job(
+        _guarded(verify_refund_rollup),
+        trigger=CronTrigger(hour=7, minute=45, timezone=SYDNEY_TZ),
+        id='refund_rollup_verify',
+        name='Refund Rollup Verification',
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
     # ── Google Ads ───────────────────────────────────────
     if settings.google_ads_sheet_id:
         scheduler.add_job(
@@ -922,6 +1038,16 @@ def setup_scheduler():
         coalesce=True,
     )
 
+    scheduler.add_job(
+        _guarded(run_churn_scoring),
+        trigger=CronTrigger(hour=3, minute=30, timezone=SYDNEY_TZ),
+        id='churn_scoring',
+        name='Churn Risk Daily Scoring',
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
     # ── Caprice Pricing ──────────────────────────────────
     scheduler.add_job(
         _guarded(sync_caprice_pricing),
@@ -0,0 +1,66 @@
+"""
+Ad Spend Change Tracking
+
+Records which campaign days changed since AdSpendProcessor last ran
+(ad_spend_dirty_campaigns), so an incremental run recomputes only those
+campaigns' windows:
+
+    google_ads           campaign rows saved by the API sync, sheet or CSV import
+    google_ads_products  product rows saved (product performance is rebuilt)
+    shopify              orders attributed to a campaign saved or re-resolved
+
+Writers call mark_dirty() inside their own transaction; the processor reads
+pending marks up to a high-water id and clears exactly those afterwards, so
+marks written while it runs are kept for the next run.
+"""
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.ad_spend import AdSpendDirtyCampaign
+
+
+SOURCE_GOOGLE_ADS = 'google_ads'
+SOURCE_GOOGLE_ADS_PRODUCTS = 'google_ads_products'
+SOURCE_SHOPIFY = 'shopify'
+
+
+def mark_dirty(
+    db: Session,
+    touched: Iterable[Tuple[Optional[str], Optional[date]]],
+    source: str,
+    commit: bool = False,
+) -> int:
+    """Record (campaign_id, date) pairs as changed. Returns the number written."""
+    now = datetime.utcnow()
+    marks = [
+        {'campaign_id': campaign_id, 'date': day, 'source': source, 'marked_at': now}
+        for campaign_id, day in set(touched)
+    ]
+    if marks:
+        db.bulk_insert_mappings(AdSpendDirtyCampaign, marks)
+    if commit:
+        db.commit()
+    return len(marks)
+
+
+def pending_marks(db: Session) -> Tuple[Optional[int], List]:
+    """
+    Pending (id, campaign_id, date, source) rows and the highest id among
+    them (None when there are none).
+    """
+    m = AdSpendDirtyCampaign
+    marks = db.query(m.id, m.campaign_id, m.date, m.source).order_by(m.id).all()
+    return (marks[-1].id if marks else None), marks
+
+
+def clear_marks(db: Session, up_to_id: Optional[int]) -> int:
+    """Delete marks consumed by a run (ids up to and including up_to_id)."""
+    if up_to_id is None:
+        return 0
+    cleared = db.query(AdSpendDirtyCampaign).filter(
+        AdSpendDirtyCampaign.id <= up_to_id
+    ).delete(synchronize_session=False)
+    db.commit()
+    return cleared
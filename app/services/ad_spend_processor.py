@@ -8,6 +8,12 @@ Transforms raw google_ads_campaigns daily data into:
 
 Designed to be idempotent: re-running overwrites previous results for
 the same period without creating duplicates.
+
+Runs are incremental by default: only campaigns marked dirty since the last
+run (ad_spend_changes — Google Ads imports, Shopify order saves), or whose
+stored row is missing or for a different window, are recomputed. When the
+window end moves every campaign is stale, which makes it a full rebuild;
+process(full=True) forces one (e.g. after product cost changes).
 """
 import logging
 from datetime import datetime, date, timedelta
@@ -29,6 +35,7 @@ from app.models.product_cost import ProductCost
 from app.models.product import Product
 from app.services.shopify_revenue_attribution import ShopifyRevenueAttributionService
 from app.services.finance_service import FinanceService
+from app.services.ad_spend_changes import SOURCE_GOOGLE_ADS_PRODUCTS, clear_marks, pending_marks
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +46,8 @@ class AdSpendProcessor:
 
     Usage:
         processor = AdSpendProcessor(db)
-        result = processor.process(days=30)
+        result = processor.process(days=30)             # changed campaigns only
+        result = processor.process(days=30, full=True)  # rebuild everything
     """
 
     # Thresholds (matching AdSpendService)
@@ -55,9 +63,9 @@ class AdSpendProcessor:
     def __init__(self, db: Session):
         self.db = db
 
-    def process(self, days: int = 30) -> Dict:
+    def process(self, days: int = 30, full: bool = False) -> Dict:
         """Main pipeline entry point. Idempotent."""
-        logger.info(f"AdSpendProcessor: starting for last {days} days")
+        logger.info(f"AdSpendProcessor: starting for last {days} days{' (full rebuild)' if full else ''}")
         start_time = datetime.utcnow()
 
         # Anchor to latest ads data row — never fall back to calendar today
@@ -77,12 +85,41 @@ class AdSpendProcessor:
         period_end = max_date
         period_start = period_end - timedelta(days=days - 1)
 
+        # Step 0: Work out which campaigns changed since the last run
+        marks_up_to, marks = pending_marks(self.db)
+        window_ids = self._campaign_ids_in_window(period_start, period_end)
+        dirty_ids = self._dirty_campaign_ids(window_ids, marks, period_start, period_end, days)
+        full = full or set(dirty_ids) == set(window_ids)
+        products_dirty = full or any(
+            m.source == SOURCE_GOOGLE_ADS_PRODUCTS and (m.date is None or period_start <= m.date <= period_end)
+            for m in marks
+        )
+        mode = "full" if full else "incremental"
+
+        if not full and not dirty_ids and not products_dirty:
+            clear_marks(self.db, marks_up_to)
+            logger.info(f"AdSpendProcessor: no changes in {len(window_ids)} campaigns since last run")
+            return {
+                "mode": mode,
+                "campaigns_processed": 0,
+                "campaigns_in_window": len(window_ids),
+                "campaign_performance": {"upserted": 0, "created": 0, "updated": 0},
+                "waste_detected": {"created": 0, "cleared": 0},
+                "optimizations_generated": {"created": 0, "cleared": 0},
+                "product_performance": {"processed": 0, "profitable": 0, "losing_money": 0},
+                "period": {"start": period_start.isoformat(), "end": period_end.isoformat(), "days": days},
+                "message": "No campaign changes since the last run",
+                "duration_seconds": round((datetime.utcnow() - start_time).total_seconds(), 2),
+            }
+
         # Step 1: Aggregate
-        aggregated = self._aggregate_campaigns(period_start, period_end)
-        logger.info(f"  Aggregated {len(aggregated)} campaigns")
+        aggregated = self._aggregate_campaigns(period_start, period_end, None if full else dirty_ids)
+        logger.info(f"  Aggregated {len(aggregated)} of {len(window_ids)} campaigns ({mode})")
 
-        if not aggregated:
+        if not aggregated and full:
+            clear_marks(self.db, marks_up_to)
             return {
+                "mode": mode,
                 "campaigns_processed": 0,
                 "campaign_performance": {"upserted": 0, "created": 0, "updated": 0},
                 "waste_detected": {"created": 0, "cleared": 0},
@@ -93,34 +130,47 @@ class AdSpendProcessor:
                 "duration_seconds": round((datetime.utcnow() - start_time).total_seconds(), 2),
             }
 
-        # Step 1.5: Shopify revenue attribution
-        attribution_service = ShopifyRevenueAttributionService(self.db)
-        campaign_ids = [agg["campaign_id"] for agg in aggregated]
-        shopify_data = attribution_service.get_campaign_revenue(
-            campaign_ids, period_start, period_end
-        )
+        perf_counts = {"upserted": 0, "created": 0, "updated": 0}
+        waste_counts = {"created": 0, "cleared": 0}
+        opt_counts = {"created": 0, "cleared": 0}
+        shopify_data = {}
+        if aggregated:
+            # Step 1.5: Shopify revenue attribution
+            attribution_service = ShopifyRevenueAttributionService(self.db)
+            campaign_ids = [agg["campaign_id"] for agg in aggregated]
+            shopify_data = attribution_service.get_campaign_revenue(
+                campaign_ids, period_start, period_end
+            )
 
-        # Step 1.6: Get overhead per order from finance service
-        finance_service = FinanceService(self.db)
-        overhead_per_order = finance_service.get_latest_overhead_per_order()
+            # Step 1.6: Get overhead per order from finance service
+            finance_service = FinanceService(self.db)
+            overhead_per_order = finance_service.get_latest_overhead_per_order()
 
-        # Step 2: Derive metrics (with Shopify data where available)
-        performance_rows = self._build_performance_rows(
-            aggregated, period_start, period_end, days, shopify_data, overhead_per_order
-        )
+            # Step 2: Derive metrics (with Shopify data where available)
+            performance_rows = self._build_performance_rows(
+                aggregated, period_start, period_end, days, shopify_data, overhead_per_order
+            )
 
-        # Step 3: Upsert campaign_performance
-        perf_counts = self._upsert_campaign_performance(performance_rows)
+            # Step 3: Upsert campaign_performance
+            perf_counts = self._upsert_campaign_performance(performance_rows)
 
-        # Step 4: Detect waste
-        waste_counts = self._detect_waste(performance_rows, days)
+            # Step 4: Detect waste
+            waste_counts = self._detect_waste(performance_rows, days, None if full else campaign_ids)
 
-        # Step 5: Generate optimizations
-        opt_counts = self._generate_optimizations(performance_rows)
+            # Step 5: Generate optimizations — pairs span all campaigns, so an
+            # incremental run ranks fresh rows together with the stored ones
+            if not full:
+                performance_rows = performance_rows + self._stored_performance_rows(
+                    window_ids, set(campaign_ids), period_end, days
+                )
+            opt_counts = self._generate_optimizations(performance_rows)
 
         # Step 6: Process product performance
-        product_counts = self._process_product_performance(period_start, period_end, days)
+        product_counts = {"processed": 0, "profitable": 0, "losing_money": 0}
+        if products_dirty:
+            product_counts = self._process_product_performance(period_start, period_end, days)
 
+        clear_marks(self.db, marks_up_to)
         duration = (datetime.utcnow() - start_time).total_seconds()
 
         attribution_stats = {
@@ -132,7 +182,9 @@ class AdSpendProcessor:
         }
 
         result = {
+            "mode": mode,
             "campaigns_processed": len(aggregated),
+            "campaigns_in_window": len(window_ids),
             "campaign_performance": perf_counts,
             "waste_detected": waste_counts,
             "optimizations_generated": opt_counts,
@@ -143,17 +195,71 @@ class AdSpendProcessor:
         }
 
         logger.info(
-            f"AdSpendProcessor: done in {duration:.1f}s — "
+            f"AdSpendProcessor: done in {duration:.1f}s ({mode}) — "
             f"{perf_counts['upserted']} campaigns, "
             f"{waste_counts['created']} waste, "
             f"{opt_counts['created']} optimizations"
         )
         return result
 
+    # ── Step 0: Change tracking ──────────────────────────────────────
+
+    def _campaign_ids_in_window(self, period_start: date, period_end: date) -> List[str]:
+        return [
+            r.campaign_id for r in self.db.query(GoogleAdsCampaign.campaign_id).filter(
+                GoogleAdsCampaign.date >= period_start,
+                GoogleAdsCampaign.date <= period_end,
+            ).distinct().all()
+        ]
+
+    def _dirty_campaign_ids(
+        self, window_ids: List[str], marks: List, period_start: date, period_end: date, days: int,
+    ) -> List[str]:
+        """
+        Campaigns in the window that need recomputing: marked changed on a
+        day inside the window, or with no stored row for this exact window.
+
+        Shopify marks carry normalized ids (no CSV '.0' suffix), so ids are
+        compared normalized.
+        """
+        normalize = ShopifyRevenueAttributionService._normalize_campaign_id
+        marked = {
+            normalize(m.campaign_id) for m in marks
+            if m.campaign_id and (m.date is None or period_start <= m.date <= period_end)
+        }
+        stored = {
+            r.campaign_id: (r.period_end, r.period_days)
+            for r in self.db.query(
+                CampaignPerformance.campaign_id, CampaignPerformance.period_end, CampaignPerformance.period_days,
+            ).filter(CampaignPerformance.campaign_id.in_(window_ids)).all()
+        } if window_ids else {}
+        current = (datetime.combine(period_end, datetime.min.time()), days)
+        return [
+            cid for cid in window_ids
+            if normalize(cid) in marked or stored.get(cid) != current
+        ]
+
+    def _stored_performance_rows(
+        self, window_ids: List[str], exclude: set, period_end: date, days: int,
+    ) -> List[Dict]:
+        """Current-window campaign_performance rows of campaigns not recomputed this run."""
+        keep = [cid for cid in window_ids if cid not in exclude]
+        if not keep:
+            return []
+        rows = self.db.query(CampaignPerformance).filter(
+            CampaignPerformance.campaign_id.in_(keep),
+            CampaignPerformance.period_end == datetime.combine(period_end, datetime.min.time()),
+            CampaignPerformance.period_days == days,
+        ).all()
+        columns = [c.name for c in CampaignPerformance.__table__.columns]
+        return [{c: getattr(r, c) for c in columns} for r in rows]
+
     # ── Step 1: Aggregate ────────────────────────────────────────────
 
-    def _aggregate_campaigns(self, period_start: date, period_end: date) -> List[Dict]:
-        rows = (
+    def _aggregate_campaigns(
+        self, period_start: date, period_end: date, campaign_ids: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        query = (
             self.db.query(
                 GoogleAdsCampaign.campaign_id,
                 func.max(GoogleAdsCampaign.campaign_name).label("campaign_name"),
@@ -172,11 +278,12 @@ class AdSpendProcessor:
                 GoogleAdsCampaign.date >= period_start,
                 GoogleAdsCampaign.date <= period_end,
             )
-            .group_by(GoogleAdsCampaign.campaign_id)
-            .all()
         )
+        if campaign_ids is not None:
+            query = query.filter(GoogleAdsCampaign.campaign_id.in_(campaign_ids))
+        rows = query.group_by(GoogleAdsCampaign.campaign_id).all()
 
-        latest_statuses = self._get_latest_campaign_statuses(period_start, period_end)
+        latest_statuses = self._get_latest_campaign_statuses(period_start, period_end, campaign_ids)
 
         return [
             {
@@ -197,8 +304,10 @@ class AdSpendProcessor:
             for r in rows
         ]
 
-    def _get_latest_campaign_statuses(self, period_start: date, period_end: date) -> Dict[str, str]:
-        max_date_sub = (
+    def _get_latest_campaign_statuses(
+        self, period_start: date, period_end: date, campaign_ids: Optional[List[str]] = None,
+    ) -> Dict[str, str]:
+        max_date_query = (
             self.db.query(
                 GoogleAdsCampaign.campaign_id,
                 func.max(GoogleAdsCampaign.date).label("max_date"),
@@ -207,9 +316,10 @@ class AdSpendProcessor:
                 GoogleAdsCampaign.date >= period_start,
                 GoogleAdsCampaign.date <= period_end,
             )
-            .group_by(GoogleAdsCampaign.campaign_id)
-            .subquery()
         )
+        if campaign_ids is not None:
+            max_date_query = max_date_query.filter(GoogleAdsCampaign.campaign_id.in_(campaign_ids))
+        max_date_sub = max_date_query.group_by(GoogleAdsCampaign.campaign_id).subquery()
 
         rows = (
             self.db.query(
@@ -240,6 +350,7 @@ class AdSpendProcessor:
         overhead_per_order: Optional[Decimal] = None,
     ) -> List[Dict]:
         results = []
+        triage_inputs = []
         shopify_data = shopify_data or {}
 
         for agg in aggregated:
@@ -392,6 +503,7 @@ class AdSpendProcessor:
                 decision['action'] = 'investigate'
 
             # ── Causal triage (Capability 1) — only for non-scaling campaigns ──
+            # Filled in for the whole batch after the loop (_apply_causal_triage)
             primary_cause = None
             cause_confidence = None
             cause_evidence = None
@@ -400,28 +512,12 @@ class AdSpendProcessor:
             lp_is_friction = None
 
             if decision['action'] != 'scale_what_works':
-                try:
-                    from app.services.causal_triage import CausalTriageService
-                    triage_svc = CausalTriageService(self.db)
-                    triage = triage_svc.diagnose(
-                        agg["campaign_id"], period_start, period_end,
-                        google_conversions, actual_conversions,
-                        campaign_name=agg["campaign_name"],
-                    )
-                    primary_cause = triage['primary_cause']
-                    cause_confidence = triage['confidence']
-                    cause_evidence = triage['causes']
-
-                    # Extract LP metrics for storage
-                    lp_cause = next(
-                        (c for c in triage['causes'] if c['cause'] == 'landing_page'), None
-                    )
-                    if lp_cause:
-                        lp_cvr_change = lp_cause.get('cvr_change')
-                        lp_bounce_change = lp_cause.get('bounce_change')
-                        lp_is_friction = lp_cause['score'] >= 0.7
-                except Exception as e:
-                    logger.warning(f"Triage failed for {agg['campaign_id']}: {e}")
+                triage_inputs.append({
+                    "campaign_id": agg["campaign_id"],
+                    "campaign_name": agg["campaign_name"],
+                    "google_conversions": google_conversions,
+                    "actual_conversions": actual_conversions,
+                })
 
             results.append({
                 "campaign_id": agg["campaign_id"],
@@ -485,8 +581,39 @@ class AdSpendProcessor:
                 "analyzed_at": datetime.utcnow(),
             })
 
+        if triage_inputs:
+            self._apply_causal_triage(results, triage_inputs, period_start, period_end)
+
         return results
 
+    def _apply_causal_triage(
+        self, rows: List[Dict], triage_inputs: List[Dict], period_start: date, period_end: date,
+    ) -> None:
+        """Run causal triage for all non-scaling campaigns at once and fill in their rows."""
+        try:
+            from app.services.causal_triage import CausalTriageService
+            triage_by_cid = CausalTriageService(self.db).diagnose_all(triage_inputs, period_start, period_end)
+        except Exception as e:
+            logger.warning(f"Triage failed for {len(triage_inputs)} campaigns: {e}")
+            return
+
+        for row in rows:
+            triage = triage_by_cid.get(row["campaign_id"])
+            if triage is None:
+                continue
+            row["primary_cause"] = triage['primary_cause']
+            row["cause_confidence"] = triage['confidence']
+            row["cause_evidence"] = triage['causes']
+
+            # Extract LP metrics for storage
+            lp_cause = next(
+                (c for c in triage['causes'] if c['cause'] == 'landing_page'), None
+            )
+            if lp_cause:
+                row["lp_cvr_change"] = lp_cause.get('cvr_change')
+                row["lp_bounce_change"] = lp_cause.get('bounce_change')
+                row["lp_is_friction"] = lp_cause['score'] >= 0.7
+
     def _determine_action(self, true_roas, is_scaling, is_wasting, total_spend, conversions) -> str:
         if is_scaling:
             return "scale"
@@ -550,12 +677,17 @@ class AdSpendProcessor:
 
     # ── Step 4: Detect waste ─────────────────────────────────────────
 
-    def _detect_waste(self, performance_rows: List[Dict], days: int) -> Dict:
-        # Clear existing active waste for idempotency
-        cleared = self.db.query(AdWaste).filter(
+    def _detect_waste(
+        self, performance_rows: List[Dict], days: int, campaign_ids: Optional[List[str]] = None,
+    ) -> Dict:
+        # Clear existing active waste for idempotency (only the recomputed campaigns' on incremental runs)
+        stale = self.db.query(AdWaste).filter(
             AdWaste.status == "active",
             AdWaste.period_days == days,
-        ).delete()
+        )
+        if campaign_ids is not None:
+            stale = stale.filter(AdWaste.campaign_id.in_(campaign_ids))
+        cleared = stale.delete(synchronize_session=False)
         self.db.commit()
 
         created = 0
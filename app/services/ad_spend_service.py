@@ -5,6 +5,7 @@ Analyzes Google Ads performance with true ROAS calculations.
 Answers: "Where am I wasting ad spend? Where should I scale?"
 """
 from typing import List, Dict, Optional
+from collections import defaultdict
 from datetime import datetime, timedelta, date
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func
@@ -12,6 +13,9 @@ from decimal import Decimal
 import statistics
 import math
 
+import numpy as np
+import pandas as pd
+
 from app.models.ad_spend import (
     CampaignPerformance,
     AdSpendOptimization,
@@ -19,6 +23,10 @@ from app.models.ad_spend import (
     ProductAdPerformance
 )
 from app.models.google_ads_data import GoogleAdsCampaign
+from app.services.ads_analysis_context import AdsAnalysisContext, DAILY_COLUMNS, daily_frame
+from app.services.ads_analytics import (
+    iso_weeks, linear_trend, percentile_rank, period_metrics, safe_ratio, trend_labels,
+)
 from app.services.finance_service import FinanceService
 from app.services.campaign_strategy import format_why_now, STRATEGY_THRESHOLDS
 from app.utils.logger import log
@@ -40,8 +48,27 @@ class AdSpendService:
         self.min_product_margin = 0.30  # 30% minimum margin after ads
         self.min_profit_roas = 1.5  # Minimum profit ROAS
 
+        # Shared data for a multi-section analysis (see load_analysis_context)
+        self._ctx: Optional[AdsAnalysisContext] = None
+
+    def load_analysis_context(self, days: int, history_days: Optional[int] = None) -> AdsAnalysisContext:
+        """
+        Load the shared analysis data for `days` once and attach it.
+
+        Until detached, period lookups and daily-row reads come from the
+        context instead of the database, so sections can run concurrently.
+        """
+        self._ctx = None
+        self._ctx = AdsAnalysisContext.load(self, days, history_days)
+        return self._ctx
+
+    def detach_analysis_context(self):
+        self._ctx = None
+
     def _get_ads_data_end_date(self) -> date:
         """Use latest Google Ads row date as analysis boundary to avoid trailing empty days."""
+        if self._ctx is not None:
+            return self._ctx.end_date
         max_date = self.db.query(func.max(GoogleAdsCampaign.date)).scalar()
         return max_date or datetime.utcnow().date()
 
@@ -50,6 +77,9 @@ class AdSpendService:
         Return active campaign snapshots for the requested period, with fallback
         to latest available period to avoid empty responses.
         """
+        if self._ctx is not None and self._ctx.days == days:
+            return self._ctx.campaigns
+
         campaigns = self.db.query(CampaignPerformance).filter(
             CampaignPerformance.is_active == True,
             CampaignPerformance.period_days == days
@@ -68,6 +98,46 @@ class AdSpendService:
             CampaignPerformance.period_days == latest_period
         ).all()
 
+    def _daily_rows(self, start: date, end: Optional[date] = None, campaign_id: Optional[str] = None) -> List:
+        """google_ads_campaigns rows with start <= date (< end), in date order."""
+        if self._ctx is not None and self._ctx.covers(start):
+            return self._ctx.daily_rows(start, end, campaign_id)
+
+        query = self.db.query(GoogleAdsCampaign).filter(GoogleAdsCampaign.date >= start)
+        if end is not None:
+            query = query.filter(GoogleAdsCampaign.date < end)
+        if campaign_id is not None:
+            query = query.filter(GoogleAdsCampaign.campaign_id == campaign_id)
+        return query.order_by(GoogleAdsCampaign.date).all()
+
+    def _daily_frame(self, start: date, end: Optional[date] = None) -> pd.DataFrame:
+        """Daily rows from `start` (to before `end`) as one frame, in date order."""
+        if self._ctx is not None and self._ctx.covers(start):
+            return self._ctx.daily_slice(start, end)
+
+        query = self.db.query(*[getattr(GoogleAdsCampaign, c) for c in DAILY_COLUMNS]).filter(
+            GoogleAdsCampaign.date >= start
+        )
+        if end is not None:
+            query = query.filter(GoogleAdsCampaign.date < end)
+        return daily_frame(query.order_by(GoogleAdsCampaign.date, GoogleAdsCampaign.id).all())
+
+    def _campaigns_with_rows(self, start: date, require: Optional[str] = None) -> List[tuple]:
+        """Distinct (campaign_id, campaign_name) with daily rows from `start`."""
+        if self._ctx is not None and self._ctx.covers(start):
+            return self._ctx.campaigns_with_rows(start, require)
+
+        query = self.db.query(
+            GoogleAdsCampaign.campaign_id,
+            GoogleAdsCampaign.campaign_name
+        ).filter(GoogleAdsCampaign.date >= start)
+        if require is not None:
+            query = query.filter(getattr(GoogleAdsCampaign, require).isnot(None))
+        return query.group_by(
+            GoogleAdsCampaign.campaign_id,
+            GoogleAdsCampaign.campaign_name
+        ).all()
+
     async def analyze_all_campaigns(self, days: int = 30) -> Dict:
         """
         Complete ad spend analysis
@@ -677,87 +747,35 @@ class AdSpendService:
         if not campaigns:
             return []
 
-        results = []
-
-        for campaign in campaigns:
-            cid = campaign.campaign_id
-
-            # Current period daily rows
-            current_rows = self.db.query(GoogleAdsCampaign).filter(
-                GoogleAdsCampaign.campaign_id == cid,
-                GoogleAdsCampaign.date >= cutoff_current
-            ).all()
-
-            # Prior period daily rows
-            prior_rows = self.db.query(GoogleAdsCampaign).filter(
-                GoogleAdsCampaign.campaign_id == cid,
-                GoogleAdsCampaign.date >= cutoff_prior,
-                GoogleAdsCampaign.date < cutoff_current
-            ).all()
-
-            def _aggregate(rows):
-                total_cost = sum((r.cost_micros or 0) for r in rows) / 1_000_000
-                total_clicks = sum((r.clicks or 0) for r in rows)
-                total_impressions = sum((r.impressions or 0) for r in rows)
-                total_conversions = sum((r.conversions or 0) for r in rows)
-                total_conv_value = sum((r.conversions_value or 0) for r in rows)
-
-                avg_cpc = total_cost / total_clicks if total_clicks > 0 else 0
-                avg_ctr = total_clicks / total_impressions if total_impressions > 0 else 0
-                conv_rate = total_conversions / total_clicks if total_clicks > 0 else 0
-                cpa = total_cost / total_conversions if total_conversions > 0 else 0
-                aov = total_conv_value / total_conversions if total_conversions > 0 else 0
-
-                return {
-                    'avg_cpc': round(avg_cpc, 2),
-                    'avg_ctr': round(avg_ctr, 4),
-                    'conv_rate': round(conv_rate, 4),
-                    'cpa': round(cpa, 2),
-                    'aov': round(aov, 2),
-                }
-
-            current_metrics = _aggregate(current_rows)
-            prior_metrics = _aggregate(prior_rows)
-
-            def _trend(current_val, prior_val):
-                if prior_val == 0:
-                    return "stable"
-                if current_val > prior_val * 1.1:
-                    return "rising"
-                if current_val < prior_val * 0.9:
-                    return "falling"
-                return "stable"
-
-            trends = {
-                'cpc_trend': _trend(current_metrics['avg_cpc'], prior_metrics['avg_cpc']),
-                'ctr_trend': _trend(current_metrics['avg_ctr'], prior_metrics['avg_ctr']),
-                'conv_rate_trend': _trend(current_metrics['conv_rate'], prior_metrics['conv_rate']),
-                'cpa_trend': _trend(current_metrics['cpa'], prior_metrics['cpa']),
-                'aov_trend': _trend(current_metrics['aov'], prior_metrics['aov']),
-            }
-
-            # Weekly data points for charting
-            weekly_data = []
-            week_buckets = {}
-            for row in current_rows:
-                week_key = row.date.isocalendar()[1]
-                if week_key not in week_buckets:
-                    week_buckets[week_key] = []
-                week_buckets[week_key].append(row)
-
-            for week_num in sorted(week_buckets.keys()):
-                week_agg = _aggregate(week_buckets[week_num])
-                weekly_data.append({
-                    'week': week_num,
-                    **week_agg
-                })
+        # Current and prior period totals for every campaign at once
+        frame = self._daily_frame(cutoff_prior)
+        is_current = (frame['date'] >= cutoff_current).to_numpy()
+        current = period_metrics(frame[is_current], ['campaign_id'])
+        prior = period_metrics(frame[~is_current], ['campaign_id'])
+        current_rows = frame[is_current].assign(week=iso_weeks(frame.loc[is_current, 'date'])[1])
+        weekly = period_metrics(current_rows, ['campaign_id', 'week'])
+
+        cids = [c.campaign_id for c in campaigns]
+        current = current.reindex(cids, fill_value=0.0)
+        prior = prior.reindex(cids, fill_value=0.0)
+        trends = pd.DataFrame({
+            f'{metric}_trend': trend_labels(current[metric], prior[metric])
+            for metric in ('avg_cpc', 'avg_ctr', 'conv_rate', 'cpa', 'aov')
+        }, index=cids).rename(columns={'avg_cpc_trend': 'cpc_trend', 'avg_ctr_trend': 'ctr_trend'})
+        weekly_by_campaign = defaultdict(list)
+        for row in weekly.reset_index().sort_values(['campaign_id', 'week']).to_dict('records'):
+            weekly_by_campaign[row.pop('campaign_id')].append(row)
 
+        results = []
+        for campaign, metrics, trend in zip(
+            campaigns, current.to_dict('records'), trends.to_dict('records'),
+        ):
             results.append({
-                'campaign_id': cid,
+                'campaign_id': campaign.campaign_id,
                 'campaign_name': campaign.campaign_name,
-                'metrics': current_metrics,
-                'trends': trends,
-                'weekly_data': weekly_data,
+                'metrics': metrics,
+                'trends': trend,
+                'weekly_data': weekly_by_campaign.get(campaign.campaign_id, []),
             })
 
         log.info(f"Deep metrics calculated for {len(results)} campaigns")
@@ -777,90 +795,64 @@ class AdSpendService:
         if not campaigns:
             return []
 
-        # Collect CTR and conversion rate values for percentile ranking
-        ctr_values = sorted([c.click_through_rate or 0 for c in campaigns])
-        conv_rates = []
-        for c in campaigns:
-            if c.actual_conversions and c.total_clicks and c.total_clicks > 0:
-                conv_rates.append(c.actual_conversions / c.total_clicks)
-            else:
-                conv_rates.append(0)
-        conv_values_sorted = sorted(conv_rates)
+        cids = [c.campaign_id for c in campaigns]
 
-        def _percentile_rank(value, sorted_list):
-            if not sorted_list:
-                return 0
-            count_below = sum(1 for v in sorted_list if v < value)
-            return count_below / len(sorted_list)
+        # CTR and conversion rate percentile ranks among campaigns
+        ctr_ranks = percentile_rank([c.click_through_rate or 0 for c in campaigns])
+        conv_ranks = percentile_rank([
+            c.actual_conversions / c.total_clicks
+            if c.actual_conversions and c.total_clicks and c.total_clicks > 0 else 0
+            for c in campaigns
+        ])
 
         end_date = self._get_ads_data_end_date()
         cutoff = end_date - timedelta(days=13)
+        is_cutoff = end_date - timedelta(days=days - 1)
+
+        # CPC trend over the last 2 weeks: first half of each campaign's rows vs second half
+        recent = self._daily_frame(min(cutoff, is_cutoff))
+        recent_rows = recent[(recent['date'] >= cutoff).to_numpy()]
+        by_campaign = recent_rows.groupby('campaign_id')
+        row_count = by_campaign['date'].transform('size')
+        halves = recent_rows.assign(
+            late=by_campaign.cumcount() >= row_count // 2,
+            cost=recent_rows['cost_micros'].astype(float),
+        )[(row_count >= 7).to_numpy()]
+        half_totals = (
+            halves.groupby(['campaign_id', 'late'])[['cost', 'clicks']].sum().unstack('late')
+            .reindex(index=cids, columns=pd.MultiIndex.from_product([['cost', 'clicks'], [False, True]]))
+            .fillna(0)
+        )
+        w1_cpc = safe_ratio(half_totals[('cost', False)] / 1_000_000, half_totals[('clicks', False)])
+        w2_cpc = safe_ratio(half_totals[('cost', True)] / 1_000_000, half_totals[('clicks', True)])
+        cpc_change = safe_ratio(w2_cpc - w1_cpc, w1_cpc)
+        cpc_trend_scores = np.select(
+            [w1_cpc <= 0, cpc_change < -0.05, cpc_change > 0.20, cpc_change > 0.05],
+            [10, 15, 0, 5],  # default stable; falling CPC is good; sharply rising; rising
+            default=10,
+        )
+
+        # Average reported impression share over the period
+        period_rows = recent[(recent['date'] >= is_cutoff).to_numpy()]
+        avg_is = (
+            period_rows['search_impression_share'].astype(float)
+            .groupby(period_rows['campaign_id']).mean()
+            .reindex(cids).fillna(0).to_numpy()
+        )
+
+        components = pd.DataFrame({
+            'roas': np.minimum(30, np.array([c.true_roas or 0 for c in campaigns], dtype=float) * 6),
+            'ctr': ctr_ranks * 20,
+            'cpc_trend': cpc_trend_scores.astype(float),
+            'impression_share': (avg_is / 100.0) * 20,
+            'conversion_rate': conv_ranks * 15,
+        })
 
         results = []
 
-        for idx, campaign in enumerate(campaigns):
+        for campaign, (_, parts) in zip(campaigns, components.iterrows()):
             cid = campaign.campaign_id
-
-            # ROAS score (0-30): min(30, true_roas * 6) -- caps at 5x = 30 points
-            true_roas = campaign.true_roas or 0
-            roas_score = min(30, true_roas * 6)
-
-            # CTR score (0-20): percentile rank among campaigns * 20
-            ctr_val = campaign.click_through_rate or 0
-            ctr_score = _percentile_rank(ctr_val, ctr_values) * 20
-
-            # CPC trend score (0-15): based on last 2 weeks of daily data
-            recent_rows = self.db.query(GoogleAdsCampaign).filter(
-                GoogleAdsCampaign.campaign_id == cid,
-                GoogleAdsCampaign.date >= cutoff
-            ).order_by(GoogleAdsCampaign.date).all()
-
-            cpc_trend_score = 10  # default stable
-            if len(recent_rows) >= 7:
-                mid = len(recent_rows) // 2
-                week1 = recent_rows[:mid]
-                week2 = recent_rows[mid:]
-
-                w1_cost = sum((r.cost_micros or 0) for r in week1) / 1_000_000
-                w1_clicks = sum((r.clicks or 0) for r in week1)
-                w2_cost = sum((r.cost_micros or 0) for r in week2) / 1_000_000
-                w2_clicks = sum((r.clicks or 0) for r in week2)
-
-                w1_cpc = w1_cost / w1_clicks if w1_clicks > 0 else 0
-                w2_cpc = w2_cost / w2_clicks if w2_clicks > 0 else 0
-
-                if w1_cpc > 0:
-                    cpc_change = (w2_cpc - w1_cpc) / w1_cpc
-                    if cpc_change < -0.05:
-                        cpc_trend_score = 15  # falling CPC is good
-                    elif cpc_change > 0.20:
-                        cpc_trend_score = 0  # sharply rising
-                    elif cpc_change > 0.05:
-                        cpc_trend_score = 5  # rising
-                    else:
-                        cpc_trend_score = 10  # stable
-
-            # Impression share score (0-20)
-            is_cutoff = end_date - timedelta(days=days - 1)
-            is_rows = self.db.query(
-                func.avg(GoogleAdsCampaign.search_impression_share)
-            ).filter(
-                GoogleAdsCampaign.campaign_id == cid,
-                GoogleAdsCampaign.date >= is_cutoff,
-                GoogleAdsCampaign.search_impression_share.isnot(None)
-            ).scalar()
-
-            avg_is = float(is_rows) if is_rows else 0
-            impression_share_score = (avg_is / 100.0) * 20
-
-            # Conversion rate score (0-15): percentile rank * 15
-            cr_val = conv_rates[idx]
-            conversion_rate_score = _percentile_rank(cr_val, conv_values_sorted) * 15
-
-            health_score = round(
-                roas_score + ctr_score + cpc_trend_score
-                + impression_share_score + conversion_rate_score, 1
-            )
+            health_score = round(sum(float(value) for value in parts), 1)
 
             if health_score >= 80:
                 grade = 'A'
@@ -885,13 +877,7 @@ class AdSpendService:
                 'campaign_name': campaign.campaign_name,
                 'health_score': health_score,
                 'grade': grade,
-                'components': {
-                    'roas': round(roas_score, 1),
-                    'ctr': round(ctr_score, 1),
-                    'cpc_trend': round(cpc_trend_score, 1),
-                    'impression_share': round(impression_share_score, 1),
-                    'conversion_rate': round(conversion_rate_score, 1),
-                },
+                'components': {name: round(float(value), 1) for name, value in parts.items()},
                 'color': color,
             })
 
@@ -976,7 +962,10 @@ class AdSpendService:
         """
         log.info(f"Calculating break-even ROAS for last {days} days")
 
-        overhead_per_order = FinanceService(self.db).get_latest_overhead_per_order()
+        if self._ctx is not None:
+            overhead_per_order = self._ctx.overhead_per_order
+        else:
+            overhead_per_order = FinanceService(self.db).get_latest_overhead_per_order()
 
         campaigns = self._get_campaigns_for_period(days)
 
@@ -1037,69 +1026,60 @@ class AdSpendService:
         cutoff = end_date - timedelta(days=days - 1)
 
         # Get distinct campaign IDs that have data
-        campaign_ids = self.db.query(
-            GoogleAdsCampaign.campaign_id,
-            GoogleAdsCampaign.campaign_name
-        ).filter(
-            GoogleAdsCampaign.date >= cutoff
-        ).group_by(
-            GoogleAdsCampaign.campaign_id,
-            GoogleAdsCampaign.campaign_name
-        ).all()
+        campaign_ids = self._campaigns_with_rows(cutoff)
+
+        # Daily spend / ROAS points for every campaign, sorted by spend within campaign
+        frame = self._daily_frame(cutoff)
+        spend = frame['cost_micros'].to_numpy(dtype=float) / 1_000_000
+        points = pd.DataFrame({
+            'campaign_id': frame['campaign_id'].to_numpy(),
+            'spend': spend,
+            'roas': safe_ratio(frame['conversions_value'].to_numpy(dtype=float), spend),
+        }).sort_values(['campaign_id', 'spend'], kind='stable', ignore_index=True)
+
+        # Spend quartile boundaries per campaign: [0, q1, q2, q3, max * 1.01)
+        sizes = points.groupby('campaign_id', sort=True).size()
+        offsets = np.concatenate([[0], np.cumsum(sizes.to_numpy())[:-1]]).astype(int)
+        n = sizes.to_numpy()
+        sorted_spend = points['spend'].to_numpy()
+        boundaries = pd.DataFrame({
+            'q1': sorted_spend[offsets + n // 4],
+            'q2': sorted_spend[offsets + n // 2],
+            'q3': sorted_spend[offsets + (3 * n) // 4],
+            'top': sorted_spend[offsets + n - 1] * 1.01,  # slight overshoot for inclusion
+        }, index=sizes.index) if len(sizes) else pd.DataFrame(columns=['q1', 'q2', 'q3', 'top'])
+
+        # Bucket index = number of quartile boundaries at or below the day's spend
+        edges = boundaries.reindex(points['campaign_id']).to_numpy()
+        points['bucket'] = (sorted_spend[:, None] >= edges[:, :3]).sum(axis=1)
+        in_range = sorted_spend < edges[:, 3]
+        bucket_stats = defaultdict(list)
+        for row in (
+            points[in_range].groupby(['campaign_id', 'bucket'])['roas'].agg(['mean', 'size'])
+            .reset_index().to_dict('records')
+        ):
+            bucket_stats[row['campaign_id']].append(row)
+        current_spend = points.groupby('campaign_id')['spend'].mean().to_dict()
+        boundaries = boundaries.to_dict('index')
+        sizes = sizes.to_dict()
 
         results = []
 
         for cid, cname in campaign_ids:
-            rows = self.db.query(GoogleAdsCampaign).filter(
-                GoogleAdsCampaign.campaign_id == cid,
-                GoogleAdsCampaign.date >= cutoff
-            ).all()
-
-            if len(rows) < 14:
-                continue
-
-            # Build daily data points
-            daily_data = []
-            for row in rows:
-                daily_spend = (row.cost_micros or 0) / 1_000_000
-                if daily_spend > 0:
-                    daily_roas = (row.conversions_value or 0) / daily_spend
-                else:
-                    daily_roas = 0
-                daily_data.append({'spend': daily_spend, 'roas': daily_roas})
-
-            if not daily_data:
-                continue
-
-            # Sort by spend to calculate quartiles
-            spends = sorted(d['spend'] for d in daily_data)
-            n = len(spends)
-
-            if n < 4:
+            if sizes.get(cid, 0) < 14:
                 continue
 
-            # Calculate quartile boundaries
-            q1 = spends[n // 4]
-            q2 = spends[n // 2]
-            q3 = spends[(3 * n) // 4]
-            boundaries = [0, q1, q2, q3, spends[-1] * 1.01]  # slight overshoot for inclusion
-
+            edge = boundaries[cid]
+            bounds = [0, edge['q1'], edge['q2'], edge['q3'], edge['top']]
             buckets = []
-            for i in range(len(boundaries) - 1):
-                lo = boundaries[i]
-                hi = boundaries[i + 1]
-                bucket_data = [d for d in daily_data if lo <= d['spend'] < hi]
-
-                if not bucket_data:
-                    continue
-
-                avg_roas = sum(d['roas'] for d in bucket_data) / len(bucket_data)
+            for stats in bucket_stats.get(cid, []):
+                lo, hi = bounds[stats['bucket']], bounds[stats['bucket'] + 1]
                 buckets.append({
                     'range_label': f"${lo:.0f}-${hi:.0f}",
                     'min_spend': round(lo, 2),
                     'max_spend': round(hi, 2),
-                    'avg_roas': round(avg_roas, 2),
-                    'days_count': len(bucket_data),
+                    'avg_roas': round(stats['mean'], 2),
+                    'days_count': stats['size'],
                 })
 
             if not buckets:
@@ -1109,7 +1089,7 @@ class AdSpendService:
             optimal_bucket = max(buckets, key=lambda b: b['avg_roas'])
             optimal_midpoint = (optimal_bucket['min_spend'] + optimal_bucket['max_spend']) / 2
 
-            current_daily_spend = sum(d['spend'] for d in daily_data) / len(daily_data)
+            current_daily_spend = current_spend[cid]
 
             overspend = 0
             if current_daily_spend > optimal_bucket['max_spend']:
@@ -1121,7 +1101,7 @@ class AdSpendService:
                 status = 'optimal'
 
             # DR curve confidence: need enough active days and stable buckets
-            active_days = len(daily_data)
+            active_days = sizes[cid]
             min_bucket_days = min(b['days_count'] for b in buckets)
             if active_days >= 21 and min_bucket_days >= 5:
                 dr_confidence = 'high'
@@ -1162,32 +1142,14 @@ class AdSpendService:
         prior_start = prior_end - timedelta(days=window_days)
 
         # Get campaigns with search_rank_lost_impression_share data
-        campaign_ids = self.db.query(
-            GoogleAdsCampaign.campaign_id,
-            GoogleAdsCampaign.campaign_name
-        ).filter(
-            GoogleAdsCampaign.date >= prior_start,
-            GoogleAdsCampaign.search_rank_lost_impression_share.isnot(None)
-        ).group_by(
-            GoogleAdsCampaign.campaign_id,
-            GoogleAdsCampaign.campaign_name
-        ).all()
+        campaign_ids = self._campaigns_with_rows(prior_start, require='search_rank_lost_impression_share')
 
         results = []
 
         for cid, cname in campaign_ids:
-            # Current 30d
-            current_rows = self.db.query(GoogleAdsCampaign).filter(
-                GoogleAdsCampaign.campaign_id == cid,
-                GoogleAdsCampaign.date >= current_start
-            ).all()
-
-            # Prior 30d
-            prior_rows = self.db.query(GoogleAdsCampaign).filter(
-                GoogleAdsCampaign.campaign_id == cid,
-                GoogleAdsCampaign.date >= prior_start,
-                GoogleAdsCampaign.date < prior_end
-            ).all()
+            # Current and prior windows
+            current_rows = self._daily_rows(current_start, campaign_id=cid)
+            prior_rows = self._daily_rows(prior_start, prior_end, campaign_id=cid)
 
             if not current_rows or not prior_rows:
                 continue
@@ -1341,23 +1303,12 @@ class AdSpendService:
         end_date = self._get_ads_data_end_date()
         cutoff = end_date - timedelta(days=days - 1)
 
-        campaign_ids = self.db.query(
-            GoogleAdsCampaign.campaign_id,
-            GoogleAdsCampaign.campaign_name
-        ).filter(
-            GoogleAdsCampaign.date >= cutoff
-        ).group_by(
-            GoogleAdsCampaign.campaign_id,
-            GoogleAdsCampaign.campaign_name
-        ).all()
+        campaign_ids = self._campaigns_with_rows(cutoff)
 
         results = []
 
         for cid, cname in campaign_ids:
-            rows = self.db.query(GoogleAdsCampaign).filter(
-                GoogleAdsCampaign.campaign_id == cid,
-                GoogleAdsCampaign.date >= cutoff
-            ).order_by(GoogleAdsCampaign.date).all()
+            rows = self._daily_rows(cutoff, campaign_id=cid)
 
             if not rows:
                 continue
@@ -1479,13 +1430,15 @@ class AdSpendService:
                 })
 
         # Look up strategy types to deprioritize unknown/zombie campaigns
-        from app.models.ad_spend import CampaignPerformance as CP
-        strat_map = {
-            r.campaign_id: r.strategy_type
-            for r in self.db.query(CP.campaign_id, CP.strategy_type).filter(
-                CP.strategy_type.isnot(None)
-            ).all()
-        }
+        if self._ctx is not None:
+            strat_map = self._ctx.strategy_types
+        else:
+            strat_map = {
+                r.campaign_id: r.strategy_type
+                for r in self.db.query(CampaignPerformance.campaign_id, CampaignPerformance.strategy_type).filter(
+                    CampaignPerformance.strategy_type.isnot(None)
+                ).all()
+            }
         for a in results:
             a['strategy_type'] = strat_map.get(a['campaign_id'])
             is_unknown = a.get('strategy_type') == 'unknown'
@@ -1521,81 +1474,50 @@ class AdSpendService:
         end_date = self._get_ads_data_end_date()
         cutoff = end_date - timedelta(days=days - 1)
 
-        rows = self.db.query(GoogleAdsCampaign).filter(
-            GoogleAdsCampaign.date >= cutoff
-        ).order_by(GoogleAdsCampaign.date).all()
+        frame = self._daily_frame(cutoff)
 
-        if not rows:
+        if frame.empty:
             return {
                 'historical': [], 'projected': [],
                 'trend_direction': 'stable', 'confidence': 'low', 'r_squared': 0
             }
 
-        # Group by ISO week
-        week_data = {}
-        for row in rows:
-            wk = row.date.isocalendar()[1]
-            yr = row.date.isocalendar()[0]
-            key = (yr, wk)
-            if key not in week_data:
-                week_data[key] = {'spend': 0, 'revenue': 0, 'conversions': 0}
-            week_data[key]['spend'] += (row.cost_micros or 0) / 1_000_000
-            week_data[key]['revenue'] += (row.conversions_value or 0)
-            week_data[key]['conversions'] += (row.conversions or 0)
-
-        sorted_keys = sorted(week_data.keys())
-        if len(sorted_keys) < 3:
+        # Weekly totals by ISO (year, week)
+        iso_year, iso_week = iso_weeks(frame['date'])
+        weekly = pd.DataFrame({
+            'spend': frame['cost_micros'].to_numpy(dtype=float) / 1_000_000,
+            'revenue': frame['conversions_value'].to_numpy(dtype=float),
+            'conversions': frame['conversions'].to_numpy(dtype=float),
+        }).groupby([iso_year.to_numpy(), iso_week.to_numpy()]).sum()
+
+        if len(weekly) < 3:
             return {
                 'historical': [], 'projected': [],
                 'trend_direction': 'stable', 'confidence': 'low', 'r_squared': 0
             }
 
+        roas = safe_ratio(weekly['revenue'], weekly['spend'])
         historical = []
-        for i, key in enumerate(sorted_keys):
-            d = week_data[key]
-            roas = d['revenue'] / d['spend'] if d['spend'] > 0 else 0
+        for i, ((yr, wk), d) in enumerate(weekly.iterrows()):
             historical.append({
                 'week': i,
-                'week_label': f"{key[0]}-W{key[1]:02d}",
-                'spend': round(d['spend'], 2),
-                'revenue': round(d['revenue'], 2),
-                'conversions': round(d['conversions'], 1),
-                'roas': round(roas, 2),
+                'week_label': f"{yr}-W{wk:02d}",
+                'spend': round(float(d['spend']), 2),
+                'revenue': round(float(d['revenue']), 2),
+                'conversions': round(float(d['conversions']), 1),
+                'roas': round(float(roas[i]), 2),
             })
 
-        def _linear_regression(x_vals, y_vals):
-            n = len(x_vals)
-            if n < 2:
-                return 0, 0, 0
-
-            sum_x = sum(x_vals)
-            sum_y = sum(y_vals)
-            sum_xy = sum(x * y for x, y in zip(x_vals, y_vals))
-            sum_x2 = sum(x * x for x in x_vals)
-
-            denom = n * sum_x2 - sum_x * sum_x
-            if denom == 0:
-                return 0, sum_y / n if n > 0 else 0, 0
-
-            m = (n * sum_xy - sum_x * sum_y) / denom
-            b = (sum_y - m * sum_x) / n
-
-            # R-squared
-            mean_y = sum_y / n
-            ss_tot = sum((y - mean_y) ** 2 for y in y_vals)
-            ss_res = sum((y - (m * x + b)) ** 2 for x, y in zip(x_vals, y_vals))
-            r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
-
-            return m, b, r_squared
-
+        # Least-squares trend for revenue, spend and conversions in one call
         x = [h['week'] for h in historical]
         rev_y = [h['revenue'] for h in historical]
-        spend_y = [h['spend'] for h in historical]
-        conv_y = [h['conversions'] for h in historical]
-
-        m_rev, b_rev, r2_rev = _linear_regression(x, rev_y)
-        m_spend, b_spend, _ = _linear_regression(x, spend_y)
-        m_conv, b_conv, _ = _linear_regression(x, conv_y)
+        slopes, intercepts, r_squared = linear_trend(x, [
+            rev_y,
+            [h['spend'] for h in historical],
+            [h['conversions'] for h in historical],
+        ])
+        (m_rev, m_spend, m_conv), (b_rev, b_spend, b_conv) = slopes.tolist(), intercepts.tolist()
+        r2_rev = float(r_squared[0])
 
         # Project next 4 weeks
         last_week = x[-1]
@@ -0,0 +1,163 @@
+"""
+Ads Analysis Context
+
+Loads the data behind the Ads Intelligence analytics once per window and
+shares it between AdSpendService sections:
+
+    campaigns        active CampaignPerformance snapshots for the period
+    daily            google_ads_campaigns daily rows (spend, clicks, conversions
+                     and auction metrics) for the longest window any section reads
+    strategy_types   campaign_id -> strategy_type
+    overhead_per_order  FinanceService overhead used by break-even ROAS
+
+While a context is attached to an AdSpendService, its period lookups and
+daily-row reads are served from memory, so independent sections can run on
+a thread pool without touching the request's database session.
+"""
+import asyncio
+import bisect
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.models.ad_spend import CampaignPerformance
+from app.models.google_ads_data import GoogleAdsCampaign
+from app.services.finance_service import FinanceService
+from app.utils.logger import log
+
+
+DAILY_COLUMNS = [
+    'campaign_id', 'campaign_name', 'date',
+    'cost_micros', 'clicks', 'impressions', 'conversions', 'conversions_value',
+    'search_impression_share', 'search_rank_lost_impression_share',
+]
+ADDITIVE_COLUMNS = ['cost_micros', 'clicks', 'impressions', 'conversions', 'conversions_value']
+
+AdsDay = namedtuple('AdsDay', DAILY_COLUMNS)
+
+
+def daily_frame(rows) -> pd.DataFrame:
+    """Daily row tuples (DAILY_COLUMNS order) as a frame, additive metrics 0 when NULL."""
+    frame = pd.DataFrame(rows, columns=DAILY_COLUMNS)
+    frame[ADDITIVE_COLUMNS] = frame[ADDITIVE_COLUMNS].fillna(0)
+    return frame
+
+
+def dashboard_history_days(days: int) -> int:
+    """Longest daily-row window the enhanced dashboard sections read for `days`."""
+    competitor_window = max(14, (days * 3) // 2)
+    return max(days * 3, days * 2, competitor_window * 2, 14)
+
+
+class AdsAnalysisContext:
+    """Ads analytics inputs for one period, loaded once"""
+
+    def __init__(self, days: int, end_date: date, history_days: int):
+        self.days = days
+        self.end_date = end_date
+        self.start_date = end_date - timedelta(days=history_days - 1)
+        self.campaigns: List[CampaignPerformance] = []
+        self.daily = pd.DataFrame(columns=DAILY_COLUMNS)
+        self.strategy_types: Dict[str, str] = {}
+        self.overhead_per_order = None
+        self.load_seconds = 0.0
+        self._rows: Tuple[List[AdsDay], List[date]] = ([], [])
+        self._by_campaign: Dict[str, Tuple[List[AdsDay], List[date]]] = {}
+
+    @classmethod
+    def load(cls, service, days: int, history_days: Optional[int] = None) -> 'AdsAnalysisContext':
+        """Run the shared queries through `service` (no context attached yet)."""
+        started = time.perf_counter()
+        db = service.db
+        ctx = cls(days, service._get_ads_data_end_date(), history_days or dashboard_history_days(days))
+        ctx.campaigns = service._get_campaigns_for_period(days)
+
+        rows = (
+            db.query(*[getattr(GoogleAdsCampaign, c) for c in DAILY_COLUMNS])
+            .filter(GoogleAdsCampaign.date >= ctx.start_date)
+            .order_by(GoogleAdsCampaign.date, GoogleAdsCampaign.id)
+            .all()
+        )
+        # Row tuples (plain Python values, None for unreported auction
+        # metrics) for the row-wise sections, and one frame for the rest
+        records = [AdsDay(*r) for r in rows]
+        by_campaign = defaultdict(list)
+        for r in records:
+            by_campaign[r.campaign_id].append(r)
+        ctx._rows = (records, [r.date for r in records])
+        ctx._by_campaign = {cid: (rs, [r.date for r in rs]) for cid, rs in by_campaign.items()}
+        ctx.daily = daily_frame(rows)
+
+        ctx.strategy_types = {
+            r.campaign_id: r.strategy_type
+            for r in db.query(CampaignPerformance.campaign_id, CampaignPerformance.strategy_type).filter(
+                CampaignPerformance.strategy_type.isnot(None)
+            ).all()
+        }
+        ctx.overhead_per_order = FinanceService(db).get_latest_overhead_per_order()
+
+        ctx.load_seconds = time.perf_counter() - started
+        log.info(
+            f"Ads analysis context: {len(ctx.campaigns)} campaigns, {len(ctx.daily)} daily rows "
+            f"from {ctx.start_date} in {ctx.load_seconds:.2f}s"
+        )
+        return ctx
+
+    def covers(self, start: date) -> bool:
+        return start >= self.start_date
+
+    def daily_rows(
+        self,
+        start: date,
+        end: Optional[date] = None,
+        campaign_id: Optional[str] = None,
+    ) -> List[AdsDay]:
+        """Daily rows with start <= date (< end), in date order."""
+        rows, dates = self._rows if campaign_id is None else self._by_campaign.get(campaign_id, ([], []))
+        lo = bisect.bisect_left(dates, start)
+        hi = bisect.bisect_left(dates, end) if end is not None else len(rows)
+        return rows[lo:hi]
+
+    def daily_slice(self, start: date, end: Optional[date] = None) -> pd.DataFrame:
+        """Rows of `daily` with start <= date (< end), in date order."""
+        dates = self._rows[1]
+        lo = bisect.bisect_left(dates, start)
+        hi = bisect.bisect_left(dates, end) if end is not None else len(dates)
+        return self.daily.iloc[lo:hi]
+
+    def campaigns_with_rows(self, start: date, require: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Distinct (campaign_id, campaign_name) with rows from `start` (and a non-null `require`)."""
+        return sorted({
+            (r.campaign_id, r.campaign_name)
+            for r in self.daily_rows(start)
+            if require is None or getattr(r, require) is not None
+        })
+
+
+def run_sections(
+    sections: Dict[str, Callable[[], Awaitable]],
+    workers: int = 4,
+) -> Tuple[Dict[str, object], Dict[str, float]]:
+    """
+    Run independent analysis sections on a thread pool.
+
+    Each section is a zero-argument callable returning a coroutine; it runs
+    to completion on its own event loop in a worker thread. Returns
+    ({name: result}, {name: milliseconds}); the first section error is
+    re-raised after all sections finish.
+    """
+    def _timed(factory):
+        started = time.perf_counter()
+        result = asyncio.run(factory())
+        return result, round((time.perf_counter() - started) * 1000, 1)
+
+    results, timings = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {name: pool.submit(_timed, factory) for name, factory in sections.items()}
+        for name, future in futures.items():
+            results[name], timings[name] = future.result()
+    return results, timings
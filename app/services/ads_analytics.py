@@ -0,0 +1,119 @@
+"""
+Ads Analytics Kernels
+
+Batched NumPy versions of the small statistics AdSpendService sections
+used to compute per campaign and per metric in Python loops:
+
+    linear_trend      least-squares slope / intercept / R² for many series at once
+    percentile_rank   share of values strictly below each value (searchsorted)
+    safe_ratio        element-wise a / b, 0 where b <= 0
+    trend_labels      rising / falling / stable against a prior value (±10%)
+    iso_weeks         ISO (year, week) columns for a date column
+    period_metrics    CPC / CTR / conversion rate / CPA / AOV per group of daily rows
+
+Each function takes and returns arrays so a section can compute every
+campaign in one call and only build its response dicts row by row.
+"""
+from datetime import date
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.ads_analysis_context import ADDITIVE_COLUMNS
+
+
+# Rounding of the per-period metrics (as shown on the dashboard)
+PERIOD_METRIC_DECIMALS = {'avg_cpc': 2, 'avg_ctr': 4, 'conv_rate': 4, 'cpa': 2, 'aov': 2}
+
+
+def linear_trend(x, y) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ordinary least squares y = m·x + b for each row of `y` against shared `x`.
+
+    Args:
+        x: shape (n,)
+        y: shape (k, n) — one series per row
+
+    Returns:
+        (slopes, intercepts, r_squared), each shape (k,). With fewer than two
+        points every value is 0; with constant x the slope is 0 and the
+        intercept is the mean. R² is 0 for a constant series.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    k, n = y.shape
+    if n < 2:
+        return np.zeros(k), np.zeros(k), np.zeros(k)
+
+    sum_x = x.sum()
+    sum_y = y.sum(axis=1)
+    sum_xy = (y * x).sum(axis=1)
+    sum_x2 = (x * x).sum()
+
+    denom = n * sum_x2 - sum_x * sum_x
+    if denom == 0:
+        return np.zeros(k), sum_y / n, np.zeros(k)
+
+    slopes = (n * sum_xy - sum_x * sum_y) / denom
+    intercepts = (sum_y - slopes * sum_x) / n
+
+    ss_tot = ((y - (sum_y / n)[:, None]) ** 2).sum(axis=1)
+    ss_res = ((y - (slopes[:, None] * x + intercepts[:, None])) ** 2).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_squared = np.where(ss_tot > 0, 1 - ss_res / ss_tot, 0.0)
+    return slopes, intercepts, r_squared
+
+
+def percentile_rank(values) -> np.ndarray:
+    """Fraction of `values` strictly below each value (0 for an empty input)."""
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return values
+    return np.searchsorted(np.sort(values), values, side='left') / values.size
+
+
+def safe_ratio(numerator, denominator) -> np.ndarray:
+    """numerator / denominator element-wise, 0 where the denominator is not positive."""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    out = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def trend_labels(current, prior) -> np.ndarray:
+    """'rising' / 'falling' beyond ±10% of prior, else (or with a zero prior) 'stable'."""
+    current = np.asarray(current, dtype=float)
+    prior = np.asarray(prior, dtype=float)
+    return np.select(
+        [prior == 0, current > prior * 1.1, current < prior * 0.9],
+        ['stable', 'rising', 'falling'],
+        default='stable',
+    )
+
+
+def iso_weeks(dates: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """ISO (year, week) for a column of dates, computed once per distinct date."""
+    calendar = {d: d.isocalendar()[:2] for d in dates.unique() if isinstance(d, date)}
+    return (
+        dates.map(lambda d: calendar[d][0]).astype('int64'),
+        dates.map(lambda d: calendar[d][1]).astype('int64'),
+    )
+
+
+def period_metrics(daily: pd.DataFrame, keys) -> pd.DataFrame:
+    """
+    Efficiency metrics from summed daily rows, one row per `keys` group
+    (e.g. ['campaign_id'] or ['campaign_id', 'week']), rounded as displayed.
+    """
+    totals = daily.groupby(keys)[ADDITIVE_COLUMNS].sum()
+    cost = totals['cost_micros'].astype(float) / 1_000_000
+    metrics = pd.DataFrame({
+        'avg_cpc': safe_ratio(cost, totals['clicks']),
+        'avg_ctr': safe_ratio(totals['clicks'], totals['impressions']),
+        'conv_rate': safe_ratio(totals['conversions'], totals['clicks']),
+        'cpa': safe_ratio(cost, totals['conversions']),
+        'aov': safe_ratio(totals['conversions_value'], totals['conversions']),
+    }, index=totals.index)
+    return metrics.round(PERIOD_METRIC_DECIMALS)
@@ -105,7 +105,7 @@ class AnalysisService:
         if urls_to_audit:
             log.info(f"Running SEO audit on {len(urls_to_audit)} URLs...")
             try:
-                results['seo_audit'] = self.seo_analyzer.audit_site(urls_to_audit)
+                results['seo_audit'] = await self.seo_analyzer.audit_site_async(urls_to_audit)
             except Exception as e:
                 log.error(f"SEO audit error: {str(e)}")
                 results['seo_audit'] = {'error': str(e)}
@@ -182,7 +182,7 @@ class AnalysisService:
 
     async def audit_seo(self, urls: List[str]) -> Dict:
         """Run SEO audit"""
-        return self.seo_analyzer.audit_site(urls)
+        return await self.seo_analyzer.audit_site_async(urls)
 
     async def get_recommendations(
         self,
@@ -1429,25 +1429,13 @@ class BrandDiagnosisEngine:
 
     # ── data access helpers ────────────────────────────────────
 
-    def _refund_subquery(self):
-        return (
-            self.db.query(
-                ShopifyRefundLineItem.line_item_id,
-                func.sum(ShopifyRefundLineItem.subtotal).label("refund_amount"),
-                func.sum(ShopifyRefundLineItem.quantity).label("refund_qty"),
-            )
-            .group_by(ShopifyRefundLineItem.line_item_id)
-            .subquery()
-        )
-
     def _brand_totals(self, brand: str, start, end) -> Dict:
-        rpi = self._refund_subquery()
         q = self.db.query(
             func.sum(ShopifyOrderItem.total_price).label("revenue"),
             func.sum(func.coalesce(ShopifyOrderItem.total_discount, literal_column("0"))).label("discounts"),
-            func.sum(func.coalesce(rpi.c.refund_amount, literal_column("0"))).label("refunds"),
+            func.sum(ShopifyOrderItem.refunded_amount).label("refunds"),
             func.sum(ShopifyOrderItem.quantity).label("units"),
-            func.sum(func.coalesce(rpi.c.refund_qty, literal_column("0"))).label("refund_units"),
+            func.sum(ShopifyOrderItem.refunded_quantity).label("refund_units"),
             func.count(func.distinct(ShopifyOrderItem.shopify_order_id)).label("orders"),
             func.sum(
                 case(
@@ -1458,9 +1446,8 @@ class BrandDiagnosisEngine:
             ).label("total_cogs"),
             func.sum(
                 case(
-                    (and_(ShopifyOrderItem.cost_per_item.isnot(None),
-                          rpi.c.refund_qty.isnot(None)),
-                     ShopifyOrderItem.cost_per_item * rpi.c.refund_qty),
+                    (ShopifyOrderItem.cost_per_item.isnot(None),
+                     ShopifyOrderItem.cost_per_item * ShopifyOrderItem.refunded_quantity),
                     else_=literal_column("0"),
                 )
             ).label("refund_cogs"),
@@ -1471,8 +1458,6 @@ class BrandDiagnosisEngine:
                     else_=literal_column("0"),
                 )
             ).label("units_with_cost"),
-        ).outerjoin(
-            rpi, rpi.c.line_item_id == ShopifyOrderItem.line_item_id,
         ).filter(
             ShopifyOrderItem.vendor == brand,
             ShopifyOrderItem.order_date >= start,
@@ -1506,7 +1491,6 @@ class BrandDiagnosisEngine:
         }
 
     def _product_breakdown(self, brand: str, start, end) -> List[Dict]:
-        rpi = self._refund_subquery()
         rows = (
             self.db.query(
                 ShopifyOrderItem.shopify_product_id,
@@ -1514,12 +1498,11 @@ class BrandDiagnosisEngine:
                 ShopifyOrderItem.sku,
                 func.sum(ShopifyOrderItem.total_price).label("revenue"),
                 func.sum(func.coalesce(ShopifyOrderItem.total_discount, literal_column("0"))).label("discounts"),
-                func.sum(func.coalesce(rpi.c.refund_amount, literal_column("0"))).label("refunds"),
+                func.sum(ShopifyOrderItem.refunded_amount).label("refunds"),
                 func.sum(ShopifyOrderItem.quantity).label("units"),
-                func.sum(func.coalesce(rpi.c.refund_qty, literal_column("0"))).label("refund_units"),
+                func.sum(ShopifyOrderItem.refunded_quantity).label("refund_units"),
                 func.avg(ShopifyOrderItem.price).label("avg_price"),
             )
-            .outerjoin(rpi, rpi.c.line_item_id == ShopifyOrderItem.line_item_id)
             .filter(
                 ShopifyOrderItem.vendor == brand,
                 ShopifyOrderItem.order_date >= start,
@@ -9,13 +9,17 @@ from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from decimal import Decimal
 from collections import defaultdict
+from types import SimpleNamespace
 import json
 import re as _re
 
 from sqlalchemy.orm import Session
 from sqlalchemy import func, case, literal_column, String, and_, or_, extract
 
-from app.models.shopify import ShopifyOrderItem, ShopifyProduct, ShopifyInventory, ShopifyRefundLineItem
+from app.models.shopify import (
+    ShopifyOrderItem, ShopifyProduct, ShopifyInventory,
+    ShopifySalesDailyFact, ShopifyVendorOrdersDaily,
+)
 from app.models.google_ads_data import GoogleAdsProductPerformance, GoogleAdsCampaign, GoogleAdsSearchTerm
 from app.models.ga4_data import GA4ProductPerformance
 from app.models.search_console_data import SearchConsoleQuery
@@ -25,9 +29,21 @@ from app.models.business_expense import MonthlyPL
 from app.models.shippit import ShippitOrder
 from app.models.shopify import ShopifyOrder
 from app.models.ml_intelligence import MLInventorySuggestion
+from app.services.sales_fact_service import day_window, sales_measures
 from app.config import get_settings
 from app.utils.logger import log
 
+# Summed fact measures for a brand with no sales in the window
+_NO_SALES = SimpleNamespace(
+    revenue=0, discounts=0, refunds=0, net_revenue=0, units=0, refund_units=0,
+    total_cogs=0, refund_cogs=0, units_with_cost=0, costed_revenue=0,
+    costed_discounts=0, costed_refunds=0,
+)
+
+# Post-sync precompute of brand detail pages (see precompute_top_brand_details)
+DETAIL_PRECOMPUTE_TOP_K = 20
+DETAIL_PRECOMPUTE_TTL = 6 * 3600
+
 # Recommendation → data source dependency map (for Feature 7)
 _REC_DATA_DEPS = {
     "range": ["shopify_orders"],
@@ -60,6 +76,9 @@ class BrandIntelligenceService:
         # Business rule: stockouts are not treated as a lead cause of brand decline
         # because "we always sell when out of stock."
         self._stockout_root_cause = False
+        # Period-wide reads (all-brand totals, overhead, ads rows) reused
+        # across brands when several details are built on one instance.
+        self._shared_reads: Dict = {}
 
     # ── public ────────────────────────────────────────────────────
 
@@ -233,18 +252,79 @@ class BrandIntelligenceService:
         }
 
     def get_brand_detail(self, brand_name: str, period_days: int = 30) -> Dict:
+        from app.utils.cache import get_cached as _gc, _MISS as _M
+        # Filled for the top brands by precompute_top_brand_details() after each sync
+        _cv = _gc(f"brand_detail_svc|{brand_name}|{period_days}")
+        if _cv is not _M:
+            return dict(_cv)
         now = self._anchored_now()
+        shared = self._detail_aggregates([brand_name], now, period_days)
+        return self._build_brand_detail(brand_name, period_days, now, shared)
+
+    def get_brand_details(self, brand_names: List[str], period_days: int = 30) -> Dict[str, Dict]:
+        """
+        Brand detail for several brands at once.
+
+        Sales aggregates (totals, product and monthly breakdowns) come from one
+        grouped fact query per window for all brands, and period-wide reads
+        (total revenue, overhead, ads rows, active days) are shared; only the
+        brand-specific diagnostics run per brand. A brand whose detail fails is
+        logged and left out of the result.
+        """
+        now = self._anchored_now()
+        shared = self._detail_aggregates(brand_names, now, period_days)
+        details = {}
+        for brand in brand_names:
+            try:
+                details[brand] = self._build_brand_detail(brand, period_days, now, shared)
+            except Exception as e:
+                log.error(f"Brand detail failed for {brand}: {e}")
+        return details
+
+    def precompute_top_brand_details(self, top_k: int = DETAIL_PRECOMPUTE_TOP_K,
+                                     period_days: int = 30) -> Dict:
+        """Build and cache detail for the top-K brands by revenue (run after syncs)."""
+        from app.utils.cache import set_cached as _sc
+        started = datetime.utcnow()
+        now = self._anchored_now()
+        ranked = sorted(
+            self._brand_aggregates(now - timedelta(days=period_days), now),
+            key=lambda b: b["revenue"], reverse=True,
+        )
+        brands = [b["brand"] for b in ranked[:top_k]]
+        details = self.get_brand_details(brands, period_days=period_days)
+        for brand, detail in details.items():
+            _sc(f"brand_detail_svc|{brand}|{period_days}", detail, DETAIL_PRECOMPUTE_TTL)
+
+        duration = round((datetime.utcnow() - started).total_seconds(), 2)
+        log.info(f"Precomputed {len(details)} of top {len(brands)} brand details ({period_days}d) in {duration}s")
+        return {"brands": len(details), "period_days": period_days, "duration_seconds": duration}
+
+    def _detail_aggregates(self, brand_names: List[str], now, period_days: int) -> Dict[str, Dict]:
+        """Grouped sales aggregates for get_brand_detail, keyed by brand."""
+        cur_start = now - timedelta(days=period_days)
+        yoy_start = cur_start - timedelta(days=365)
+        yoy_end = now - timedelta(days=365)
+        return {
+            "monthly": self._monthly_breakdown_many(brand_names, now - timedelta(days=730), now),
+            "cur_products": self._product_breakdown_many(brand_names, cur_start, now),
+            "yoy_products": self._product_breakdown_many(brand_names, yoy_start, yoy_end),
+            "cur_totals": self._brand_totals_many(brand_names, cur_start, now),
+            "yoy_totals": self._brand_totals_many(brand_names, yoy_start, yoy_end),
+        }
+
+    def _build_brand_detail(self, brand_name: str, period_days: int, now, shared: Dict) -> Dict:
         cur_start = now - timedelta(days=period_days)
         cur_end = now
         yoy_start = cur_start - timedelta(days=365)
         yoy_end = cur_end - timedelta(days=365)
 
         # Monthly comparison (24 months)
-        monthly = self._monthly_breakdown(brand_name, now - timedelta(days=730), now)
+        monthly = shared["monthly"][brand_name]
 
         # Product breakdowns
-        cur_products = self._product_breakdown(brand_name, cur_start, cur_end)
-        yoy_products = self._product_breakdown(brand_name, yoy_start, yoy_end)
+        cur_products = shared["cur_products"][brand_name]
+        yoy_products = shared["yoy_products"][brand_name]
 
         cur_map = {p["product_id"]: p for p in cur_products}
         yoy_map = {p["product_id"]: p for p in yoy_products}
@@ -284,8 +364,8 @@ class BrandIntelligenceService:
             pass
 
         # Totals for WHY
-        cur_totals = self._brand_totals(brand_name, cur_start, cur_end)
-        yoy_totals = self._brand_totals(brand_name, yoy_start, yoy_end)
+        cur_totals = shared["cur_totals"][brand_name]
+        yoy_totals = shared["yoy_totals"][brand_name]
 
         why = self._analyze_brand_drivers(
             brand_name, cur_map, yoy_map, cur_totals, yoy_totals,
@@ -480,18 +560,23 @@ class BrandIntelligenceService:
 
     def get_brand_comparison(self, brand_names: List[str], period_days: int = 30) -> Dict:
         now = self._anchored_now()
-        start_24m = now - timedelta(days=730)
+        cur_start = now - timedelta(days=period_days)
+
+        # One grouped pass per window covers every brand
+        monthly_by_brand = self._monthly_breakdown_many(brand_names, now - timedelta(days=730), now)
+        cur_by_brand = self._brand_totals_many(brand_names, cur_start, now)
+        yoy_by_brand = self._brand_totals_many(
+            brand_names, cur_start - timedelta(days=365), now - timedelta(days=365)
+        )
 
         comparison = []
         for name in brand_names:
-            monthly = self._monthly_breakdown(name, start_24m, now)
-            cur_start = now - timedelta(days=period_days)
-            totals = self._brand_totals(name, cur_start, now)
-            yoy_totals = self._brand_totals(name, cur_start - timedelta(days=365), now - timedelta(days=365))
+            totals = cur_by_brand[name]
+            yoy_totals = yoy_by_brand[name]
 
             comparison.append({
                 "brand": name,
-                "monthly": monthly,
+                "monthly": monthly_by_brand[name],
                 "revenue": totals["revenue"],
                 "units": totals["units"],
                 "gross_margin_pct": totals["gross_margin_pct"],
@@ -515,8 +600,17 @@ class BrandIntelligenceService:
             ShopifyOrderItem.financial_status.notin_(['voided']),
         )
 
+    def _shared_read(self, key, compute):
+        """Memoize a period-wide read on this instance."""
+        if key not in self._shared_reads:
+            self._shared_reads[key] = compute()
+        return self._shared_reads[key]
+
     def _count_active_days(self, start, end) -> int:
         """Count distinct days with at least one order item in the window."""
+        return self._shared_read(("active_days", start, end), lambda: self._query_active_days(start, end))
+
+    def _query_active_days(self, start, end) -> int:
         result = self.db.query(
             func.count(func.distinct(func.date(ShopifyOrderItem.order_date)))
         ).filter(
@@ -669,6 +763,10 @@ class BrandIntelligenceService:
         return include_terms, exclude_terms, allowlist_used
 
     def _get_ads_product_summary(self, start, end) -> Dict[str, Dict]:
+        return self._shared_read(("ads_product_summary", start, end),
+                                 lambda: self._query_ads_product_summary(start, end))
+
+    def _query_ads_product_summary(self, start, end) -> Dict[str, Dict]:
         """Product-level ad spend proportionally allocated by vendor.
 
         PMax product performance data is an attribution metric (inflated 10-30x
@@ -755,6 +853,10 @@ class BrandIntelligenceService:
             return {}
 
     def _get_ads_campaign_rows(self, start, end) -> List[Dict]:
+        return self._shared_read(("ads_campaign_rows", start, end),
+                                 lambda: self._query_ads_campaign_rows(start, end))
+
+    def _query_ads_campaign_rows(self, start, end) -> List[Dict]:
         """Fetch campaign rows for name-based brand matching."""
         try:
             rows = (
@@ -881,238 +983,146 @@ class BrandIntelligenceService:
             return "Rank-limited"
         return "Active"
 
-    def _refund_per_item_subquery(self):
-        """Total refunds & refunded qty per line_item_id (all time).
-
-        Joined to order-item queries so refunds are scoped by *order* date,
-        not refund date — fixes temporal mismatch where refunds for prior-
-        period orders were incorrectly subtracted from current-period revenue.
-        """
-        return (
-            self.db.query(
-                ShopifyRefundLineItem.line_item_id,
-                func.sum(ShopifyRefundLineItem.subtotal).label("refund_amount"),
-                func.sum(ShopifyRefundLineItem.quantity).label("refund_qty"),
-            )
-            .group_by(ShopifyRefundLineItem.line_item_id)
-            .subquery()
+    def _fact_query(self, start, end, *columns, brand: Optional[str] = None,
+                    brands: Optional[List[str]] = None):
+        """Query the sales fact table over the [start, end) window (non-voided)."""
+        F = ShopifySalesDailyFact
+        first_day, last_day = day_window(start, end)
+        q = self.db.query(*columns).filter(
+            F.date >= first_day,
+            F.date <= last_day,
+            F.financial_status.notin_(['voided']),
+        )
+        if brand is not None:
+            q = q.filter(F.vendor == brand)
+        if brands is not None:
+            q = q.filter(F.vendor.in_(brands))
+        return q
+
+    def _fact_orders(self, start, end, brand: Optional[str] = None,
+                     brands: Optional[List[str]] = None) -> Dict[str, int]:
+        """Distinct orders per vendor over the [start, end) window."""
+        O = ShopifyVendorOrdersDaily
+        first_day, last_day = day_window(start, end)
+        q = self.db.query(O.vendor, func.sum(O.order_count)).filter(
+            O.date >= first_day,
+            O.date <= last_day,
+            O.financial_status.notin_(['voided']),
         )
+        if brand is not None:
+            q = q.filter(O.vendor == brand)
+        if brands is not None:
+            q = q.filter(O.vendor.in_(brands))
+        return {vendor: int(orders or 0) for vendor, orders in q.group_by(O.vendor).all()}
+
+    @staticmethod
+    def _net_sales(r) -> Dict:
+        """Net revenue, COGS, units and like-for-like margin from summed fact measures."""
+        gross_rev = _dec(r.revenue)
+        discounts = _dec(r.discounts)
+        refunds = _dec(r.refunds)
+        net_rev = gross_rev - discounts - refunds
+        net_cogs = _dec(r.total_cogs) - _dec(r.refund_cogs)
+        units = int(r.units or 0)
+        net_units = units - int(r.refund_units or 0)
+        units_costed = int(r.units_with_cost or 0)
+        cost_coverage = round(units_costed / units * 100, 1) if units > 0 else 0
+
+        # Margin: use only costed-item revenue vs costed-item COGS
+        # so we compare like-for-like instead of partial cost / full revenue.
+        costed_net_rev = _dec(r.costed_revenue) - _dec(r.costed_discounts) - _dec(r.costed_refunds)
+        margin = round((costed_net_rev - net_cogs) / costed_net_rev * 100, 1) if costed_net_rev > 0 and net_cogs > 0 else 0
+        return {
+            "net_rev": net_rev,
+            "gross_rev": gross_rev,
+            "discounts": discounts,
+            "refunds": refunds,
+            "net_cogs": net_cogs,
+            "net_units": net_units,
+            "cost_coverage": cost_coverage,
+            "margin": margin,
+            "estimated_margin": margin if 0 < cost_coverage < 100 else None,
+        }
 
     def _brand_aggregates(self, start, end) -> List[Dict]:
-        rpi = self._refund_per_item_subquery()
-        q = self.db.query(
-            ShopifyOrderItem.vendor,
-            func.sum(ShopifyOrderItem.total_price).label('revenue'),
-            func.sum(func.coalesce(ShopifyOrderItem.total_discount, literal_column('0'))).label('discounts'),
-            func.sum(func.coalesce(rpi.c.refund_amount, literal_column('0'))).label('refunds'),
-            func.sum(ShopifyOrderItem.quantity).label('units'),
-            func.sum(func.coalesce(rpi.c.refund_qty, literal_column('0'))).label('refund_units'),
-            func.count(func.distinct(ShopifyOrderItem.shopify_order_id)).label('orders'),
-            func.count(func.distinct(ShopifyOrderItem.shopify_product_id)).label('product_count'),
-            func.sum(
-                case(
-                    (ShopifyOrderItem.cost_per_item.isnot(None),
-                     ShopifyOrderItem.cost_per_item * ShopifyOrderItem.quantity),
-                    else_=literal_column('0')
-                )
-            ).label('total_cogs'),
-            func.sum(
-                case(
-                    (and_(ShopifyOrderItem.cost_per_item.isnot(None),
-                          rpi.c.refund_qty.isnot(None)),
-                     ShopifyOrderItem.cost_per_item * rpi.c.refund_qty),
-                    else_=literal_column('0')
-                )
-            ).label('refund_cogs'),
-            func.sum(
-                case(
-                    (ShopifyOrderItem.cost_per_item.isnot(None),
-                     ShopifyOrderItem.quantity),
-                    else_=literal_column('0')
-                )
-            ).label('units_with_cost'),
-            # Revenue/discounts/refunds for costed items only (for accurate margin)
-            func.sum(
-                case(
-                    (ShopifyOrderItem.cost_per_item.isnot(None),
-                     ShopifyOrderItem.total_price),
-                    else_=literal_column('0')
-                )
-            ).label('costed_revenue'),
-            func.sum(
-                case(
-                    (ShopifyOrderItem.cost_per_item.isnot(None),
-                     func.coalesce(ShopifyOrderItem.total_discount, literal_column('0'))),
-                    else_=literal_column('0')
-                )
-            ).label('costed_discounts'),
-            func.sum(
-                case(
-                    (ShopifyOrderItem.cost_per_item.isnot(None),
-                     func.coalesce(rpi.c.refund_amount, literal_column('0'))),
-                    else_=literal_column('0')
-                )
-            ).label('costed_refunds'),
+        F = ShopifySalesDailyFact
+        rows = (
+            self._fact_query(
+                start, end,
+                F.vendor,
+                *sales_measures(),
+                func.count(func.distinct(F.shopify_product_id)).label('product_count'),
+            )
+            .filter(F.vendor.isnot(None), F.vendor != '')
+            .group_by(F.vendor)
+            .all()
         )
-        q = q.outerjoin(rpi, rpi.c.line_item_id == ShopifyOrderItem.line_item_id)
-        q = self._base_filters(q, start, end)
-        rows = q.group_by(ShopifyOrderItem.vendor).all()
+        orders = self._fact_orders(start, end)
 
         results = []
         for r in rows:
-            gross_rev = _dec(r.revenue)
-            discounts = _dec(r.discounts)
-            refunds = _dec(r.refunds)
-            net_rev = gross_rev - discounts - refunds
-            gross_cogs = _dec(r.total_cogs)
-            refund_cogs = _dec(r.refund_cogs)
-            net_cogs = gross_cogs - refund_cogs
-            units = r.units or 0
-            refund_units = int(r.refund_units or 0)
-            net_units = units - refund_units
-            units_costed = int(r.units_with_cost or 0)
-            cost_coverage = round(units_costed / units * 100, 1) if units > 0 else 0
-            asp = round(net_rev / net_units, 2) if net_units > 0 else 0
-
-            # Margin: use only costed-item revenue vs costed-item COGS
-            # so we compare like-for-like instead of partial cost / full revenue.
-            costed_net_rev = _dec(r.costed_revenue) - _dec(r.costed_discounts) - _dec(r.costed_refunds)
-            margin = round((costed_net_rev - net_cogs) / costed_net_rev * 100, 1) if costed_net_rev > 0 and net_cogs > 0 else 0
-            estimated_margin = margin if 0 < cost_coverage < 100 else None
-
+            s = self._net_sales(r)
+            net_units = s["net_units"]
             results.append({
                 "brand": r.vendor,
-                "revenue": round(net_rev, 2),
-                "refunds": round(refunds, 2),
+                "revenue": round(s["net_rev"], 2),
+                "refunds": round(s["refunds"], 2),
                 "units": net_units,
-                "orders": r.orders or 0,
+                "orders": orders.get(r.vendor, 0),
                 "product_count": r.product_count or 0,
-                "total_cogs": round(net_cogs, 2),
-                "gross_margin_pct": margin,
-                "cost_coverage_pct": cost_coverage,
-                "estimated_margin_pct": estimated_margin,
-                "has_cost_data": net_cogs > 0,
-                "avg_selling_price": asp,
+                "total_cogs": round(s["net_cogs"], 2),
+                "gross_margin_pct": s["margin"],
+                "cost_coverage_pct": s["cost_coverage"],
+                "estimated_margin_pct": s["estimated_margin"],
+                "has_cost_data": s["net_cogs"] > 0,
+                "avg_selling_price": round(s["net_rev"] / net_units, 2) if net_units > 0 else 0,
             })
         return results
 
     def _brand_totals(self, brand: str, start, end) -> Dict:
-        rpi = self._refund_per_item_subquery()
-        q = self.db.query(
-            func.sum(ShopifyOrderItem.total_price).label('revenue'),
-            func.sum(func.coalesce(ShopifyOrderItem.total_discount, literal_column('0'))).label('discounts'),
-            func.sum(func.coalesce(rpi.c.refund_amount, literal_column('0'))).label('refunds'),
-            func.sum(ShopifyOrderItem.quantity).label('units'),
-            func.sum(func.coalesce(rpi.c.refund_qty, literal_column('0'))).label('refund_units'),
-            func.count(func.distinct(ShopifyOrderItem.shopify_order_id)).label('orders'),
-            func.sum(
-                case(
-                    (ShopifyOrderItem.cost_per_item.isnot(None),
-                     ShopifyOrderItem.cost_per_item * ShopifyOrderItem.quantity),
-                    else_=literal_column('0')
-                )
-            ).label('total_cogs'),
-            func.sum(
-                case(
-                    (and_(ShopifyOrderItem.cost_per_item.isnot(None),
-                          rpi.c.refund_qty.isnot(None)),
-                     ShopifyOrderItem.cost_per_item * rpi.c.refund_qty),
-                    else_=literal_column('0')
-                )
-            ).label('refund_cogs'),
-            func.sum(
-                case(
-                    (ShopifyOrderItem.cost_per_item.isnot(None),
-                     ShopifyOrderItem.quantity),
-                    else_=literal_column('0')
-                )
-            ).label('units_with_cost'),
-            # Revenue/discounts/refunds for costed items only (for accurate margin)
-            func.sum(
-                case(
-                    (ShopifyOrderItem.cost_per_item.isnot(None),
-                     ShopifyOrderItem.total_price),
-                    else_=literal_column('0')
-                )
-            ).label('costed_revenue'),
-            func.sum(
-                case(
-                    (ShopifyOrderItem.cost_per_item.isnot(None),
-                     func.coalesce(ShopifyOrderItem.total_discount, literal_column('0'))),
-                    else_=literal_column('0')
-                )
-            ).label('costed_discounts'),
-            func.sum(
-                case(
-                    (ShopifyOrderItem.cost_per_item.isnot(None),
-                     func.coalesce(rpi.c.refund_amount, literal_column('0'))),
-                    else_=literal_column('0')
-                )
-            ).label('costed_refunds'),
-        ).outerjoin(
-            rpi, rpi.c.line_item_id == ShopifyOrderItem.line_item_id
-        ).filter(
-            ShopifyOrderItem.vendor == brand,
-            ShopifyOrderItem.order_date >= start,
-            ShopifyOrderItem.order_date < end,
-            ShopifyOrderItem.financial_status.notin_(['voided']),
-        )
-        r = q.first()
-        gross_rev = _dec(r.revenue) if r else 0
-        discounts = _dec(r.discounts) if r else 0
-        refunds = _dec(r.refunds) if r else 0
-        net_rev = gross_rev - discounts - refunds
-        gross_cogs = _dec(r.total_cogs) if r else 0
-        refund_cogs = _dec(r.refund_cogs) if r else 0
-        net_cogs = gross_cogs - refund_cogs
-        units = (r.units or 0) if r else 0
-        refund_units = int(r.refund_units or 0) if r else 0
-        net_units = units - refund_units
-        units_costed = int(r.units_with_cost or 0) if r else 0
-        cost_coverage = round(units_costed / units * 100, 1) if units > 0 else 0
-        # Margin: use costed-item revenue vs costed-item COGS (like-for-like)
-        costed_net_rev = _dec(r.costed_revenue) - _dec(r.costed_discounts) - _dec(r.costed_refunds) if r else 0
-        margin = round((costed_net_rev - net_cogs) / costed_net_rev * 100, 1) if costed_net_rev > 0 and net_cogs > 0 else 0
-        estimated_margin = margin if 0 < cost_coverage < 100 else None
-
-        return {
-            "revenue": round(net_rev, 2),
-            "gross_revenue": round(gross_rev, 2),
-            "discounts": round(discounts, 2),
-            "refunds": round(refunds, 2),
-            "units": net_units,
-            "orders": (r.orders or 0) if r else 0,
-            "total_cogs": round(net_cogs, 2),
-            "gross_margin_pct": margin,
-            "cost_coverage_pct": cost_coverage,
-            "estimated_margin_pct": estimated_margin,
-            "has_cost_data": net_cogs > 0,
+        return self._brand_totals_many([brand], start, end)[brand]
+
+    def _brand_totals_many(self, brands: List[str], start, end) -> Dict[str, Dict]:
+        """Period totals for several brands from one grouped fact query."""
+        F = ShopifySalesDailyFact
+        rows = {
+            r.vendor: r
+            for r in self._fact_query(start, end, F.vendor, *sales_measures(), brands=brands)
+            .group_by(F.vendor)
+            .all()
         }
+        orders = self._fact_orders(start, end, brands=brands)
+
+        totals = {}
+        for brand in brands:
+            s = self._net_sales(rows.get(brand, _NO_SALES))
+            totals[brand] = {
+                "revenue": round(s["net_rev"], 2),
+                "gross_revenue": round(s["gross_rev"], 2),
+                "discounts": round(s["discounts"], 2),
+                "refunds": round(s["refunds"], 2),
+                "units": s["net_units"],
+                "orders": orders.get(brand, 0),
+                "total_cogs": round(s["net_cogs"], 2),
+                "gross_margin_pct": s["margin"],
+                "cost_coverage_pct": s["cost_coverage"],
+                "estimated_margin_pct": s["estimated_margin"],
+                "has_cost_data": s["net_cogs"] > 0,
+            }
+        return totals
 
     def _total_revenue(self, start, end) -> float:
         """Net revenue across all brands for a period (for allocation)."""
-        rpi = self._refund_per_item_subquery()
-        r = (
-            self.db.query(
-                func.sum(ShopifyOrderItem.total_price).label('revenue'),
-                func.sum(func.coalesce(ShopifyOrderItem.total_discount, literal_column('0'))).label('discounts'),
-                func.sum(func.coalesce(rpi.c.refund_amount, literal_column('0'))).label('refunds'),
-            )
-            .outerjoin(rpi, rpi.c.line_item_id == ShopifyOrderItem.line_item_id)
-            .filter(
-                ShopifyOrderItem.order_date >= start,
-                ShopifyOrderItem.order_date < end,
-                ShopifyOrderItem.financial_status.notin_(['voided']),
-            )
-            .first()
-        )
-        gross = _dec(r.revenue) if r else 0
-        discounts = _dec(r.discounts) if r else 0
-        refunds = _dec(r.refunds) if r else 0
-        return round(gross - discounts - refunds, 2)
+        def _query():
+            net = self._fact_query(start, end, func.sum(ShopifySalesDailyFact.net_revenue)).scalar()
+            return round(_dec(net), 2)
+        return self._shared_read(("total_revenue", start, end), _query)
 
     def _get_period_overhead_ex_shipping(self, start, end) -> float:
         """Operating expenses excluding ads and shipping, summed across months."""
+        return self._shared_read(("overhead", start, end), lambda: self._query_overhead_ex_shipping(start, end))
+
+    def _query_overhead_ex_shipping(self, start, end) -> float:
         # Normalize to month starts
         start_month = datetime(start.year, start.month, 1)
         end_month = datetime(end.year, end.month, 1)
@@ -1323,121 +1333,98 @@ class BrandIntelligenceService:
             return 0.0
 
     def _monthly_breakdown(self, brand: str, start, end) -> List[Dict]:
-        rpi = self._refund_per_item_subquery()
-        yr_col = extract('year', ShopifyOrderItem.order_date).label('yr')
-        mo_col = extract('month', ShopifyOrderItem.order_date).label('mo')
+        return self._monthly_breakdown_many([brand], start, end)[brand]
+
+    def _monthly_breakdown_many(self, brands: List[str], start, end) -> Dict[str, List[Dict]]:
+        """This-year vs last-year monthly revenue for several brands in one pass."""
+        F = ShopifySalesDailyFact
+        yr_col = extract('year', F.date).label('yr')
+        mo_col = extract('month', F.date).label('mo')
         rows = (
-            self.db.query(
+            self._fact_query(
+                start, end,
+                F.vendor,
                 yr_col,
                 mo_col,
-                func.sum(ShopifyOrderItem.total_price).label('revenue'),
-                func.sum(func.coalesce(ShopifyOrderItem.total_discount, literal_column('0'))).label('discounts'),
-                func.sum(func.coalesce(rpi.c.refund_amount, literal_column('0'))).label('refunds'),
-                func.sum(ShopifyOrderItem.quantity).label('units'),
-                func.sum(func.coalesce(rpi.c.refund_qty, literal_column('0'))).label('refund_units'),
+                func.sum(F.net_revenue).label('revenue'),
+                func.sum(F.units).label('units'),
+                func.sum(F.refund_units).label('refund_units'),
+                brands=brands,
             )
-            .outerjoin(rpi, rpi.c.line_item_id == ShopifyOrderItem.line_item_id)
-            .filter(
-                ShopifyOrderItem.vendor == brand,
-                ShopifyOrderItem.order_date >= start,
-                ShopifyOrderItem.order_date < end,
-                ShopifyOrderItem.financial_status.notin_(['voided']),
-            )
-            .group_by(yr_col, mo_col)
-            .order_by(yr_col, mo_col)
+            .group_by(F.vendor, yr_col, mo_col)
             .all()
         )
 
-        # Build {(year, month): {revenue, units}}
-        by_ym = {}
+        # Build {brand: {(year, month): {revenue, units}}}
+        by_brand = defaultdict(dict)
         for r in rows:
             yr = str(int(r.yr))
             mo = f"{int(r.mo):02d}"
-            gross = _dec(r.revenue)
-            discounts = _dec(r.discounts)
-            refunds = _dec(r.refunds)
             net_units = (r.units or 0) - int(r.refund_units or 0)
-            by_ym[(yr, mo)] = {"revenue": gross - discounts - refunds, "units": net_units}
+            by_brand[r.vendor][(yr, mo)] = {"revenue": _dec(r.revenue), "units": net_units}
 
         # Determine the two years we're comparing
         this_year = str(end.year)
         last_year = str(end.year - 1)
         months = [f"{m:02d}" for m in range(1, 13)]
 
-        result = []
-        for mo in months:
-            result.append({
-                "month": mo,
-                "month_label": f"{_month_name(mo)}",
-                "this_year": round(by_ym.get((this_year, mo), {}).get("revenue", 0), 2),
-                "this_year_units": by_ym.get((this_year, mo), {}).get("units", 0),
-                "last_year": round(by_ym.get((last_year, mo), {}).get("revenue", 0), 2),
-                "last_year_units": by_ym.get((last_year, mo), {}).get("units", 0),
-            })
+        result = {}
+        for brand in brands:
+            by_ym = by_brand.get(brand, {})
+            result[brand] = [
+                {
+                    "month": mo,
+                    "month_label": f"{_month_name(mo)}",
+                    "this_year": round(by_ym.get((this_year, mo), {}).get("revenue", 0), 2),
+                    "this_year_units": by_ym.get((this_year, mo), {}).get("units", 0),
+                    "last_year": round(by_ym.get((last_year, mo), {}).get("revenue", 0), 2),
+                    "last_year_units": by_ym.get((last_year, mo), {}).get("units", 0),
+                }
+                for mo in months
+            ]
         return result
 
     def _product_breakdown(self, brand: str, start, end) -> List[Dict]:
-        rpi = self._refund_per_item_subquery()
+        return self._product_breakdown_many([brand], start, end)[brand]
+
+    def _product_breakdown_many(self, brands: List[str], start, end) -> Dict[str, List[Dict]]:
+        """Per-product sales for several brands from one grouped fact query."""
+        F = ShopifySalesDailyFact
         rows = (
-            self.db.query(
-                ShopifyOrderItem.shopify_product_id,
-                ShopifyOrderItem.title,
-                ShopifyOrderItem.sku,
-                func.sum(ShopifyOrderItem.total_price).label('revenue'),
-                func.sum(func.coalesce(ShopifyOrderItem.total_discount, literal_column('0'))).label('discounts'),
-                func.sum(func.coalesce(rpi.c.refund_amount, literal_column('0'))).label('refunds'),
-                func.sum(ShopifyOrderItem.quantity).label('units'),
-                func.sum(func.coalesce(rpi.c.refund_qty, literal_column('0'))).label('refund_units'),
-                func.avg(ShopifyOrderItem.price).label('avg_price'),
-                func.sum(
-                    case(
-                        (ShopifyOrderItem.cost_per_item.isnot(None),
-                         ShopifyOrderItem.cost_per_item * ShopifyOrderItem.quantity),
-                        else_=literal_column('0')
-                    )
-                ).label('cogs'),
-                func.sum(
-                    case(
-                        (and_(ShopifyOrderItem.cost_per_item.isnot(None),
-                              rpi.c.refund_qty.isnot(None)),
-                         ShopifyOrderItem.cost_per_item * rpi.c.refund_qty),
-                        else_=literal_column('0')
-                    )
-                ).label('refund_cogs'),
-            )
-            .outerjoin(rpi, rpi.c.line_item_id == ShopifyOrderItem.line_item_id)
-            .filter(
-                ShopifyOrderItem.vendor == brand,
-                ShopifyOrderItem.order_date >= start,
-                ShopifyOrderItem.order_date < end,
-                ShopifyOrderItem.financial_status.notin_(['voided']),
-            )
-            .group_by(
-                ShopifyOrderItem.shopify_product_id,
-                ShopifyOrderItem.title,
-                ShopifyOrderItem.sku,
+            self._fact_query(
+                start, end,
+                F.vendor,
+                F.shopify_product_id,
+                F.sku,
+                func.max(F.title).label('title'),
+                func.sum(F.net_revenue).label('net_revenue'),
+                func.sum(F.refunds).label('refunds'),
+                func.sum(F.units).label('units'),
+                func.sum(F.refund_units).label('refund_units'),
+                func.sum(F.price_total).label('price_total'),
+                func.sum(F.line_count).label('line_count'),
+                func.sum(F.cogs).label('cogs'),
+                func.sum(F.refund_cogs).label('refund_cogs'),
+                brands=brands,
             )
+            .group_by(F.vendor, F.shopify_product_id, F.sku)
             .all()
         )
-        results = []
+        results = {brand: [] for brand in brands}
         for r in rows:
-            gross_rev = _dec(r.revenue)
-            discounts = _dec(r.discounts)
-            refunds = _dec(r.refunds)
-            net_rev = gross_rev - discounts - refunds
-            gross_cogs = _dec(r.cogs)
-            refund_cogs = _dec(r.refund_cogs)
-            net_cogs = gross_cogs - refund_cogs
+            net_rev = _dec(r.net_revenue)
+            net_cogs = _dec(r.cogs) - _dec(r.refund_cogs)
             net_units = (r.units or 0) - int(r.refund_units or 0)
+            avg_price = _dec(r.price_total) / r.line_count if r.line_count else 0
             margin = round((net_rev - net_cogs) / net_rev * 100, 1) if net_rev > 0 and net_cogs > 0 else 0
-            results.append({
+            results[r.vendor].append({
                 "product_id": r.shopify_product_id,
                 "title": r.title or "Unknown",
                 "sku": r.sku or "",
                 "revenue": round(net_rev, 2),
-                "refunds": round(refunds, 2),
+                "refunds": round(_dec(r.refunds), 2),
                 "units": net_units,
-                "avg_price": round(_dec(r.avg_price), 2),
+                "avg_price": round(avg_price, 2),
                 "cogs": round(net_cogs, 2),
                 "gross_margin_pct": margin,
             })
@@ -2987,7 +2974,6 @@ class BrandIntelligenceService:
 
             # 2. Recent revenue + velocity + COGS per product (net of discounts/refunds)
             since = datetime.utcnow() - timedelta(days=period_days)
-            rpi = self._refund_per_item_subquery()
             rev_rows = (
                 self.db.query(
                     ShopifyOrderItem.shopify_product_id,
@@ -2995,9 +2981,9 @@ class BrandIntelligenceService:
                     ShopifyOrderItem.sku,
                     func.sum(ShopifyOrderItem.total_price).label("rev"),
                     func.sum(func.coalesce(ShopifyOrderItem.total_discount, literal_column("0"))).label("discounts"),
-                    func.sum(func.coalesce(rpi.c.refund_amount, literal_column("0"))).label("refunds"),
+                    func.sum(ShopifyOrderItem.refunded_amount).label("refunds"),
                     func.sum(ShopifyOrderItem.quantity).label("units"),
-                    func.sum(func.coalesce(rpi.c.refund_qty, literal_column("0"))).label("refund_units"),
+                    func.sum(ShopifyOrderItem.refunded_quantity).label("refund_units"),
                     func.avg(ShopifyOrderItem.price).label("avg_price"),
                     func.sum(
                         case(
@@ -3008,9 +2994,8 @@ class BrandIntelligenceService:
                     ).label("cogs"),
                     func.sum(
                         case(
-                            (and_(ShopifyOrderItem.cost_per_item.isnot(None),
-                                  rpi.c.refund_qty.isnot(None)),
-                             ShopifyOrderItem.cost_per_item * rpi.c.refund_qty),
+                            (ShopifyOrderItem.cost_per_item.isnot(None),
+                             ShopifyOrderItem.cost_per_item * ShopifyOrderItem.refunded_quantity),
                             else_=literal_column("0"),
                         )
                     ).label("refund_cogs"),
@@ -3022,7 +3007,6 @@ class BrandIntelligenceService:
                         )
                     ).label("units_costed"),
                 )
-                .outerjoin(rpi, rpi.c.line_item_id == ShopifyOrderItem.line_item_id)
                 .filter(
                     ShopifyOrderItem.shopify_product_id.in_(candidate_pids),
                     ShopifyOrderItem.order_date >= since,
@@ -0,0 +1,157 @@
+"""
+Brand Report Render Service
+
+Renders brand pricing report PDFs (generate_brand_report_pdf) in a pool of
+worker processes and caches the finished bytes, so a portal download never
+holds a web worker while ReportLab and matplotlib build the document.
+
+Artifacts are cached per brand + pricing snapshot date + data version
+(row count and latest import time of the brand's pricing rows), so a new
+Caprice import makes the old artifact unreachable without explicit
+invalidation (the key prefix is deliberately outside the Shopify cache
+sources). prerender() renders every portal brand after the nightly
+sync; the download endpoint streams the cached bytes and only renders on
+a miss.
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.competitive_pricing import CompetitivePricing
+from app.utils.cache import get_cached, set_cached, _MISS
+from app.utils.logger import log
+
+
+RENDER_CACHE_TTL = 24 * 3600
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _render_pdf(data: dict) -> bytes:
+    """Worker entry point: render one report and return the PDF bytes."""
+    from app.services.brand_report_pdf import generate_brand_report_pdf
+    return generate_brand_report_pdf(data).getvalue()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        workers = max(1, get_settings().report_render_workers)
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        log.info(f"Brand report render pool started with {workers} workers")
+    return _pool
+
+
+def _reset_pool():
+    """Drop a pool whose worker died so the next render starts a fresh one."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def shutdown_render_pool():
+    """Stop the worker processes (application shutdown)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+class BrandReportRenderService:
+    """Pooled, cached rendering of brand report PDFs"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._versions: Dict[str, Optional[str]] = {}
+
+    def data_version(self, brand: str) -> Optional[str]:
+        """
+        Version string for the data behind a brand's report, or None when the
+        brand has no pricing rows.
+        """
+        if brand not in self._versions:
+            latest = self.db.query(func.max(CompetitivePricing.pricing_date)).scalar()
+            rows, imported_at = (
+                self.db.query(func.count(CompetitivePricing.id), func.max(CompetitivePricing.import_date))
+                .filter(CompetitivePricing.vendor == brand)
+                .first()
+            )
+            self._versions[brand] = f"{latest}|{rows}|{imported_at}" if latest and rows else None
+        return self._versions[brand]
+
+    def _cache_key(self, brand: str) -> Optional[str]:
+        version = self.data_version(brand)
+        return f"report_pdf|{brand}|{version}" if version else None
+
+    def get_cached_pdf(self, brand: str) -> Optional[bytes]:
+        """Rendered PDF for the brand's current data, if one is cached."""
+        key = self._cache_key(brand)
+        if key is None:
+            return None
+        cached = get_cached(key)
+        return None if cached is _MISS else cached
+
+    async def render(self, brand: str, data: dict) -> bytes:
+        """Render a report in the pool without blocking the event loop, then cache it."""
+        loop = asyncio.get_running_loop()
+        try:
+            pdf = await loop.run_in_executor(_get_pool(), _render_pdf, data)
+        except BrokenProcessPool:
+            _reset_pool()
+            raise
+        self._store(brand, pdf)
+        return pdf
+
+    def _store(self, brand: str, pdf: bytes):
+        key = self._cache_key(brand)
+        if key is not None:
+            set_cached(key, pdf, RENDER_CACHE_TTL)
+
+    def prerender(self, brands: Iterable[str], build_data: Callable[[str], dict]) -> Dict:
+        """
+        Render reports for every brand whose current data has no cached PDF.
+
+        build_data(brand) returns the report payload (the 'data' dict of
+        /pricing/brand-report). Payloads are built here one at a time and the
+        renders run concurrently in the pool. Brands that fail are logged and
+        counted, never raised.
+        """
+        pending, cached, failed = {}, 0, 0
+        pool = _get_pool()
+        for brand in brands:
+            if self.data_version(brand) is None:
+                continue
+            if self.get_cached_pdf(brand) is not None:
+                cached += 1
+                continue
+            try:
+                data = build_data(brand)
+                if data.get("error"):
+                    continue
+                pending[brand] = pool.submit(_render_pdf, data)
+            except Exception as e:
+                log.warning(f"Brand report payload failed for {brand}: {e}")
+                failed += 1
+
+        rendered = 0
+        for i, (brand, future) in enumerate(pending.items()):
+            try:
+                self._store(brand, future.result())
+                rendered += 1
+            except BrokenProcessPool:
+                _reset_pool()
+                failed += len(pending) - i
+                log.error("Brand report render pool broke; remaining renders abandoned")
+                break
+            except Exception as e:
+                log.warning(f"Brand report render failed for {brand}: {e}")
+                failed += 1
+
+        log.info(f"Brand report pre-render: {rendered} rendered, {cached} already cached, {failed} failed")
+        return {"rendered": rendered, "cached": cached, "failed": failed}
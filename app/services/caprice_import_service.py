@@ -4,16 +4,21 @@ Caprice Import Service — automated daily import of pricing files.
 Scans /imports/new-sheets for unprocessed .xlsx files, imports them
 using the proven import_caprice_file() logic, logs results to
 caprice_import_log, and moves files to processed/ or failed/.
+
+New files are read and cleaned in parallel worker processes (the Excel
+parse dominates); the database merges then run one file at a time.
 """
 import hashlib
 import logging
 import shutil
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from sqlalchemy.orm import Session
 
+from app.config import get_settings
 from app.models.base import SessionLocal, Base, engine
 from app.models.caprice_import import CapriceImportLog
 
@@ -41,6 +46,12 @@ def _file_checksum(path: Path) -> str:
     return h.hexdigest()
 
 
+def _read_file(file_path: str):
+    """Worker entry point: read and clean one pricing file into a frame."""
+    from scripts.import_data import read_caprice_frame
+    return read_caprice_frame(file_path)
+
+
 def _already_imported(checksum: str, db: Session) -> bool:
     """Check if a file with this checksum was already imported successfully."""
     return db.query(CapriceImportLog).filter(
@@ -79,8 +90,12 @@ class CapriceImportService:
         results: List[Dict] = []
 
         try:
+            checksums = {fp: _file_checksum(fp) for fp in files}
+            pending = [fp for fp in files if not _already_imported(checksums[fp], db)]
+            frames = self._read_files(pending)
+
             for fp in files:
-                result = self._process_one(fp, db)
+                result = self._process_one(fp, db, checksum=checksums[fp], frame=frames.get(fp))
                 results.append(result)
 
             summary = {
@@ -102,9 +117,31 @@ class CapriceImportService:
                 db.close()
 
     # ── per-file processing ─────────────────────────────────────────
-    def _process_one(self, fp: Path, db: Session) -> Dict:
+    def _read_files(self, files: List[Path]) -> Dict:
+        """
+        Read new files in parallel worker processes.
+
+        Returns {path: frame or the exception raised while reading}. With a
+        single file or one worker the read happens in _process_one instead.
+        """
+        workers = min(len(files), max(1, get_settings().caprice_import_workers))
+        if workers < 2:
+            return {}
+
+        frames = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {fp: pool.submit(_read_file, str(fp)) for fp in files}
+            for fp, future in futures.items():
+                try:
+                    frames[fp] = future.result()
+                except Exception as exc:
+                    frames[fp] = exc
+        logger.info(f"Caprice import: read {len(files)} file(s) with {workers} workers")
+        return frames
+
+    def _process_one(self, fp: Path, db: Session, checksum: Optional[str] = None, frame=None) -> Dict:
         filename = fp.name
-        checksum = _file_checksum(fp)
+        checksum = checksum or _file_checksum(fp)
 
         # Duplicate check
         if _already_imported(checksum, db):
@@ -115,8 +152,10 @@ class CapriceImportService:
 
         # Import via existing proven logic
         try:
+            if isinstance(frame, Exception):
+                raise frame
             from scripts.import_data import import_caprice_file
-            result = import_caprice_file(str(fp), db)
+            result = import_caprice_file(str(fp), db, frame=frame)
         except Exception as exc:
             error_msg = str(exc)[:500]
             logger.error(f"  FAILED {filename}: {error_msg}")
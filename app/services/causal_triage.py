@@ -8,11 +8,16 @@ Six cause categories:
   attribution_lag  — Google vs Shopify conversion gap
   catalog_feed     — Merchant Center disapprovals
   measurement      — stale or missing data sources
+
+diagnose() triages one campaign; diagnose_all() triages a batch with the
+period-level scores (landing page, feed, measurement) computed once and the
+demand / auction inputs fetched for every campaign with grouped queries.
 """
 from datetime import date, timedelta
 from typing import Dict, List, Optional
 
-from sqlalchemy import func
+import pandas as pd
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
 from app.models.google_ads_data import GoogleAdsCampaign
@@ -67,6 +72,51 @@ class CausalTriageService:
         meas = self._score_measurement()
         causes.append(meas)
 
+        return self._rank_causes(causes)
+
+    def diagnose_all(
+        self,
+        campaigns: List[Dict],
+        period_start: date,
+        period_end: date,
+    ) -> Dict[str, Dict]:
+        """
+        Batch triage for many campaigns.
+
+        campaigns: [{campaign_id, campaign_name, google_conversions,
+                     actual_conversions}, ...]
+
+        Returns: {campaign_id: same shape as diagnose()}
+        """
+        campaign_ids = [c['campaign_id'] for c in campaigns]
+
+        # Period-level scores don't depend on the campaign — compute once
+        lp = self._score_landing_page(period_start, period_end)
+        feed = self._score_catalog_feed(period_start, period_end)
+        meas = self._score_measurement()
+
+        demand_by_name = self._batch_demand(
+            [c.get('campaign_name', '') for c in campaigns], period_start, period_end
+        )
+        auction_by_cid = self._batch_auction_pressure(campaign_ids, period_start, period_end)
+
+        results = {}
+        for c in campaigns:
+            cid = c['campaign_id']
+            causes = [
+                dict(demand_by_name[c.get('campaign_name', '')]),
+                auction_by_cid[cid],
+                dict(lp),
+                self._score_attribution(c.get('google_conversions', 0), c.get('actual_conversions', 0)),
+                dict(feed),
+                dict(meas),
+            ]
+            results[cid] = self._rank_causes(causes)
+        return results
+
+    @staticmethod
+    def _rank_causes(causes: List[Dict]) -> Dict:
+        """Sort causes by score and pick the primary one with a confidence."""
         # Sort by score descending
         causes.sort(key=lambda c: c['score'], reverse=True)
 
@@ -125,7 +175,7 @@ class CausalTriageService:
         mid = start + (end - start) // 2
         brand_keywords = self._extract_brand_keywords(campaign_name)
 
-        def _period_totals(s, e):
+        def _period_totals(s, e, keywords):
             q = self.db.query(
                 func.sum(SearchConsoleQuery.clicks).label('clicks'),
                 func.sum(SearchConsoleQuery.impressions).label('impr'),
@@ -134,30 +184,103 @@ class CausalTriageService:
                 SearchConsoleQuery.date <= e,
             )
             # Filter by brand keywords if available
-            if brand_keywords:
-                from sqlalchemy import or_
+            if keywords:
                 q = q.filter(or_(
-                    *[SearchConsoleQuery.query.ilike(f'%{kw}%') for kw in brand_keywords]
+                    *[SearchConsoleQuery.query.ilike(f'%{kw}%') for kw in keywords]
                 ))
             row = q.first()
             return (row.clicks or 0, row.impr or 0)
 
-        prev_clicks, prev_impr = _period_totals(start, mid - timedelta(days=1))
-        curr_clicks, curr_impr = _period_totals(mid, end)
+        brand = None
+        if brand_keywords:
+            brand = (
+                _period_totals(start, mid - timedelta(days=1), brand_keywords)
+                + _period_totals(mid, end, brand_keywords)
+            )
+        site = None
+        if brand is None or brand[0] == 0:
+            site = _period_totals(start, mid - timedelta(days=1), None) + _period_totals(mid, end, None)
+        return self._demand_cause(brand, site)
+
+    def _batch_demand(self, campaign_names: List[str], start: date, end: date) -> Dict[str, Dict]:
+        """
+        Demand cause per campaign name from grouped Search Console queries.
+
+        Clicks/impressions are fetched once per half-period grouped by query
+        text for every query matching any campaign's brand keywords; each
+        campaign then sums the queries containing one of its keywords.
+        """
+        mid = start + (end - start) // 2
+        halves = [(start, mid - timedelta(days=1)), (mid, end)]
+        keywords_by_name = {name: self._extract_brand_keywords(name) for name in set(campaign_names)}
+        all_keywords = sorted({kw for kws in keywords_by_name.values() for kw in kws})
 
-        # If brand-filtered query returned no data, fall back to site-wide
-        # but dampen score by 60% since it's not campaign-specific
-        is_brand_specific = bool(brand_keywords) and prev_clicks > 0
-        dampening = 1.0 if is_brand_specific else 0.4
+        site = ()
+        for s, e in halves:
+            row = self.db.query(
+                func.sum(SearchConsoleQuery.clicks).label('clicks'),
+                func.sum(SearchConsoleQuery.impressions).label('impr'),
+            ).filter(
+                SearchConsoleQuery.date >= s,
+                SearchConsoleQuery.date <= e,
+            ).first()
+            site += (row.clicks or 0, row.impr or 0)
+
+        # One frame per half: query text -> clicks, impressions
+        frames = []
+        for s, e in halves:
+            rows = []
+            if all_keywords:
+                rows = (
+                    self.db.query(
+                        SearchConsoleQuery.query,
+                        func.sum(SearchConsoleQuery.clicks).label('clicks'),
+                        func.sum(SearchConsoleQuery.impressions).label('impr'),
+                    )
+                    .filter(
+                        SearchConsoleQuery.date >= s,
+                        SearchConsoleQuery.date <= e,
+                        or_(*[SearchConsoleQuery.query.ilike(f'%{kw}%') for kw in all_keywords]),
+                    )
+                    .group_by(SearchConsoleQuery.query)
+                    .all()
+                )
+            frame = pd.DataFrame(rows, columns=['query', 'clicks', 'impr'])
+            frame[['clicks', 'impr']] = frame[['clicks', 'impr']].fillna(0)
+            text = frame['query'].fillna('').str.lower()
+            masks = {kw: text.str.contains(kw, regex=False).to_numpy() for kw in all_keywords}
+            frames.append((frame, masks))
+
+        results = {}
+        for name, keywords in keywords_by_name.items():
+            brand = None
+            if keywords:
+                brand = ()
+                for frame, masks in frames:
+                    hit = masks[keywords[0]].copy()
+                    for kw in keywords[1:]:
+                        hit |= masks[kw]
+                    brand += (frame['clicks'][hit].sum(), frame['impr'][hit].sum())
+            results[name] = self._demand_cause(brand, site)
+        return results
 
-        if prev_clicks == 0 and brand_keywords:
-            # No SC data for this brand — try site-wide with heavy dampening
-            brand_keywords.clear()  # Clear to trigger unfiltered query
-            prev_clicks, prev_impr = _period_totals(start, mid - timedelta(days=1))
-            curr_clicks, curr_impr = _period_totals(mid, end)
-            dampening = 0.3  # Site-wide is weakly relevant
-            is_brand_specific = False
+    @staticmethod
+    def _demand_cause(brand: Optional[tuple], site: Optional[tuple]) -> Dict:
+        """
+        Score demand from (prev_clicks, prev_impr, curr_clicks, curr_impr)
+        totals for the campaign's brand keywords (None without keywords)
+        and site-wide.
+        """
+        if brand is not None and brand[0] > 0:
+            totals, dampening, is_brand_specific = brand, 1.0, True
+        elif brand is not None:
+            # No SC data for this brand — site-wide is weakly relevant
+            totals, dampening, is_brand_specific = site, 0.3, False
+        else:
+            # No brand keywords — site-wide, dampened since it's not campaign-specific
+            totals, dampening, is_brand_specific = site, 0.4, False
 
+        prev_clicks, prev_impr, curr_clicks, curr_impr = (float(v) for v in totals)
         if prev_clicks == 0:
             return {'cause': 'demand', 'score': 0, 'evidence': 'No prior SC data'}
 
@@ -185,29 +308,47 @@ class CausalTriageService:
 
     def _score_auction_pressure(self, campaign_id: str, start: date, end: date) -> Dict:
         """Detect competitive pressure via impression share and CPC changes."""
+        return self._batch_auction_pressure([campaign_id], start, end)[campaign_id]
+
+    def _batch_auction_pressure(self, campaign_ids: List[str], start: date, end: date) -> Dict[str, Dict]:
+        """Auction pressure cause per campaign, from two grouped period averages."""
         mid = start + (end - start) // 2
+        empty = {'rank_lost': 0.0, 'budget_lost': 0.0, 'cpc': 0.0, 'ctr': 0.0}
 
         def _period_avg(s, e):
-            row = self.db.query(
-                func.avg(GoogleAdsCampaign.search_rank_lost_impression_share).label('rank_lost'),
-                func.avg(GoogleAdsCampaign.search_budget_lost_impression_share).label('budget_lost'),
-                func.avg(GoogleAdsCampaign.avg_cpc).label('cpc'),
-                func.avg(GoogleAdsCampaign.ctr).label('ctr'),
-            ).filter(
-                GoogleAdsCampaign.campaign_id == campaign_id,
-                GoogleAdsCampaign.date >= s,
-                GoogleAdsCampaign.date <= e,
-            ).first()
-            return {
-                'rank_lost': float(row.rank_lost or 0),
-                'budget_lost': float(row.budget_lost or 0),
-                'cpc': float(row.cpc or 0),
-                'ctr': float(row.ctr or 0),
-            }
+            rows = (
+                self.db.query(
+                    GoogleAdsCampaign.campaign_id,
+                    func.avg(GoogleAdsCampaign.search_rank_lost_impression_share).label('rank_lost'),
+                    func.avg(GoogleAdsCampaign.search_budget_lost_impression_share).label('budget_lost'),
+                    func.avg(GoogleAdsCampaign.avg_cpc).label('cpc'),
+                    func.avg(GoogleAdsCampaign.ctr).label('ctr'),
+                )
+                .filter(
+                    GoogleAdsCampaign.campaign_id.in_(campaign_ids),
+                    GoogleAdsCampaign.date >= s,
+                    GoogleAdsCampaign.date <= e,
+                )
+                .group_by(GoogleAdsCampaign.campaign_id)
+                .all()
+            )
+            return {r.campaign_id: {
+                'rank_lost': float(r.rank_lost or 0),
+                'budget_lost': float(r.budget_lost or 0),
+                'cpc': float(r.cpc or 0),
+                'ctr': float(r.ctr or 0),
+            } for r in rows}
 
         prev = _period_avg(start, mid - timedelta(days=1))
         curr = _period_avg(mid, end)
+        return {
+            cid: self._auction_cause(prev.get(cid, empty), curr.get(cid, empty))
+            for cid in campaign_ids
+        }
 
+    @staticmethod
+    def _auction_cause(prev: Dict, curr: Dict) -> Dict:
+        """Score auction pressure from previous/current half-period averages."""
         score = 0
         evidence_parts = []
 
@@ -12,8 +12,16 @@ from datetime import datetime, date, timedelta
 from decimal import Decimal
 
 from app.models.base import SessionLocal
-from app.models.shopify import ShopifyOrder, ShopifyProduct, ShopifyCustomer, ShopifyOrderItem, ShopifyRefund, ShopifyInventory
-from app.models.search_console_data import SearchConsoleQuery, SearchConsolePage
+from app.models.shopify import (
+    ShopifyOrder, ShopifyProduct, ShopifyCustomer, ShopifyOrderItem, ShopifyRefund, ShopifyInventory,
+    ShopifySalesDailyFact,
+)
+from app.models.search_console_data import (
+    SearchConsoleQuery, SearchConsolePage, SearchConsoleQueryDaily, SearchConsolePageDaily
+)
+from app.services.sales_fact_service import day_window
+from app.services.search_console_rollup_service import weighted_position
+from app.services.query_classifier import QUERY_CLASS_BRAND, excluding_classes, parse_brand_terms
 from app.models.ga4_data import (
     GA4TrafficSource, GA4LandingPage, GA4DailySummary, GA4DeviceBreakdown,
     GA4GeoBreakdown, GA4UserType, GA4PagePerformance, GA4DailyEcommerce, GA4Event
@@ -42,6 +50,13 @@ class ChatDataService:
         end_dt = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
         return start_dt, end_dt
 
+    def _sales_fact_query(self, start_date: date, end_date: date, *columns):
+        """Query the daily sales fact table for days in [start_date, end_date]."""
+        return self.db.query(*columns).filter(
+            ShopifySalesDailyFact.date >= start_date,
+            ShopifySalesDailyFact.date <= end_date,
+        )
+
     def get_database_stats(self) -> Dict[str, Any]:
         """Get statistics about what's in the database"""
         try:
@@ -414,12 +429,12 @@ class ChatDataService:
         """Get top search queries from Search Console"""
         try:
             results = self.db.query(
-                SearchConsoleQuery.query,
-                func.sum(SearchConsoleQuery.clicks).label('total_clicks'),
-                func.sum(SearchConsoleQuery.impressions).label('total_impressions'),
-                func.avg(SearchConsoleQuery.position).label('avg_position')
+                SearchConsoleQueryDaily.query,
+                func.sum(SearchConsoleQueryDaily.clicks).label('total_clicks'),
+                func.sum(SearchConsoleQueryDaily.impressions).label('total_impressions'),
+                weighted_position(SearchConsoleQueryDaily).label('avg_position')
             ).group_by(
-                SearchConsoleQuery.query
+                SearchConsoleQueryDaily.query
             ).order_by(
                 desc('total_clicks')
             ).limit(limit).all()
@@ -440,10 +455,11 @@ class ChatDataService:
         """Get brand terms to exclude from non-brand query analysis"""
         from app.config import get_settings
         settings = get_settings()
-        brand_terms_str = getattr(settings, 'gsc_brand_terms', '')
-        if not brand_terms_str:
-            return []
-        return [term.strip().lower() for term in brand_terms_str.split(',') if term.strip()]
+        return parse_brand_terms(getattr(settings, 'gsc_brand_terms', ''))
+
+    def _exclude_brand_predicate(self):
+        """Rows not classified as brand (unclassified rows are kept)."""
+        return excluding_classes(SearchConsoleQueryDaily.query_class, QUERY_CLASS_BRAND)
 
     def get_search_console_queries_filtered(
         self,
@@ -465,7 +481,7 @@ class ChatDataService:
             Dict with queries, metadata, and summary
         """
         try:
-            from sqlalchemy import not_, literal
+            from sqlalchemy import literal
 
             # Calculate date range
             end_date = date.today()
@@ -473,34 +489,31 @@ class ChatDataService:
 
             # Build base query
             query = self.db.query(
-                SearchConsoleQuery.query.label('query'),
-                func.sum(SearchConsoleQuery.clicks).label('total_clicks'),
-                func.sum(SearchConsoleQuery.impressions).label('total_impressions'),
-                func.avg(SearchConsoleQuery.position).label('avg_position')
+                SearchConsoleQueryDaily.query.label('query'),
+                func.sum(SearchConsoleQueryDaily.clicks).label('total_clicks'),
+                func.sum(SearchConsoleQueryDaily.impressions).label('total_impressions'),
+                weighted_position(SearchConsoleQueryDaily).label('avg_position')
             ).filter(
-                SearchConsoleQuery.date >= start_date,
-                SearchConsoleQuery.date <= end_date
+                SearchConsoleQueryDaily.date >= start_date,
+                SearchConsoleQueryDaily.date <= end_date
             )
 
             # Exclude brand terms if requested
             brand_terms = self.get_brand_terms()
             excluded_terms = []
             if exclude_brand and brand_terms:
-                for term in brand_terms:
-                    query = query.filter(
-                        not_(func.lower(SearchConsoleQuery.query).like(f'%{term}%'))
-                    )
+                query = query.filter(self._exclude_brand_predicate())
                 excluded_terms = brand_terms
 
             # Group and order
-            query = query.group_by(SearchConsoleQuery.query)
+            query = query.group_by(SearchConsoleQueryDaily.query)
 
             if order_by == 'impressions':
                 query = query.order_by(desc('total_impressions'))
             elif order_by == 'ctr':
                 # Calculate CTR for ordering
                 query = query.order_by(
-                    desc(func.sum(SearchConsoleQuery.clicks) / func.nullif(func.sum(SearchConsoleQuery.impressions), 0))
+                    desc(func.sum(SearchConsoleQueryDaily.clicks) / func.nullif(func.sum(SearchConsoleQueryDaily.impressions), 0))
                 )
             else:  # default: clicks
                 query = query.order_by(desc('total_clicks'))
@@ -524,20 +537,17 @@ class ChatDataService:
 
             # Get totals for the period
             totals_query = self.db.query(
-                func.sum(SearchConsoleQuery.clicks).label('total_clicks'),
-                func.sum(SearchConsoleQuery.impressions).label('total_impressions'),
-                func.count(func.distinct(SearchConsoleQuery.query)).label('unique_queries')
+                func.sum(SearchConsoleQueryDaily.clicks).label('total_clicks'),
+                func.sum(SearchConsoleQueryDaily.impressions).label('total_impressions'),
+                func.count(func.distinct(SearchConsoleQueryDaily.query)).label('unique_queries')
             ).filter(
-                SearchConsoleQuery.date >= start_date,
-                SearchConsoleQuery.date <= end_date
+                SearchConsoleQueryDaily.date >= start_date,
+                SearchConsoleQueryDaily.date <= end_date
             )
 
             # Apply same brand exclusion to totals
             if exclude_brand and brand_terms:
-                for term in brand_terms:
-                    totals_query = totals_query.filter(
-                        not_(func.lower(SearchConsoleQuery.query).like(f'%{term}%'))
-                    )
+                totals_query = totals_query.filter(self._exclude_brand_predicate())
 
             totals = totals_query.first()
 
@@ -593,20 +603,20 @@ class ChatDataService:
 
             # Build query
             query = self.db.query(
-                SearchConsolePage.page.label('page'),
-                func.sum(SearchConsolePage.clicks).label('total_clicks'),
-                func.sum(SearchConsolePage.impressions).label('total_impressions'),
-                func.avg(SearchConsolePage.position).label('avg_position')
+                SearchConsolePageDaily.page.label('page'),
+                func.sum(SearchConsolePageDaily.clicks).label('total_clicks'),
+                func.sum(SearchConsolePageDaily.impressions).label('total_impressions'),
+                weighted_position(SearchConsolePageDaily).label('avg_position')
             ).filter(
-                SearchConsolePage.date >= start_date,
-                SearchConsolePage.date <= end_date
-            ).group_by(SearchConsolePage.page)
+                SearchConsolePageDaily.date >= start_date,
+                SearchConsolePageDaily.date <= end_date
+            ).group_by(SearchConsolePageDaily.page)
 
             if order_by == 'impressions':
                 query = query.order_by(desc('total_impressions'))
             elif order_by == 'ctr':
                 query = query.order_by(
-                    desc(func.sum(SearchConsolePage.clicks) / func.nullif(func.sum(SearchConsolePage.impressions), 0))
+                    desc(func.sum(SearchConsolePageDaily.clicks) / func.nullif(func.sum(SearchConsolePageDaily.impressions), 0))
                 )
             else:
                 query = query.order_by(desc('total_clicks'))
@@ -696,43 +706,38 @@ class ChatDataService:
             Dict with queries sorted by impressions (highest first)
         """
         try:
-            from sqlalchemy import not_
-
             # Calculate date range
             end_date = date.today()
             start_date = end_date - timedelta(days=days)
 
             # Build base query - aggregate by query
             query = self.db.query(
-                SearchConsoleQuery.query.label('query'),
-                func.sum(SearchConsoleQuery.clicks).label('total_clicks'),
-                func.sum(SearchConsoleQuery.impressions).label('total_impressions'),
-                func.avg(SearchConsoleQuery.position).label('avg_position')
+                SearchConsoleQueryDaily.query.label('query'),
+                func.sum(SearchConsoleQueryDaily.clicks).label('total_clicks'),
+                func.sum(SearchConsoleQueryDaily.impressions).label('total_impressions'),
+                weighted_position(SearchConsoleQueryDaily).label('avg_position')
             ).filter(
-                SearchConsoleQuery.date >= start_date,
-                SearchConsoleQuery.date <= end_date
+                SearchConsoleQueryDaily.date >= start_date,
+                SearchConsoleQueryDaily.date <= end_date
             )
 
             # Exclude brand terms if requested
             brand_terms = self.get_brand_terms()
             excluded_terms = []
             if exclude_brand and brand_terms:
-                for term in brand_terms:
-                    query = query.filter(
-                        not_(func.lower(SearchConsoleQuery.query).like(f'%{term}%'))
-                    )
+                query = query.filter(self._exclude_brand_predicate())
                 excluded_terms = brand_terms
 
             # Group by query
-            query = query.group_by(SearchConsoleQuery.query)
+            query = query.group_by(SearchConsoleQueryDaily.query)
 
             # Filter for low CTR and high impressions using HAVING clause
             # CTR < threshold AND impressions >= min_impressions
             query = query.having(
                 and_(
-                    func.sum(SearchConsoleQuery.impressions) >= min_impressions,
-                    (func.sum(SearchConsoleQuery.clicks) * 100.0 /
-                     func.nullif(func.sum(SearchConsoleQuery.impressions), 0)) < ctr_threshold
+                    func.sum(SearchConsoleQueryDaily.impressions) >= min_impressions,
+                    (func.sum(SearchConsoleQueryDaily.clicks) * 100.0 /
+                     func.nullif(func.sum(SearchConsoleQueryDaily.impressions), 0)) < ctr_threshold
                 )
             )
 
@@ -808,30 +813,27 @@ class ChatDataService:
 
             # Build base query
             query = self.db.query(
-                SearchConsoleQuery.query.label('query'),
-                func.sum(SearchConsoleQuery.clicks).label('total_clicks'),
-                func.sum(SearchConsoleQuery.impressions).label('total_impressions'),
-                func.avg(SearchConsoleQuery.position).label('avg_position')
+                SearchConsoleQueryDaily.query.label('query'),
+                func.sum(SearchConsoleQueryDaily.clicks).label('total_clicks'),
+                func.sum(SearchConsoleQueryDaily.impressions).label('total_impressions'),
+                weighted_position(SearchConsoleQueryDaily).label('avg_position')
             ).filter(
-                SearchConsoleQuery.date >= start_date,
-                SearchConsoleQuery.date <= end_date
+                SearchConsoleQueryDaily.date >= start_date,
+                SearchConsoleQueryDaily.date <= end_date
             )
 
-            # Filter for queries MATCHING any brand term
-            brand_filters = [
-                func.lower(SearchConsoleQuery.query).like(f'%{term}%')
-                for term in brand_terms
-            ]
-            query = query.filter(or_(*brand_filters))
+            # Filter for queries classified as brand at ingestion
+            brand_filter = SearchConsoleQueryDaily.query_class == QUERY_CLASS_BRAND
+            query = query.filter(brand_filter)
 
             # Group and order
-            query = query.group_by(SearchConsoleQuery.query)
+            query = query.group_by(SearchConsoleQueryDaily.query)
 
             if order_by == 'impressions':
                 query = query.order_by(desc('total_impressions'))
             elif order_by == 'ctr':
                 query = query.order_by(
-                    desc(func.sum(SearchConsoleQuery.clicks) / func.nullif(func.sum(SearchConsoleQuery.impressions), 0))
+                    desc(func.sum(SearchConsoleQueryDaily.clicks) / func.nullif(func.sum(SearchConsoleQueryDaily.impressions), 0))
                 )
             else:  # default: clicks
                 query = query.order_by(desc('total_clicks'))
@@ -855,14 +857,14 @@ class ChatDataService:
 
             # Get totals for brand queries
             totals_query = self.db.query(
-                func.sum(SearchConsoleQuery.clicks).label('total_clicks'),
-                func.sum(SearchConsoleQuery.impressions).label('total_impressions'),
-                func.count(func.distinct(SearchConsoleQuery.query)).label('unique_queries')
+                func.sum(SearchConsoleQueryDaily.clicks).label('total_clicks'),
+                func.sum(SearchConsoleQueryDaily.impressions).label('total_impressions'),
+                func.count(func.distinct(SearchConsoleQueryDaily.query)).label('unique_queries')
             ).filter(
-                SearchConsoleQuery.date >= start_date,
-                SearchConsoleQuery.date <= end_date
+                SearchConsoleQueryDaily.date >= start_date,
+                SearchConsoleQueryDaily.date <= end_date
             )
-            totals_query = totals_query.filter(or_(*brand_filters))
+            totals_query = totals_query.filter(brand_filter)
             totals = totals_query.first()
 
             total_clicks = totals.total_clicks or 0
@@ -916,7 +918,7 @@ class ChatDataService:
             Dict with opportunity queries sorted by impressions (highest potential first)
         """
         try:
-            from sqlalchemy import not_, and_
+            from sqlalchemy import and_
 
             # Calculate date range
             end_date = date.today()
@@ -924,34 +926,31 @@ class ChatDataService:
 
             # Build base query
             query = self.db.query(
-                SearchConsoleQuery.query.label('query'),
-                func.sum(SearchConsoleQuery.clicks).label('total_clicks'),
-                func.sum(SearchConsoleQuery.impressions).label('total_impressions'),
-                func.avg(SearchConsoleQuery.position).label('avg_position')
+                SearchConsoleQueryDaily.query.label('query'),
+                func.sum(SearchConsoleQueryDaily.clicks).label('total_clicks'),
+                func.sum(SearchConsoleQueryDaily.impressions).label('total_impressions'),
+                weighted_position(SearchConsoleQueryDaily).label('avg_position')
             ).filter(
-                SearchConsoleQuery.date >= start_date,
-                SearchConsoleQuery.date <= end_date
+                SearchConsoleQueryDaily.date >= start_date,
+                SearchConsoleQueryDaily.date <= end_date
             )
 
             # Exclude brand terms if requested
             brand_terms = self.get_brand_terms()
             excluded_terms = []
             if exclude_brand and brand_terms:
-                for term in brand_terms:
-                    query = query.filter(
-                        not_(func.lower(SearchConsoleQuery.query).like(f'%{term}%'))
-                    )
+                query = query.filter(self._exclude_brand_predicate())
                 excluded_terms = brand_terms
 
             # Group by query
-            query = query.group_by(SearchConsoleQuery.query)
+            query = query.group_by(SearchConsoleQueryDaily.query)
 
             # Filter for position range and minimum impressions using HAVING
             query = query.having(
                 and_(
-                    func.avg(SearchConsoleQuery.position) >= pos_min,
-                    func.avg(SearchConsoleQuery.position) <= pos_max,
-                    func.sum(SearchConsoleQuery.impressions) >= min_impressions
+                    weighted_position(SearchConsoleQueryDaily) >= pos_min,
+                    weighted_position(SearchConsoleQueryDaily) <= pos_max,
+                    func.sum(SearchConsoleQueryDaily.impressions) >= min_impressions
                 )
             )
 
@@ -1021,14 +1020,14 @@ class ChatDataService:
             def get_period_data(start_dt: date, end_dt: date) -> Dict[str, Dict]:
                 """Get aggregated page data for a period"""
                 results = self.db.query(
-                    SearchConsolePage.page.label('page'),
-                    func.sum(SearchConsolePage.clicks).label('total_clicks'),
-                    func.sum(SearchConsolePage.impressions).label('total_impressions'),
-                    func.avg(SearchConsolePage.position).label('avg_position')
+                    SearchConsolePageDaily.page.label('page'),
+                    func.sum(SearchConsolePageDaily.clicks).label('total_clicks'),
+                    func.sum(SearchConsolePageDaily.impressions).label('total_impressions'),
+                    weighted_position(SearchConsolePageDaily).label('avg_position')
                 ).filter(
-                    SearchConsolePage.date >= start_dt,
-                    SearchConsolePage.date <= end_dt
-                ).group_by(SearchConsolePage.page).all()
+                    SearchConsolePageDaily.date >= start_dt,
+                    SearchConsolePageDaily.date <= end_dt
+                ).group_by(SearchConsolePageDaily.page).all()
 
                 return {
                     r.page: {
@@ -1043,12 +1042,12 @@ class ChatDataService:
             def get_period_totals(start_dt: date, end_dt: date) -> Dict:
                 """Get totals for a period"""
                 result = self.db.query(
-                    func.sum(SearchConsolePage.clicks).label('total_clicks'),
-                    func.sum(SearchConsolePage.impressions).label('total_impressions'),
-                    func.count(func.distinct(SearchConsolePage.page)).label('unique_pages')
+                    func.sum(SearchConsolePageDaily.clicks).label('total_clicks'),
+                    func.sum(SearchConsolePageDaily.impressions).label('total_impressions'),
+                    func.count(func.distinct(SearchConsolePageDaily.page)).label('unique_pages')
                 ).filter(
-                    SearchConsolePage.date >= start_dt,
-                    SearchConsolePage.date <= end_dt
+                    SearchConsolePageDaily.date >= start_dt,
+                    SearchConsolePageDaily.date <= end_dt
                 ).first()
 
                 clicks = result.total_clicks or 0
@@ -1149,8 +1148,6 @@ class ChatDataService:
             Dict with period comparison and top movers (gainers/losers)
         """
         try:
-            from sqlalchemy import not_
-
             # Calculate date ranges
             current_end = date.today()
             current_start = current_end - timedelta(days=current_days)
@@ -1162,22 +1159,19 @@ class ChatDataService:
             def get_period_data(start_dt: date, end_dt: date) -> Dict[str, Dict]:
                 """Get aggregated data for a period"""
                 query = self.db.query(
-                    SearchConsoleQuery.query.label('query'),
-                    func.sum(SearchConsoleQuery.clicks).label('total_clicks'),
-                    func.sum(SearchConsoleQuery.impressions).label('total_impressions'),
-                    func.avg(SearchConsoleQuery.position).label('avg_position')
+                    SearchConsoleQueryDaily.query.label('query'),
+                    func.sum(SearchConsoleQueryDaily.clicks).label('total_clicks'),
+                    func.sum(SearchConsoleQueryDaily.impressions).label('total_impressions'),
+                    weighted_position(SearchConsoleQueryDaily).label('avg_position')
                 ).filter(
-                    SearchConsoleQuery.date >= start_dt,
-                    SearchConsoleQuery.date <= end_dt
+                    SearchConsoleQueryDaily.date >= start_dt,
+                    SearchConsoleQueryDaily.date <= end_dt
                 )
 
                 if exclude_brand and brand_terms:
-                    for term in brand_terms:
-                        query = query.filter(
-                            not_(func.lower(SearchConsoleQuery.query).like(f'%{term}%'))
-                        )
+                    query = query.filter(self._exclude_brand_predicate())
 
-                results = query.group_by(SearchConsoleQuery.query).all()
+                results = query.group_by(SearchConsoleQueryDaily.query).all()
 
                 return {
                     r.query: {
@@ -1192,19 +1186,16 @@ class ChatDataService:
             def get_period_totals(start_dt: date, end_dt: date) -> Dict:
                 """Get totals for a period"""
                 query = self.db.query(
-                    func.sum(SearchConsoleQuery.clicks).label('total_clicks'),
-                    func.sum(SearchConsoleQuery.impressions).label('total_impressions'),
-                    func.count(func.distinct(SearchConsoleQuery.query)).label('unique_queries')
+                    func.sum(SearchConsoleQueryDaily.clicks).label('total_clicks'),
+                    func.sum(SearchConsoleQueryDaily.impressions).label('total_impressions'),
+                    func.count(func.distinct(SearchConsoleQueryDaily.query)).label('unique_queries')
                 ).filter(
-                    SearchConsoleQuery.date >= start_dt,
-                    SearchConsoleQuery.date <= end_dt
+                    SearchConsoleQueryDaily.date >= start_dt,
+                    SearchConsoleQueryDaily.date <= end_dt
                 )
 
                 if exclude_brand and brand_terms:
-                    for term in brand_terms:
-                        query = query.filter(
-                            not_(func.lower(SearchConsoleQuery.query).like(f'%{term}%'))
-                        )
+                    query = query.filter(self._exclude_brand_predicate())
 
                 result = query.first()
                 clicks = result.total_clicks or 0
@@ -1765,16 +1756,14 @@ class ChatDataService:
     def get_product_variant_popularity(self, start_date: date, end_date: date, limit: int = 10) -> Dict[str, Any]:
         """Top product variants by units"""
         try:
-            start_dt, end_dt = self._date_bounds(start_date, end_date)
-            rows = self.db.query(
-                ShopifyOrderItem.sku,
-                ShopifyOrderItem.title,
-                func.sum(ShopifyOrderItem.quantity).label("units"),
-                func.sum(ShopifyOrderItem.total_price).label("revenue")
-            ).filter(
-                ShopifyOrderItem.order_date >= start_dt,
-                ShopifyOrderItem.order_date < end_dt
-            ).group_by(ShopifyOrderItem.sku, ShopifyOrderItem.title).order_by(func.sum(ShopifyOrderItem.quantity).desc()).limit(limit).all()
+            F = ShopifySalesDailyFact
+            rows = self._sales_fact_query(
+                start_date, end_date,
+                F.sku,
+                func.max(F.title).label("title"),
+                func.sum(F.units).label("units"),
+                func.sum(F.gross_revenue).label("revenue")
+            ).group_by(F.sku).order_by(func.sum(F.units).desc()).limit(limit).all()
 
             return {
                 "period": f"{start_date} to {end_date}",
@@ -1794,16 +1783,14 @@ class ChatDataService:
     def get_low_selling_products(self, start_date: date, end_date: date, limit: int = 10) -> Dict[str, Any]:
         """Products with lowest sales in a period (non-zero)"""
         try:
-            start_dt, end_dt = self._date_bounds(start_date, end_date)
-            rows = self.db.query(
-                ShopifyOrderItem.sku,
-                ShopifyOrderItem.title,
-                func.sum(ShopifyOrderItem.quantity).label("units"),
-                func.sum(ShopifyOrderItem.total_price).label("revenue")
-            ).filter(
-                ShopifyOrderItem.order_date >= start_dt,
-                ShopifyOrderItem.order_date < end_dt
-            ).group_by(ShopifyOrderItem.sku, ShopifyOrderItem.title).having(func.sum(ShopifyOrderItem.quantity) > 0).order_by(func.sum(ShopifyOrderItem.quantity).asc()).limit(limit).all()
+            F = ShopifySalesDailyFact
+            rows = self._sales_fact_query(
+                start_date, end_date,
+                F.sku,
+                func.max(F.title).label("title"),
+                func.sum(F.units).label("units"),
+                func.sum(F.gross_revenue).label("revenue")
+            ).group_by(F.sku).having(func.sum(F.units) > 0).order_by(func.sum(F.units).asc()).limit(limit).all()
 
             return {
                 "period": f"{start_date} to {end_date}",
@@ -1843,29 +1830,24 @@ class ChatDataService:
             Dict with brand sales data, top brands or single brand details
         """
         try:
-            start_dt, end_dt = self._date_bounds(start_date, end_date)
-
-            # Build a subquery to get vendor from NETT master (ProductCost) first,
-            # fallback to ShopifyOrderItem.vendor or ShopifyProduct.vendor
-            # We'll query order items and left join to product_costs to get authoritative vendor
-
-            # Get all order items in the period with their SKUs
-            items_query = self.db.query(
-                ShopifyOrderItem.sku,
-                ShopifyOrderItem.title,
-                ShopifyOrderItem.quantity,
-                ShopifyOrderItem.total_price,
-                ShopifyOrderItem.shopify_order_id,
-                ShopifyOrderItem.vendor.label('item_vendor')
+            # Per-SKU sales for the period from the daily sales fact table;
+            # joined to product_costs below to get the authoritative vendor
+            F = ShopifySalesDailyFact
+            items_query = self._sales_fact_query(
+                start_date, end_date,
+                F.sku,
+                func.max(F.title).label('title'),
+                func.sum(F.units).label('quantity'),
+                func.sum(F.gross_revenue).label('total_price'),
+                func.sum(F.order_count).label('order_count'),
+                func.max(F.vendor).label('item_vendor')
             ).filter(
-                ShopifyOrderItem.order_date >= start_dt,
-                ShopifyOrderItem.order_date < end_dt,
-                ShopifyOrderItem.sku.isnot(None),
-                ShopifyOrderItem.sku != ''
-            ).subquery()
+                F.sku.isnot(None),
+                F.sku != ''
+            ).group_by(F.sku).subquery()
 
             # Join to ProductCost to get NETT master vendor (authoritative)
-            # Use COALESCE: ProductCost.vendor > ShopifyOrderItem.vendor
+            # Use COALESCE: ProductCost.vendor > order-item vendor
             vendor_label = func.coalesce(
                 ProductCost.vendor,
                 items_query.c.item_vendor
@@ -1878,7 +1860,7 @@ class ChatDataService:
                 items_query.c.title,
                 func.sum(items_query.c.quantity).label('units'),
                 func.sum(items_query.c.total_price).label('revenue'),
-                func.count(func.distinct(items_query.c.shopify_order_id)).label('orders')
+                func.sum(items_query.c.order_count).label('orders')
             ).outerjoin(
                 ProductCost,
                 func.upper(ProductCost.vendor_sku) == func.upper(items_query.c.sku)
@@ -5322,26 +5304,25 @@ class ChatDataService:
         limit: int = 30
     ) -> List[Dict]:
         """
-        Get product mix for a date range - fast query using order_items table.
+        Get product mix for a date range - fast query using the daily sales fact table.
 
         Returns top products by revenue with quantity sold.
         """
         try:
-            results = self.db.query(
-                ShopifyOrderItem.title,
-                ShopifyOrderItem.sku,
-                ShopifyOrderItem.shopify_product_id,
-                func.sum(ShopifyOrderItem.quantity).label('units_sold'),
-                func.sum(ShopifyOrderItem.total_price).label('revenue'),
-                func.count(func.distinct(ShopifyOrderItem.shopify_order_id)).label('order_count')
+            F = ShopifySalesDailyFact
+            results = self._sales_fact_query(
+                start_date, end_date,
+                func.max(F.title).label('title'),
+                F.sku,
+                F.shopify_product_id,
+                func.sum(F.units).label('units_sold'),
+                func.sum(F.gross_revenue).label('revenue'),
+                func.sum(F.order_count).label('order_count')
             ).filter(
-                ShopifyOrderItem.order_date >= start_date,
-                ShopifyOrderItem.order_date <= end_date,
-                ShopifyOrderItem.financial_status.in_(['paid', 'partially_refunded'])
+                F.financial_status.in_(['paid', 'partially_refunded'])
             ).group_by(
-                ShopifyOrderItem.shopify_product_id,
-                ShopifyOrderItem.title,
-                ShopifyOrderItem.sku
+                F.shopify_product_id,
+                F.sku
             ).order_by(
                 desc('revenue')
             ).limit(limit).all()
@@ -5369,25 +5350,24 @@ class ChatDataService:
     ) -> List[Dict]:
         """Get daily sales for a specific product or SKU."""
         try:
-            start_date = datetime.now() - timedelta(days=days)
-
-            query = self.db.query(
-                func.date(ShopifyOrderItem.order_date).label('date'),
-                func.sum(ShopifyOrderItem.quantity).label('units'),
-                func.sum(ShopifyOrderItem.total_price).label('revenue')
+            F = ShopifySalesDailyFact
+            first_day, last_day = day_window(datetime.now() - timedelta(days=days), datetime.now())
+
+            query = self._sales_fact_query(
+                first_day, last_day,
+                F.date,
+                func.sum(F.units).label('units'),
+                func.sum(F.gross_revenue).label('revenue')
             ).filter(
-                ShopifyOrderItem.order_date >= start_date,
-                ShopifyOrderItem.financial_status.in_(['paid', 'partially_refunded'])
+                F.financial_status.in_(['paid', 'partially_refunded'])
             )
 
             if product_id:
-                query = query.filter(ShopifyOrderItem.shopify_product_id == product_id)
+                query = query.filter(F.shopify_product_id == product_id)
             elif sku:
-                query = query.filter(ShopifyOrderItem.sku == sku)
+                query = query.filter(F.sku == sku)
 
-            results = query.group_by(
-                func.date(ShopifyOrderItem.order_date)
-            ).order_by('date').all()
+            results = query.group_by(F.date).order_by(F.date).all()
 
             return [
                 {
@@ -5415,22 +5395,18 @@ class ChatDataService:
             prev_end = current_start
             prev_start = prev_end - timedelta(days=days)
 
+            F = ShopifySalesDailyFact
+            sold = F.financial_status.in_(['paid', 'partially_refunded'])
+
             # Get current period data
-            current = self.db.query(
-                ShopifyOrderItem.title,
-                ShopifyOrderItem.sku,
-                ShopifyOrderItem.shopify_product_id,
-                func.sum(ShopifyOrderItem.quantity).label('units'),
-                func.sum(ShopifyOrderItem.total_price).label('revenue')
-            ).filter(
-                ShopifyOrderItem.order_date >= current_start,
-                ShopifyOrderItem.order_date <= current_end,
-                ShopifyOrderItem.financial_status.in_(['paid', 'partially_refunded'])
-            ).group_by(
-                ShopifyOrderItem.shopify_product_id,
-                ShopifyOrderItem.title,
-                ShopifyOrderItem.sku
-            ).all()
+            current = self._sales_fact_query(
+                *day_window(current_start, current_end),
+                F.shopify_product_id,
+                func.max(F.title).label('title'),
+                func.max(F.sku).label('sku'),
+                func.sum(F.units).label('units'),
+                func.sum(F.gross_revenue).label('revenue')
+            ).filter(sold).group_by(F.shopify_product_id).all()
 
             current_map = {
                 r.shopify_product_id: {
@@ -5443,17 +5419,12 @@ class ChatDataService:
             }
 
             # Get previous period data
-            previous = self.db.query(
-                ShopifyOrderItem.shopify_product_id,
-                func.sum(ShopifyOrderItem.quantity).label('units'),
-                func.sum(ShopifyOrderItem.total_price).label('revenue')
-            ).filter(
-                ShopifyOrderItem.order_date >= prev_start,
-                ShopifyOrderItem.order_date <= prev_end,
-                ShopifyOrderItem.financial_status.in_(['paid', 'partially_refunded'])
-            ).group_by(
-                ShopifyOrderItem.shopify_product_id
-            ).all()
+            previous = self._sales_fact_query(
+                *day_window(prev_start, prev_end),
+                F.shopify_product_id,
+                func.sum(F.units).label('units'),
+                func.sum(F.gross_revenue).label('revenue')
+            ).filter(sold).group_by(F.shopify_product_id).all()
 
             prev_map = {
                 r.shopify_product_id: {
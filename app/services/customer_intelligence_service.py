@@ -966,6 +966,9 @@ class CustomerIntelligenceService:
                     flags.append("High Value")
                 if cust_rfm["segment"] in ("New Customers", "Promising"):
                     flags.append("New")
+            # Precomputed nightly by ChurnScoringService
+            if customer.is_at_risk:
+                flags.append("Churn Risk")
 
             total_spent = float(customer.total_spent or 0)
             orders_count = int(customer.orders_count or 0)
@@ -1013,6 +1016,7 @@ class CustomerIntelligenceService:
                 "city": customer.default_address_city or "",
                 "state": customer.default_address_province or "",
                 "country": customer.default_address_country or "",
+                "churn_probability": customer.churn_probability,
                 "flags": flags,
                 "orders": [
                     {
@@ -19,7 +19,7 @@ from app.connectors.google_sheets import GoogleSheetsConnector
 from app.connectors.shippit_connector import ShippitConnector
 from app.config import get_settings
 from app.models.base import SessionLocal
-from app.models.shopify import ShopifyOrder, ShopifyProduct, ShopifyCustomer, ShopifyRefund, ShopifyRefundLineItem, ShopifyInventory, ShopifyOrderItem
+from app.models.shopify import ShopifyOrder, ShopifyProduct, ShopifyCustomer, ShopifyRefund, ShopifyRefundLineItem, ShopifyInventory, ShopifyInventoryLevel, ShopifyOrderItem
 from app.models.shippit import ShippitOrder
 from app.utils.url_parsing import parse_landing_site
 from app.models.search_console_data import SearchConsoleQuery, SearchConsolePage, SearchConsoleSitemap
@@ -35,6 +35,9 @@ from app.models.analytics import DataSyncLog
 from app.models.product_cost import ProductCost
 from app.models.data_quality import DataSyncStatus
 from app.services.validation_service import validation_service
+from app.services.query_classifier import get_query_classifier, backfill_query_classes
+from app.services.refund_rollup_service import RefundRollupService
+from app.services.ad_spend_changes import SOURCE_GOOGLE_ADS, mark_dirty
 from app.utils.logger import log
 import time
 from contextlib import contextmanager
@@ -352,23 +355,26 @@ class DataSyncService:
 
         return start_date, end_date
 
-    async def sync_all(self, days: int = 30) -> Dict:
+    async def sync_all(self, days: int = 30, include_shopify: bool = True) -> Dict:
         """
         Sync data from all sources.
         Each individual sync logs its own result to DataSyncLog.
+
+        include_shopify=False skips the Shopify poll (changes arrive via
+        webhooks between reconciliation sweeps).
         """
         log.info(f"Starting full data sync for last {days} days")
 
         start_date, end_date = self._get_sydney_date_range(days)
 
         # Use the logged sync methods instead of raw connector calls
-        results = {
-            'shopify': await self.sync_shopify(days=days),
-            'klaviyo': await self.sync_klaviyo(days=days),
-            'ga4': await self.sync_ga4(days=days),
-            'google_ads': await self.sync_google_ads(days=days),
-            'merchant_center': await self.sync_merchant_center(),
-        }
+        results = {}
+        if include_shopify:
+            results['shopify'] = await self.sync_shopify(days=days)
+        results['klaviyo'] = await self.sync_klaviyo(days=days)
+        results['ga4'] = await self.sync_ga4(days=days)
+        results['google_ads'] = await self.sync_google_ads(days=days)
+        results['merchant_center'] = await self.sync_merchant_center()
 
         if self.shippit:
             results['shippit'] = await self.sync_shippit(days=days)
@@ -553,6 +559,10 @@ class DataSyncService:
             return result
 
         db = SessionLocal()
+        # Order dates whose line items changed — refreshed in the product sales rollup
+        touched_dates = set()
+        saved_line_items = set()
+        saved_order_ids = set()
 
         try:
             # Build comprehensive SKU -> cost lookup (supports fuzzy matching)
@@ -702,6 +712,8 @@ class DataSyncService:
                         db.add(new_order)
                         result['created'] += 1
 
+                    saved_order_ids.add(shopify_order_id)
+
                     # ── Save normalized order items (enables COGS, product mix, P&L) ──
                     line_items = order_data.get('line_items', [])
                     if line_items:
@@ -709,6 +721,8 @@ class DataSyncService:
                         db.query(ShopifyOrderItem).filter(
                             ShopifyOrderItem.shopify_order_id == shopify_order_id
                         ).delete()
+                        if order_item_date:
+                            touched_dates.add(order_item_date.date())
 
                         for item in line_items:
                             sku = item.get('sku')
@@ -741,6 +755,7 @@ class DataSyncService:
                                 synced_at=datetime.utcnow()
                             )
                             db.add(order_item)
+                            saved_line_items.add(item.get('id'))
 
                 except Exception as e:
                     log.warning(f"Failed to save order {shopify_order_id}: {e}")
@@ -748,8 +763,13 @@ class DataSyncService:
                     result['failed_ids'].append(str(shopify_order_id))
                     continue
 
+            # Re-created line items start at zero refunds; restore their totals
+            RefundRollupService(db).refresh_line_items(saved_line_items, commit=False)
             db.commit()
             log.info(f"Saved {result['created']} new, updated {result['updated']} Shopify orders (with order items)")
+            self._refresh_order_attribution(saved_order_ids)
+            self._refresh_product_sales_rollup(touched_dates)
+            self._refresh_sales_fact(touched_dates=touched_dates)
             return result
 
         except Exception as e:
@@ -955,6 +975,7 @@ class DataSyncService:
         if not refunds:
             return result
 
+        refunded_line_items = set()
         db = SessionLocal()
         try:
             for refund_data in refunds:
@@ -1004,6 +1025,12 @@ class DataSyncService:
                     # Normalize refund line items
                     refund_items = refund_data.get('refund_line_items') or []
                     if refund_items:
+                        # Line items losing a refund row also need their totals recomputed
+                        refunded_line_items.update(
+                            line_item_id for (line_item_id,) in db.query(ShopifyRefundLineItem.line_item_id).filter(
+                                ShopifyRefundLineItem.shopify_refund_id == shopify_refund_id
+                            )
+                        )
                         db.query(ShopifyRefundLineItem).filter(
                             ShopifyRefundLineItem.shopify_refund_id == shopify_refund_id
                         ).delete()
@@ -1023,6 +1050,7 @@ class DataSyncService:
                                     synced_at=datetime.utcnow(),
                                 )
                                 db.add(new_item)
+                                refunded_line_items.add(item.get('line_item_id'))
                             except Exception as item_e:
                                 log.warning(f"Failed to save refund line item for refund {shopify_refund_id}: {item_e}")
 
@@ -1031,8 +1059,10 @@ class DataSyncService:
                     result['failed'] += 1
                     continue
 
+            RefundRollupService(db).refresh_line_items(refunded_line_items, commit=False)
             db.commit()
             log.info(f"Saved {result['created']} new, updated {result['updated']} Shopify refunds")
+            self._refresh_sales_fact(line_item_ids=refunded_line_items)
             return result
 
         except Exception as e:
@@ -1129,6 +1159,8 @@ class DataSyncService:
                 if stale_deleted:
                     log.info(f"Removed {stale_deleted} stale inventory records")
                 result['stale_removed'] = stale_deleted
+                # Totals were just replaced; webhook per-location levels restart from here
+                db.query(ShopifyInventoryLevel).delete(synchronize_session=False)
 
             db.commit()
             log.info(f"Saved {result['created']} new, updated {result['updated']} Shopify inventory records")
@@ -1625,6 +1657,8 @@ class DataSyncService:
                 # Update log with final counts after save completes
                 _update_sync_log(sync_log_id, sync_result)
 
+                self._refresh_search_console_rollups(start_date, end_date)
+
         return result
 
     def _save_search_queries(self, data: Dict, sync_log_id: int = None) -> Dict:
@@ -1648,6 +1682,7 @@ class DataSyncService:
 
         db = SessionLocal()
         today = datetime.utcnow().date()
+        classifier = get_query_classifier()
 
         try:
             for query_data in queries:
@@ -1690,6 +1725,7 @@ class DataSyncService:
                         existing.impressions = query_data.get('impressions', 0)
                         existing.ctr = query_data.get('ctr', 0)
                         existing.position = query_data.get('position', 0)
+                        existing.query_class = classifier.classify(query_text)
                         existing.synced_at = datetime.utcnow()
                         result['updated'] += 1
                     else:
@@ -1703,6 +1739,7 @@ class DataSyncService:
                             impressions=query_data.get('impressions', 0),
                             ctr=query_data.get('ctr', 0),
                             position=query_data.get('position', 0),
+                            query_class=classifier.classify(query_text),
                             synced_at=datetime.utcnow()
                         )
                         db.add(new_query)
@@ -1908,60 +1945,367 @@ class DataSyncService:
         finally:
             db.close()
 
+    def _refresh_order_attribution(self, order_ids=None) -> Optional[int]:
+        """
+        Maintain the order → campaign attribution index after a save.
+
+        With order_ids, resolves those orders; without, re-resolves indexed
+        orders against the current Google Ads campaign names.
+        Never raises — index maintenance must not fail the sync itself.
+        """
+        from app.services.shopify_revenue_attribution import ShopifyRevenueAttributionService
+
+        if order_ids is not None and not order_ids:
+            return None
+        db = SessionLocal()
+        try:
+            service = ShopifyRevenueAttributionService(db)
+            if order_ids is None:
+                return service.reindex_campaign_names()
+            return service.index_orders(order_ids)
+        except Exception as e:
+            log.error(f"Failed to refresh order attribution index: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _refresh_product_sales_rollup(self, touched_dates) -> Optional[Dict]:
+        """
+        Refresh the per-day product sales rollup for order dates touched by a save.
+
+        Never raises — rollup maintenance must not fail the sync itself.
+        """
+        from app.services.product_sales_rollup_service import ProductSalesRollupService
+
+        if not touched_dates:
+            return None
+        db = SessionLocal()
+        try:
+            return ProductSalesRollupService(db).refresh_dates(touched_dates)
+        except Exception as e:
+            log.error(f"Failed to refresh product sales rollup: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _refresh_sales_fact(self, touched_dates=None, line_item_ids=None) -> Optional[Dict]:
+        """
+        Refresh the daily sales fact table for order dates touched by a save.
+
+        Refund saves pass the refunded line_item_ids instead; refunds are
+        attributed to the order date, so those items' order days are refreshed.
+        An empty table is rebuilt from the full history here, so request
+        paths never have to. Never raises — fact maintenance must not fail
+        the sync itself.
+        """
+        from app.services.sales_fact_service import SalesFactService
+
+        if not touched_dates and not line_item_ids:
+            return None
+        db = SessionLocal()
+        try:
+            service = SalesFactService(db)
+            if service.ensure_built():
+                return {"rebuilt": True}
+            dates = set(touched_dates or [])
+            if line_item_ids:
+                dates.update(service.order_dates_for_line_items(line_item_ids))
+            return service.refresh_dates(dates)
+        except Exception as e:
+            log.error(f"Failed to refresh sales fact table: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _refresh_search_console_rollups(self, start_date, end_date, ensure_built: bool = False) -> Optional[Dict]:
+        """
+        Refresh Search Console rollup tables for a freshly synced date range.
+
+        Never raises — rollup maintenance must not fail the sync itself.
+        """
+        from app.services.search_console_rollup_service import SearchConsoleRollupService
+
+        if isinstance(start_date, str):
+            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+        if isinstance(end_date, str):
+            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+        if isinstance(start_date, datetime):
+            start_date = start_date.date()
+        if isinstance(end_date, datetime):
+            end_date = end_date.date()
+        if not start_date or not end_date:
+            return None
+
+        db = SessionLocal()
+        try:
+            # Rows ingested before classification existed get classified
+            # first so the rollups carry query_class for brand filters
+            backfill_query_classes(db, only_missing=True)
+
+            rollups = SearchConsoleRollupService(db)
+            if ensure_built and rollups.ensure_built():
+                return {"rebuilt": True}
+            return rollups.refresh(start_date, end_date)
+        except Exception as e:
+            log.error(f"Failed to refresh Search Console rollups: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _bulk_save_search_console_window(self, data: Dict, sync_log_id: int = None) -> Dict:
+        """
+        Persist one backfill window in bulk.
+
+        Window payloads carry the date dimension, so they are authoritative
+        for every day they contain: existing rows for those days are deleted
+        and the window is re-inserted with executemany, instead of one
+        existence check per row as in _save_search_queries/_save_search_pages.
+
+        Returns:
+            Dict with keys: processed, created, replaced, failed, validation_failures,
+            queries_saved, pages_saved
+        """
+        import pandas as pd
+
+        result = {
+            'processed': 0, 'created': 0, 'replaced': 0, 'failed': 0, 'validation_failures': 0,
+            'queries_saved': 0, 'pages_saved': 0,
+        }
+        query_perf = data.get('query_performance') or {}
+        page_perf = data.get('page_performance') or {}
+        queries = query_perf.get('queries', []) if isinstance(query_perf, dict) else query_perf
+        pages = page_perf.get('pages', []) if isinstance(page_perf, dict) else page_perf
+
+        valid_queries = []
+        for query_data in queries:
+            validation_result = validation_service.validate_search_query(query_data)
+            if validation_result.all_issues:
+                result['validation_failures'] += validation_service.persist_validation_failures(
+                    failures=validation_result.all_issues,
+                    entity_type="search_query",
+                    entity_id=query_data.get('query'),
+                    source="search_console",
+                    sync_log_id=sync_log_id
+                )
+            if validation_result.has_blocking_errors:
+                result['failed'] += 1
+                continue
+            valid_queries.append(query_data)
+
+        now = datetime.utcnow()
+        frames = {}
+        if valid_queries:
+            qdf = pd.DataFrame(valid_queries)
+            qdf['date'] = pd.to_datetime(qdf['date']).dt.date
+            # Same unique key as _save_search_queries: (query, date)
+            qdf = qdf.drop_duplicates(subset=['query', 'date'], keep='last')
+            qdf['query_class'] = get_query_classifier().classify_series(qdf['query'])
+            frames[SearchConsoleQuery] = qdf
+        page_rows = [p for p in pages if p.get('page')]
+        result['failed'] += len(pages) - len(page_rows)
+        if page_rows:
+            pdf = pd.DataFrame(page_rows)
+            pdf['date'] = pd.to_datetime(pdf['date']).dt.date
+            pdf = pdf.drop_duplicates(subset=['page', 'date'], keep='last')
+            frames[SearchConsolePage] = pdf
+
+        db = SessionLocal()
+        try:
+            for model, df in frames.items():
+                dates = sorted(df['date'].unique())
+                result['replaced'] += db.query(model).filter(
+                    model.date.in_(dates)
+                ).delete(synchronize_session=False)
+
+                columns = [c for c in model.__table__.columns.keys() if c in df.columns]
+                df = df[columns].astype(object).where(df[columns].notna(), None)
+                records = df.to_dict('records')
+                for record in records:
+                    record['synced_at'] = now
+                for i in range(0, len(records), 5000):
+                    db.execute(model.__table__.insert(), records[i:i + 5000])
+                result['processed'] += len(records)
+                result['created'] += len(records)
+                result['queries_saved' if model is SearchConsoleQuery else 'pages_saved'] = len(records)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        return result
+
+    def _search_console_backfill_windows(self, start_date: datetime, end_date: datetime, window_days: int) -> List[tuple]:
+        """Fixed window boundaries, so a resumed run lines up with its checkpoint."""
+        windows = []
+        current_start = start_date
+        while current_start < end_date:
+            window_end = min(current_start + timedelta(days=window_days), end_date)
+            windows.append((current_start, window_end))
+            current_start = window_end + timedelta(days=1)
+        return windows
+
+    def _find_search_console_checkpoint(self, months: int, window_days: int) -> Optional[DataSyncLog]:
+        """
+        Latest unfinished backfill with the same shape, if any.
+
+        Partial and failed runs are resumed. A "running" row is only taken
+        over once its heartbeat (last checkpoint write) is older than
+        gsc_backfill_stale_minutes, i.e. the process that owned it died;
+        a live backfill is never resumed concurrently.
+        """
+        stale_before = datetime.utcnow() - timedelta(
+            minutes=getattr(settings, 'gsc_backfill_stale_minutes', 30)
+        )
+        db = SessionLocal()
+        try:
+            candidates = db.query(DataSyncLog).filter(
+                DataSyncLog.source == "search_console",
+                DataSyncLog.sync_type == "backfill",
+                DataSyncLog.status.in_(["running", "partial", "failed"]),
+            ).order_by(DataSyncLog.started_at.desc()).limit(5).all()
+            for sync_log in candidates:
+                details = sync_log.error_details or {}
+                checkpoint = details.get("checkpoint") or {}
+                if sync_log.status == "running":
+                    heartbeat = details.get("heartbeat_at")
+                    last_seen = datetime.fromisoformat(heartbeat) if heartbeat else sync_log.started_at
+                    if last_seen is None or last_seen > stale_before:
+                        continue
+                if checkpoint.get("months") == months and checkpoint.get("window_days") == window_days:
+                    db.expunge(sync_log)
+                    return sync_log
+            return None
+        finally:
+            db.close()
+
+    def _write_backfill_checkpoint(self, sync_log_id: int, checkpoint: Dict, results: Dict, status: str = "running") -> None:
+        """Persist per-window completion state on the backfill's DataSyncLog row."""
+        if not sync_log_id:
+            return
+        db = SessionLocal()
+        try:
+            sync_log = db.query(DataSyncLog).filter(DataSyncLog.id == sync_log_id).first()
+            if sync_log:
+                total_records = results["total_queries_saved"] + results["total_pages_saved"]
+                sync_log.status = status
+                sync_log.records_processed = total_records
+                sync_log.records_created = total_records
+                # Reassign (not mutate) so the JSON column is flagged dirty
+                sync_log.error_details = {
+                    "checkpoint": {**checkpoint, "completed_windows": sorted(checkpoint["completed_windows"])},
+                    "windows_total": results["windows_total"],
+                    "windows_successful": results["windows_processed"] + results["windows_skipped"],
+                    "windows_failed": results["windows_failed"],
+                    "queries_saved": results["total_queries_saved"],
+                    "pages_saved": results["total_pages_saved"],
+                    "window_errors": results["errors"] if results["errors"] else None,
+                    "heartbeat_at": datetime.utcnow().isoformat(),
+                }
+                db.commit()
+        except Exception as e:
+            db.rollback()
+            log.error(f"Failed to write backfill checkpoint: {e}")
+        finally:
+            db.close()
+
     async def backfill_search_console(
         self,
         months: int = 16,
         window_days: int = 14,
-        delay_between_windows: float = 2.0
+        delay_between_windows: float = 2.0,
+        concurrency: Optional[int] = None,
+        resume: bool = True
     ) -> Dict:
         """
-        Backfill Search Console data in chunks to avoid rate limits.
+        Backfill Search Console data in windows, several at a time.
+
+        Each completed window is checkpointed on the backfill's DataSyncLog
+        row (error_details["checkpoint"]), so a crashed or partial run resumes
+        from the windows it has not finished instead of restarting at month 16.
+        Workers share one quota-aware rate limiter (gsc_api_queries_per_minute)
+        and back off together on 429s.
 
         Args:
             months: Number of months to backfill (max 16)
             window_days: Days per fetch window (7-30)
-            delay_between_windows: Seconds between windows
+            delay_between_windows: Seconds each worker pauses between its windows
+            concurrency: Windows fetched in parallel (default gsc_backfill_concurrency)
+            resume: Continue the latest unfinished backfill with the same shape
 
         Returns:
             Dict with backfill results
         """
         import asyncio
-        backfill_start = time.time()
-
-        log.info(f"Starting Search Console backfill: {months} months, {window_days}-day windows")
+        from app.utils.rate_limiter import AsyncRateLimiter
 
-        # Create sync log for the entire backfill operation
-        db = SessionLocal()
-        try:
-            sync_log = DataSyncLog(
-                source="search_console",
-                sync_type="backfill",
-                status="running",
-                started_at=datetime.utcnow()
+        backfill_start = time.time()
+        months = min(months, 16)
+        concurrency = max(1, concurrency or getattr(settings, 'gsc_backfill_concurrency', 4))
+
+        previous = self._find_search_console_checkpoint(months, window_days) if resume else None
+        if previous:
+            checkpoint = dict(previous.error_details["checkpoint"])
+            checkpoint["completed_windows"] = set(checkpoint.get("completed_windows") or [])
+            start_date = datetime.fromisoformat(checkpoint["start_date"])
+            end_date = datetime.fromisoformat(checkpoint["end_date"])
+            sync_log_id = previous.id
+            log.info(
+                f"Resuming Search Console backfill (sync log {sync_log_id}): "
+                f"{len(checkpoint['completed_windows'])} windows already complete"
             )
-            db.add(sync_log)
-            db.commit()
-            sync_log_id = sync_log.id
-        except Exception as e:
-            log.error(f"Failed to create sync log: {e}")
-            sync_log_id = None
-        finally:
-            db.close()
+        else:
+            end_date = datetime.now() - timedelta(days=3)  # GSC has 2-3 day delay
+            start_date = datetime.now() - timedelta(days=months * 30)
+            checkpoint = {
+                "months": months,
+                "window_days": window_days,
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "completed_windows": set(),
+            }
+            db = SessionLocal()
+            try:
+                sync_log = DataSyncLog(
+                    source="search_console",
+                    sync_type="backfill",
+                    status="running",
+                    started_at=datetime.utcnow()
+                )
+                db.add(sync_log)
+                db.commit()
+                sync_log_id = sync_log.id
+            except Exception as e:
+                log.error(f"Failed to create sync log: {e}")
+                sync_log_id = None
+            finally:
+                db.close()
 
-        # Calculate date range
-        months = min(months, 16)
-        end_date = datetime.now() - timedelta(days=3)  # GSC has 2-3 day delay
-        start_date = datetime.now() - timedelta(days=months * 30)
+        windows = self._search_console_backfill_windows(start_date, end_date, window_days)
+        pending = [
+            (num, ws, we) for num, (ws, we) in enumerate(windows, start=1)
+            if ws.date().isoformat() not in checkpoint["completed_windows"]
+        ]
+
+        log.info(
+            f"Starting Search Console backfill: {months} months, {window_days}-day windows, "
+            f"{len(pending)}/{len(windows)} windows pending, concurrency {concurrency}"
+        )
 
         results = {
             "success": True,
             "sync_log_id": sync_log_id,
+            "resumed": previous is not None,
             "source": "Google Search Console",
             "sync_type": "backfill",
             "months_requested": months,
             "start_date": start_date.date().isoformat(),
             "end_date": end_date.date().isoformat(),
             "window_days": window_days,
+            "concurrency": concurrency,
+            "windows_total": len(windows),
+            "windows_skipped": len(windows) - len(pending),
             "windows_processed": 0,
             "windows_failed": 0,
             "total_queries_saved": 0,
@@ -1969,121 +2313,117 @@ class DataSyncService:
             "window_results": [],
             "errors": []
         }
-
-        try:
-            # Connect to Search Console
-            if not self.search_console.service:
-                await self.search_console.connect()
-
-            # Process windows
-            current_start = start_date
-            window_num = 0
-
-            while current_start < end_date:
-                window_num += 1
-                window_end = min(current_start + timedelta(days=window_days), end_date)
-
-                log.info(f"Processing window {window_num}: {current_start.date()} to {window_end.date()}")
-
+        self._write_backfill_checkpoint(sync_log_id, checkpoint, results)
+
+        limiter = AsyncRateLimiter(getattr(settings, 'gsc_api_queries_per_minute', 600), per=60.0)
+        # Saves run in a worker thread, one at a time: adjacent windows share
+        # weekly / monthly rollup periods
+        save_lock = asyncio.Lock()
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in pending:
+            queue.put_nowait(item)
+
+        def record_failure(window_num, window_start, window_end, error_msg):
+            results["windows_failed"] += 1
+            results["errors"].append({
+                "window": window_num,
+                "dates": f"{window_start.date()} to {window_end.date()}",
+                "error": error_msg
+            })
+            results["window_results"].append({
+                "window": window_num,
+                "start_date": window_start.date().isoformat(),
+                "end_date": window_end.date().isoformat(),
+                "success": False,
+                "error": error_msg
+            })
+            log.warning(f"Window {window_num} failed: {error_msg}")
+
+        async def worker():
+            # One connector (and googleapiclient service) per worker: the
+            # underlying httplib2 transport is not safe to share across threads
+            connector = SearchConsoleConnector()
+            connector.rate_limiter = limiter
+            if not connector.service:
+                await connector.connect()
+
+            while True:
                 try:
-                    # Fetch data for this window
-                    window_result = await self.search_console._sync_window_with_retry(
-                        current_start, window_end, max_retries=3
+                    window_num, window_start, window_end = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                log.info(f"Processing window {window_num}: {window_start.date()} to {window_end.date()}")
+                try:
+                    window_result = await connector._sync_window_with_retry(
+                        window_start, window_end, max_retries=getattr(settings, 'gsc_backfill_max_retries', 3)
                     )
-
-                    if window_result.get("success") and window_result.get("data"):
-                        # Save the fetched data to database
-                        window_data = window_result["data"]
-
-                        # Save queries
-                        query_save_result = self._save_search_queries(window_data, sync_log_id=sync_log_id)
-                        queries_saved = query_save_result.get("created", 0) + query_save_result.get("updated", 0)
-
-                        # Save pages
-                        page_save_result = self._save_search_pages(window_data, sync_log_id=sync_log_id)
-                        pages_saved = page_save_result.get("created", 0) + page_save_result.get("updated", 0)
+                    if window_result.get("success") and window_result.get("data") is not None:
+                        async with save_lock:
+                            save_result = await asyncio.to_thread(
+                                self._bulk_save_search_console_window,
+                                window_result["data"], sync_log_id=sync_log_id,
+                            )
+                            await asyncio.to_thread(
+                                self._refresh_search_console_rollups, window_start, window_end
+                            )
+                        queries_saved = save_result["queries_saved"]
+                        pages_saved = save_result["pages_saved"]
 
                         results["windows_processed"] += 1
                         results["total_queries_saved"] += queries_saved
                         results["total_pages_saved"] += pages_saved
-
                         results["window_results"].append({
                             "window": window_num,
-                            "start_date": current_start.date().isoformat(),
+                            "start_date": window_start.date().isoformat(),
                             "end_date": window_end.date().isoformat(),
                             "success": True,
                             "queries_fetched": window_result.get("queries", 0),
                             "pages_fetched": window_result.get("pages", 0),
                             "queries_saved": queries_saved,
-                            "pages_saved": pages_saved
+                            "pages_saved": pages_saved,
+                            "rows_replaced": save_result.get("replaced", 0)
                         })
-
+                        checkpoint["completed_windows"].add(window_start.date().isoformat())
+                        self._write_backfill_checkpoint(sync_log_id, checkpoint, results)
                         log.info(f"Window {window_num} complete: saved {queries_saved} queries, {pages_saved} pages")
                     else:
-                        results["windows_failed"] += 1
-                        error_msg = window_result.get("error", "Unknown error")
-                        results["errors"].append({
-                            "window": window_num,
-                            "dates": f"{current_start.date()} to {window_end.date()}",
-                            "error": error_msg
-                        })
-                        results["window_results"].append({
-                            "window": window_num,
-                            "start_date": current_start.date().isoformat(),
-                            "end_date": window_end.date().isoformat(),
-                            "success": False,
-                            "error": error_msg
-                        })
-                        log.warning(f"Window {window_num} failed: {error_msg}")
-
+                        record_failure(window_num, window_start, window_end, window_result.get("error", "Unknown error"))
                 except Exception as e:
-                    results["windows_failed"] += 1
-                    error_msg = str(e)
-                    results["errors"].append({
-                        "window": window_num,
-                        "dates": f"{current_start.date()} to {window_end.date()}",
-                        "error": error_msg
-                    })
                     log.error(f"Window {window_num} exception: {e}")
+                    record_failure(window_num, window_start, window_end, str(e))
 
-                # Move to next window
-                current_start = window_end + timedelta(days=1)
-
-                # Rate limit delay between windows
-                if current_start < end_date and delay_between_windows > 0:
-                    log.debug(f"Waiting {delay_between_windows}s before next window...")
+                if not queue.empty() and delay_between_windows > 0:
                     await asyncio.sleep(delay_between_windows)
 
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(concurrency, len(pending)) or 1)))
+
+            results["window_results"].sort(key=lambda w: w["window"])
             results["duration_seconds"] = round(time.time() - backfill_start, 2)
             results["success"] = results["windows_failed"] == 0
 
-            total_records = results["total_queries_saved"] + results["total_pages_saved"]
             log.info(
                 f"Search Console backfill complete: "
-                f"{results['windows_processed']}/{window_num} windows, "
+                f"{results['windows_processed'] + results['windows_skipped']}/{len(windows)} windows "
+                f"({results['windows_skipped']} resumed), "
                 f"{results['total_queries_saved']} queries + {results['total_pages_saved']} pages saved in {results['duration_seconds']}s"
             )
 
-            # Update sync log with final results
+            if results["success"]:
+                status = "success"
+            elif results["windows_processed"] + results["windows_skipped"] > 0:
+                status = "partial"
+            else:
+                status = "failed"
+            self._write_backfill_checkpoint(sync_log_id, checkpoint, results, status=status)
             if sync_log_id:
                 db = SessionLocal()
                 try:
                     sync_log = db.query(DataSyncLog).filter(DataSyncLog.id == sync_log_id).first()
                     if sync_log:
-                        sync_log.status = "success" if results["success"] else "partial" if results["windows_processed"] > 0 else "failed"
-                        sync_log.records_processed = total_records
-                        sync_log.records_created = total_records
                         sync_log.records_failed = 0
                         sync_log.duration_seconds = results["duration_seconds"]
                         sync_log.completed_at = datetime.utcnow()
-                        sync_log.error_details = {
-                            "windows_total": window_num,
-                            "windows_successful": results["windows_processed"],
-                            "windows_failed": results["windows_failed"],
-                            "queries_saved": results["total_queries_saved"],
-                            "pages_saved": results["total_pages_saved"],
-                            "window_errors": results["errors"] if results["errors"] else None
-                        }
                         db.commit()
                 except Exception as e:
                     log.error(f"Failed to update sync log: {e}")
@@ -2096,7 +2436,7 @@ class DataSyncService:
             error_msg = f"Search Console backfill failed: {str(e)}"
             log.error(error_msg)
 
-            # Update sync log with failure
+            # Completed windows stay checkpointed; the next run resumes from them
             if sync_log_id:
                 db = SessionLocal()
                 try:
@@ -2173,6 +2513,11 @@ class DataSyncService:
             sitemap_save_result = self._save_search_sitemaps(data, sync_log_id=sync_log_id)
             sitemaps_saved = sitemap_save_result.get("created", 0) + sitemap_save_result.get("updated", 0)
 
+            # Refresh dashboard rollups for the synced days
+            rollup_result = self._refresh_search_console_rollups(
+                result.get("start_date"), result.get("end_date"), ensure_built=True
+            )
+
             total_records_saved = queries_saved + pages_saved + sitemaps_saved
             duration = round(time.time() - sync_start, 2)
 
@@ -2191,6 +2536,7 @@ class DataSyncService:
                 "pages_saved": pages_saved,
                 "sitemaps_saved": sitemaps_saved,
                 "total_records_saved": total_records_saved,
+                "rollups_refreshed": rollup_result is not None,
                 "duration_seconds": duration
             }
 
@@ -3299,6 +3645,7 @@ class DataSyncService:
             'search_terms_created': 0, 'search_terms_updated': 0
         }
         db = SessionLocal()
+        touched_campaigns = set()
 
         try:
             # Save campaigns
@@ -3317,6 +3664,7 @@ class DataSyncService:
                         GoogleAdsCampaign.campaign_id == campaign_id,
                         GoogleAdsCampaign.date == reference_date
                     ).first()
+                    touched_campaigns.add((campaign_id, reference_date))
 
                     # Convert cost from dollars to micros for storage
                     cost_dollars = campaign_data.get('cost', 0)
@@ -3487,7 +3835,10 @@ class DataSyncService:
                     log.warning(f"Failed to save search term '{search_term}': {e}")
                     result['failed'] += 1
 
+            mark_dirty(db, touched_campaigns, SOURCE_GOOGLE_ADS)
             db.commit()
+            if campaigns:
+                self._refresh_order_attribution()
             log.info(
                 f"Google Ads saved: {result['campaigns_created']} campaigns, "
                 f"{result['ad_groups_created']} ad groups, {result['search_terms_created']} search terms"
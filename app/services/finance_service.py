@@ -5,18 +5,63 @@ Pulls revenue from Shopify, COGS from ProductCost/OrderItems,
 ad spend from Google Ads, and operating expenses from BusinessExpense
 to produce a full monthly P&L statement.
 """
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 from decimal import Decimal
 from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import func, extract, and_, or_
 
-from app.models.business_expense import BusinessExpense, MonthlyPL
-from app.models.shopify import ShopifyOrder, ShopifyOrderItem
+from app.models.business_expense import EXPENSE_CATEGORIES, BusinessExpense, MonthlyPL
+from app.models.shopify import ShopifyOrder, ShopifyOrderItem, ShopifySalesDailyFact
 from app.models.google_ads_data import GoogleAdsCampaign
+from app.services.sales_fact_service import SalesFactService
 from app.utils.logger import log
 
 
+_EMPTY_REVENUE = {
+    'total_orders': 0,
+    'gross_revenue': Decimal('0'),
+    'net_revenue': Decimal('0'),
+    'refunds': Decimal('0'),
+}
+
+
+def _month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _next_month(month: date) -> date:
+    if month.month == 12:
+        return date(month.year + 1, 1, 1)
+    return date(month.year, month.month + 1, 1)
+
+
+def _month_span(start_month: date, end_month: date) -> List[date]:
+    """First-of-month dates from start_month to end_month inclusive."""
+    months, cur = [], _month_start(start_month)
+    while cur <= end_month:
+        months.append(cur)
+        cur = _next_month(cur)
+    return months
+
+
+def _last_months(n: int) -> List[date]:
+    """The current month and the N-1 before it, oldest first."""
+    today = date.today()
+    y, m = today.year, today.month - (max(n, 1) - 1)
+    while m <= 0:
+        m += 12
+        y -= 1
+    return _month_span(date(y, m, 1), _month_start(today))
+
+
+def _naive_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    """Compare stored timestamps regardless of whether the driver returned tz-aware values."""
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
 class FinanceService:
     def __init__(self, db: Session):
         self.db = db
@@ -31,103 +76,113 @@ class FinanceService:
         Returns:
             Dict with full P&L breakdown
         """
-        # Normalize to first of month
-        month = date(month.year, month.month, 1)
-
-        # Calculate next month for date range
-        if month.month == 12:
-            next_month = date(month.year + 1, 1, 1)
-        else:
-            next_month = date(month.year, month.month + 1, 1)
-
-        log.info(f"Calculating P&L for {month.strftime('%Y-%m')}")
-
-        # ── Revenue from Shopify ──
-        revenue_data = self._calculate_revenue(month, next_month)
-
-        # ── COGS from ShopifyOrderItem ──
-        cogs = self._calculate_cogs(month, next_month)
+        return self.calculate_pl_months([month])[0]
 
-        # ── Ad Spend from Google Ads ──
-        ad_spend = self._calculate_ad_spend(month, next_month)
+    def calculate_pl_range(self, start_month: date, end_month: date) -> List[Dict]:
+        """Calculate and store P&L for every month from start_month to end_month inclusive."""
+        return self.calculate_pl_months(_month_span(start_month, end_month))
 
-        # ── Operating Expenses from BusinessExpense ──
-        expenses = self._get_expense_breakdown(month)
-
-        # ── Compute P&L ──
-        gross_revenue = revenue_data['gross_revenue']
-        refunds = revenue_data['refunds']
-        net_revenue = gross_revenue - refunds
-        total_orders = revenue_data['total_orders']
-
-        gross_margin = net_revenue - cogs
-        gross_margin_pct = (gross_margin / net_revenue * 100) if net_revenue > 0 else Decimal('0')
+    def calculate_pl_months(self, months: List[date]) -> List[Dict]:
+        """
+        Calculate and store P&L for several months in one pass.
 
-        # Sum all operating expenses
-        expense_total = (
-            ad_spend
-            + expenses.get('payroll', Decimal('0'))
-            + expenses.get('rent', Decimal('0'))
-            + expenses.get('shipping', Decimal('0'))
-            + expenses.get('utilities', Decimal('0'))
-            + expenses.get('insurance', Decimal('0'))
-            + expenses.get('software', Decimal('0'))
-            + expenses.get('marketing_other', Decimal('0'))
-            + expenses.get('professional_services', Decimal('0'))
-            + expenses.get('other', Decimal('0'))
-        )
+        Each source (revenue, COGS, ad spend, expenses) is read with one
+        query grouped by month over the covered range, and all MonthlyPL
+        rows are upserted in a single commit.
 
-        operating_profit = gross_margin - expense_total
-        operating_margin_pct = (operating_profit / net_revenue * 100) if net_revenue > 0 else Decimal('0')
+        Returns:
+            List of P&L dicts in month order
+        """
+        months = sorted({_month_start(m) for m in months})
+        if not months:
+            return []
+        range_start, range_end = months[0], _next_month(months[-1])
+
+        log.info(f"Calculating P&L for {len(months)} month(s) "
+                 f"{months[0].strftime('%Y-%m')} to {months[-1].strftime('%Y-%m')}")
+
+        # ── One grouped query per source, keyed by month ──
+        revenue_by_month = self._revenue_by_month(range_start, range_end)
+        cogs_by_month = self._cogs_by_month(range_start, range_end)
+        ad_spend_by_month = self._ad_spend_by_month(range_start, range_end)
+        expenses_by_month = self._expenses_by_month(range_start, range_end)
+
+        existing = {
+            pl.month: pl
+            for pl in self.db.query(MonthlyPL).filter(MonthlyPL.month.in_(months)).all()
+        }
+        now = datetime.utcnow()
+
+        rows = []
+        for month in months:
+            values = self._compute_pl(
+                revenue_by_month.get(month, _EMPTY_REVENUE),
+                cogs_by_month.get(month, Decimal('0')),
+                ad_spend_by_month.get(month, Decimal('0')),
+                expenses_by_month.get(month, {}),
+            )
 
-        net_profit = operating_profit  # Same for now (no interest/tax)
-        net_margin_pct = operating_margin_pct
+            # ── Upsert MonthlyPL ──
+            pl = existing.get(month)
+            if not pl:
+                pl = MonthlyPL(month=month)
+                self.db.add(pl)
+            for field, value in values.items():
+                setattr(pl, field, value)
+            pl.generated_at = now
+            pl.updated_at = now
+            rows.append(pl)
 
-        # Overhead per order = (all expenses except COGS) / total orders
-        # This is used by the ads dashboard to allocate overhead to campaigns
-        overhead_expenses = expense_total - ad_spend  # Exclude ad spend (already in campaign cost)
-        overhead_per_order = (overhead_expenses / total_orders) if total_orders > 0 else None
-
-        avg_order_value = (net_revenue / total_orders) if total_orders > 0 else None
-
-        # ── Upsert MonthlyPL ──
-        existing = self.db.query(MonthlyPL).filter(MonthlyPL.month == month).first()
-        if not existing:
-            existing = MonthlyPL(month=month)
-            self.db.add(existing)
-
-        existing.gross_revenue = gross_revenue
-        existing.refunds = refunds
-        existing.net_revenue = net_revenue
-        existing.cogs = cogs
-        existing.gross_margin = gross_margin
-        existing.gross_margin_pct = gross_margin_pct
-        existing.ad_spend = ad_spend
-        existing.payroll = expenses.get('payroll', Decimal('0'))
-        existing.rent = expenses.get('rent', Decimal('0'))
-        existing.shipping = expenses.get('shipping', Decimal('0'))
-        existing.utilities = expenses.get('utilities', Decimal('0'))
-        existing.insurance = expenses.get('insurance', Decimal('0'))
-        existing.software = expenses.get('software', Decimal('0'))
-        existing.marketing_other = expenses.get('marketing_other', Decimal('0'))
-        existing.professional_services = expenses.get('professional_services', Decimal('0'))
-        existing.other_expenses = expenses.get('other', Decimal('0'))
-        existing.total_expenses = expense_total
-        existing.operating_profit = operating_profit
-        existing.operating_margin_pct = operating_margin_pct
-        existing.net_profit = net_profit
-        existing.net_margin_pct = net_margin_pct
-        existing.total_orders = total_orders
-        existing.avg_order_value = avg_order_value
-        existing.overhead_per_order = overhead_per_order
-        existing.generated_at = datetime.utcnow()
-        existing.updated_at = datetime.utcnow()
+            log.info(f"P&L for {month.strftime('%Y-%m')}: revenue=${values['net_revenue']}, "
+                     f"profit=${values['net_profit']}, orders={values['total_orders']}")
 
         self.db.commit()
+        return [self._pl_to_dict(pl) for pl in rows]
 
-        log.info(f"P&L for {month.strftime('%Y-%m')}: revenue=${net_revenue}, profit=${net_profit}, orders={total_orders}")
+    def refresh_pl(self, months: int = 6, force: bool = False) -> Dict:
+        """
+        Bring the last N months of P&L up to date.
 
-        return self._pl_to_dict(existing)
+        Open months (the current one) are always recomputed. Closed months
+        are recomputed only when missing or when a source changed after the
+        stored row was generated: orders synced/updated (late refunds and
+        edits), sales fact rows refreshed (refunds, cost backfills), Google
+        Ads rows synced, or expenses imported for that month.
+
+        Returns:
+            Dict with the recomputed month keys and the P&L for all N months
+        """
+        window = _last_months(months)
+        if force:
+            stale = window
+        else:
+            generated = dict(
+                self.db.query(MonthlyPL.month, MonthlyPL.updated_at)
+                .filter(MonthlyPL.month.in_(window))
+                .all()
+            )
+            current_month = _month_start(date.today())
+            touched = self._source_changes_by_month(window[0], _next_month(window[-1]))
+            stale = [
+                m for m in window
+                if m >= current_month
+                or generated.get(m) is None
+                or (m in touched and touched[m] > _naive_utc(generated[m]))
+            ]
+
+        if stale:
+            self.calculate_pl_months(stale)
+
+        rows = (
+            self.db.query(MonthlyPL)
+            .filter(MonthlyPL.month.in_(window))
+            .order_by(MonthlyPL.month)
+            .all()
+        )
+        return {
+            "recomputed": [m.strftime('%Y-%m') for m in stale],
+            "months": [self._pl_to_dict(r) for r in rows],
+        }
 
     def get_pl_summary(self, months: int = 6) -> List[Dict]:
         """Get monthly P&L data for the last N months."""
@@ -249,72 +304,195 @@ class FinanceService:
 
     # ── Private methods ──
 
-    def _calculate_revenue(self, month_start: date, month_end: date) -> Dict:
-        """Calculate revenue from Shopify orders for a month."""
+    @staticmethod
+    def _compute_pl(revenue_data: Dict, cogs: Decimal, ad_spend: Decimal,
+                    expenses: Dict[str, Decimal]) -> Dict:
+        """P&L field values for one month from its source totals."""
+        gross_revenue = revenue_data['gross_revenue']
+        refunds = revenue_data['refunds']
+        net_revenue = gross_revenue - refunds
+        total_orders = revenue_data['total_orders']
+
+        gross_margin = net_revenue - cogs
+        gross_margin_pct = (gross_margin / net_revenue * 100) if net_revenue > 0 else Decimal('0')
+
+        # Sum all operating expenses
+        expense_total = ad_spend + sum(
+            (expenses.get(category, Decimal('0')) for category in EXPENSE_CATEGORIES),
+            Decimal('0'),
+        )
+
+        operating_profit = gross_margin - expense_total
+        operating_margin_pct = (operating_profit / net_revenue * 100) if net_revenue > 0 else Decimal('0')
+
+        # Overhead per order = (all expenses except COGS) / total orders
+        # This is used by the ads dashboard to allocate overhead to campaigns
+        overhead_expenses = expense_total - ad_spend  # Exclude ad spend (already in campaign cost)
+
+        return {
+            'gross_revenue': gross_revenue,
+            'refunds': refunds,
+            'net_revenue': net_revenue,
+            'cogs': cogs,
+            'gross_margin': gross_margin,
+            'gross_margin_pct': gross_margin_pct,
+            'ad_spend': ad_spend,
+            'payroll': expenses.get('payroll', Decimal('0')),
+            'rent': expenses.get('rent', Decimal('0')),
+            'shipping': expenses.get('shipping', Decimal('0')),
+            'utilities': expenses.get('utilities', Decimal('0')),
+            'insurance': expenses.get('insurance', Decimal('0')),
+            'software': expenses.get('software', Decimal('0')),
+            'marketing_other': expenses.get('marketing_other', Decimal('0')),
+            'professional_services': expenses.get('professional_services', Decimal('0')),
+            'other_expenses': expenses.get('other', Decimal('0')),
+            'total_expenses': expense_total,
+            'operating_profit': operating_profit,
+            'operating_margin_pct': operating_margin_pct,
+            'net_profit': operating_profit,  # Same for now (no interest/tax)
+            'net_margin_pct': operating_margin_pct,
+            'total_orders': total_orders,
+            'avg_order_value': (net_revenue / total_orders) if total_orders > 0 else None,
+            'overhead_per_order': (overhead_expenses / total_orders) if total_orders > 0 else None,
+        }
+
+    @staticmethod
+    def _by_month(rows) -> Dict[date, object]:
+        """{first-of-month: value} from (yr, mo, value) rows."""
+        return {date(int(r[0]), int(r[1]), 1): r[2] for r in rows}
+
+    def _revenue_by_month(self, range_start: date, range_end: date) -> Dict[date, Dict]:
+        """Revenue from Shopify orders, grouped by month."""
         # Filter valid orders
         valid_statuses = ['paid', 'partially_refunded', 'partially_paid']
 
         _ts = func.coalesce(ShopifyOrder.processed_at, ShopifyOrder.created_at)
         _net = func.coalesce(ShopifyOrder.current_subtotal_price, ShopifyOrder.subtotal_price)
-        result = self.db.query(
+        yr, mo = extract('year', _ts), extract('month', _ts)
+        rows = self.db.query(
+            yr, mo,
             func.count(ShopifyOrder.id).label('total_orders'),
             func.coalesce(func.sum(ShopifyOrder.total_price), 0).label('gross_revenue'),
             func.coalesce(func.sum(_net), 0).label('net_revenue'),
             func.coalesce(func.sum(ShopifyOrder.total_refunded), 0).label('refunds'),
         ).filter(
-            _ts >= datetime.combine(month_start, datetime.min.time()),
-            _ts < datetime.combine(month_end, datetime.min.time()),
+            _ts >= datetime.combine(range_start, datetime.min.time()),
+            _ts < datetime.combine(range_end, datetime.min.time()),
             ShopifyOrder.cancelled_at.is_(None),
             ShopifyOrder.financial_status.in_(valid_statuses),
-        ).first()
+        ).group_by(yr, mo).all()
+
+        return self._by_month(
+            (r[0], r[1], {
+                'total_orders': r.total_orders or 0,
+                'gross_revenue': Decimal(str(r.gross_revenue or 0)),
+                'net_revenue': Decimal(str(r.net_revenue or 0)),
+                'refunds': Decimal(str(r.refunds or 0)),
+            })
+            for r in rows
+        )
 
-        return {
-            'total_orders': result.total_orders or 0,
-            'gross_revenue': Decimal(str(result.gross_revenue or 0)),
-            'net_revenue': Decimal(str(result.net_revenue or 0)),
-            'refunds': Decimal(str(result.refunds or 0)),
-        }
+    def _cogs_by_month(self, range_start: date, range_end: date) -> Dict[date, Decimal]:
+        """
+        COGS (order-item cost_per_item) from the daily sales fact table, grouped by month.
 
-    def _calculate_cogs(self, month_start: date, month_end: date) -> Decimal:
-        """Calculate COGS from ShopifyOrderItem cost_per_item."""
-        result = self.db.query(
-            func.coalesce(
-                func.sum(ShopifyOrderItem.cost_per_item * ShopifyOrderItem.quantity),
-                0
-            )
+        The fact table is built by the Shopify sync; until then COGS is summed
+        from the order items directly.
+        """
+        if not SalesFactService(self.db).is_built():
+            return self._order_item_cogs_by_month(range_start, range_end)
+        F = ShopifySalesDailyFact
+        yr, mo = extract('year', F.date), extract('month', F.date)
+        rows = self.db.query(
+            yr, mo, func.coalesce(func.sum(F.cogs), 0)
         ).filter(
-            ShopifyOrderItem.order_date >= datetime.combine(month_start, datetime.min.time()),
-            ShopifyOrderItem.order_date < datetime.combine(month_end, datetime.min.time()),
-            ShopifyOrderItem.cost_per_item.isnot(None),
-            ShopifyOrderItem.cost_per_item > 0,
-        ).scalar()
-
-        return Decimal(str(result or 0))
-
-    def _calculate_ad_spend(self, month_start: date, month_end: date) -> Decimal:
-        """Calculate Google Ads spend for a month."""
-        result = self.db.query(
-            func.coalesce(func.sum(GoogleAdsCampaign.cost_micros), 0)
+            F.date >= range_start,
+            F.date < range_end,
+        ).group_by(yr, mo).all()
+
+        return self._by_month((r[0], r[1], Decimal(str(r[2] or 0))) for r in rows)
+
+    def _order_item_cogs_by_month(self, range_start: date, range_end: date) -> Dict[date, Decimal]:
+        """COGS from ShopifyOrderItem cost_per_item, grouped by month."""
+        I = ShopifyOrderItem
+        yr, mo = extract('year', I.order_date), extract('month', I.order_date)
+        rows = self.db.query(
+            yr, mo, func.coalesce(func.sum(I.cost_per_item * I.quantity), 0)
         ).filter(
-            GoogleAdsCampaign.date >= month_start.isoformat(),
-            GoogleAdsCampaign.date < month_end.isoformat(),
-        ).scalar()
+            I.order_date >= datetime.combine(range_start, datetime.min.time()),
+            I.order_date < datetime.combine(range_end, datetime.min.time()),
+            I.cost_per_item.isnot(None),
+            I.cost_per_item > 0,
+        ).group_by(yr, mo).all()
+
+        return self._by_month((r[0], r[1], Decimal(str(r[2] or 0))) for r in rows)
+
+    def _ad_spend_by_month(self, range_start: date, range_end: date) -> Dict[date, Decimal]:
+        """Google Ads spend grouped by month."""
+        C = GoogleAdsCampaign
+        yr, mo = extract('year', C.date), extract('month', C.date)
+        rows = self.db.query(
+            yr, mo, func.coalesce(func.sum(C.cost_micros), 0)
+        ).filter(
+            C.date >= range_start.isoformat(),
+            C.date < range_end.isoformat(),
+        ).group_by(yr, mo).all()
 
         # Convert from micros to dollars
-        return Decimal(str(result or 0)) / Decimal('1000000')
+        return self._by_month(
+            (r[0], r[1], Decimal(str(r[2] or 0)) / Decimal('1000000')) for r in rows
+        )
 
-    def _get_expense_breakdown(self, month: date) -> Dict[str, Decimal]:
-        """Get expenses grouped by category for a month."""
+    def _expenses_by_month(self, range_start: date, range_end: date) -> Dict[date, Dict[str, Decimal]]:
+        """Expenses grouped by month and category."""
         results = self.db.query(
+            BusinessExpense.month,
             BusinessExpense.category,
             func.sum(BusinessExpense.amount).label('total')
         ).filter(
-            BusinessExpense.month == month
+            BusinessExpense.month >= range_start,
+            BusinessExpense.month < range_end,
         ).group_by(
-            BusinessExpense.category
+            BusinessExpense.month,
+            BusinessExpense.category,
         ).all()
 
-        return {r.category: Decimal(str(r.total or 0)) for r in results}
+        by_month: Dict[date, Dict[str, Decimal]] = {}
+        for r in results:
+            by_month.setdefault(r.month, {})[r.category] = Decimal(str(r.total or 0))
+        return by_month
+
+    def _source_changes_by_month(self, range_start: date, range_end: date) -> Dict[date, datetime]:
+        """Latest change to any P&L source per month (naive UTC)."""
+        start_dt = datetime.combine(range_start, datetime.min.time())
+        end_dt = datetime.combine(range_end, datetime.min.time())
+        _ts = func.coalesce(ShopifyOrder.processed_at, ShopifyOrder.created_at)
+        F = ShopifySalesDailyFact
+        C = GoogleAdsCampaign
+        E = BusinessExpense
+
+        sources = [
+            # Orders re-saved by sync (refunds bump total_refunded) or newly synced
+            (_ts, [func.max(ShopifyOrder.updated_at), func.max(ShopifyOrder.synced_at)],
+             [_ts >= start_dt, _ts < end_dt]),
+            # Sales fact days re-rolled after refunds or cost backfills
+            (F.date, [func.max(F.refreshed_at)], [F.date >= range_start, F.date < range_end]),
+            (C.date, [func.max(C.synced_at)],
+             [C.date >= range_start.isoformat(), C.date < range_end.isoformat()]),
+            (E.month, [func.max(E.updated_at), func.max(E.created_at)],
+             [E.month >= range_start, E.month < range_end]),
+        ]
+
+        changes: Dict[date, datetime] = {}
+        for col, stamps, filters in sources:
+            yr, mo = extract('year', col), extract('month', col)
+            for r in self.db.query(yr, mo, *stamps).filter(*filters).group_by(yr, mo).all():
+                month = date(int(r[0]), int(r[1]), 1)
+                for stamp in r[2:]:
+                    stamp = _naive_utc(stamp)
+                    if stamp and (month not in changes or stamp > changes[month]):
+                        changes[month] = stamp
+        return changes
 
     def _has_expenses(self, month: date) -> bool:
         """Check if any expenses exist for a month."""
@@ -22,6 +22,8 @@ from sqlalchemy.orm import Session
 
 from app.models.base import SessionLocal, Base, engine
 from app.models.google_ads_import import GoogleAdsImportLog
+from app.services.ad_spend_changes import SOURCE_GOOGLE_ADS, SOURCE_GOOGLE_ADS_PRODUCTS, mark_dirty
+from app.services.shopify_revenue_attribution import ShopifyRevenueAttributionService
 from app.models.google_ads_data import (
     GoogleAdsCampaign,
     GoogleAdsAdGroup,
@@ -507,6 +509,7 @@ class GoogleAdsImportService:
 
     def _upsert_campaigns(self, df: pd.DataFrame, db: Session, filename: str) -> Dict:
         result = {"created": 0, "updated": 0, "skipped": 0, "errored": 0}
+        touched = set()
 
         for idx, row in df.iterrows():
             campaign_id = str(row.get("campaign_id", "")).strip()
@@ -547,6 +550,7 @@ class GoogleAdsImportService:
                     obj = GoogleAdsCampaign(campaign_id=campaign_id, date=row_date, **vals)
                     db.add(obj)
                     result["created"] += 1
+                touched.add((campaign_id, row_date))
 
                 if (result["created"] + result["updated"]) % 1000 == 0:
                     db.commit()
@@ -556,7 +560,14 @@ class GoogleAdsImportService:
                 db.rollback()
                 result["errored"] += 1
 
+        mark_dirty(db, touched, SOURCE_GOOGLE_ADS)
         db.commit()
+        # Campaign names feed utm_campaign order attribution
+        try:
+            ShopifyRevenueAttributionService(db).reindex_campaign_names()
+        except Exception as e:
+            logger.warning(f"Order attribution reindex failed: {e}")
+            db.rollback()
         return result
 
     def _upsert_ad_groups(self, df: pd.DataFrame, db: Session, filename: str) -> Dict:
@@ -611,6 +622,7 @@ class GoogleAdsImportService:
 
     def _upsert_products(self, df: pd.DataFrame, db: Session, filename: str) -> Dict:
         result = {"created": 0, "updated": 0, "skipped": 0, "errored": 0}
+        touched = set()
 
         for idx, row in df.iterrows():
             product_item_id = str(row.get("product_item_id", "")).strip()
@@ -649,6 +661,7 @@ class GoogleAdsImportService:
                     )
                     db.add(obj)
                     result["created"] += 1
+                touched.add((None, row_date))
 
                 if (result["created"] + result["updated"]) % 1000 == 0:
                     db.commit()
@@ -658,6 +671,7 @@ class GoogleAdsImportService:
                 db.rollback()
                 result["errored"] += 1
 
+        mark_dirty(db, touched, SOURCE_GOOGLE_ADS_PRODUCTS)
         db.commit()
         return result
 
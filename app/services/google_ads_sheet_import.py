@@ -7,6 +7,10 @@ and upserts into the google_ads_campaigns table.
 This is the automated alternative to manual CSV export/import.
 The ads manager sets up a Google Ads Script that writes to a shared Sheet,
 then our system reads from that Sheet on demand or on schedule.
+
+Campaign rows are parsed column-wise with pandas and hashed per
+(campaign, date); only rows that are new or whose hash differs from the
+stored row_hash are written, so re-importing an unchanged sheet is a read.
 """
 import logging
 import re
@@ -14,6 +18,9 @@ import time
 from datetime import datetime, date as date_type
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+import pandas as pd
+
 try:
     from google.oauth2 import service_account
     from googleapiclient.discovery import build
@@ -27,6 +34,8 @@ from sqlalchemy.orm import Session
 from app.models.base import SessionLocal, Base, engine
 from app.models.google_ads_data import GoogleAdsCampaign, GoogleAdsProductPerformance
 from app.models.google_ads_import import GoogleAdsImportLog
+from app.services.ad_spend_changes import SOURCE_GOOGLE_ADS, SOURCE_GOOGLE_ADS_PRODUCTS, mark_dirty
+from app.services.shopify_revenue_attribution import ShopifyRevenueAttributionService
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +82,27 @@ SHEET_COLUMN_MAP = {
     "search rank lost is": "search_rank_lost_impression_share",
 }
 
+# Campaign values covered by row_hash (everything the import writes except timestamps)
+CAMPAIGN_HASH_FIELDS = [
+    "campaign_name", "campaign_type", "campaign_status", "impressions", "clicks",
+    "cost_micros", "conversions", "conversions_value", "ctr", "avg_cpc",
+    "search_impression_share", "search_budget_lost_impression_share",
+    "search_rank_lost_impression_share",
+]
+
+# Rows per bulk insert / update before committing
+MERGE_BATCH = 500
+
+# Largest value each integer metric column holds (impressions / clicks are
+# INTEGER; cost is checked in micros against BIGINT, with float headroom).
+# Larger sheet values count as row errors; the row is not written.
+INT_LIMITS = {"impressions": 2**31 - 1, "clicks": 2**31 - 1, "cost": 2**62}
+
+PERCENTAGE_FIELDS = [
+    "ctr", "search_impression_share", "search_budget_lost_impression_share",
+    "search_rank_lost_impression_share",
+]
+
 # Product tab column mapping (aggregated format — no daily Date column)
 PRODUCT_COLUMN_MAP = {
     "date": "date",
@@ -195,7 +225,8 @@ class GoogleAdsSheetImportService:
             logger.info(
                 f"Google Ads Sheet import done: "
                 f"{counts['created']} created, {counts['updated']} updated, "
-                f"{counts['skipped']} skipped, {counts['errored']} errors"
+                f"{counts['unchanged']} unchanged, {counts['skipped']} skipped, "
+                f"{counts['errored']} errors, {counts['coerced']} with unparseable values"
             )
 
             return {
@@ -204,8 +235,10 @@ class GoogleAdsSheetImportService:
                 "rows_found": len(data_rows),
                 "rows_created": counts["created"],
                 "rows_updated": counts["updated"],
+                "rows_unchanged": counts["unchanged"],
                 "rows_skipped": counts["skipped"],
                 "rows_errored": counts["errored"],
+                "rows_coerced": counts["coerced"],
                 "date_range": date_range,
             }
 
@@ -309,6 +342,7 @@ class GoogleAdsSheetImportService:
         as the date. Falls back to today's date if neither exists.
         """
         counts = {"created": 0, "updated": 0, "skipped": 0, "errored": 0}
+        touched = set()
 
         # Determine date strategy: daily Date column, Period End, or today
         has_date_col = "date" in col_map.values()
@@ -366,6 +400,7 @@ class GoogleAdsSheetImportService:
                     )
                     db.add(obj)
                     counts["created"] += 1
+                touched.add((None, row_date))
 
                 if (counts["created"] + counts["updated"]) % 500 == 0:
                     db.commit()
@@ -375,6 +410,7 @@ class GoogleAdsSheetImportService:
                 db.rollback()
                 counts["errored"] += 1
 
+        mark_dirty(db, touched, SOURCE_GOOGLE_ADS_PRODUCTS)
         db.commit()
         return counts
 
@@ -419,89 +455,74 @@ class GoogleAdsSheetImportService:
     def _upsert_campaigns(
         self, rows: List[List[str]], col_map: Dict[int, str], db: Session,
     ) -> Dict[str, int]:
-        """Upsert campaign rows into google_ads_campaigns."""
-        counts = {"created": 0, "updated": 0, "skipped": 0, "errored": 0}
-
-        for row_idx, row in enumerate(rows):
-            try:
-                # Extract required fields
-                campaign_id = self._get_field(row, col_map, "campaign_id")
-                date_str = self._get_field(row, col_map, "date")
-
-                if not campaign_id or not date_str:
-                    counts["skipped"] += 1
-                    continue
-
-                # Normalize campaign_id (strip .0 from float format)
-                campaign_id = str(campaign_id).strip()
-                if campaign_id.endswith(".0"):
-                    campaign_id = campaign_id[:-2]
-
-                row_date = _parse_date(date_str)
-                if not row_date:
-                    counts["skipped"] += 1
-                    continue
-
-                # Check for existing record
-                existing = db.query(GoogleAdsCampaign).filter(
-                    GoogleAdsCampaign.campaign_id == campaign_id,
-                    GoogleAdsCampaign.date == row_date,
-                ).first()
-
-                vals = dict(
-                    campaign_name=str(
-                        self._get_field(row, col_map, "campaign_name") or "Unknown"
-                    ).strip(),
-                    campaign_type=self._get_field(row, col_map, "campaign_type") or None,
-                    campaign_status=self._get_field(row, col_map, "campaign_status") or None,
-                    impressions=_parse_int(self._get_field(row, col_map, "impressions")),
-                    clicks=_parse_int(self._get_field(row, col_map, "clicks")),
-                    cost_micros=_parse_cost_to_micros(
-                        self._get_field(row, col_map, "cost")
-                    ),
-                    conversions=_parse_float(
-                        self._get_field(row, col_map, "conversions")
-                    ),
-                    conversions_value=_parse_float(
-                        self._get_field(row, col_map, "conversions_value")
-                    ),
-                    ctr=_parse_percentage(self._get_field(row, col_map, "ctr")),
-                    avg_cpc=_parse_cost_dollars(
-                        self._get_field(row, col_map, "avg_cpc")
-                    ),
-                    search_impression_share=_parse_percentage(
-                        self._get_field(row, col_map, "search_impression_share")
-                    ),
-                    search_budget_lost_impression_share=_parse_percentage(
-                        self._get_field(row, col_map, "search_budget_lost_impression_share")
-                    ),
-                    search_rank_lost_impression_share=_parse_percentage(
-                        self._get_field(row, col_map, "search_rank_lost_impression_share")
-                    ),
-                    synced_at=datetime.utcnow(),
-                )
-
-                if existing:
-                    for k, v in vals.items():
-                        setattr(existing, k, v)
-                    counts["updated"] += 1
-                else:
-                    obj = GoogleAdsCampaign(
-                        campaign_id=campaign_id, date=row_date, **vals
-                    )
-                    db.add(obj)
-                    counts["created"] += 1
-
-                # Batch commit
-                if (counts["created"] + counts["updated"]) % 500 == 0:
-                    db.commit()
-
-            except Exception as e:
-                logger.warning(f"Row {row_idx + 2} error: {e}")
-                db.rollback()
-                counts["errored"] += 1
-
+        """
+        Merge campaign rows into google_ads_campaigns.
+
+        New (campaign, date) rows are bulk-inserted, rows whose hash changed
+        are bulk-updated, and rows identical to the stored ones are counted
+        as unchanged and not written. Repeated (campaign, date) rows in the
+        sheet keep the last one, as the row-by-row upsert did.
+
+        Unparseable metric cells are imported as 0 / blank, like the scalar
+        parsers, and the row is still written; such rows are counted as
+        coerced. Rows with a metric that overflows its column are counted as
+        errored and not written. A batch the database rejects is retried row
+        by row, so one bad row only errors itself.
+        """
+        counts = {"created": 0, "updated": 0, "unchanged": 0, "skipped": 0, "errored": 0, "coerced": 0}
+
+        frame = _campaign_frame(rows, col_map)
+        counts["skipped"] = len(rows) - len(frame)
+        counts["coerced"] = int((frame["unparsed"] & ~frame["overflow"]).sum())
+        if counts["coerced"]:
+            logger.warning(f"{counts['coerced']} campaign row(s) had unparseable values, imported as 0 / blank")
+        counts["errored"] = int(frame["overflow"].sum())
+        if counts["errored"]:
+            logger.warning(f"{counts['errored']} campaign row(s) with out-of-range values not imported")
+        frame = frame[~frame["overflow"]].drop(columns=["unparsed", "overflow"])
+        frame = frame.drop_duplicates(["campaign_id", "date"], keep="last")
+        if frame.empty:
+            return counts
+
+        existing = pd.DataFrame(
+            db.query(
+                GoogleAdsCampaign.id, GoogleAdsCampaign.campaign_id,
+                GoogleAdsCampaign.date, GoogleAdsCampaign.row_hash,
+            ).filter(
+                GoogleAdsCampaign.date >= frame["date"].min(),
+                GoogleAdsCampaign.date <= frame["date"].max(),
+            ).order_by(GoogleAdsCampaign.id).all(),
+            columns=["id", "campaign_id", "date", "stored_hash"],
+        ).drop_duplicates(["campaign_id", "date"], keep="first")
+        merged = frame.merge(existing, on=["campaign_id", "date"], how="left")
+
+        is_new = merged["id"].isna()
+        is_changed = ~is_new & (merged["row_hash"] != merged["stored_hash"])
+        counts["unchanged"] = int((~is_new & ~is_changed).sum())
+
+        now = datetime.utcnow()
+        value_columns = ["campaign_id", "date", "row_hash"] + CAMPAIGN_HASH_FIELDS
+        inserts = _records(merged.loc[is_new, value_columns], synced_at=now)
+        updates = _records(merged.loc[is_changed, ["id"] + value_columns], synced_at=now)
+        for record in updates:
+            record["id"] = int(record["id"])
+
+        inserts = _write_batches(db, lambda batch: db.bulk_insert_mappings(GoogleAdsCampaign, batch), inserts)
+        updates = _write_batches(db, lambda batch: db.bulk_update_mappings(GoogleAdsCampaign, batch), updates)
+        counts["created"], counts["updated"] = len(inserts), len(updates)
+        counts["errored"] += int(is_new.sum()) + int(is_changed.sum()) - len(inserts) - len(updates)
+
+        if not inserts and not updates:
+            return counts
+
+        mark_dirty(db, ((r["campaign_id"], r["date"]) for r in inserts + updates), SOURCE_GOOGLE_ADS)
         db.commit()
+        # Campaign names feed utm_campaign order attribution
+        try:
+            ShopifyRevenueAttributionService(db).reindex_campaign_names()
+        except Exception as e:
+            logger.warning(f"Order attribution reindex failed: {e}")
+            db.rollback()
         return counts
 
     def _get_date_range(
@@ -653,6 +674,129 @@ def _parse_percentage(value) -> Optional[float]:
         return None
 
 
+# ── Columnar parsing (campaign import) ───────────────────────────
+# Column-wise equivalents of the parsers above: the same inputs give the same
+# values, with NaN where the scalar parser returns None.
+
+def _sheet_column(grid: pd.DataFrame, col_map: Dict[int, str], field_name: str) -> pd.Series:
+    """Stripped cell values for a field (first matching column, as _get_field), NaN when blank."""
+    idx = next((i for i, fname in col_map.items() if fname == field_name), None)
+    if idx is None:
+        return pd.Series(np.nan, index=grid.index, dtype=object)
+    col = grid[idx].fillna("").astype(str).str.strip()
+    return col.where(col != "", np.nan)
+
+
+def _to_number(col: pd.Series, strip: str = ", ") -> pd.Series:
+    """Remove separator characters and parse as float; unparseable values become NaN."""
+    cleaned = col.astype(object)
+    for ch in strip:
+        cleaned = cleaned.str.replace(ch, "", regex=False)
+    values = pd.to_numeric(cleaned, errors="coerce").astype(float)
+    return values.where(np.isfinite(values), np.nan)
+
+
+def _percentage_column(col: pd.Series) -> pd.Series:
+    """Column form of _parse_percentage."""
+    values = col.where(~col.str.startswith("<", na=False), np.nan)
+    values = values.str.rstrip("%").str.replace(",", "", regex=False).str.strip()
+    return pd.to_numeric(values, errors="coerce").astype(float)
+
+
+def _campaign_frame(rows: List[List[str]], col_map: Dict[int, str]) -> pd.DataFrame:
+    """
+    Parse campaign sheet rows into one typed row per valid (campaign, date)
+    with its row_hash. Rows without a campaign id or a parseable date are
+    dropped (the caller counts them as skipped).
+
+    `unparsed` marks rows with a metric cell that is neither blank nor "--"
+    and does not parse; the value is coerced as the scalar parser would.
+    `overflow` marks rows with a value too large for its column.
+    """
+    width = max(col_map) + 1 if col_map else 0
+    grid = pd.DataFrame([(list(row) + [""] * width)[:width] for row in rows], columns=range(width))
+    field = lambda name: _sheet_column(grid, col_map, name)
+    unparsed = pd.Series(False, index=grid.index)
+    overflow = pd.Series(False, index=grid.index)
+
+    def checked(name, values, limit=None):
+        nonlocal unparsed, overflow
+        raw = field(name)
+        bad = raw.notna() & (raw != "--") & values.isna()
+        if name in PERCENTAGE_FIELDS:
+            bad &= ~raw.str.startswith("<", na=False)
+        unparsed = unparsed | bad
+        if limit is not None:
+            overflow = overflow | (values.abs() > limit)
+            values = values.where(values.abs() <= limit, np.nan)
+        return values
+
+    def count(name, scale=1, strip=", "):
+        values = checked(name, _to_number(field(name), strip) * scale, limit=INT_LIMITS[name])
+        return np.trunc(values.fillna(0)).astype("int64")
+
+    dates = field("date")
+    parsed_dates = dates.map({v: _parse_date(v) for v in dates.dropna().unique()})
+
+    frame = pd.DataFrame({
+        "campaign_id": field("campaign_id").str.replace(r"\.0$", "", regex=True),
+        "date": parsed_dates,
+        "campaign_name": field("campaign_name").fillna("Unknown"),
+        "campaign_type": field("campaign_type"),
+        "campaign_status": field("campaign_status"),
+        "impressions": count("impressions"),
+        "clicks": count("clicks"),
+        "cost_micros": count("cost", scale=1_000_000, strip="$, "),
+        "conversions": checked("conversions", _to_number(field("conversions"))).fillna(0.0),
+        "conversions_value": checked("conversions_value", _to_number(field("conversions_value"))).fillna(0.0),
+        "ctr": checked("ctr", _percentage_column(field("ctr"))),
+        "avg_cpc": checked("avg_cpc", _to_number(field("avg_cpc"), "$, ")),
+        **{name: checked(name, _percentage_column(field(name))) for name in PERCENTAGE_FIELDS if name != "ctr"},
+        "unparsed": unparsed,
+        "overflow": overflow,
+    })
+    frame = frame[frame["campaign_id"].notna() & frame["date"].notna()].reset_index(drop=True)
+    hashes = pd.util.hash_pandas_object(frame[CAMPAIGN_HASH_FIELDS], index=False)
+    frame["row_hash"] = [f"{h:016x}" for h in hashes]
+    return frame
+
+
+def _write_batches(db: Session, write, records: List[Dict]) -> List[Dict]:
+    """
+    Apply write() in MERGE_BATCH chunks, committing each. A chunk that fails
+    is rolled back and retried one record at a time; returns the records
+    written (failed ones are logged and left out).
+    """
+    written = []
+    for i in range(0, len(records), MERGE_BATCH):
+        batch = records[i:i + MERGE_BATCH]
+        try:
+            write(batch)
+            db.commit()
+            written.extend(batch)
+            continue
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Campaign batch write failed, retrying row by row: {e}")
+        for record in batch:
+            try:
+                write([record])
+                db.commit()
+                written.append(record)
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Campaign {record.get('campaign_id')} {record.get('date')} error: {e}")
+    return written
+
+
+def _records(frame: pd.DataFrame, **extra) -> List[Dict]:
+    """DataFrame rows as mappings for bulk insert/update, NaN → None."""
+    records = frame.astype(object).where(frame.notna(), None).to_dict("records")
+    for record in records:
+        record.update(extra)
+    return records
+
+
 def _parse_date(value) -> Optional[date_type]:
     """Parse date from various formats."""
     if not value:
@@ -0,0 +1,233 @@
+"""
+KPI Time-Series Service
+
+Maintains kpi_hourly_points, the hourly KPI store behind continuous
+monitoring. Each series is an additive measure bucketed by UTC hour:
+
+    net_revenue, orders          paid orders by processed_at (net sales basis)
+    gross_revenue, orders_created  paid orders by created_at (post-refund totals)
+    abandoned_checkouts          unrecovered checkouts by created_at
+    email_open_rate_sum, email_campaigns  sent Klaviyo campaigns by send_time
+    sessions, organic/paid/social_sessions  GA4 (daily, midnight bucket)
+    ads_*                        enabled Google Ads campaigns (daily, midnight bucket)
+
+refresh() re-derives the buckets from a day onward with one grouped query
+per source, so after each sync only the last few days are recomputed.
+Ratios (conversion rate, ROAS, abandonment, open rate) are computed by the
+readers from summed components, never stored.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import case, extract, func
+from sqlalchemy.orm import Session
+
+from app.models.ga4_data import GA4TrafficSource
+from app.models.google_ads_data import GoogleAdsCampaign
+from app.models.klaviyo_data import KlaviyoCampaign
+from app.models.kpi_timeseries import KpiHourlyPoint
+from app.models.shopify import ShopifyOrder
+from app.models.transaction import AbandonedCheckout
+from app.utils.logger import log
+
+
+PAID_STATUSES = ['paid', 'partially_refunded']
+
+HISTORY_DAYS = 8          # 7-day baselines and trends plus the current day
+REFRESH_HOURS = 72        # Late order updates and GA4/Ads restatements land here
+FRESH_FOR = timedelta(minutes=5)
+
+HOURLY_KPI_SERIES = [
+    'net_revenue', 'orders', 'gross_revenue', 'orders_created',
+    'abandoned_checkouts', 'email_open_rate_sum', 'email_campaigns',
+]
+DAILY_KPI_SERIES = [
+    'sessions', 'organic_sessions', 'paid_sessions', 'social_sessions',
+    'ads_conversions_value', 'ads_cost_micros', 'ads_clicks', 'ads_impressions',
+    'ads_zero_impression_rows',
+]
+
+MEDIUM_SERIES = {
+    'organic_sessions': 'organic',
+    'paid_sessions': 'cpc',
+    'social_sessions': 'social',
+}
+
+# Process-wide freshness marker for ensure_fresh()
+_last_refresh: Optional[datetime] = None
+
+
+def floor_hour(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+class KpiTimeSeriesService:
+    """Hourly KPI store: refresh from source tables, read windows and trends"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ── series definitions ──────────────────────────────────────────
+
+    def _hourly(self, ts, measures: Dict, start: datetime, *criteria) -> Dict[str, Dict[datetime, float]]:
+        """Group measures by (date, hour) of `ts` from `start` onward."""
+        day = func.date(ts)
+        hour = extract('hour', ts)
+        rows = (
+            self.db.query(day.label('day'), hour.label('hour'), *[m.label(k) for k, m in measures.items()])
+            .filter(ts >= start, *criteria)
+            .group_by(day, hour)
+            .all()
+        )
+        out: Dict[str, Dict[datetime, float]] = {k: {} for k in measures}
+        for row in rows:
+            bucket = datetime.combine(_as_date(row.day), time(int(row.hour)))
+            for key in measures:
+                value = getattr(row, key)
+                if value:
+                    out[key][bucket] = float(value)
+        return out
+
+    def _daily(self, day_col, measures: Dict, start: date, *criteria) -> Dict[str, Dict[datetime, float]]:
+        """Group measures by a date column into midnight buckets."""
+        rows = (
+            self.db.query(day_col.label('day'), *[m.label(k) for k, m in measures.items()])
+            .filter(day_col >= start, *criteria)
+            .group_by(day_col)
+            .all()
+        )
+        out: Dict[str, Dict[datetime, float]] = {k: {} for k in measures}
+        for row in rows:
+            bucket = datetime.combine(_as_date(row.day), time.min)
+            for key in measures:
+                value = getattr(row, key)
+                if value:
+                    out[key][bucket] = float(value)
+        return out
+
+    def _compute(self, start: datetime) -> Dict[str, Dict[datetime, float]]:
+        """Every series' buckets from `start` (a midnight) onward."""
+        series: Dict[str, Dict[datetime, float]] = {}
+        paid = ShopifyOrder.financial_status.in_(PAID_STATUSES)
+
+        processed_ts = func.coalesce(ShopifyOrder.processed_at, ShopifyOrder.created_at)
+        series.update(self._hourly(processed_ts, {
+            'net_revenue': func.sum(func.coalesce(ShopifyOrder.current_subtotal_price, ShopifyOrder.subtotal_price)),
+            'orders': func.count(ShopifyOrder.id),
+        }, start, paid))
+
+        series.update(self._hourly(ShopifyOrder.created_at, {
+            'gross_revenue': func.sum(func.coalesce(ShopifyOrder.current_total_price, ShopifyOrder.total_price)),
+            'orders_created': func.count(ShopifyOrder.id),
+        }, start, paid))
+
+        series.update(self._hourly(AbandonedCheckout.created_at, {
+            'abandoned_checkouts': func.count(AbandonedCheckout.id),
+        }, start, AbandonedCheckout.recovered == False))
+
+        series.update(self._hourly(KlaviyoCampaign.send_time, {
+            'email_open_rate_sum': func.sum(KlaviyoCampaign.open_rate),
+            'email_campaigns': func.count(KlaviyoCampaign.open_rate),
+        }, start, KlaviyoCampaign.status == 'sent', KlaviyoCampaign.recipients > 0))
+
+        start_day = start.date()
+        series.update(self._daily(GA4TrafficSource.date, {
+            'sessions': func.sum(GA4TrafficSource.sessions),
+        }, start_day, GA4TrafficSource.session_source == '(all)', GA4TrafficSource.session_medium == '(all)'))
+        for key, medium in MEDIUM_SERIES.items():
+            series.update(self._daily(GA4TrafficSource.date, {
+                key: func.sum(GA4TrafficSource.sessions),
+            }, start_day, GA4TrafficSource.session_medium == medium))
+
+        series.update(self._daily(GoogleAdsCampaign.date, {
+            'ads_conversions_value': func.sum(GoogleAdsCampaign.conversions_value),
+            'ads_cost_micros': func.sum(GoogleAdsCampaign.cost_micros),
+            'ads_clicks': func.sum(GoogleAdsCampaign.clicks),
+            'ads_impressions': func.sum(GoogleAdsCampaign.impressions),
+            'ads_zero_impression_rows': func.sum(case((GoogleAdsCampaign.impressions == 0, 1), else_=0)),
+        }, start_day, GoogleAdsCampaign.campaign_status == 'ENABLED'))
+        return series
+
+    # ── maintenance ─────────────────────────────────────────────────
+
+    def refresh(self, since: datetime) -> Dict:
+        """
+        Rebuild every bucket from midnight of the day containing `since`.
+
+        The old points are deleted and the new ones inserted in one
+        transaction, so readers never see a half-refreshed window.
+        """
+        global _last_refresh
+        started = datetime.utcnow()
+        start = datetime.combine(since.date(), time.min)
+        try:
+            series = self._compute(start)
+            self.db.query(KpiHourlyPoint).filter(KpiHourlyPoint.hour >= start).delete(synchronize_session=False)
+            now = datetime.utcnow()
+            points = [
+                {'metric': metric, 'hour': bucket, 'value': value, 'refreshed_at': now}
+                for metric, buckets in series.items()
+                for bucket, value in buckets.items()
+            ]
+            if points:
+                self.db.bulk_insert_mappings(KpiHourlyPoint, points)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        _last_refresh = started
+        duration = round((datetime.utcnow() - started).total_seconds(), 2)
+        log.debug(f"KPI store refreshed from {start}: {len(points)} points in {duration}s")
+        return {'since': start.isoformat(), 'points': len(points), 'duration_seconds': duration}
+
+    def refresh_recent(self, hours: int = REFRESH_HOURS) -> Dict:
+        return self.refresh(datetime.utcnow() - timedelta(hours=hours))
+
+    def ensure_fresh(self, max_age: timedelta = FRESH_FOR) -> None:
+        """
+        Build the store on first use and refresh the recent window when the
+        last refresh in this process is older than `max_age`.
+        """
+        if _last_refresh is not None and datetime.utcnow() - _last_refresh < max_age:
+            return
+        if self.db.query(KpiHourlyPoint.id).first() is None:
+            self.refresh(datetime.utcnow() - timedelta(days=HISTORY_DAYS))
+        else:
+            self.refresh_recent()
+
+    # ── readers ─────────────────────────────────────────────────────
+
+    def window_sums(self, metrics: Iterable[str], start: datetime, end: Optional[datetime] = None) -> Dict[str, float]:
+        """Sum of each metric over buckets in [start, end)."""
+        metrics = list(metrics)
+        query = (
+            self.db.query(KpiHourlyPoint.metric, func.sum(KpiHourlyPoint.value))
+            .filter(KpiHourlyPoint.metric.in_(metrics), KpiHourlyPoint.hour >= start)
+        )
+        if end is not None:
+            query = query.filter(KpiHourlyPoint.hour < end)
+        sums = dict(query.group_by(KpiHourlyPoint.metric).all())
+        return {m: float(sums.get(m) or 0) for m in metrics}
+
+    def daily_values(self, metrics: Iterable[str], start: datetime) -> Dict[str, Dict[date, float]]:
+        """Per-day totals of each metric from `start` onward (only days with data)."""
+        metrics = list(metrics)
+        out: Dict[str, Dict[date, float]] = {m: {} for m in metrics}
+        points = (
+            self.db.query(KpiHourlyPoint.metric, KpiHourlyPoint.hour, KpiHourlyPoint.value)
+            .filter(KpiHourlyPoint.metric.in_(metrics), KpiHourlyPoint.hour >= start)
+            .all()
+        )
+        for metric, hour, value in points:
+            day = hour.date()
+            out[metric][day] = out[metric].get(day, 0.0) + value
+        return out
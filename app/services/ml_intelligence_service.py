@@ -3,7 +3,7 @@ ML Intelligence Service - Phase 1
 
 Lightweight, explainable ML baselines:
 1. Forecasting (Holt's Linear Exponential Smoothing)
-2. Anomaly Detection (Rolling Z-Score)
+2. Anomaly Detection (Rolling Z-Score, vectorized across metrics)
 3. Revenue Driver Analysis (Multiplicative Decomposition)
 4. Tracking Health (GA4 vs Shopify Gap)
 5. Inventory Suggestions (Sales Velocity + Days of Cover)
@@ -17,6 +17,7 @@ from datetime import datetime, date, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from decimal import Decimal
 
+import pandas as pd
 from sqlalchemy import func, text, and_, cast, Date
 from sqlalchemy.sql.expression import case
 from sqlalchemy.orm import Session
@@ -254,14 +255,23 @@ class MLIntelligenceService:
         return [avg] * horizon, residual_std
 
     def _forecast_metric(
-        self, metric: str, horizon: int = 7, training_window: int = 90
+        self,
+        metric: str,
+        horizon: int = 7,
+        training_window: int = 90,
+        frame: Optional[pd.DataFrame] = None,
     ) -> List[Dict[str, Any]]:
         """
         Generate forecast for a single metric.
 
+        History comes from `frame` (a _fetch_daily_metric_frame result over
+        the training window) when given, else from the database.
         Returns list of forecast dicts ready for DB insertion.
         """
-        history = self._fetch_daily_metric_history(metric, days=training_window)
+        if frame is not None:
+            history = [{"date": day, "value": float(value)} for day, value in frame[metric].dropna().items()]
+        else:
+            history = self._fetch_daily_metric_history(metric, days=training_window)
 
         if not history:
             logger.warning(f"No history for metric '{metric}', skipping forecast")
@@ -305,16 +315,19 @@ class MLIntelligenceService:
 
         return forecasts
 
-    def generate_forecasts(self, horizon: int = 7) -> Dict[str, Any]:
+    def generate_forecasts(self, horizon: int = 7, frame: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
         """
         Generate forecasts for all tracked metrics and persist to DB.
+
+        `frame` is an already loaded 90-day _fetch_daily_metric_frame (the
+        pipeline shares one between forecasting and anomaly detection).
         """
         metrics = ["revenue", "orders", "sessions"]
         total_inserted = 0
         results = {}
 
         for metric in metrics:
-            forecasts = self._forecast_metric(metric, horizon=horizon)
+            forecasts = self._forecast_metric(metric, horizon=horizon, frame=frame)
             for f in forecasts:
                 self.db.add(MLForecast(**f))
             total_inserted += len(forecasts)
@@ -368,133 +381,124 @@ class MLIntelligenceService:
     # 2. ANOMALY DETECTION - Rolling Z-Score
     # ─────────────────────────────────────────────
 
-    def _detect_metric_anomalies(
-        self,
-        metric: str,
-        baseline_window: int,
-        lookback_days: int = 14,
-        history_days: int = 90,
-    ) -> List[Dict[str, Any]]:
+    def _fetch_daily_metric_frame(self, days: int = 90) -> pd.DataFrame:
         """
-        Detect anomalies for a single metric using rolling z-score.
+        Daily history of every anomaly metric as one date x metric frame.
 
-        Args:
-            metric: Metric name
-            baseline_window: Rolling window size (7 or 30)
-            lookback_days: How many recent days to check for anomalies
-            history_days: Total history to fetch for computing baselines
+        One Shopify and one GA4 query instead of one per metric. Each column
+        holds the same points _fetch_daily_metric_history returns for that
+        metric; dates a metric has no point for are NaN.
         """
-        history = self._fetch_daily_metric_history(metric, days=history_days)
-
-        if len(history) < baseline_window + lookback_days:
-            logger.warning(
-                f"Insufficient history for {metric} anomaly detection "
-                f"({len(history)} < {baseline_window + lookback_days})"
+        cutoff = date.today() - timedelta(days=days)
+        order_rows = (
+            self.db.query(
+                func.date(ShopifyOrder.created_at).label("day"),
+                func.sum(func.coalesce(ShopifyOrder.current_total_price, ShopifyOrder.total_price)).label("revenue"),
+                func.count(ShopifyOrder.id).label("orders"),
             )
-            return []
-
-        now = datetime.utcnow()
-        anomalies = []
-
-        # Check the last lookback_days points
-        start_idx = max(baseline_window, len(history) - lookback_days)
-
-        for i in range(start_idx, len(history)):
-            # Compute rolling mean and std from preceding window
-            window_values = [
-                history[j]["value"] for j in range(i - baseline_window, i)
-            ]
-            mean_val = sum(window_values) / len(window_values)
-            if len(window_values) > 1:
-                var_val = sum((v - mean_val) ** 2 for v in window_values) / (
-                    len(window_values) - 1
-                )
-                std_val = math.sqrt(var_val)
-            else:
-                std_val = 0.0
-
-            actual = history[i]["value"]
-
-            if std_val == 0:
-                continue
-
-            z_score = (actual - mean_val) / std_val
-
-            # Severity thresholds
-            abs_z = abs(z_score)
-            if abs_z < 2.5:
-                continue  # Not anomalous enough
-
-            if abs_z >= 4:
-                severity = "critical"
-            elif abs_z >= 3:
-                severity = "high"
-            else:
-                severity = "medium"
-
-            deviation_pct = ((actual - mean_val) / mean_val * 100) if mean_val != 0 else 0
-            direction = "spike" if z_score > 0 else "drop"
-
-            anomalies.append(
-                {
-                    "date": history[i]["date"],
-                    "metric": metric,
-                    "actual_value": round(actual, 2),
-                    "expected_value": round(mean_val, 2),
-                    "deviation_pct": round(deviation_pct, 2),
-                    "z_score": round(z_score, 2),
-                    "direction": direction,
-                    "severity": severity,
-                    "baseline_window": baseline_window,
-                    "generated_at": now,
-                }
+            .filter(
+                func.date(ShopifyOrder.created_at) >= cutoff,
+                ShopifyOrder.financial_status.in_(["paid", "partially_refunded"]),
+                ShopifyOrder.cancelled_at.is_(None),
             )
+            .group_by(func.date(ShopifyOrder.created_at))
+            .all()
+        )
+        session_rows = (
+            self.db.query(GA4DailySummary.date, GA4DailySummary.sessions)
+            .filter(GA4DailySummary.date >= cutoff)
+            .all()
+        )
+
+        orders = pd.DataFrame(
+            [(_ensure_date(r.day), float(r.revenue or 0), float(r.orders or 0)) for r in order_rows],
+            columns=["date", "revenue", "orders"],
+        ).set_index("date").astype(float)
+        sessions = pd.Series(
+            {r.date: float(r.sessions or 0) for r in session_rows}, name="sessions", dtype=float
+        )
 
-        return anomalies
+        frame = orders.join(sessions, how="outer")
+        has_orders = frame["orders"].notna()
+        day_sessions = frame["sessions"].where(has_orders).fillna(0)
+        frame["aov"] = (frame["revenue"] / frame["orders"].clip(lower=1)).where(has_orders)
+        frame["conversion_rate"] = (
+            (frame["orders"] / day_sessions * 100).where(day_sessions > 0, 0.0).where(has_orders)
+        )
+        frame.index.name = "date"
+        return frame[["revenue", "orders", "sessions", "conversion_rate", "aov"]].sort_index()
 
-    def detect_anomalies(self, history_days: int = 90) -> Dict[str, Any]:
+    def detect_anomalies(self, history_days: int = 90, frame: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
         """
         Detect anomalies across all metrics and persist to DB.
 
-        Uses both 7-day and 30-day baselines for each metric.
+        Uses both 7-day and 30-day baselines for each metric. Every metric is
+        scored in one vectorized rolling z-score pass per baseline window.
+        `frame` is an already loaded _fetch_daily_metric_frame(history_days).
         """
+        from app.ml.anomaly_detection import AnomalyDetector
+
         metrics = ["revenue", "orders", "sessions", "conversion_rate", "aov"]
         baselines = [7, 30]
-        total_upserted = 0
-        results = {}
-
-        for metric in metrics:
-            metric_count = 0
-            for window in baselines:
-                anomalies = self._detect_metric_anomalies(
-                    metric, baseline_window=window, history_days=history_days
-                )
-                for a in anomalies:
-                    # Upsert: check if exists
-                    existing = (
-                        self.db.query(MLAnomaly)
-                        .filter(
-                            MLAnomaly.date == a["date"],
-                            MLAnomaly.metric == a["metric"],
-                            MLAnomaly.baseline_window == a["baseline_window"],
-                        )
-                        .first()
+        lookback_days = 14
+
+        if frame is None:
+            frame = self._fetch_daily_metric_frame(days=history_days)
+        detector = AnomalyDetector()
+        found = []
+        for window in baselines:
+            for metric in metrics:
+                points = int(frame[metric].notna().sum())
+                if points < window + lookback_days:
+                    logger.warning(
+                        f"Insufficient history for {metric} anomaly detection "
+                        f"({points} < {window + lookback_days})"
                     )
-                    if existing:
-                        # Update
-                        for k, v in a.items():
-                            if k != "date" and k != "metric" and k != "baseline_window":
-                                setattr(existing, k, v)
-                    else:
-                        self.db.add(MLAnomaly(**a))
-                    metric_count += 1
+            found.append(detector.detect_series_anomalies(
+                frame, baseline_window=window, lookback_days=lookback_days, threshold=2.5,
+            ))
 
-                total_upserted += len(anomalies)
+        now = datetime.utcnow()
+        anomalies = [
+            {
+                "date": r.date,
+                "metric": r.metric,
+                "actual_value": round(float(r.value), 2),
+                "expected_value": round(float(r.expected_value), 2),
+                "deviation_pct": round(float(r.deviation_pct), 2),
+                "z_score": round(float(r.z_score), 2),
+                "direction": r.direction,
+                "severity": r.severity,
+                "baseline_window": int(r.baseline_window),
+                "generated_at": now,
+            }
+            for df in found
+            for r in df.itertuples(index=False)
+        ]
 
-            results[metric] = metric_count
+        # Upsert against the existing rows for the checked dates in one query
+        existing = {}
+        if anomalies:
+            rows = (
+                self.db.query(MLAnomaly)
+                .filter(MLAnomaly.date >= min(a["date"] for a in anomalies))
+                .all()
+            )
+            existing = {(r.date, r.metric, r.baseline_window): r for r in rows}
+
+        results = {metric: 0 for metric in metrics}
+        for a in anomalies:
+            row = existing.get((a["date"], a["metric"], a["baseline_window"]))
+            if row:
+                for k, v in a.items():
+                    if k != "date" and k != "metric" and k != "baseline_window":
+                        setattr(row, k, v)
+            else:
+                self.db.add(MLAnomaly(**a))
+            results[a["metric"]] += 1
 
         self.db.commit()
-        return {"anomalies_upserted": total_upserted, "by_metric": results}
+        return {"anomalies_upserted": len(anomalies), "by_metric": results}
 
     def get_anomalies(
         self,
@@ -1634,49 +1638,3 @@ class MLIntelligenceService:
             }
             for r in rows
         ]
-
-    # ─────────────────────────────────────────────
-    # PIPELINE ORCHESTRATOR
-    # ─────────────────────────────────────────────
-
-    def run_daily_ml_pipeline(self) -> Dict[str, Any]:
-        """
-        Run all ML jobs in sequence.
-        Called by the scheduler at 3am daily or manually via POST /ml/run.
-        """
-        results = {}
-
-        try:
-            logger.info("ML Pipeline: Starting forecasts...")
-            results["forecasts"] = self.generate_forecasts(horizon=30)
-        except Exception as e:
-            logger.error(f"ML Pipeline: Forecasting failed: {e}")
-            self.db.rollback()
-            results["forecasts"] = {"error": str(e)}
-
-        try:
-            logger.info("ML Pipeline: Starting anomaly detection...")
-            results["anomalies"] = self.detect_anomalies(history_days=90)
-        except Exception as e:
-            logger.error(f"ML Pipeline: Anomaly detection failed: {e}")
-            self.db.rollback()
-            results["anomalies"] = {"error": str(e)}
-
-        try:
-            logger.info("ML Pipeline: Capturing inventory snapshot...")
-            self._capture_inventory_snapshot()
-            self.db.commit()
-        except Exception as e:
-            logger.error(f"ML Pipeline: Inventory snapshot failed: {e}")
-            self.db.rollback()
-
-        try:
-            logger.info("ML Pipeline: Starting inventory suggestions...")
-            results["inventory"] = self.generate_inventory_suggestions()
-        except Exception as e:
-            logger.error(f"ML Pipeline: Inventory suggestions failed: {e}")
-            self.db.rollback()
-            results["inventory"] = {"error": str(e)}
-
-        logger.info(f"ML Pipeline: Complete. Results: {results}")
-        return results
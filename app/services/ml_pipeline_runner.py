@@ -0,0 +1,180 @@
+"""
+ML Pipeline Runner
+
+Runs the nightly MLIntelligenceService stages in spawned worker processes
+so the CPU-bound model fitting never holds the scheduler's event loop or
+the caller's database session:
+
+    forecasts   Holt / moving-average forecasts     (generate_forecasts)
+    anomalies   rolling z-score anomaly detection   (detect_anomalies)
+    inventory   inventory snapshot, then reorder suggestions
+
+The stages are independent, so they run concurrently. Each worker opens its
+own database session. The daily metric history that forecasts and anomalies
+both read is queried once here and handed to the workers as a Parquet
+buffer, not as ORM rows.
+
+Every stage reports wall time, CPU time and peak RSS under
+results["stage_metrics"]; results["pipeline"] has the worker count and
+total wall time. Peak RSS is the worker process's high-water mark
+when the stage finished. With ml_pipeline_workers < 2 the same stages run
+one after another in this process.
+"""
+import io
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from app.config import get_settings
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_STAGES = ("forecasts", "anomalies", "inventory")
+
+FORECAST_HORIZON = 30
+HISTORY_DAYS = 90
+
+
+def _frame_to_parquet(frame: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    frame.to_parquet(buffer, engine="pyarrow")
+    return buffer.getvalue()
+
+
+def _frame_from_parquet(data: Optional[bytes]) -> Optional[pd.DataFrame]:
+    if data is None:
+        return None
+    return pd.read_parquet(io.BytesIO(data), engine="pyarrow")
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """High-water resident set size of this process in MB."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS bytes
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    except Exception:
+        return None
+
+
+def _execute_stage(service, stage: str, frame: Optional[pd.DataFrame]) -> Dict[str, Any]:
+    if stage == "forecasts":
+        return service.generate_forecasts(horizon=FORECAST_HORIZON, frame=frame)
+    if stage == "anomalies":
+        return service.detect_anomalies(history_days=HISTORY_DAYS, frame=frame)
+    if stage == "inventory":
+        try:
+            service._capture_inventory_snapshot()
+            service.db.commit()
+        except Exception as e:
+            logger.error(f"ML Pipeline: Inventory snapshot failed: {e}")
+            service.db.rollback()
+        return service.generate_inventory_suggestions()
+    raise ValueError(f"Unknown ML pipeline stage '{stage}'")
+
+
+def _run_stage(stage: str, metric_frame: Optional[bytes]) -> Tuple[Dict, Dict]:
+    """
+    Worker entry point: run one stage on a fresh session.
+
+    Returns (stage result, stage metrics). A failing stage returns
+    {"error": ...} instead of raising.
+    """
+    from app.models.base import SessionLocal
+    from app.services.ml_intelligence_service import MLIntelligenceService
+
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    db = SessionLocal()
+    try:
+        logger.info(f"ML Pipeline: Starting {stage}...")
+        result = _execute_stage(MLIntelligenceService(db), stage, _frame_from_parquet(metric_frame))
+        status = "success"
+    except Exception as e:
+        logger.error(f"ML Pipeline: {stage} failed: {e}")
+        db.rollback()
+        result, status = {"error": str(e)}, "failed"
+    finally:
+        db.close()
+
+    metrics = {
+        "status": status,
+        "wall_seconds": round(time.perf_counter() - wall_started, 3),
+        "cpu_seconds": round(time.process_time() - cpu_started, 3),
+        "peak_rss_mb": _peak_rss_mb(),
+        "pid": os.getpid(),
+    }
+    return result, metrics
+
+
+def _load_metric_frame() -> Optional[bytes]:
+    """Query the shared daily metric history once; None lets each stage query its own."""
+    from app.models.base import SessionLocal
+    from app.services.ml_intelligence_service import MLIntelligenceService
+
+    db = SessionLocal()
+    try:
+        return _frame_to_parquet(MLIntelligenceService(db)._fetch_daily_metric_frame(days=HISTORY_DAYS))
+    except Exception as e:
+        logger.warning(f"ML Pipeline: shared metric history failed, stages will query their own: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def run_ml_pipeline(workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run every pipeline stage and return {stage: result, "stage_metrics": {...}}.
+
+    Blocking; async callers should run it with asyncio.to_thread.
+    """
+    started = time.perf_counter()
+    metric_frame = _load_metric_frame()
+    if workers is None:
+        workers = get_settings().ml_pipeline_workers
+    workers = min(len(PIPELINE_STAGES), max(1, workers))
+
+    outcomes = {}
+    if workers < 2:
+        for stage in PIPELINE_STAGES:
+            outcomes[stage] = _run_stage(stage, metric_frame)
+    else:
+        # Spawned, not forked: the caller is a multi-threaded API/scheduler
+        # process, and each worker opens its own session anyway
+        spawn = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=spawn) as pool:
+            futures = {stage: pool.submit(_run_stage, stage, metric_frame) for stage in PIPELINE_STAGES}
+            for stage, future in futures.items():
+                try:
+                    outcomes[stage] = future.result()
+                except Exception as e:  # worker died (BrokenProcessPool) or result not picklable
+                    logger.error(f"ML Pipeline: {stage} worker failed: {e}")
+                    outcomes[stage] = ({"error": str(e)}, {"status": "failed"})
+
+    results = {stage: result for stage, (result, _) in outcomes.items()}
+    results["stage_metrics"] = {stage: metrics for stage, (_, metrics) in outcomes.items()}
+    results["pipeline"] = {"workers": workers, "wall_seconds": round(time.perf_counter() - started, 3)}
+
+    summary = ", ".join(
+        f"{stage} {m.get('wall_seconds', '?')}s wall / {m.get('cpu_seconds', '?')}s CPU / "
+        f"{m.get('peak_rss_mb', '?')} MB"
+        for stage, m in results["stage_metrics"].items()
+    )
+    logger.info(
+        f"ML Pipeline: Complete in {results['pipeline']['wall_seconds']:.1f}s "
+        f"with {workers} worker(s): {summary}"
+    )
+    return results
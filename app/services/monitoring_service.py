@@ -4,7 +4,7 @@ The safety net that catches everything before it becomes a problem
 """
 import asyncio
 from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 import hashlib
 import json
 
@@ -21,6 +21,13 @@ from app.models.ga4_data import GA4TrafficSource
 from app.models.google_ads_data import GoogleAdsCampaign
 from app.models.klaviyo_data import KlaviyoCampaign
 from app.models.transaction import AbandonedCheckout
+from app.services.kpi_timeseries_service import (
+    DAILY_KPI_SERIES,
+    HOURLY_KPI_SERIES,
+    KpiTimeSeriesService,
+    floor_hour,
+)
+from app.services.product_sales_rollup_service import ProductSalesRollupService
 from app.utils.logger import log
 from app.config import get_settings
 
@@ -49,6 +56,14 @@ class MonitoringService:
         # Control flag for stopping the monitoring loop
         self._running = False
 
+        # Last full Shopify poll; with webhooks enabled it only runs as a
+        # reconciliation sweep every shopify_reconcile_minutes
+        self._last_shopify_reconcile = None
+
+        # Product sales rollup freshness (see _product_sales_rollup)
+        self._product_sales_refreshed_at = None
+        self._product_sales_refresh_interval = timedelta(minutes=5)
+
         # Define what metrics to monitor
         self.monitored_metrics = {
             'revenue': {'threshold': 0.15, 'cooldown_hours': 4},
@@ -71,8 +86,9 @@ class MonitoringService:
             try:
                 log.info("Running monitoring check...")
 
-                # 1. Sync latest data
+                # 1. Sync latest data, then roll it into the hourly KPI store
                 await self._sync_latest_data()
+                await asyncio.to_thread(self._refresh_kpi_store)
 
                 # 2. Check all metrics
                 issues = await self._check_all_metrics()
@@ -133,11 +149,40 @@ class MonitoringService:
     async def _sync_latest_data(self):
         """Sync latest data from all sources"""
         try:
+            if settings.shopify_webhooks_enabled:
+                # Apply queued Shopify webhooks; poll Shopify only when a
+                # reconciliation sweep is due
+                from app.services.shopify_webhook_service import drain_shopify_webhooks
+                await asyncio.to_thread(drain_shopify_webhooks, self.data_sync)
+                if not self._shopify_reconcile_due():
+                    await self.data_sync.sync_all(days=1, include_shopify=False)
+                    return
+
             # Quick sync of last 24 hours only
             await self.data_sync.sync_all(days=1)
+            self._last_shopify_reconcile = datetime.utcnow()
+            if settings.shopify_webhooks_enabled:
+                from app.services.shopify_webhook_service import prune_shopify_webhooks
+                await asyncio.to_thread(prune_shopify_webhooks)
         except Exception as e:
             log.error(f"Error syncing data: {str(e)}")
 
+    def _refresh_kpi_store(self):
+        """Re-bucket the recent KPI window from the freshly synced tables"""
+        db = SessionLocal()
+        try:
+            KpiTimeSeriesService(db).refresh_recent()
+        except Exception as e:
+            log.error(f"Error refreshing KPI store: {str(e)}")
+        finally:
+            db.close()
+
+    def _shopify_reconcile_due(self) -> bool:
+        if self._last_shopify_reconcile is None:
+            return True
+        interval = timedelta(minutes=settings.shopify_reconcile_minutes)
+        return datetime.utcnow() - self._last_shopify_reconcile >= interval
+
     async def _check_all_metrics(self) -> List[Dict]:
         """
         Check all monitored metrics against baselines
@@ -803,86 +848,73 @@ Estimated additional revenue: $150-500/day if paid performs at 50% of organic co
         finally:
             db.close()
 
-    async def _get_current_metrics(self) -> Dict:
+    def _kpis_from_store(
+        self,
+        store: KpiTimeSeriesService,
+        start: datetime,
+        end: Optional[datetime],
+        day_start: datetime,
+        day_end: Optional[datetime],
+        days: int = 1,
+    ) -> Dict:
         """
-        Get current metric values (last 24 hours) from database.
+        KPI values for a window, summed from the hourly KPI store.
 
-        Returns dict with keys: revenue, conversion_rate, roas, traffic,
-        cart_abandonment, email_open_rate
+        Order, checkout and email series cover the hour buckets in
+        [start, end); GA4 and Google Ads (daily sources) cover the days in
+        [day_start, day_end). Revenue and traffic are per-day averages over
+        `days`; the ratios are computed from the window totals.
         """
-        db = SessionLocal()
-        try:
-            cutoff = datetime.utcnow() - timedelta(hours=24)
-            cutoff_date = cutoff.date()
-            metrics = {}
+        hourly = store.window_sums(HOURLY_KPI_SERIES, start, end)
+        daily = store.window_sums(DAILY_KPI_SERIES, day_start, day_end)
+        metrics = {}
 
-            # 1. Revenue from Shopify orders (last 24h) — net sales basis
-            _ts = func.coalesce(ShopifyOrder.processed_at, ShopifyOrder.created_at)
-            _net = func.coalesce(ShopifyOrder.current_subtotal_price, ShopifyOrder.subtotal_price)
-            revenue_result = db.query(func.sum(_net)).filter(
-                _ts >= cutoff,
-                ShopifyOrder.financial_status.in_(['paid', 'partially_refunded'])
-            ).scalar()
-            metrics['revenue'] = float(revenue_result) if revenue_result else 0
+        # 1. Revenue from Shopify orders — net sales basis
+        revenue = hourly['net_revenue']
+        metrics['revenue'] = revenue / days if revenue > 0 else 0
 
-            # 2. Traffic from GA4 daily totals (last 24h)
-            # Use only (all)/(all) rows to avoid double-counting with per-channel aggregates
-            traffic_result = db.query(
-                func.sum(GA4TrafficSource.sessions).label('sessions')
-            ).filter(
-                GA4TrafficSource.date >= cutoff_date,
-                GA4TrafficSource.session_source == '(all)',
-                GA4TrafficSource.session_medium == '(all)'
-            ).scalar()
-            sessions = traffic_result or 0
-            metrics['traffic'] = int(sessions)
+        # 2. Traffic from GA4 daily totals ((all)/(all) rows only)
+        sessions = daily['sessions']
+        metrics['traffic'] = int(sessions / days) if sessions > 0 else 0
 
-            # Conversions: Use Shopify orders as source of truth
-            # This ensures apples-to-apples comparison with baseline (which also uses orders)
-            current_orders = db.query(func.count(ShopifyOrder.id)).filter(
-                _ts >= cutoff,
-                ShopifyOrder.financial_status.in_(['paid', 'partially_refunded'])
-            ).scalar() or 0
-            metrics['conversion_rate'] = (current_orders / sessions * 100) if sessions > 0 else 0
+        # Conversions: Shopify orders are the source of truth
+        metrics['conversion_rate'] = (hourly['orders'] / sessions * 100) if sessions > 0 else 0
 
-            # 3. ROAS from Google Ads (last 24h)
-            ads_result = db.query(
-                func.sum(GoogleAdsCampaign.conversions_value).label('revenue'),
-                func.sum(GoogleAdsCampaign.cost_micros).label('cost_micros')
-            ).filter(
-                GoogleAdsCampaign.date >= cutoff_date,
-                GoogleAdsCampaign.campaign_status == 'ENABLED'
-            ).first()
+        # 3. ROAS from enabled Google Ads campaigns
+        ad_cost = daily['ads_cost_micros'] / 1_000_000
+        metrics['roas'] = (daily['ads_conversions_value'] / ad_cost) if ad_cost > 0 else 0
 
-            ad_revenue = ads_result.revenue or 0
-            ad_cost_micros = ads_result.cost_micros or 0
-            ad_cost = ad_cost_micros / 1_000_000 if ad_cost_micros else 0
-            metrics['roas'] = (ad_revenue / ad_cost) if ad_cost > 0 else 0
+        # 4. Cart abandonment: unrecovered checkouts vs completed orders
+        abandoned_count = hourly['abandoned_checkouts']
+        total_checkouts = abandoned_count + hourly['orders_created']
+        metrics['cart_abandonment'] = (abandoned_count / total_checkouts) if total_checkouts > 0 else 0
 
-            # 4. Cart abandonment rate (last 24h)
-            # Count abandoned checkouts vs completed orders
-            abandoned_count = db.query(func.count(AbandonedCheckout.id)).filter(
-                AbandonedCheckout.created_at >= cutoff,
-                AbandonedCheckout.recovered == False
-            ).scalar() or 0
+        # 5. Average open rate of sent Klaviyo campaigns
+        campaigns = hourly['email_campaigns']
+        metrics['email_open_rate'] = (hourly['email_open_rate_sum'] / campaigns) if campaigns else 0
 
-            completed_count = db.query(func.count(ShopifyOrder.id)).filter(
-                ShopifyOrder.created_at >= cutoff,
-                ShopifyOrder.financial_status.in_(['paid', 'partially_refunded'])
-            ).scalar() or 0
+        return metrics
 
-            total_checkouts = abandoned_count + completed_count
-            metrics['cart_abandonment'] = (abandoned_count / total_checkouts) if total_checkouts > 0 else 0
+    async def _get_current_metrics(self) -> Dict:
+        """
+        Get current metric values (last 24 hours) from the hourly KPI store.
 
-            # 5. Email open rate from Klaviyo (campaigns sent in last 24h)
-            email_result = db.query(
-                func.avg(KlaviyoCampaign.open_rate)
-            ).filter(
-                KlaviyoCampaign.send_time >= cutoff,
-                KlaviyoCampaign.status == 'sent',
-                KlaviyoCampaign.recipients > 0
-            ).scalar()
-            metrics['email_open_rate'] = float(email_result) if email_result else 0
+        Returns dict with keys: revenue, conversion_rate, roas, traffic,
+        cart_abandonment, email_open_rate
+        """
+        db = SessionLocal()
+        try:
+            store = KpiTimeSeriesService(db)
+            store.ensure_fresh()
+
+            cutoff = datetime.utcnow() - timedelta(hours=24)
+            metrics = self._kpis_from_store(
+                store,
+                start=floor_hour(cutoff),
+                end=None,
+                day_start=datetime.combine(cutoff.date(), time.min),
+                day_end=None,
+            )
 
             log.debug(f"Current metrics (24h): {metrics}")
             return metrics
@@ -910,90 +942,21 @@ Estimated additional revenue: $150-500/day if paid performs at 50% of organic co
         """
         db = SessionLocal()
         try:
+            store = KpiTimeSeriesService(db)
+            store.ensure_fresh()
+
             # 7 days ago to 24 hours ago (excludes current period)
             end_cutoff = datetime.utcnow() - timedelta(hours=24)
             start_cutoff = datetime.utcnow() - timedelta(days=7)
-            start_date = start_cutoff.date()
-            end_date = end_cutoff.date()
-            metrics = {}
-
-            # 1. Average daily revenue from Shopify orders — net sales basis
-            _ts = func.coalesce(ShopifyOrder.processed_at, ShopifyOrder.created_at)
-            _net = func.coalesce(ShopifyOrder.current_subtotal_price, ShopifyOrder.subtotal_price)
-            revenue_result = db.query(func.sum(_net)).filter(
-                _ts >= start_cutoff,
-                _ts < end_cutoff,
-                ShopifyOrder.financial_status.in_(['paid', 'partially_refunded'])
-            ).scalar()
-            # Convert to daily average (divide by 6 days since we exclude last 24h)
-            total_revenue = float(revenue_result) if revenue_result else 0
-            metrics['revenue'] = total_revenue / 6 if total_revenue > 0 else 0
-
-            # 2. Average daily traffic from GA4 daily totals
-            # Use only (all)/(all) rows to avoid double-counting
-            traffic_result = db.query(
-                func.sum(GA4TrafficSource.sessions).label('sessions')
-            ).filter(
-                GA4TrafficSource.date >= start_date,
-                GA4TrafficSource.date < end_date,
-                GA4TrafficSource.session_source == '(all)',
-                GA4TrafficSource.session_medium == '(all)'
-            ).scalar()
-            sessions = traffic_result or 0
-            # Daily average traffic
-            metrics['traffic'] = int(sessions / 6) if sessions > 0 else 0
-
-            # Conversions: Use Shopify orders as source of truth for historical conversions
-            # GA4 aggregated rows only have conversion data for today, so we use
-            # actual order counts which are reliable across the historical period
-            baseline_orders = db.query(func.count(ShopifyOrder.id)).filter(
-                _ts >= start_cutoff,
-                _ts < end_cutoff,
-                ShopifyOrder.financial_status.in_(['paid', 'partially_refunded'])
-            ).scalar() or 0
-            metrics['conversion_rate'] = (baseline_orders / sessions * 100) if sessions > 0 else 0
-
-            # 3. Average ROAS from Google Ads
-            ads_result = db.query(
-                func.sum(GoogleAdsCampaign.conversions_value).label('revenue'),
-                func.sum(GoogleAdsCampaign.cost_micros).label('cost_micros')
-            ).filter(
-                GoogleAdsCampaign.date >= start_date,
-                GoogleAdsCampaign.date < end_date,
-                GoogleAdsCampaign.campaign_status == 'ENABLED'
-            ).first()
-
-            ad_revenue = ads_result.revenue or 0
-            ad_cost_micros = ads_result.cost_micros or 0
-            ad_cost = ad_cost_micros / 1_000_000 if ad_cost_micros else 0
-            metrics['roas'] = (ad_revenue / ad_cost) if ad_cost > 0 else 0
-
-            # 4. Average cart abandonment rate
-            abandoned_count = db.query(func.count(AbandonedCheckout.id)).filter(
-                AbandonedCheckout.created_at >= start_cutoff,
-                AbandonedCheckout.created_at < end_cutoff,
-                AbandonedCheckout.recovered == False
-            ).scalar() or 0
-
-            completed_count = db.query(func.count(ShopifyOrder.id)).filter(
-                ShopifyOrder.created_at >= start_cutoff,
-                ShopifyOrder.created_at < end_cutoff,
-                ShopifyOrder.financial_status.in_(['paid', 'partially_refunded'])
-            ).scalar() or 0
-
-            total_checkouts = abandoned_count + completed_count
-            metrics['cart_abandonment'] = (abandoned_count / total_checkouts) if total_checkouts > 0 else 0
-
-            # 5. Average email open rate from Klaviyo
-            email_result = db.query(
-                func.avg(KlaviyoCampaign.open_rate)
-            ).filter(
-                KlaviyoCampaign.send_time >= start_cutoff,
-                KlaviyoCampaign.send_time < end_cutoff,
-                KlaviyoCampaign.status == 'sent',
-                KlaviyoCampaign.recipients > 0
-            ).scalar()
-            metrics['email_open_rate'] = float(email_result) if email_result else 0
+            # Daily averages: divide by 6 days since we exclude the last 24h
+            metrics = self._kpis_from_store(
+                store,
+                start=floor_hour(start_cutoff),
+                end=floor_hour(end_cutoff),
+                day_start=datetime.combine(start_cutoff.date(), time.min),
+                day_end=datetime.combine(end_cutoff.date(), time.min),
+                days=6,
+            )
 
             log.debug(f"Baseline metrics (7-day avg): {metrics}")
             return metrics
@@ -1024,11 +987,11 @@ Estimated additional revenue: $150-500/day if paid performs at 50% of organic co
             cutoff_date = (datetime.utcnow() - timedelta(hours=24)).date()
 
             # Find ENABLED campaigns with 0 impressions (possible disapproval)
-            problematic_campaigns = db.query(func.count(GoogleAdsCampaign.id)).filter(
-                GoogleAdsCampaign.date >= cutoff_date,
-                GoogleAdsCampaign.campaign_status == 'ENABLED',
-                GoogleAdsCampaign.impressions == 0
-            ).scalar() or 0
+            store = KpiTimeSeriesService(db)
+            store.ensure_fresh()
+            problematic_campaigns = int(store.window_sums(
+                ['ads_zero_impression_rows'], datetime.combine(cutoff_date, time.min)
+            )['ads_zero_impression_rows'])
 
             if problematic_campaigns > 0:
                 log.warning(f"Found {problematic_campaigns} enabled campaigns with 0 impressions")
@@ -1043,177 +1006,78 @@ Estimated additional revenue: $150-500/day if paid performs at 50% of organic co
 
     async def _get_metric_trend(self, metric: str, days: int) -> List[Dict]:
         """
-        Get metric trend over time (daily values).
+        Get metric trend over time (daily values) from the hourly KPI store.
 
         Returns list of {date, value} dicts for the specified metric.
         """
         db = SessionLocal()
         try:
-            end_date = datetime.utcnow()
-            start_date = end_date - timedelta(days=days)
-            trend = []
+            store = KpiTimeSeriesService(db)
+            store.ensure_fresh()
+            start = floor_hour(datetime.utcnow() - timedelta(days=days))
+
+            def _series(*names):
+                values = store.daily_values(names, start)
+                return [values[n] for n in names]
+
+            def _points(by_day, fmt=lambda v: v):
+                return [{'date': d.isoformat(), 'value': fmt(by_day[d])} for d in sorted(by_day)]
 
             if metric == 'traffic':
-                # Daily traffic from GA4
-                results = db.query(
-                    GA4TrafficSource.date,
-                    func.sum(GA4TrafficSource.sessions).label('value')
-                ).filter(
-                    GA4TrafficSource.date >= start_date.date(),
-                    GA4TrafficSource.session_source == '(all)',
-                    GA4TrafficSource.session_medium == '(all)'
-                ).group_by(GA4TrafficSource.date).order_by(GA4TrafficSource.date).all()
-
-                for row in results:
-                    trend.append({'date': row.date.isoformat(), 'value': row.value or 0})
-
-            elif metric == 'revenue':
-                # Daily revenue from Shopify orders
-                # Use current_total_price (post-refund) with fallback to total_price for old records
-                from sqlalchemy import cast, Date, func as sqla_func
-                results = db.query(
-                    cast(ShopifyOrder.created_at, Date).label('date'),
-                    func.sum(
-                        sqla_func.coalesce(ShopifyOrder.current_total_price, ShopifyOrder.total_price)
-                    ).label('value')
-                ).filter(
-                    ShopifyOrder.created_at >= start_date,
-                    ShopifyOrder.financial_status.in_(['paid', 'partially_refunded'])
-                ).group_by(cast(ShopifyOrder.created_at, Date)).order_by(cast(ShopifyOrder.created_at, Date)).all()
-
-                for row in results:
-                    trend.append({'date': row.date.isoformat(), 'value': float(row.value or 0)})
-
-            elif metric == 'conversion_rate':
-                # Need both sessions and orders per day
-                from sqlalchemy import cast, Date
-
-                # Get daily sessions
-                sessions_by_day = {}
-                session_results = db.query(
-                    GA4TrafficSource.date,
-                    func.sum(GA4TrafficSource.sessions).label('sessions')
-                ).filter(
-                    GA4TrafficSource.date >= start_date.date(),
-                    GA4TrafficSource.session_source == '(all)',
-                    GA4TrafficSource.session_medium == '(all)'
-                ).group_by(GA4TrafficSource.date).all()
-
-                for row in session_results:
-                    sessions_by_day[row.date] = row.sessions or 0
-
-                # Get daily orders
-                order_results = db.query(
-                    cast(ShopifyOrder.created_at, Date).label('date'),
-                    func.count(ShopifyOrder.id).label('orders')
-                ).filter(
-                    ShopifyOrder.created_at >= start_date,
-                    ShopifyOrder.financial_status.in_(['paid', 'partially_refunded'])
-                ).group_by(cast(ShopifyOrder.created_at, Date)).all()
-
-                for row in order_results:
-                    sessions = sessions_by_day.get(row.date, 0)
-                    rate = (row.orders / sessions * 100) if sessions > 0 else 0
-                    trend.append({'date': row.date.isoformat(), 'value': round(rate, 2)})
-
-            elif metric in ['avg_order_value', 'aov']:
-                # Average order value per day
-                # Use current_total_price (post-refund) with fallback to total_price for old records
-                from sqlalchemy import cast, Date, func as sqla_func
-                results = db.query(
-                    cast(ShopifyOrder.created_at, Date).label('date'),
-                    func.avg(
-                        sqla_func.coalesce(ShopifyOrder.current_total_price, ShopifyOrder.total_price)
-                    ).label('value')
-                ).filter(
-                    ShopifyOrder.created_at >= start_date,
-                    ShopifyOrder.financial_status.in_(['paid', 'partially_refunded'])
-                ).group_by(cast(ShopifyOrder.created_at, Date)).order_by(cast(ShopifyOrder.created_at, Date)).all()
-
-                for row in results:
-                    trend.append({'date': row.date.isoformat(), 'value': float(row.value or 0)})
-
-            elif metric in ['organic_traffic', 'paid_traffic', 'social_traffic']:
-                # Traffic by medium type
-                medium_map = {
-                    'organic_traffic': 'organic',
-                    'paid_traffic': 'cpc',
-                    'social_traffic': 'social'
-                }
-                target_medium = medium_map.get(metric, 'organic')
-
-                results = db.query(
-                    GA4TrafficSource.date,
-                    func.sum(GA4TrafficSource.sessions).label('value')
-                ).filter(
-                    GA4TrafficSource.date >= start_date.date(),
-                    GA4TrafficSource.session_medium == target_medium
-                ).group_by(GA4TrafficSource.date).order_by(GA4TrafficSource.date).all()
-
-                for row in results:
-                    trend.append({'date': row.date.isoformat(), 'value': row.value or 0})
-
-            elif metric == 'checkout_abandonment':
-                # Daily checkout abandonment rate
-                from sqlalchemy import cast, Date
-
-                # Get daily abandoned checkouts
-                abandoned = db.query(
-                    cast(AbandonedCheckout.created_at, Date).label('date'),
-                    func.count(AbandonedCheckout.id).label('abandoned')
-                ).filter(
-                    AbandonedCheckout.created_at >= start_date,
-                    AbandonedCheckout.recovered == False
-                ).group_by(cast(AbandonedCheckout.created_at, Date)).all()
-
-                # Get daily completed orders
-                completed = db.query(
-                    cast(ShopifyOrder.created_at, Date).label('date'),
-                    func.count(ShopifyOrder.id).label('completed')
-                ).filter(
-                    ShopifyOrder.created_at >= start_date,
-                    ShopifyOrder.financial_status.in_(['paid', 'partially_refunded'])
-                ).group_by(cast(ShopifyOrder.created_at, Date)).all()
-
-                completed_by_day = {row.date: row.completed for row in completed}
-
-                for row in abandoned:
-                    total = row.abandoned + completed_by_day.get(row.date, 0)
-                    rate = (row.abandoned / total * 100) if total > 0 else 0
-                    trend.append({'date': row.date.isoformat(), 'value': round(rate, 1)})
-
-            elif metric == 'ctr':
-                # Daily CTR from Google Ads
-                results = db.query(
-                    GoogleAdsCampaign.date,
-                    func.sum(GoogleAdsCampaign.clicks).label('clicks'),
-                    func.sum(GoogleAdsCampaign.impressions).label('impressions')
-                ).filter(
-                    GoogleAdsCampaign.date >= start_date.date(),
-                    GoogleAdsCampaign.campaign_status == 'ENABLED'
-                ).group_by(GoogleAdsCampaign.date).order_by(GoogleAdsCampaign.date).all()
-
-                for row in results:
-                    ctr = (row.clicks / row.impressions * 100) if row.impressions > 0 else 0
-                    trend.append({'date': row.date.isoformat(), 'value': round(ctr, 2)})
-
-            elif metric == 'cpc':
-                # Daily CPC from Google Ads
-                results = db.query(
-                    GoogleAdsCampaign.date,
-                    func.sum(GoogleAdsCampaign.clicks).label('clicks'),
-                    func.sum(GoogleAdsCampaign.cost_micros).label('cost_micros')
-                ).filter(
-                    GoogleAdsCampaign.date >= start_date.date(),
-                    GoogleAdsCampaign.campaign_status == 'ENABLED'
-                ).group_by(GoogleAdsCampaign.date).order_by(GoogleAdsCampaign.date).all()
-
-                for row in results:
-                    cost = (row.cost_micros or 0) / 1_000_000
-                    cpc = (cost / row.clicks) if row.clicks > 0 else 0
-                    trend.append({'date': row.date.isoformat(), 'value': round(cpc, 2)})
-
-            return trend
+                sessions, = _series('sessions')
+                return _points(sessions, int)
+
+            if metric == 'revenue':
+                # Post-refund order totals by order creation date
+                revenue, = _series('gross_revenue')
+                return _points(revenue)
+
+            if metric == 'conversion_rate':
+                sessions, orders = _series('sessions', 'orders_created')
+                return [
+                    {'date': d.isoformat(),
+                     'value': round(orders[d] / sessions[d] * 100, 2) if sessions.get(d) else 0}
+                    for d in sorted(orders)
+                ]
+
+            if metric in ['avg_order_value', 'aov']:
+                revenue, orders = _series('gross_revenue', 'orders_created')
+                return [
+                    {'date': d.isoformat(), 'value': revenue.get(d, 0) / orders[d]}
+                    for d in sorted(orders)
+                ]
+
+            if metric in ['organic_traffic', 'paid_traffic', 'social_traffic']:
+                key = metric.replace('_traffic', '_sessions')
+                sessions, = _series(key)
+                return _points(sessions, int)
+
+            if metric == 'checkout_abandonment':
+                abandoned, completed = _series('abandoned_checkouts', 'orders_created')
+                trend = []
+                for d in sorted(abandoned):
+                    total = abandoned[d] + completed.get(d, 0)
+                    rate = (abandoned[d] / total * 100) if total > 0 else 0
+                    trend.append({'date': d.isoformat(), 'value': round(rate, 1)})
+                return trend
+
+            if metric == 'ctr':
+                clicks, impressions = _series('ads_clicks', 'ads_impressions')
+                return [
+                    {'date': d.isoformat(),
+                     'value': round(clicks.get(d, 0) / impressions[d] * 100, 2) if impressions.get(d) else 0}
+                    for d in sorted(set(clicks) | set(impressions))
+                ]
+
+            if metric == 'cpc':
+                clicks, cost_micros = _series('ads_clicks', 'ads_cost_micros')
+                return [
+                    {'date': d.isoformat(),
+                     'value': round(cost_micros.get(d, 0) / 1_000_000 / clicks[d], 2) if clicks.get(d) else 0}
+                    for d in sorted(set(clicks) | set(cost_micros))
+                ]
+
+            return []
 
         except Exception as e:
             log.error(f"Error getting metric trend for {metric}: {e}")
@@ -1229,47 +1093,12 @@ Estimated additional revenue: $150-500/day if paid performs at 50% of organic co
         """
         db = SessionLocal()
         try:
-            now = datetime.utcnow()
-            current_start = now - timedelta(days=7)
-            previous_start = now - timedelta(days=14)
-
-            # Helper to extract product sales from line_items JSON
-            # Since line_items is stored as JSON, we need to process in Python
-            current_orders = db.query(ShopifyOrder.line_items).filter(
-                ShopifyOrder.created_at >= current_start,
-                ShopifyOrder.financial_status.in_(['paid', 'partially_refunded'])
-            ).all()
+            today = datetime.utcnow().date()
+            rollup = self._product_sales_rollup(db)
 
-            previous_orders = db.query(ShopifyOrder.line_items).filter(
-                ShopifyOrder.created_at >= previous_start,
-                ShopifyOrder.created_at < current_start,
-                ShopifyOrder.financial_status.in_(['paid', 'partially_refunded'])
-            ).all()
-
-            # Aggregate sales by product
-            def aggregate_products(orders):
-                products = {}
-                for (line_items,) in orders:
-                    if not line_items:
-                        continue
-                    for item in line_items:
-                        product_id = str(item.get('product_id', 'unknown'))
-                        title = item.get('title', 'Unknown Product')
-                        quantity = item.get('quantity', 0)
-                        price = float(item.get('price', 0))
-
-                        if product_id not in products:
-                            products[product_id] = {
-                                'title': title,
-                                'units': 0,
-                                'revenue': 0
-                            }
-                        products[product_id]['units'] += quantity
-                        products[product_id]['revenue'] += quantity * price
-                return products
-
-            current_products = aggregate_products(current_orders)
-            previous_products = aggregate_products(previous_orders)
+            # Last 7 days (incl. today) vs the 7 days before, from the daily rollup
+            current_products = rollup.get_product_sales(today - timedelta(days=6), today)
+            previous_products = rollup.get_product_sales(today - timedelta(days=13), today - timedelta(days=7))
 
             # Calculate changes for top current products
             changes = {}
@@ -1937,49 +1766,18 @@ Estimated additional revenue: $150-500/day if paid performs at 50% of organic co
         """
         db = SessionLocal()
         try:
-            now = datetime.utcnow()
-            current_start = now - timedelta(days=3)  # Last 3 days
-            baseline_start = now - timedelta(days=10)  # 7 days before that
-
-            # Get current period sales by product (from line items)
-            current_orders = db.query(ShopifyOrder.line_items).filter(
-                ShopifyOrder.created_at >= current_start,
-                ShopifyOrder.financial_status.in_(['paid', 'partially_refunded'])
-            ).all()
+            today = datetime.utcnow().date()
+            rollup = self._product_sales_rollup(db)
 
-            # Get baseline period sales
-            baseline_orders = db.query(ShopifyOrder.line_items).filter(
-                ShopifyOrder.created_at >= baseline_start,
-                ShopifyOrder.created_at < current_start,
-                ShopifyOrder.financial_status.in_(['paid', 'partially_refunded'])
-            ).all()
+            # Last 3 days vs the 7 days before that
+            current_products = rollup.get_product_sales(today - timedelta(days=2), today)
+            baseline_products = rollup.get_product_sales(today - timedelta(days=9), today - timedelta(days=3))
 
-            # Aggregate by product
-            def aggregate_sales(orders, days):
-                products = {}
-                for (line_items,) in orders:
-                    if not line_items:
-                        continue
-                    for item in line_items:
-                        product_id = str(item.get('product_id', 'unknown'))
-                        title = item.get('title', 'Unknown')
-                        quantity = item.get('quantity', 0)
-                        price = float(item.get('price', 0))
-
-                        if product_id not in products:
-                            products[product_id] = {'title': title, 'units': 0, 'revenue': 0}
-                        products[product_id]['units'] += quantity
-                        products[product_id]['revenue'] += quantity * price
-
-                # Normalize to daily rate
-                for pid in products:
-                    products[pid]['daily_units'] = products[pid]['units'] / days
-                    products[pid]['daily_revenue'] = products[pid]['revenue'] / days
-
-                return products
-
-            current_products = aggregate_sales(current_orders, 3)
-            baseline_products = aggregate_sales(baseline_orders, 7)
+            # Normalize to daily rate
+            for products, days in ((current_products, 3), (baseline_products, 7)):
+                for data in products.values():
+                    data['daily_units'] = data['units'] / days
+                    data['daily_revenue'] = data['revenue'] / days
 
             # Find breakouts: products with 2x+ velocity increase
             breakouts = []
@@ -2014,6 +1812,21 @@ Estimated additional revenue: $150-500/day if paid performs at 50% of organic co
         finally:
             db.close()
 
+    def _product_sales_rollup(self, db) -> ProductSalesRollupService:
+        """
+        Rollup service with today/yesterday recomputed at most once per
+        refresh interval, so orders written by any path (sync, scripts)
+        show up without rescanning history.
+        """
+        rollup = ProductSalesRollupService(db)
+        now = datetime.utcnow()
+        if (self._product_sales_refreshed_at is None
+                or now - self._product_sales_refreshed_at > self._product_sales_refresh_interval):
+            if not rollup.ensure_built():
+                rollup.refresh(now.date() - timedelta(days=1), now.date())
+            self._product_sales_refreshed_at = now
+        return rollup
+
     async def _find_top_performing_campaigns(self) -> Optional[Dict]:
         """
         Find campaigns with exceptional ROAS (>5x) that could be scaled.
@@ -0,0 +1,147 @@
+"""
+Product Sales Rollup Service
+
+Maintains shopify_product_sales_daily, a per-day product sales rollup of the
+normalized shopify_order_items table. Monitoring checks (top-product change,
+breakout products) and other product-velocity readers aggregate a few
+hundred rollup rows per window instead of deserializing line_items JSON for
+every order on every tick.
+
+Refreshed for the touched order dates after each Shopify order save; any
+window can be re-aggregated from the daily rows.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func, literal
+from sqlalchemy.orm import Session
+
+from app.models.shopify import ShopifyOrderItem, ShopifyProductSalesDaily
+from app.services.sales_fact_service import date_runs
+from app.services.search_console_rollup_service import GRAIN_MONTH, period_bounds
+from app.utils.logger import log
+
+
+# Statuses monitoring treats as realised sales
+SOLD_FINANCIAL_STATUSES = ('paid', 'partially_refunded')
+
+
+class ProductSalesRollupService:
+    """Builds and incrementally refreshes the per-day product sales rollup"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refresh(self, start_date: date, end_date: date) -> Dict:
+        """Recompute rollup rows for every day in [start_date, end_date]."""
+        started = datetime.utcnow()
+        day = func.date(ShopifyOrderItem.order_date)
+
+        try:
+            self.db.query(ShopifyProductSalesDaily).filter(
+                ShopifyProductSalesDaily.date >= start_date,
+                ShopifyProductSalesDaily.date <= end_date,
+            ).delete(synchronize_session=False)
+
+            source = self.db.query(
+                day,
+                ShopifyOrderItem.shopify_product_id,
+                ShopifyOrderItem.financial_status,
+                func.max(ShopifyOrderItem.title),
+                func.coalesce(func.sum(ShopifyOrderItem.quantity), 0),
+                func.coalesce(func.sum(ShopifyOrderItem.total_price), 0),
+                func.coalesce(func.sum(ShopifyOrderItem.total_discount), 0),
+                func.count(func.distinct(ShopifyOrderItem.shopify_order_id)),
+                literal(datetime.utcnow()),
+            ).filter(
+                ShopifyOrderItem.order_date >= datetime.combine(start_date, datetime.min.time()),
+                ShopifyOrderItem.order_date < datetime.combine(end_date + timedelta(days=1), datetime.min.time()),
+            ).group_by(
+                day, ShopifyOrderItem.shopify_product_id, ShopifyOrderItem.financial_status
+            )
+
+            stmt = ShopifyProductSalesDaily.__table__.insert().from_select(
+                ["date", "shopify_product_id", "financial_status", "title", "units",
+                 "gross_revenue", "discounts", "order_count", "refreshed_at"],
+                source,
+            )
+            rows = self.db.execute(stmt).rowcount or 0
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        duration = round((datetime.utcnow() - started).total_seconds(), 2)
+        log.info(f"Product sales rollup refreshed {start_date} to {end_date}: {rows} rows in {duration}s")
+        return {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "rows": rows,
+            "duration_seconds": duration,
+        }
+
+    def refresh_dates(self, dates: Iterable[date]) -> Optional[Dict]:
+        """Refresh each contiguous run of touched order dates."""
+        runs = date_runs(dates)
+        if not runs:
+            return None
+        rows = 0
+        for run_start, run_end in runs:
+            rows += self.refresh(run_start, run_end)["rows"]
+        return {"runs": len(runs), "rows": rows}
+
+    def rebuild(self) -> Dict:
+        """Rebuild from the full order-item history, one month at a time."""
+        bounds = self.db.query(
+            func.min(ShopifyOrderItem.order_date), func.max(ShopifyOrderItem.order_date)
+        ).first()
+        if not bounds or not bounds[0]:
+            return {"months_rebuilt": 0}
+        start_date, end_date = bounds[0].date(), bounds[1].date()
+        months = 0
+        for ms, me in period_bounds(GRAIN_MONTH, start_date, end_date):
+            self.refresh(max(ms, start_date), min(me, end_date))
+            months += 1
+        return {"months_rebuilt": months}
+
+    def ensure_built(self) -> bool:
+        """Run a full rebuild if the rollup has never been populated."""
+        if self.db.query(ShopifyProductSalesDaily.id).first() is not None:
+            return False
+        if self.db.query(ShopifyOrderItem.id).first() is None:
+            return False
+        log.info("Product sales rollup empty — running full rebuild")
+        self.rebuild()
+        return True
+
+    def get_product_sales(
+        self,
+        start_date: date,
+        end_date: date,
+        financial_statuses: Iterable[str] = SOLD_FINANCIAL_STATUSES,
+    ) -> Dict[str, Dict]:
+        """
+        Units and gross revenue per product over [start_date, end_date].
+
+        Keyed by str(product_id) ('unknown' for items without one).
+        """
+        R = ShopifyProductSalesDaily
+        rows = self.db.query(
+            R.shopify_product_id,
+            func.max(R.title).label("title"),
+            func.sum(R.units).label("units"),
+            func.sum(R.gross_revenue).label("revenue"),
+        ).filter(
+            R.date >= start_date,
+            R.date <= end_date,
+            R.financial_status.in_(list(financial_statuses)),
+        ).group_by(R.shopify_product_id).all()
+
+        return {
+            str(row.shopify_product_id) if row.shopify_product_id is not None else "unknown": {
+                "title": row.title or "Unknown Product",
+                "units": int(row.units or 0),
+                "revenue": float(row.revenue or 0),
+            }
+            for row in rows
+        }
@@ -0,0 +1,164 @@
+"""
+Search Query Classifier
+
+Shared brand / spam classification for Search Console queries.
+
+Brand terms and spam fragments are compiled into one alternation regex each,
+so a query is classified in a single scan instead of a Python loop per term.
+classify_series() runs the same patterns vectorized over a pandas Series for
+bulk (re)classification.
+
+Classes are persisted on search_console_queries.query_class (and the rollup
+tables) at ingestion time so brand / non-brand filters are indexed SQL
+predicates. Readers exclude classes with excluding_classes(), which keeps
+rows not yet classified (NULL) so every report treats them the same way.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.utils.logger import log
+
+
+QUERY_CLASS_BRAND = "brand"
+QUERY_CLASS_SPAM = "spam"
+QUERY_CLASS_NON_BRAND = "non_brand"
+
+DEFAULT_SPAM_FRAGMENTS = [
+    "slot", "casino", "bet", "poker", "porn", "xxx", "adult", "escort",
+    "apk", "download", "login", "free", "bonus", "crypto", "forex"
+]
+# URL-ish queries and emoji bait are spam regardless of configured fragments
+_SPAM_MARKERS = ["http", ".com", ".net", ".xyz", "🔥", "💰", "🤑"]
+
+
+def _compile(terms: Iterable[str]) -> Optional[re.Pattern]:
+    # Longest-first so overlapping terms ("cass brothers" vs "cass") match greedily
+    cleaned = sorted({t.lower() for t in terms if t}, key=len, reverse=True)
+    if not cleaned:
+        return None
+    return re.compile("|".join(re.escape(t) for t in cleaned))
+
+
+class QueryClassifier:
+    """Compiled brand / spam matcher (substring semantics, case-insensitive)"""
+
+    def __init__(self, brand_terms: Iterable[str], spam_fragments: Optional[Iterable[str]] = None):
+        self.brand_terms = [t.strip().lower() for t in brand_terms if t and t.strip()]
+        fragments = DEFAULT_SPAM_FRAGMENTS if spam_fragments is None else list(spam_fragments)
+        self.spam_fragments = [f.lower() for f in fragments if f]
+        self._brand_re = _compile(self.brand_terms)
+        self._spam_re = _compile(self.spam_fragments + _SPAM_MARKERS)
+
+    def is_brand(self, query: str) -> bool:
+        if not query or self._brand_re is None:
+            return False
+        return self._brand_re.search(query.lower()) is not None
+
+    def is_spam(self, query: str) -> bool:
+        if not query or self._spam_re is None:
+            return False
+        return self._spam_re.search(query.lower()) is not None
+
+    def classify(self, query: str) -> str:
+        """Brand wins over spam so brand-only reports keep every brand query."""
+        if self.is_brand(query):
+            return QUERY_CLASS_BRAND
+        if self.is_spam(query):
+            return QUERY_CLASS_SPAM
+        return QUERY_CLASS_NON_BRAND
+
+    def classify_series(self, queries: pd.Series) -> pd.Series:
+        """Vectorized classify() over a Series of query strings."""
+        lowered = queries.fillna("").astype(str).str.lower()
+        brand = (
+            lowered.str.contains(self._brand_re.pattern, regex=True)
+            if self._brand_re is not None else pd.Series(False, index=lowered.index)
+        )
+        spam = (
+            lowered.str.contains(self._spam_re.pattern, regex=True)
+            if self._spam_re is not None else pd.Series(False, index=lowered.index)
+        )
+        classes = np.select(
+            [brand.to_numpy(), spam.to_numpy()],
+            [QUERY_CLASS_BRAND, QUERY_CLASS_SPAM],
+            default=QUERY_CLASS_NON_BRAND,
+        )
+        return pd.Series(classes, index=queries.index)
+
+
+def parse_brand_terms(raw) -> List[str]:
+    """Normalise the GSC_BRAND_TERMS setting (comma string or list)."""
+    if not raw:
+        return []
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    return [t.strip().lower() for t in raw if t and t.strip()]
+
+
+def excluding_classes(column, *classes: str):
+    """
+    SQL predicate: query_class not in `classes`, keeping unclassified (NULL)
+    rows, e.g. excluding_classes(Model.query_class, QUERY_CLASS_BRAND).
+    """
+    return or_(column.is_(None), column.notin_(classes))
+
+
+@lru_cache(maxsize=1)
+def get_query_classifier() -> QueryClassifier:
+    """Process-wide classifier built from settings."""
+    settings = get_settings()
+    return QueryClassifier(parse_brand_terms(getattr(settings, "gsc_brand_terms", "")))
+
+
+def backfill_query_classes(
+    db: Session,
+    classifier: Optional[QueryClassifier] = None,
+    only_missing: bool = True,
+    chunk_size: int = 500,
+) -> Dict[str, int]:
+    """
+    Classify distinct queries in bulk and write query_class back to the raw
+    and rollup tables.
+
+    only_missing=True touches rows ingested before classification existed;
+    pass False after changing GSC_BRAND_TERMS to reclassify everything.
+    """
+    from app.models.search_console_data import (
+        SearchConsoleQuery, SearchConsoleQueryDaily, SearchConsoleQueryPageRollup
+    )
+
+    classifier = classifier or get_query_classifier()
+    distinct = db.query(SearchConsoleQuery.query).distinct()
+    if only_missing:
+        distinct = distinct.filter(SearchConsoleQuery.query_class.is_(None))
+    queries = pd.Series([row[0] for row in distinct.all()], dtype=object)
+
+    counts = {QUERY_CLASS_BRAND: 0, QUERY_CLASS_SPAM: 0, QUERY_CLASS_NON_BRAND: 0}
+    if queries.empty:
+        return counts
+
+    classes = classifier.classify_series(queries)
+    for query_class, group in queries.groupby(classes):
+        values = group.tolist()
+        counts[query_class] = len(values)
+        for i in range(0, len(values), chunk_size):
+            chunk = values[i:i + chunk_size]
+            for model in (SearchConsoleQuery, SearchConsoleQueryDaily, SearchConsoleQueryPageRollup):
+                db.query(model).filter(model.query.in_(chunk)).update(
+                    {model.query_class: query_class}, synchronize_session=False
+                )
+    db.commit()
+
+    log.info(
+        f"Classified {len(queries)} Search Console queries: "
+        f"{counts[QUERY_CLASS_BRAND]} brand, {counts[QUERY_CLASS_SPAM]} spam, "
+        f"{counts[QUERY_CLASS_NON_BRAND]} non-brand"
+    )
+    return counts
@@ -0,0 +1,180 @@
+"""
+Refund Rollup Service
+
+Keeps shopify_order_items.refunded_quantity / refunded_amount in step with
+shopify_refund_line_items. Every sales reader used to re-derive these by
+grouping the entire refund history by line_item_id and joining it back to
+the order items; the materialized columns turn that into a plain column read.
+
+Maintained by the Shopify refund save (refunded line items) and order save
+(re-created line items). verify() compares the columns with the raw refund
+table and optionally repairs drift; it runs nightly from the scheduler.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.shopify import ShopifyOrderItem, ShopifyRefundLineItem
+from app.services.sales_fact_service import SalesFactService
+from app.utils.logger import log
+
+
+CHUNK_SIZE = 500
+REBUILD_ID_STEP = 50000
+AMOUNT_TOLERANCE = 0.005
+
+
+def _refund_totals():
+    """Correlated (quantity, amount) scalar subqueries for the outer order item."""
+    R = ShopifyRefundLineItem
+    match = R.line_item_id == ShopifyOrderItem.line_item_id
+    qty = select(func.coalesce(func.sum(R.quantity), 0)).where(match).scalar_subquery()
+    amount = select(func.coalesce(func.sum(R.subtotal), 0)).where(match).scalar_subquery()
+    return qty, amount
+
+
+class RefundRollupService:
+    """Materializes refund totals per order line item"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _update(self, *criteria) -> int:
+        qty, amount = _refund_totals()
+        return self.db.query(ShopifyOrderItem).filter(*criteria).update(
+            {
+                ShopifyOrderItem.refunded_quantity: qty,
+                ShopifyOrderItem.refunded_amount: amount,
+            },
+            synchronize_session=False,
+        ) or 0
+
+    def refresh_line_items(self, line_item_ids: Iterable[int], commit: bool = True) -> int:
+        """
+        Recompute the refund columns for the given Shopify line item ids.
+
+        Pass commit=False to fold the update into the caller's transaction
+        (pending rows are flushed first).
+        """
+        ids = sorted({i for i in line_item_ids if i})
+        if not ids:
+            return 0
+        self.db.flush()
+        updated = 0
+        for offset in range(0, len(ids), CHUNK_SIZE):
+            updated += self._update(ShopifyOrderItem.line_item_id.in_(ids[offset:offset + CHUNK_SIZE]))
+        if commit:
+            self.db.commit()
+        return updated
+
+    def rebuild(self) -> Dict:
+        """Recompute the refund columns for every order item, in id ranges."""
+        started = datetime.utcnow()
+        lo, hi = self.db.query(func.min(ShopifyOrderItem.id), func.max(ShopifyOrderItem.id)).first()
+        if lo is None:
+            return {"rows": 0, "duration_seconds": 0.0}
+
+        rows = 0
+        try:
+            for start in range(lo, hi + 1, REBUILD_ID_STEP):
+                rows += self._update(
+                    ShopifyOrderItem.id >= start,
+                    ShopifyOrderItem.id < start + REBUILD_ID_STEP,
+                    ShopifyOrderItem.line_item_id.isnot(None),
+                )
+                self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        duration = round((datetime.utcnow() - started).total_seconds(), 2)
+        log.info(f"Refund rollup rebuilt: {rows} order items in {duration}s")
+        return {"rows": rows, "duration_seconds": duration}
+
+    def verify(self, fix: bool = False, sample_size: int = 20) -> Dict:
+        """
+        Compare the materialized columns with shopify_refund_line_items.
+
+        Reports order items whose columns disagree with the raw refund sum and
+        refund lines that point at no known order item. With fix=True the
+        mismatched items are recomputed and their order days re-rolled into the
+        daily sales fact table.
+        """
+        R = ShopifyRefundLineItem
+        I = ShopifyOrderItem
+        raw = (
+            self.db.query(
+                R.line_item_id.label("line_item_id"),
+                func.sum(R.quantity).label("qty"),
+                func.sum(R.subtotal).label("amount"),
+            )
+            .filter(R.line_item_id.isnot(None))
+            .group_by(R.line_item_id)
+            .subquery()
+        )
+        raw_qty = func.coalesce(raw.c.qty, 0)
+        raw_amount = func.coalesce(raw.c.amount, 0)
+
+        mismatched = (
+            self.db.query(
+                I.line_item_id,
+                I.refunded_quantity,
+                I.refunded_amount,
+                raw_qty.label("raw_qty"),
+                raw_amount.label("raw_amount"),
+            )
+            .outerjoin(raw, raw.c.line_item_id == I.line_item_id)
+            .filter(
+                I.line_item_id.isnot(None),
+                or_(
+                    I.refunded_quantity != raw_qty,
+                    func.abs(I.refunded_amount - raw_amount) > AMOUNT_TOLERANCE,
+                ),
+            )
+            .all()
+        )
+
+        orphans = (
+            self.db.query(func.count(R.id))
+            .outerjoin(I, I.line_item_id == R.line_item_id)
+            .filter(and_(R.line_item_id.isnot(None), I.id.is_(None)))
+            .scalar()
+        ) or 0
+        checked = self.db.query(func.count(I.id)).filter(I.line_item_id.isnot(None)).scalar() or 0
+
+        sample: List[Dict] = [
+            {
+                "line_item_id": r.line_item_id,
+                "refunded_quantity": int(r.refunded_quantity or 0),
+                "refunded_amount": float(r.refunded_amount or 0),
+                "raw_quantity": int(r.raw_qty or 0),
+                "raw_amount": float(r.raw_amount or 0),
+            }
+            for r in mismatched[:sample_size]
+        ]
+
+        fixed = 0
+        if fix and mismatched:
+            drifted = [r.line_item_id for r in mismatched]
+            fixed = self.refresh_line_items(drifted)
+            # Refund measures in the daily sales fact come from these columns
+            fact = SalesFactService(self.db)
+            fact.refresh_dates(fact.order_dates_for_line_items(drifted))
+
+        if mismatched:
+            log.warning(
+                f"Refund rollup drift: {len(mismatched)} of {checked} order items disagree "
+                f"with shopify_refund_line_items ({fixed} fixed)"
+            )
+        else:
+            log.info(f"Refund rollup verified: {checked} order items match")
+
+        return {
+            "checked": checked,
+            "mismatched": len(mismatched),
+            "orphan_refund_lines": int(orphans),
+            "fixed": fixed,
+            "sample": sample,
+        }
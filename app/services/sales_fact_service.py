@@ -0,0 +1,231 @@
+"""
+Sales Fact Service
+
+Maintains shopify_sales_daily_fact, the daily sales cube behind brand,
+finance and chat sales reporting, plus its shopify_vendor_orders_daily
+companion (distinct orders per brand-day).
+
+Each fact row holds the additive measures for one (day, vendor, product,
+SKU, financial_status): units, gross revenue, discounts, refunds and
+refunded units (the line items' materialized refund totals, so refunds
+land on the order date), COGS and the costed-item revenue used for
+like-for-like margins. Readers filter and group a few thousand fact rows
+instead of re-aggregating order lines and refunds on each request.
+
+Refreshed for the touched order dates after each Shopify order or refund
+save, which also builds the table on first run; rebuild() re-derives the
+whole cube month by month.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, func, literal, literal_column
+from sqlalchemy.orm import Session
+
+from app.models.shopify import (
+    ShopifyOrderItem,
+    ShopifySalesDailyFact,
+    ShopifyVendorOrdersDaily,
+)
+from app.services.search_console_rollup_service import GRAIN_MONTH, period_bounds
+from app.utils.logger import log
+
+
+FACT_COLUMNS = [
+    "date", "vendor", "shopify_product_id", "sku", "financial_status", "title",
+    "units", "refund_units", "gross_revenue", "discounts", "refunds", "net_revenue",
+    "cogs", "refund_cogs", "units_with_cost", "costed_revenue", "costed_discounts",
+    "costed_refunds", "line_count", "price_total", "order_count", "refreshed_at",
+]
+
+
+def day_window(start: datetime, end: datetime) -> Tuple[date, date]:
+    """
+    Map a [start, end) datetime window onto inclusive fact days.
+
+    A window that ends part-way through a day includes that day and one that
+    starts part-way through a day skips it, so "now - N days .. now" covers
+    exactly N days ending on the anchor day.
+    """
+    first = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+    last = end.date() if end.time() != time.min else end.date() - timedelta(days=1)
+    return first, last
+
+
+def date_runs(dates: Iterable[date]) -> List[Tuple[date, date]]:
+    """Collapse a set of dates into contiguous (start, end) runs."""
+    days = sorted({d.date() if isinstance(d, datetime) else d for d in dates if d})
+    runs: List[Tuple[date, date]] = []
+    for d in days:
+        if runs and d == runs[-1][1] + timedelta(days=1):
+            runs[-1] = (runs[-1][0], d)
+        else:
+            runs.append((d, d))
+    return runs
+
+
+def sales_measures() -> List:
+    """Labelled SUM() columns over the fact table, shared by every reader."""
+    F = ShopifySalesDailyFact
+    return [
+        func.coalesce(func.sum(F.gross_revenue), 0).label('revenue'),
+        func.coalesce(func.sum(F.discounts), 0).label('discounts'),
+        func.coalesce(func.sum(F.refunds), 0).label('refunds'),
+        func.coalesce(func.sum(F.net_revenue), 0).label('net_revenue'),
+        func.coalesce(func.sum(F.units), 0).label('units'),
+        func.coalesce(func.sum(F.refund_units), 0).label('refund_units'),
+        func.coalesce(func.sum(F.cogs), 0).label('total_cogs'),
+        func.coalesce(func.sum(F.refund_cogs), 0).label('refund_cogs'),
+        func.coalesce(func.sum(F.units_with_cost), 0).label('units_with_cost'),
+        func.coalesce(func.sum(F.costed_revenue), 0).label('costed_revenue'),
+        func.coalesce(func.sum(F.costed_discounts), 0).label('costed_discounts'),
+        func.coalesce(func.sum(F.costed_refunds), 0).label('costed_refunds'),
+    ]
+
+
+class SalesFactService:
+    """Builds and incrementally refreshes the daily sales fact table"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refresh(self, start_date: date, end_date: date) -> Dict:
+        """Recompute fact rows for every day in [start_date, end_date]."""
+        started = datetime.utcnow()
+        start_dt = datetime.combine(start_date, time.min)
+        end_dt = datetime.combine(end_date + timedelta(days=1), time.min)
+        now = datetime.utcnow()
+
+        I = ShopifyOrderItem
+        day = func.date(I.order_date)
+        zero = literal_column('0')
+        has_cost = I.cost_per_item.isnot(None)
+        discount = func.coalesce(I.total_discount, zero)
+        refund_amount = func.coalesce(I.refunded_amount, zero)
+        refund_qty = func.coalesce(I.refunded_quantity, zero)
+        total_price = func.coalesce(I.total_price, zero)
+
+        try:
+            for model in (ShopifySalesDailyFact, ShopifyVendorOrdersDaily):
+                self.db.query(model).filter(
+                    model.date >= start_date,
+                    model.date <= end_date,
+                ).delete(synchronize_session=False)
+
+            source = (
+                self.db.query(
+                    day,
+                    I.vendor,
+                    I.shopify_product_id,
+                    I.sku,
+                    I.financial_status,
+                    func.max(I.title),
+                    func.coalesce(func.sum(I.quantity), 0),
+                    func.coalesce(func.sum(refund_qty), 0),
+                    func.coalesce(func.sum(total_price), 0),
+                    func.coalesce(func.sum(discount), 0),
+                    func.coalesce(func.sum(refund_amount), 0),
+                    func.coalesce(func.sum(total_price - discount - refund_amount), 0),
+                    func.sum(case((has_cost, I.cost_per_item * I.quantity), else_=zero)),
+                    func.sum(case((has_cost, I.cost_per_item * refund_qty), else_=zero)),
+                    func.sum(case((has_cost, I.quantity), else_=zero)),
+                    func.sum(case((has_cost, total_price), else_=zero)),
+                    func.sum(case((has_cost, discount), else_=zero)),
+                    func.sum(case((has_cost, refund_amount), else_=zero)),
+                    func.count(I.id),
+                    func.coalesce(func.sum(I.price), 0),
+                    func.count(func.distinct(I.shopify_order_id)),
+                    literal(now),
+                )
+                .filter(I.order_date >= start_dt, I.order_date < end_dt)
+                .group_by(day, I.vendor, I.shopify_product_id, I.sku, I.financial_status)
+            )
+            rows = self.db.execute(
+                ShopifySalesDailyFact.__table__.insert().from_select(FACT_COLUMNS, source)
+            ).rowcount or 0
+
+            orders_source = (
+                self.db.query(
+                    day,
+                    I.vendor,
+                    I.financial_status,
+                    func.count(func.distinct(I.shopify_order_id)),
+                    literal(now),
+                )
+                .filter(I.order_date >= start_dt, I.order_date < end_dt)
+                .group_by(day, I.vendor, I.financial_status)
+            )
+            self.db.execute(
+                ShopifyVendorOrdersDaily.__table__.insert().from_select(
+                    ["date", "vendor", "financial_status", "order_count", "refreshed_at"],
+                    orders_source,
+                )
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        duration = round((datetime.utcnow() - started).total_seconds(), 2)
+        log.info(f"Sales fact refreshed {start_date} to {end_date}: {rows} rows in {duration}s")
+        return {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "rows": rows,
+            "duration_seconds": duration,
+        }
+
+    def refresh_dates(self, dates: Iterable[date]) -> Optional[Dict]:
+        """Refresh each contiguous run of touched order dates."""
+        runs = date_runs(dates)
+        if not runs:
+            return None
+        rows = 0
+        for run_start, run_end in runs:
+            rows += self.refresh(run_start, run_end)["rows"]
+        return {"runs": len(runs), "rows": rows}
+
+    def order_dates_for_line_items(self, line_item_ids: Iterable[int]) -> List[date]:
+        """Order dates of the given line items (refunds land on these days)."""
+        ids = list({i for i in line_item_ids if i})
+        dates = set()
+        for offset in range(0, len(ids), 500):
+            chunk = ids[offset:offset + 500]
+            for (order_date,) in self.db.query(ShopifyOrderItem.order_date).filter(
+                ShopifyOrderItem.line_item_id.in_(chunk)
+            ).distinct():
+                if order_date:
+                    dates.add(order_date.date())
+        return sorted(dates)
+
+    def rebuild(self) -> Dict:
+        """Rebuild from the full order-item history, one month at a time."""
+        bounds = self.db.query(
+            func.min(ShopifyOrderItem.order_date), func.max(ShopifyOrderItem.order_date)
+        ).first()
+        if not bounds or not bounds[0]:
+            return {"months_rebuilt": 0}
+        start_date, end_date = bounds[0].date(), bounds[1].date()
+        months = 0
+        for ms, me in period_bounds(GRAIN_MONTH, start_date, end_date):
+            self.refresh(max(ms, start_date), min(me, end_date))
+            months += 1
+        return {"months_rebuilt": months}
+
+    def is_built(self) -> bool:
+        """Whether the fact table holds any rows (cheap enough for request paths)."""
+        return self.db.query(ShopifySalesDailyFact.id).first() is not None
+
+    def ensure_built(self) -> bool:
+        """
+        Run a full rebuild if the fact table has never been populated.
+
+        Sync/scheduler paths only — a rebuild scans the whole order history.
+        """
+        if self.is_built():
+            return False
+        if self.db.query(ShopifyOrderItem.id).first() is None:
+            return False
+        log.info("Sales fact table empty — running full rebuild")
+        self.rebuild()
+        return True
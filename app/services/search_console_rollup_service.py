@@ -0,0 +1,248 @@
+"""
+Search Console Rollup Service
+
+Maintains pre-aggregated Search Console tables so dashboard windows
+(7/28/30/90 days, monthly trends) read a few thousand rollup rows instead
+of re-aggregating the raw 16-month query/page history on every request.
+
+Tables:
+  - search_console_query_daily          (date x query)
+  - search_console_page_daily           (date x page)
+  - search_console_query_page_rollups   (week|month x query x page)
+
+Position is stored as SUM(position * impressions) so any window can be
+re-aggregated into an impression-weighted average; CTR is derived as
+SUM(clicks) / SUM(impressions).
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, literal
+from sqlalchemy.orm import Session
+
+from app.models.search_console_data import (
+    SearchConsoleQuery, SearchConsolePage,
+    SearchConsoleQueryDaily, SearchConsolePageDaily, SearchConsoleQueryPageRollup,
+)
+from app.utils.logger import log
+
+
+GRAIN_WEEK = "week"
+GRAIN_MONTH = "month"
+
+
+# ── Aggregate expressions shared by rollup readers ──
+
+def weighted_position(model):
+    """Impression-weighted average position over a rollup model's rows."""
+    return func.sum(model.weighted_position_sum) / func.nullif(func.sum(model.impressions), 0)
+
+
+def weighted_ctr(model):
+    """Impression-weighted CTR (decimal, 0-1) over a rollup model's rows."""
+    return func.sum(model.clicks) * 1.0 / func.nullif(func.sum(model.impressions), 0)
+
+
+def week_start(d: date) -> date:
+    """Monday of the ISO week containing d."""
+    return d - timedelta(days=d.weekday())
+
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1)
+
+
+def period_bounds(grain: str, start_date: date, end_date: date) -> List[Tuple[date, date]]:
+    """(period_start, period_end) pairs for every grain period touching the range."""
+    periods = []
+    if grain == GRAIN_WEEK:
+        cursor = week_start(start_date)
+        while cursor <= end_date:
+            periods.append((cursor, cursor + timedelta(days=6)))
+            cursor += timedelta(days=7)
+    elif grain == GRAIN_MONTH:
+        cursor = month_start(start_date)
+        while cursor <= end_date:
+            nxt = _next_month(cursor)
+            periods.append((cursor, nxt - timedelta(days=1)))
+            cursor = nxt
+    else:
+        raise ValueError(f"Unknown rollup grain: {grain}")
+    return periods
+
+
+class SearchConsoleRollupService:
+    """Builds and incrementally refreshes Search Console rollup tables"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refresh(self, start_date: date, end_date: date) -> Dict:
+        """
+        Recompute rollups for every day (and every week/month) touched by
+        [start_date, end_date].
+
+        Called after each Search Console sync with the synced date range, so
+        late GSC revisions to the last few days are picked up.
+        """
+        started = datetime.utcnow()
+        result = {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "query_daily_rows": 0,
+            "page_daily_rows": 0,
+            "week_rows": 0,
+            "month_rows": 0,
+        }
+
+        try:
+            result["query_daily_rows"] = self._refresh_query_daily(start_date, end_date)
+            result["page_daily_rows"] = self._refresh_page_daily(start_date, end_date)
+            result["week_rows"] = self._refresh_query_page(GRAIN_WEEK, start_date, end_date)
+            result["month_rows"] = self._refresh_query_page(GRAIN_MONTH, start_date, end_date)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        result["duration_seconds"] = round((datetime.utcnow() - started).total_seconds(), 2)
+        log.info(
+            f"Search Console rollups refreshed {start_date} to {end_date}: "
+            f"{result['query_daily_rows']} query-days, {result['page_daily_rows']} page-days, "
+            f"{result['week_rows']} week rows, {result['month_rows']} month rows"
+        )
+        return result
+
+    def rebuild(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict:
+        """
+        Rebuild rollups for the full raw history, one month at a time so the
+        working set stays bounded during 16-month rebuilds.
+        """
+        if start_date is None or end_date is None:
+            bounds = self.db.query(
+                func.min(SearchConsoleQuery.date), func.max(SearchConsoleQuery.date)
+            ).first()
+            page_bounds = self.db.query(
+                func.min(SearchConsolePage.date), func.max(SearchConsolePage.date)
+            ).first()
+            mins = [d for d in (bounds[0], page_bounds[0]) if d]
+            maxs = [d for d in (bounds[1], page_bounds[1]) if d]
+            if not mins:
+                return {"months_rebuilt": 0}
+            start_date = start_date or min(mins)
+            end_date = end_date or max(maxs)
+
+        months = 0
+        for ms, me in period_bounds(GRAIN_MONTH, start_date, end_date):
+            self.refresh(max(ms, start_date), min(me, end_date))
+            months += 1
+        return {
+            "months_rebuilt": months,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+        }
+
+    def ensure_built(self) -> bool:
+        """Run a full rebuild if the rollups have never been populated."""
+        has_rollups = self.db.query(SearchConsoleQueryDaily.id).first() is not None
+        if has_rollups:
+            return False
+        has_raw = self.db.query(SearchConsoleQuery.id).first() is not None
+        if not has_raw:
+            return False
+        log.info("Search Console rollups empty — running full rebuild")
+        self.rebuild()
+        return True
+
+    # ── Refresh steps ──
+
+    def _refresh_query_daily(self, start_date: date, end_date: date) -> int:
+        self.db.query(SearchConsoleQueryDaily).filter(
+            SearchConsoleQueryDaily.date >= start_date,
+            SearchConsoleQueryDaily.date <= end_date,
+        ).delete(synchronize_session=False)
+
+        source = self.db.query(
+            SearchConsoleQuery.date,
+            SearchConsoleQuery.query,
+            func.max(SearchConsoleQuery.query_class),
+            func.coalesce(func.sum(SearchConsoleQuery.clicks), 0),
+            func.coalesce(func.sum(SearchConsoleQuery.impressions), 0),
+            func.coalesce(func.sum(func.coalesce(SearchConsoleQuery.position, 0) * SearchConsoleQuery.impressions), 0),
+            literal(datetime.utcnow()),
+        ).filter(
+            SearchConsoleQuery.date >= start_date,
+            SearchConsoleQuery.date <= end_date,
+        ).group_by(
+            SearchConsoleQuery.date, SearchConsoleQuery.query
+        )
+
+        stmt = SearchConsoleQueryDaily.__table__.insert().from_select(
+            ["date", "query", "query_class", "clicks", "impressions", "weighted_position_sum", "refreshed_at"],
+            source,
+        )
+        return self.db.execute(stmt).rowcount or 0
+
+    def _refresh_page_daily(self, start_date: date, end_date: date) -> int:
+        self.db.query(SearchConsolePageDaily).filter(
+            SearchConsolePageDaily.date >= start_date,
+            SearchConsolePageDaily.date <= end_date,
+        ).delete(synchronize_session=False)
+
+        source = self.db.query(
+            SearchConsolePage.date,
+            SearchConsolePage.page,
+            func.coalesce(func.sum(SearchConsolePage.clicks), 0),
+            func.coalesce(func.sum(SearchConsolePage.impressions), 0),
+            func.coalesce(func.sum(func.coalesce(SearchConsolePage.position, 0) * SearchConsolePage.impressions), 0),
+            literal(datetime.utcnow()),
+        ).filter(
+            SearchConsolePage.date >= start_date,
+            SearchConsolePage.date <= end_date,
+        ).group_by(
+            SearchConsolePage.date, SearchConsolePage.page
+        )
+
+        stmt = SearchConsolePageDaily.__table__.insert().from_select(
+            ["date", "page", "clicks", "impressions", "weighted_position_sum", "refreshed_at"],
+            source,
+        )
+        return self.db.execute(stmt).rowcount or 0
+
+    def _refresh_query_page(self, grain: str, start_date: date, end_date: date) -> int:
+        """Recompute whole week/month periods overlapping the refreshed range."""
+        rows = 0
+        for period_start, period_end in period_bounds(grain, start_date, end_date):
+            self.db.query(SearchConsoleQueryPageRollup).filter(
+                SearchConsoleQueryPageRollup.grain == grain,
+                SearchConsoleQueryPageRollup.period_start == period_start,
+            ).delete(synchronize_session=False)
+
+            source = self.db.query(
+                literal(grain),
+                literal(period_start),
+                SearchConsoleQuery.query,
+                SearchConsoleQuery.page,
+                func.max(SearchConsoleQuery.query_class),
+                func.coalesce(func.sum(SearchConsoleQuery.clicks), 0),
+                func.coalesce(func.sum(SearchConsoleQuery.impressions), 0),
+                func.coalesce(func.sum(func.coalesce(SearchConsoleQuery.position, 0) * SearchConsoleQuery.impressions), 0),
+                literal(datetime.utcnow()),
+            ).filter(
+                SearchConsoleQuery.date >= period_start,
+                SearchConsoleQuery.date <= period_end,
+            ).group_by(
+                SearchConsoleQuery.query, SearchConsoleQuery.page
+            )
+
+            stmt = SearchConsoleQueryPageRollup.__table__.insert().from_select(
+                ["grain", "period_start", "query", "page", "query_class", "clicks", "impressions",
+                 "weighted_position_sum", "refreshed_at"],
+                source,
+            )
+            rows += self.db.execute(stmt).rowcount or 0
+        return rows
@@ -7,16 +7,24 @@ Answers: "Where are my easy SEO wins?"
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta, date
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, or_
 from collections import defaultdict
 
 from app.models.search_console_data import (
-    SearchConsoleQuery, SearchConsolePage, SearchConsoleIndexCoverage, SearchConsoleSitemap
+    SearchConsoleQuery, SearchConsolePage, SearchConsoleIndexCoverage, SearchConsoleSitemap,
+    SearchConsoleQueryDaily, SearchConsolePageDaily, SearchConsoleQueryPageRollup
 )
 from app.models.ga4_data import GA4TrafficSource
 from app.config import get_settings
 from app.utils.logger import log
 from app.services.seo_utils import expected_ctr_for_position, classify_url, shorten_url
+from app.services.search_console_rollup_service import (
+    GRAIN_WEEK, GRAIN_MONTH, weighted_position, week_start, period_bounds
+)
+from app.services.query_classifier import (
+    QueryClassifier, QUERY_CLASS_BRAND, QUERY_CLASS_SPAM, DEFAULT_SPAM_FRAGMENTS,
+    excluding_classes, parse_brand_terms,
+)
 
 
 class SEOService:
@@ -25,16 +33,16 @@ class SEOService:
     def __init__(self, db: Session):
         self.db = db
         settings = get_settings()
-        brand_terms = settings.gsc_brand_terms or []
-        if isinstance(brand_terms, str):
-            brand_terms = [t.strip() for t in brand_terms.split(",")]
-        self.brand_terms = [t.lower() for t in brand_terms if t.strip()]
-        self.spam_fragments = [
-            "slot", "casino", "bet", "poker", "porn", "xxx", "adult", "escort",
-            "apk", "download", "login", "free", "bonus", "crypto", "forex"
-        ]
+        self.brand_terms = parse_brand_terms(settings.gsc_brand_terms)
+        self.spam_fragments = list(DEFAULT_SPAM_FRAGMENTS)
+        self.classifier = QueryClassifier(self.brand_terms, self.spam_fragments)
         self.value_per_click_default = 1.0
 
+        # Batch sizes for multi-key lookups (bounded to stay under driver
+        # bind-parameter limits and keep OR'd LIKE prefixes index-friendly)
+        self._in_batch_size = 500
+        self._prefix_batch_size = 100
+
         # Opportunity thresholds (configurable)
         self.high_impression_threshold = 500  # Min impressions/month to consider
         self.low_ctr_threshold = 0.03  # 3% - CTR below this with high impressions = opportunity
@@ -129,6 +137,7 @@ class SEOService:
         ).filter(
             SearchConsoleQuery.date >= start_date,
             SearchConsoleQuery.date <= end_date,
+            self._non_brand(SearchConsoleQuery),
         ).group_by(
             SearchConsoleQuery.query
         ).having(
@@ -140,15 +149,17 @@ class SEOService:
         ).limit(limit * 5).all()
 
         opportunities = []
-        prev_ctr_map = self._get_query_prev_ctr_map([q.query for q in queries], start_date, end_date)
+        candidates = [
+            q for q in queries
+            if q.ctr is not None and q.position is not None
+        ]
+        candidate_queries = [q.query for q in candidates]
+        prev_ctr_map = self._get_query_prev_ctr_map(candidate_queries, start_date, end_date)
+        top_page_map = self._get_top_pages_for_queries(candidate_queries, start_date, end_date)
 
         value_per_click = self._get_value_per_click(start_date, end_date)
-        for query in queries:
-            if query.ctr is None or query.position is None:
-                continue
-            if self._is_brand_query(query.query) or self._is_spam_query(query.query):
-                continue
-            top_page = self._get_top_page_for_query(query.query, start_date, end_date)
+        for query in candidates:
+            top_page = top_page_map.get(query.query)
             suggested_title, suggested_meta = self._build_snippet_suggestions(query.query)
             # Calculate potential clicks if CTR improved
             # Assume improving to average CTR for position (rough estimate)
@@ -226,6 +237,7 @@ class SEOService:
         ).filter(
             SearchConsoleQuery.date >= start_date,
             SearchConsoleQuery.date <= end_date,
+            self._non_brand(SearchConsoleQuery),
         ).group_by(
             SearchConsoleQuery.query
         ).having(
@@ -242,8 +254,6 @@ class SEOService:
         for query in queries:
             if query.position is None:
                 continue
-            if self._is_brand_query(query.query) or self._is_spam_query(query.query):
-                continue
             # Estimate traffic gain from reaching page 1
             page_one_ctr = self._estimate_expected_ctr(5.0)  # Assume position 5
             potential_clicks = int(query.impressions * page_one_ctr) - query.clicks
@@ -352,24 +362,30 @@ class SEOService:
 
         opportunities = []
 
-        value_per_click = self._get_value_per_click(start_date, end_date)
+        declining_rows = []
         for row in rows:
             prev_clicks = row.prev_clicks or 0
             if prev_clicks < 20:
                 continue
-
-            clicks_lost = prev_clicks - (row.clicks or 0)
-            if prev_clicks == 0:
-                continue
             decline_pct = (row.clicks - prev_clicks) / prev_clicks
             if decline_pct > self.declining_threshold:
                 continue
+            declining_rows.append((row, decline_pct))
+
+        top_queries_map = self._get_top_queries_for_pages(
+            [row.page for row, _ in declining_rows], start_date, end_date
+        )
+
+        value_per_click = self._get_value_per_click(start_date, end_date)
+        for row, decline_pct in declining_rows:
+            prev_clicks = row.prev_clicks or 0
+            clicks_lost = prev_clicks - (row.clicks or 0)
 
             position_change = None
             if row.prev_position is not None and row.position is not None:
                 position_change = row.position - row.prev_position
 
-            top_queries = await self._get_top_queries_for_page(row.page, start_date, end_date)
+            top_queries = top_queries_map.get(row.page, [])
             opportunity = {
                 'url': row.page,
                 'page_type': None,
@@ -566,43 +582,77 @@ class SEOService:
         end_date: date,
         limit: int = 3
     ) -> List[Dict]:
-        base = self._normalize_url(page_url)
-        if not base:
-            return []
-        variants = {base, base.rstrip("/"), base.rstrip("/") + "/"}
+        return self._get_top_queries_for_pages([page_url], start_date, end_date, limit).get(page_url, [])
 
-        rows = self.db.query(
-            SearchConsoleQuery.query.label("query"),
-            func.sum(SearchConsoleQuery.clicks).label("clicks"),
-            func.sum(SearchConsoleQuery.impressions).label("impressions"),
-            func.avg(SearchConsoleQuery.position).label("position"),
-            SearchConsoleQuery.page.label("page"),
-        ).filter(
-            SearchConsoleQuery.page.isnot(None),
-            SearchConsoleQuery.date >= start_date,
-            SearchConsoleQuery.date <= end_date,
-            SearchConsoleQuery.page.like(f"{base}%")
-        ).group_by(
-            SearchConsoleQuery.query, SearchConsoleQuery.page
-        ).order_by(
-            desc(func.sum(SearchConsoleQuery.clicks))
-        ).limit(limit * 2).all()
+    def _get_top_queries_for_pages(
+        self,
+        page_urls: List[str],
+        start_date: date,
+        end_date: date,
+        limit: int = 3
+    ) -> Dict[str, List[Dict]]:
+        """
+        Resolve the top non-brand queries for many pages at once.
 
-        results = []
-        for row in rows:
-            if self._normalize_url(row.page) not in variants:
-                continue
-            if self._is_brand_query(row.query) or self._is_spam_query(row.query):
-                continue
-            results.append({
-                "query": row.query,
-                "clicks": row.clicks,
-                "impressions": row.impressions,
-                "position": round(row.position, 1) if row.position is not None else None
-            })
-            if len(results) >= limit:
-                break
+        Ranks (query, page) click totals per page with a window function so
+        each chunk of candidate pages costs one query instead of one per page.
+        Query-string and trailing-slash variants of a page are merged onto
+        the normalized URL, matching _normalize_url().
+        """
+        bases = {}
+        for url in page_urls:
+            base = self._normalize_url(url)
+            if base:
+                bases.setdefault(base, []).append(url)
+        if not bases:
+            return {}
 
+        rows_by_base = defaultdict(list)
+        base_list = list(bases)
+        for i in range(0, len(base_list), self._prefix_batch_size):
+            chunk = base_list[i:i + self._prefix_batch_size]
+            clicks_total = func.sum(SearchConsoleQuery.clicks)
+            ranked = self.db.query(
+                SearchConsoleQuery.query.label("query"),
+                SearchConsoleQuery.page.label("page"),
+                clicks_total.label("clicks"),
+                func.sum(SearchConsoleQuery.impressions).label("impressions"),
+                func.avg(SearchConsoleQuery.position).label("position"),
+                func.row_number().over(
+                    partition_by=SearchConsoleQuery.page,
+                    order_by=desc(clicks_total),
+                ).label("rn"),
+            ).filter(
+                SearchConsoleQuery.page.isnot(None),
+                SearchConsoleQuery.date >= start_date,
+                SearchConsoleQuery.date <= end_date,
+                or_(*[SearchConsoleQuery.page.like(f"{base}%") for base in chunk]),
+            ).group_by(
+                SearchConsoleQuery.query, SearchConsoleQuery.page
+            ).subquery()
+
+            rows = self.db.query(ranked).filter(ranked.c.rn <= limit * 2).all()
+            for row in rows:
+                base = self._normalize_url(row.page)
+                if base in bases:
+                    rows_by_base[base].append(row)
+
+        results = {}
+        for base, urls in bases.items():
+            top = []
+            for row in sorted(rows_by_base.get(base, []), key=lambda r: r.clicks or 0, reverse=True):
+                if self._is_brand_query(row.query) or self._is_spam_query(row.query):
+                    continue
+                top.append({
+                    "query": row.query,
+                    "clicks": row.clicks,
+                    "impressions": row.impressions,
+                    "position": round(row.position, 1) if row.position is not None else None
+                })
+                if len(top) >= limit:
+                    break
+            for url in urls:
+                results[url] = top
         return results
 
     def _normalize_url(self, url: Optional[str]) -> str:
@@ -614,22 +664,14 @@ class SEOService:
         return cleaned
 
     def _is_brand_query(self, query: str) -> bool:
-        if not query:
-            return False
-        q = query.lower()
-        return any(term in q for term in self.brand_terms)
+        return self.classifier.is_brand(query)
 
     def _is_spam_query(self, query: str) -> bool:
-        if not query:
-            return False
-        q = query.lower()
-        if any(fragment in q for fragment in self.spam_fragments):
-            return True
-        if "http" in q or ".com" in q or ".net" in q or ".xyz" in q:
-            return True
-        if any(ch in q for ch in ["🔥", "💰", "🤑"]):
-            return True
-        return False
+        return self.classifier.is_spam(query)
+
+    def _non_brand(self, model):
+        """SQL predicate for non-brand, non-spam rows (unclassified rows are kept)."""
+        return excluding_classes(model.query_class, QUERY_CLASS_BRAND, QUERY_CLASS_SPAM)
 
     async def get_seo_dashboard(
         self,
@@ -858,29 +900,52 @@ class SEOService:
         return action_stack[:6]
 
     def _get_cannibalization(self, days: int) -> List[Dict]:
+        """
+        Queries ranking with 2+ pages over exactly [today - days, today].
+
+        Full weeks come from the weekly query/page rollup; the leading
+        partial week (start_date to the next Monday) is read from the raw
+        rows, so days before start_date never widen the window.
+        """
         end_date = date.today()
         start_date = end_date - timedelta(days=days)
-        rows = self.db.query(
-            SearchConsoleQuery.query.label("query"),
-            func.count(func.distinct(SearchConsoleQuery.page)).label("page_count"),
-            func.sum(SearchConsoleQuery.clicks).label("clicks")
+        first_full_week = week_start(start_date + timedelta(days=6))
+        R = SearchConsoleQueryPageRollup
+        Q = SearchConsoleQuery
+        weekly = self.db.query(
+            R.query.label("query"), R.page.label("page"), R.clicks.label("clicks")
         ).filter(
-            SearchConsoleQuery.date >= start_date,
-            SearchConsoleQuery.date <= end_date,
-            SearchConsoleQuery.page.isnot(None)
+            R.grain == GRAIN_WEEK,
+            R.period_start >= first_full_week,
+            R.period_start <= end_date,
+            R.page.isnot(None),
+            self._non_brand(R),
+        )
+        leading = self.db.query(
+            Q.query.label("query"), Q.page.label("page"), Q.clicks.label("clicks")
+        ).filter(
+            Q.date >= start_date,
+            Q.date < first_full_week,
+            Q.page.isnot(None),
+            self._non_brand(Q),
+        )
+        pages = weekly.union_all(leading).subquery()
+
+        rows = self.db.query(
+            pages.c.query,
+            func.count(func.distinct(pages.c.page)).label("page_count"),
+            func.sum(pages.c.clicks).label("clicks")
         ).group_by(
-            SearchConsoleQuery.query
+            pages.c.query
         ).having(
-            func.count(func.distinct(SearchConsoleQuery.page)) >= 2,
-            func.sum(SearchConsoleQuery.clicks) >= 10
+            func.count(func.distinct(pages.c.page)) >= 2,
+            func.sum(pages.c.clicks) >= 10
         ).order_by(
-            desc(func.sum(SearchConsoleQuery.clicks))
+            desc(func.sum(pages.c.clicks))
         ).limit(10).all()
 
         results = []
         for row in rows:
-            if self._is_brand_query(row.query) or self._is_spam_query(row.query):
-                continue
             results.append({
                 'query': row.query,
                 'page_count': row.page_count,
@@ -895,25 +960,26 @@ class SEOService:
         prev_end = start_date - timedelta(days=1)
         prev_start = prev_end - timedelta(days=period_days - 1)
 
+        P = SearchConsolePageDaily
         current = self.db.query(
-            SearchConsolePage.page.label("page"),
-            func.sum(SearchConsolePage.clicks).label("clicks"),
-            func.sum(SearchConsolePage.impressions).label("impressions"),
-            func.avg(SearchConsolePage.position).label("position"),
+            P.page.label("page"),
+            func.sum(P.clicks).label("clicks"),
+            func.sum(P.impressions).label("impressions"),
+            weighted_position(P).label("position"),
         ).filter(
-            SearchConsolePage.date >= start_date,
-            SearchConsolePage.date <= end_date,
-        ).group_by(SearchConsolePage.page).subquery()
+            P.date >= start_date,
+            P.date <= end_date,
+        ).group_by(P.page).subquery()
 
         previous = self.db.query(
-            SearchConsolePage.page.label("page"),
-            func.sum(SearchConsolePage.clicks).label("clicks"),
-            func.sum(SearchConsolePage.impressions).label("impressions"),
-            func.avg(SearchConsolePage.position).label("position"),
+            P.page.label("page"),
+            func.sum(P.clicks).label("clicks"),
+            func.sum(P.impressions).label("impressions"),
+            weighted_position(P).label("position"),
         ).filter(
-            SearchConsolePage.date >= prev_start,
-            SearchConsolePage.date <= prev_end,
-        ).group_by(SearchConsolePage.page).subquery()
+            P.date >= prev_start,
+            P.date <= prev_end,
+        ).group_by(P.page).subquery()
 
         rows = self.db.query(
             current.c.page,
@@ -979,20 +1045,13 @@ class SEOService:
             SearchConsolePage.date <= end_date,
         ).scalar() or 0
 
-        non_brand_clicks = 0
-        query_rows = self.db.query(
-            SearchConsoleQuery.query.label("query"),
-            func.sum(SearchConsoleQuery.clicks).label("clicks")
+        non_brand_clicks = self.db.query(
+            func.sum(SearchConsoleQuery.clicks)
         ).filter(
             SearchConsoleQuery.date >= start_date,
             SearchConsoleQuery.date <= end_date,
-        ).group_by(
-            SearchConsoleQuery.query
-        ).all()
-        for row in query_rows:
-            if self._is_brand_query(row.query) or self._is_spam_query(row.query):
-                continue
-            non_brand_clicks += row.clicks or 0
+            self._non_brand(SearchConsoleQuery),
+        ).scalar() or 0
 
         ctr_drag_count = self.db.query(
             func.count(func.distinct(SearchConsoleQuery.query))
@@ -1112,20 +1171,48 @@ class SEOService:
         return prev
 
     def _get_top_page_for_query(self, query: str, start_date: date, end_date: date) -> Optional[str]:
-        row = self.db.query(
-            SearchConsoleQuery.page.label("page"),
-            func.sum(SearchConsoleQuery.clicks).label("clicks")
-        ).filter(
-            SearchConsoleQuery.query == query,
-            SearchConsoleQuery.page.isnot(None),
-            SearchConsoleQuery.date >= start_date,
-            SearchConsoleQuery.date <= end_date,
-        ).group_by(
-            SearchConsoleQuery.page
-        ).order_by(
-            desc(func.sum(SearchConsoleQuery.clicks))
-        ).first()
-        return row.page if row else None
+        return self._get_top_pages_for_queries([query], start_date, end_date).get(query)
+
+    def _get_top_pages_for_queries(
+        self,
+        queries: List[str],
+        start_date: date,
+        end_date: date
+    ) -> Dict[str, str]:
+        """
+        Resolve the highest-click landing page for many queries at once.
+
+        Uses ROW_NUMBER() over per-(query, page) click totals so the whole
+        candidate set resolves in one query per chunk.
+        """
+        queries = list(dict.fromkeys(q for q in queries if q))
+        if not queries:
+            return {}
+
+        top_pages = {}
+        for i in range(0, len(queries), self._in_batch_size):
+            chunk = queries[i:i + self._in_batch_size]
+            clicks_total = func.sum(SearchConsoleQuery.clicks)
+            ranked = self.db.query(
+                SearchConsoleQuery.query.label("query"),
+                SearchConsoleQuery.page.label("page"),
+                func.row_number().over(
+                    partition_by=SearchConsoleQuery.query,
+                    order_by=desc(clicks_total),
+                ).label("rn"),
+            ).filter(
+                SearchConsoleQuery.query.in_(chunk),
+                SearchConsoleQuery.page.isnot(None),
+                SearchConsoleQuery.date >= start_date,
+                SearchConsoleQuery.date <= end_date,
+            ).group_by(
+                SearchConsoleQuery.query, SearchConsoleQuery.page
+            ).subquery()
+
+            rows = self.db.query(ranked.c.query, ranked.c.page).filter(ranked.c.rn == 1).all()
+            for row in rows:
+                top_pages[row.query] = row.page
+        return top_pages
 
     def _build_snippet_suggestions(self, query: str) -> (str, str):
         base = query.strip().title()
@@ -1259,21 +1346,22 @@ class SEOService:
 
     def _rank_movers(self, sd, ed, psd, ped):
         """Count pages gaining and losing rank."""
+        P = SearchConsolePageDaily
         cur = self.db.query(
-            SearchConsolePage.page.label("page"),
-            func.avg(SearchConsolePage.position).label("pos"),
+            P.page.label("page"),
+            weighted_position(P).label("pos"),
         ).filter(
-            SearchConsolePage.date >= sd,
-            SearchConsolePage.date <= ed,
-        ).group_by(SearchConsolePage.page).subquery()
+            P.date >= sd,
+            P.date <= ed,
+        ).group_by(P.page).subquery()
 
         prev = self.db.query(
-            SearchConsolePage.page.label("page"),
-            func.avg(SearchConsolePage.position).label("pos"),
+            P.page.label("page"),
+            weighted_position(P).label("pos"),
         ).filter(
-            SearchConsolePage.date >= psd,
-            SearchConsolePage.date <= ped,
-        ).group_by(SearchConsolePage.page).subquery()
+            P.date >= psd,
+            P.date <= ped,
+        ).group_by(P.page).subquery()
 
         rows = self.db.query(
             cur.c.page,
@@ -1320,6 +1408,7 @@ class SEOService:
         ).filter(
             SearchConsoleQuery.date >= start_date,
             SearchConsoleQuery.date <= end_date,
+            self._non_brand(SearchConsoleQuery),
         ).group_by(
             SearchConsoleQuery.query,
         ).having(
@@ -1331,21 +1420,16 @@ class SEOService:
         value_per_click = self._get_value_per_click(start_date, end_date)
         results = []
         for r in rows:
-            if self._is_brand_query(r.query) or self._is_spam_query(r.query):
-                continue
             exp_ctr = expected_ctr_for_position(r.position or 50)
             actual_clicks = r.clicks or 0
             actual_ctr = actual_clicks / (r.impressions or 1)
             gap = max(0, int((r.impressions or 0) * exp_ctr) - actual_clicks)
             if gap < 2:
                 continue
-            # Get top page for this query
-            top_page = self._get_top_page_for_query(r.query, start_date, end_date) if len(results) < limit else None
-            sparkline = self._compute_sparkline_query(r.query, months=6) if len(results) < limit else []
             results.append({
                 "query": r.query,
-                "page": top_page,
-                "short_page": shorten_url(top_page) if top_page else "-",
+                "page": None,
+                "short_page": "-",
                 "position": round(r.position, 1) if r.position else None,
                 "impressions": int(r.impressions or 0),
                 "clicks": int(actual_clicks),
@@ -1353,10 +1437,19 @@ class SEOService:
                 "expected_ctr": round(exp_ctr * 100, 2),
                 "click_gap": gap,
                 "revenue_gap": round(gap * value_per_click, 2),
-                "sparkline": sparkline,
+                "sparkline": [],
             })
             if len(results) >= limit:
                 break
+
+        # Resolve top pages for the whole result set in one pass
+        top_page_map = self._get_top_pages_for_queries([r["query"] for r in results], start_date, end_date)
+        sparklines = self._compute_sparklines_for_queries([r["query"] for r in results], months=6)
+        for item in results:
+            top_page = top_page_map.get(item["query"])
+            item["page"] = top_page
+            item["short_page"] = shorten_url(top_page) if top_page else "-"
+            item["sparkline"] = sparklines[item["query"]]
         results.sort(key=lambda x: x["click_gap"], reverse=True)
         return results[:limit]
 
@@ -1407,47 +1500,49 @@ class SEOService:
     # ==================================================================
     def get_monthly_trends(self, months: int = 6) -> List[Dict]:
         """Monthly rollups for chart + table."""
-        today = date.today()
-        results = []
-        for i in range(months - 1, -1, -1):
-            # First day of month i months ago
-            m = today.month - i
-            y = today.year
-            while m <= 0:
-                m += 12
-                y -= 1
-            month_start = date(y, m, 1)
-            # Last day of month
-            if m == 12:
-                month_end = date(y + 1, 1, 1) - timedelta(days=1)
-            else:
-                month_end = date(y, m + 1, 1) - timedelta(days=1)
-            # Don't exceed today
-            if month_end > today:
-                month_end = today
-
-            totals = self.db.query(
-                func.sum(SearchConsoleQuery.clicks).label("clicks"),
-                func.sum(SearchConsoleQuery.impressions).label("impressions"),
+        month_keys = self._recent_month_starts(months)
+        R = SearchConsoleQueryPageRollup
+
+        totals = {
+            r.period_start: r for r in self.db.query(
+                R.period_start.label("period_start"),
+                func.sum(R.clicks).label("clicks"),
+                func.sum(R.impressions).label("impressions"),
+                weighted_position(R).label("position"),
             ).filter(
-                SearchConsoleQuery.date >= month_start,
-                SearchConsoleQuery.date <= month_end,
-            ).first()
-
-            clicks = int(totals.clicks or 0)
-            impressions = int(totals.impressions or 0)
-            ctr = round(clicks / impressions * 100, 2) if impressions else 0
+                R.grain == GRAIN_MONTH,
+                R.period_start >= month_keys[0],
+            ).group_by(R.period_start).all()
+        }
 
-            avg_pos = self.db.query(
-                func.avg(SearchConsoleQuery.position)
-            ).filter(
-                SearchConsoleQuery.date >= month_start,
-                SearchConsoleQuery.date <= month_end,
-                SearchConsoleQuery.impressions > 0,
-            ).scalar() or 0
+        # Click gap per month: query-level totals with >= 50 impressions
+        gaps = defaultdict(int)
+        gap_rows = self.db.query(
+            R.period_start.label("period_start"),
+            func.sum(R.clicks).label("clicks"),
+            func.sum(R.impressions).label("impressions"),
+            weighted_position(R).label("position"),
+        ).filter(
+            R.grain == GRAIN_MONTH,
+            R.period_start >= month_keys[0],
+        ).group_by(
+            R.period_start, R.query
+        ).having(
+            func.sum(R.impressions) >= 50,
+        ).all()
+        for r in gap_rows:
+            exp = expected_ctr_for_position(r.position or 50)
+            gap = int((r.impressions or 0) * exp) - (r.clicks or 0)
+            if gap > 0:
+                gaps[r.period_start] += gap
 
-            # Click gap for this month
-            gap = self._compute_total_click_gap(month_start, month_end)
+        results = []
+        for month_start in month_keys:
+            t = totals.get(month_start)
+            clicks = int(t.clicks or 0) if t else 0
+            impressions = int(t.impressions or 0) if t else 0
+            ctr = round(clicks / impressions * 100, 2) if impressions else 0
+            avg_pos = float(t.position or 0) if t else 0
 
             results.append({
                 "month": month_start.strftime("%b %Y"),
@@ -1455,11 +1550,21 @@ class SEOService:
                 "clicks": clicks,
                 "impressions": impressions,
                 "ctr": ctr,
-                "avg_position": round(float(avg_pos), 1),
-                "click_gap": gap,
+                "avg_position": round(avg_pos, 1),
+                "click_gap": gaps.get(month_start, 0),
             })
         return results
 
+    def _recent_month_starts(self, months: int) -> List[date]:
+        """First day of each of the last `months` calendar months, oldest first."""
+        today = date.today()
+        m = today.month - (months - 1)
+        y = today.year
+        while m <= 0:
+            m += 12
+            y -= 1
+        return [ms for ms, _ in period_bounds(GRAIN_MONTH, date(y, m, 1), today)]
+
     # ==================================================================
     #  NEW: Position Distribution
     # ==================================================================
@@ -1468,13 +1573,14 @@ class SEOService:
         end_date = date.today()
         start_date = end_date - timedelta(days=days)
 
+        Q = SearchConsoleQueryDaily
         rows = self.db.query(
-            SearchConsoleQuery.query.label("query"),
-            func.avg(SearchConsoleQuery.position).label("position"),
+            Q.query.label("query"),
+            weighted_position(Q).label("position"),
         ).filter(
-            SearchConsoleQuery.date >= start_date,
-            SearchConsoleQuery.date <= end_date,
-        ).group_by(SearchConsoleQuery.query).all()
+            Q.date >= start_date,
+            Q.date <= end_date,
+        ).group_by(Q.query).all()
 
         buckets = {"1-3": 0, "4-10": 0, "11-20": 0, "20+": 0}
         for r in rows:
@@ -1515,6 +1621,7 @@ class SEOService:
         ).filter(
             SearchConsoleQuery.date >= start_date,
             SearchConsoleQuery.date <= end_date,
+            self._non_brand(SearchConsoleQuery),
         ).group_by(
             SearchConsoleQuery.query,
         ).having(
@@ -1549,8 +1656,6 @@ class SEOService:
         # First pass: compute raw values
         raw = []
         for r in cur_rows:
-            if self._is_brand_query(r.query) or self._is_spam_query(r.query):
-                continue
             exp_ctr = expected_ctr_for_position(r.position or 50)
             gap = max(0, int((r.impressions or 0) * exp_ctr) - (r.clicks or 0))
             if gap < 3:
@@ -1561,10 +1666,12 @@ class SEOService:
             if (r.impressions or 0) > max_imp:
                 max_imp = r.impressions
 
+        top_page_map = self._get_top_pages_for_queries([r.query for r, _, _ in raw], start_date, end_date)
+        sparklines = self._compute_sparklines_for_queries([r.query for r, _, _ in raw], months=6)
         for r, gap, exp_ctr in raw:
             prev = prev_map.get(r.query)
             flags = self._compute_ml_flags(r, prev)
-            top_page = self._get_top_page_for_query(r.query, start_date, end_date)
+            top_page = top_page_map.get(r.query)
             url_info = classify_url(top_page)
 
             # Priority score: (norm_gap×0.5 + norm_impressions×0.3) × effort_weight + revenue×0.2
@@ -1575,7 +1682,7 @@ class SEOService:
             priority = (norm_gap * 0.5 + norm_imp * 0.3) * effort + rev_score * 0.2
             priority_score = min(int(priority * 100), 100)
 
-            sparkline = self._compute_sparkline_query(r.query, months=6)
+            sparkline = sparklines[r.query]
 
             actual_ctr = (r.clicks or 0) / (r.impressions or 1)
             results.append({
@@ -1855,31 +1962,31 @@ class SEOService:
     # ==================================================================
     def _compute_sparkline_query(self, query: str, months: int = 6) -> List[int]:
         """6-month click totals for a query."""
-        today = date.today()
-        values = []
-        for i in range(months - 1, -1, -1):
-            m = today.month - i
-            y = today.year
-            while m <= 0:
-                m += 12
-                y -= 1
-            ms = date(y, m, 1)
-            if m == 12:
-                me = date(y + 1, 1, 1) - timedelta(days=1)
-            else:
-                me = date(y, m + 1, 1) - timedelta(days=1)
-            if me > today:
-                me = today
+        return self._compute_sparklines_for_queries([query], months).get(query, [0] * months)
 
-            total = self.db.query(
-                func.sum(SearchConsoleQuery.clicks)
+    def _compute_sparklines_for_queries(self, queries: List[str], months: int = 6) -> Dict[str, List[int]]:
+        """
+        6-month click totals for many queries at once: one grouped query
+        over the monthly rollup per chunk. Queries with no clicks get zeros.
+        """
+        month_keys = self._recent_month_starts(months)
+        queries = list(dict.fromkeys(queries))
+        by_query = {q: {} for q in queries}
+        R = SearchConsoleQueryPageRollup
+        for i in range(0, len(queries), self._in_batch_size):
+            chunk = queries[i:i + self._in_batch_size]
+            rows = self.db.query(
+                R.query.label("query"),
+                R.period_start.label("period_start"),
+                func.sum(R.clicks).label("clicks"),
             ).filter(
-                SearchConsoleQuery.query == query,
-                SearchConsoleQuery.date >= ms,
-                SearchConsoleQuery.date <= me,
-            ).scalar() or 0
-            values.append(int(total))
-        return values
+                R.grain == GRAIN_MONTH,
+                R.query.in_(chunk),
+                R.period_start >= month_keys[0],
+            ).group_by(R.query, R.period_start).all()
+            for r in rows:
+                by_query[r.query][r.period_start] = int(r.clicks or 0)
+        return {q: [months_seen.get(ms, 0) for ms in month_keys] for q, months_seen in by_query.items()}
 
     def _compute_monthly_for_query(self, query: str, months: int = 6) -> List[Dict]:
         today = date.today()
@@ -8,22 +8,35 @@ Attribution hierarchy:
 1. gad_campaign_id (parsed from landing_site URL) — exact campaign ID match
 2. utm_campaign — normalized name match against campaign names
 3. No match — caller falls back to Google's reported numbers
+
+Matching happens once per order, not per report: index_orders() resolves
+orders into shopify_order_attribution when they are saved, and
+reindex_campaign_names() re-resolves the utm tier when imported campaign
+names change. get_campaign_revenue() is then two grouped queries (orders,
+line items) over the index. Both mark the campaigns they touch dirty for
+the next incremental AdSpendProcessor run.
 """
 import logging
-from collections import defaultdict
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from urllib.parse import unquote
 
-from sqlalchemy import or_, func
+from sqlalchemy import Numeric, and_, case, func, or_
 from sqlalchemy.orm import Session
 
-from app.models.shopify import ShopifyOrder, ShopifyOrderItem
+from app.models.shopify import ShopifyOrder, ShopifyOrderAttribution, ShopifyOrderItem
 from app.models.google_ads_data import GoogleAdsCampaign
+from app.services.ad_spend_changes import SOURCE_SHOPIFY, mark_dirty
 
 logger = logging.getLogger(__name__)
 
+ATTRIBUTABLE_STATUSES = ["paid", "partially_refunded"]
+INDEX_BATCH = 500
+
+TIER_GAD = "gad_campaign_id"
+TIER_UTM = "utm_campaign"
+
 
 class ShopifyRevenueAttributionService:
     """Attributes Shopify orders to Google Ads campaigns."""
@@ -50,70 +63,71 @@ class ShopifyRevenueAttributionService:
         # Normalize campaign IDs (strip trailing .0 from CSV import format)
         normalized_ids = {self._normalize_campaign_id(cid): cid for cid in campaign_ids}
 
-        # Build campaign name → normalized ID mapping for UTM fallback
-        name_to_id = self._build_name_to_id_map(campaign_ids, period_start, period_end)
-
-        # Fetch attributable orders in the period
         period_start_dt = datetime.combine(period_start, datetime.min.time())
         period_end_dt = datetime.combine(period_end, datetime.max.time())
 
-        orders = (
-            self.db.query(ShopifyOrder)
-            .filter(
-                ShopifyOrder.created_at >= period_start_dt,
-                ShopifyOrder.created_at <= period_end_dt,
-                ShopifyOrder.cancelled_at.is_(None),
-                ShopifyOrder.financial_status.in_(["paid", "partially_refunded"]),
-                or_(
-                    ShopifyOrder.gad_campaign_id.isnot(None),
-                    ShopifyOrder.utm_campaign.isnot(None),
-                ),
+        # Orders saved before the index existed (or by another writer)
+        self._index_missing_orders(period_start_dt, period_end_dt)
+
+        matched = self._matched_orders(list(normalized_ids), period_start_dt, period_end_dt).subquery()
+
+        order_rows = (
+            self.db.query(
+                matched.c.campaign_id,
+                matched.c.match_tier,
+                func.count().label("order_count"),
+                func.sum(matched.c.revenue).label("revenue"),
             )
+            .group_by(matched.c.campaign_id, matched.c.match_tier)
             .all()
         )
 
-        logger.info(f"Attribution: {len(orders)} attributable orders in period")
+        item = ShopifyOrderItem
+        costed = and_(item.cost_per_item.isnot(None), item.quantity.isnot(None), item.quantity != 0)
+        item_rows = (
+            self.db.query(
+                matched.c.campaign_id,
+                func.sum(case((costed, item.cost_per_item * item.quantity))).label("product_costs"),
+                func.count(func.distinct(case((and_(item.sku.isnot(None), item.sku != ""), item.sku)))).label("skus"),
+                func.sum(case(
+                    (and_(costed, item.price.isnot(None), item.price != 0, item.cost_per_item > item.price), 1),
+                    else_=0,
+                )).label("unprofitable"),
+            )
+            .join(item, item.shopify_order_id == matched.c.shopify_order_id)
+            .filter(matched.c.campaign_id.isnot(None))
+            .group_by(matched.c.campaign_id)
+            .all()
+        )
 
-        # Match orders to campaigns
-        campaign_orders: Dict[str, List] = defaultdict(list)
         stats = {"gad_matched": 0, "utm_matched": 0, "unmatched": 0}
-
-        for order in orders:
-            matched_id = None
-
-            # Tier 1: gad_campaign_id (exact match)
-            if order.gad_campaign_id:
-                norm_gad = self._normalize_campaign_id(order.gad_campaign_id)
-                if norm_gad in normalized_ids:
-                    matched_id = normalized_ids[norm_gad]
-                    stats["gad_matched"] += 1
-
-            # Tier 2: utm_campaign (name match)
-            if matched_id is None and order.utm_campaign:
-                norm_name = self._normalize_name(order.utm_campaign)
-                if norm_name in name_to_id:
-                    matched_id = name_to_id[norm_name]
-                    stats["utm_matched"] += 1
-
-            if matched_id:
-                campaign_orders[matched_id].append(order)
-            else:
-                stats["unmatched"] += 1
+        totals: Dict[str, Dict] = {}
+        for row in order_rows:
+            if row.campaign_id is None:
+                stats["unmatched"] += row.order_count
+                continue
+            stats["gad_matched" if row.match_tier == TIER_GAD else "utm_matched"] += row.order_count
+            t = totals.setdefault(row.campaign_id, {"order_count": 0, "revenue": Decimal("0")})
+            t["order_count"] += row.order_count
+            t["revenue"] += Decimal(row.revenue or 0)
+        items_by_campaign = {row.campaign_id: row for row in item_rows}
 
         logger.info(
-            f"Attribution: {stats['gad_matched']} via gad_campaign_id, "
+            f"Attribution: {sum(stats.values())} attributable orders in period — "
+            f"{stats['gad_matched']} via gad_campaign_id, "
             f"{stats['utm_matched']} via utm_campaign, "
             f"{stats['unmatched']} unmatched"
         )
 
-        # Calculate revenue per campaign
+        # Revenue per campaign, keyed by the caller's campaign ids
         result: Dict[str, Optional[Dict]] = {}
         for cid in campaign_ids:
-            orders_for_campaign = campaign_orders.get(cid, [])
-            if not orders_for_campaign:
+            norm = self._normalize_campaign_id(cid)
+            t = totals.get(norm)
+            if not t:
                 result[cid] = None
                 continue
-            result[cid] = self._calculate_campaign_metrics(orders_for_campaign)
+            result[cid] = self._campaign_metrics(t, items_by_campaign.get(norm))
 
         matched_campaigns = sum(1 for v in result.values() if v is not None)
         logger.info(
@@ -123,87 +137,217 @@ class ShopifyRevenueAttributionService:
 
         return result
 
-    def _build_name_to_id_map(
-        self, campaign_ids: List[str], period_start: date, period_end: date,
-    ) -> Dict[str, str]:
-        """Build {normalized_campaign_name: campaign_id} for UTM matching."""
-        rows = (
+    def _matched_orders(self, normalized_ids: List[str], start_dt: datetime, end_dt: datetime):
+        """
+        Attributable orders in the period with the requested campaign each
+        matches: gad_campaign_id first, then the utm_campaign name's id.
+        """
+        a = ShopifyOrderAttribution
+        gad_hit = a.gad_campaign_id.in_(normalized_ids)
+        utm_hit = a.utm_campaign_id.in_(normalized_ids)
+        # Net of refunds, excluding tax/shipping (zero falls through to the next figure)
+        revenue = func.coalesce(
+            func.nullif(ShopifyOrder.current_subtotal_price, 0),
+            func.nullif(ShopifyOrder.subtotal_price, 0),
+            ShopifyOrder.total_price,
+            0,
+            type_=Numeric(10, 2),
+        )
+        return (
             self.db.query(
-                GoogleAdsCampaign.campaign_id,
-                GoogleAdsCampaign.campaign_name,
+                ShopifyOrder.shopify_order_id.label("shopify_order_id"),
+                case((gad_hit, a.gad_campaign_id), (utm_hit, a.utm_campaign_id)).label("campaign_id"),
+                case((gad_hit, TIER_GAD), (utm_hit, TIER_UTM)).label("match_tier"),
+                revenue.label("revenue"),
             )
+            .join(a, a.shopify_order_id == ShopifyOrder.shopify_order_id)
             .filter(
-                GoogleAdsCampaign.date >= period_start,
-                GoogleAdsCampaign.date <= period_end,
+                ShopifyOrder.created_at >= start_dt,
+                ShopifyOrder.created_at <= end_dt,
+                ShopifyOrder.cancelled_at.is_(None),
+                ShopifyOrder.financial_status.in_(ATTRIBUTABLE_STATUSES),
             )
-            .distinct()
-            .all()
         )
 
-        mapping = {}
-        target_ids = set(campaign_ids)
-        for r in rows:
-            if r.campaign_id in target_ids:
-                norm = self._normalize_name(r.campaign_name)
-                mapping[norm] = r.campaign_id
-        return mapping
-
-    def _calculate_campaign_metrics(self, orders: List[ShopifyOrder]) -> Dict:
-        """Calculate revenue, COGS, and product metrics for a set of orders."""
-        total_revenue = Decimal("0")
-        total_cogs = Decimal("0")
-        all_skus = set()
-        unprofitable_count = 0
-
-        order_ids = [o.shopify_order_id for o in orders]
-
-        # Batch-load order items for all matched orders
-        items_by_order: Dict[int, List] = defaultdict(list)
-        if order_ids:
-            items = (
-                self.db.query(ShopifyOrderItem)
-                .filter(ShopifyOrderItem.shopify_order_id.in_(order_ids))
-                .all()
-            )
-            for item in items:
-                items_by_order[item.shopify_order_id].append(item)
-
-        for order in orders:
-            # Revenue: net of refunds, excluding tax/shipping
-            revenue = (
-                order.current_subtotal_price
-                or order.subtotal_price
-                or order.total_price
-                or Decimal("0")
-            )
-            total_revenue += revenue
-
-            # COGS from order items
-            for item in items_by_order.get(order.shopify_order_id, []):
-                if item.sku:
-                    all_skus.add(item.sku)
-
-                if item.cost_per_item is not None and item.quantity:
-                    item_cogs = item.cost_per_item * item.quantity
-                    total_cogs += item_cogs
-
-                    # Check if this product is unprofitable
-                    if item.price and item.cost_per_item > item.price:
-                        unprofitable_count += 1
+    @staticmethod
+    def _campaign_metrics(totals: Dict, items) -> Dict:
+        """Assemble the per-campaign result from the order and item aggregates."""
+        total_revenue = totals["revenue"]
+        total_cogs = Decimal(items.product_costs or 0) if items else Decimal("0")
 
         avg_margin = None
         if total_revenue > 0 and total_cogs > 0:
             avg_margin = round(float((total_revenue - total_cogs) / total_revenue), 4)
 
         return {
-            "order_count": len(orders),
+            "order_count": totals["order_count"],
             "revenue": total_revenue,
             "product_costs": total_cogs,
-            "products_advertised": len(all_skus),
+            "products_advertised": items.skus if items else 0,
             "avg_product_margin": avg_margin,
-            "unprofitable_products_count": unprofitable_count,
+            "unprofitable_products_count": int(items.unprofitable or 0) if items else 0,
+        }
+
+    # ── attribution index ───────────────────────────────────────────
+
+    def index_orders(self, order_ids: Iterable[int], commit: bool = True) -> int:
+        """
+        Resolve orders into the attribution index (insert or refresh).
+
+        Call after orders are saved; orders without a gad_campaign_id or
+        utm_campaign are skipped. Returns the number of index rows written.
+        """
+        order_ids = [oid for oid in set(order_ids) if oid is not None]
+        if not order_ids:
+            return 0
+
+        name_map, known_ids = self._campaign_lookup()
+        now = datetime.utcnow()
+        inserts, updates = [], []
+        touched = set()
+        for i in range(0, len(order_ids), INDEX_BATCH):
+            batch = order_ids[i:i + INDEX_BATCH]
+            orders = (
+                self.db.query(
+                    ShopifyOrder.shopify_order_id, ShopifyOrder.gad_campaign_id,
+                    ShopifyOrder.utm_campaign, ShopifyOrder.created_at,
+                )
+                .filter(
+                    ShopifyOrder.shopify_order_id.in_(batch),
+                    or_(ShopifyOrder.gad_campaign_id.isnot(None), ShopifyOrder.utm_campaign.isnot(None)),
+                )
+                .all()
+            )
+            existing = dict(
+                self.db.query(ShopifyOrderAttribution.shopify_order_id, ShopifyOrderAttribution.id)
+                .filter(ShopifyOrderAttribution.shopify_order_id.in_(batch))
+                .all()
+            )
+            for order_id, gad, utm, created_at in orders:
+                row = self._resolve(gad, utm, name_map, known_ids)
+                row["resolved_at"] = now
+                order_day = created_at.date() if created_at else None
+                touched.update((cid, order_day) for cid in (row["gad_campaign_id"], row["utm_campaign_id"]) if cid)
+                if order_id in existing:
+                    row["id"] = existing[order_id]
+                    updates.append(row)
+                else:
+                    row["shopify_order_id"] = order_id
+                    inserts.append(row)
+
+        if inserts:
+            self.db.bulk_insert_mappings(ShopifyOrderAttribution, inserts)
+        if updates:
+            self.db.bulk_update_mappings(ShopifyOrderAttribution, updates)
+        mark_dirty(self.db, touched, SOURCE_SHOPIFY)
+        if commit:
+            self.db.commit()
+        return len(inserts) + len(updates)
+
+    def reindex_campaign_names(self, commit: bool = True) -> int:
+        """
+        Re-resolve indexed orders against the current campaign names and ids.
+
+        Call after Google Ads campaigns are imported; only rows whose
+        resolution changed are written. Returns the number updated.
+        """
+        name_map, known_ids = self._campaign_lookup()
+        a = ShopifyOrderAttribution
+        rows = self.db.query(
+            a.id, a.gad_campaign_id, a.utm_name, a.utm_campaign_id, a.campaign_id, a.match_tier,
+        ).all()
+
+        now = datetime.utcnow()
+        updates = []
+        touched = set()
+        for row in rows:
+            utm_id = name_map.get(row.utm_name) if row.utm_name else None
+            campaign_id, tier = self._best_match(row.gad_campaign_id, utm_id, known_ids)
+            if (utm_id, campaign_id, tier) != (row.utm_campaign_id, row.campaign_id, row.match_tier):
+                # Both the campaign losing and the one gaining the order change
+                touched.update((cid, None) for cid in (row.utm_campaign_id, utm_id) if cid)
+                updates.append({
+                    "id": row.id, "utm_campaign_id": utm_id,
+                    "campaign_id": campaign_id, "match_tier": tier, "resolved_at": now,
+                })
+
+        if updates:
+            self.db.bulk_update_mappings(ShopifyOrderAttribution, updates)
+        mark_dirty(self.db, touched, SOURCE_SHOPIFY)
+        if commit:
+            self.db.commit()
+        if updates:
+            logger.info(f"Attribution index: re-resolved {len(updates)}/{len(rows)} orders after campaign import")
+        return len(updates)
+
+    def _index_missing_orders(self, start_dt: datetime, end_dt: datetime) -> int:
+        """Index attributable orders in the period that have no index row yet."""
+        missing = [
+            r[0] for r in (
+                self.db.query(ShopifyOrder.shopify_order_id)
+                .outerjoin(ShopifyOrderAttribution,
+                           ShopifyOrderAttribution.shopify_order_id == ShopifyOrder.shopify_order_id)
+                .filter(
+                    ShopifyOrderAttribution.id.is_(None),
+                    ShopifyOrder.created_at >= start_dt,
+                    ShopifyOrder.created_at <= end_dt,
+                    or_(ShopifyOrder.gad_campaign_id.isnot(None), ShopifyOrder.utm_campaign.isnot(None)),
+                )
+                .all()
+            )
+        ]
+        if not missing:
+            return 0
+        logger.info(f"Attribution index: backfilling {len(missing)} orders")
+        return self.index_orders(missing)
+
+    def _campaign_lookup(self) -> Tuple[Dict[str, str], Set[str]]:
+        """
+        {normalized_campaign_name: normalized campaign_id} and the set of
+        known campaign ids. A name reused by several campaigns resolves to
+        the one with the most recent data.
+        """
+        rows = (
+            self.db.query(
+                GoogleAdsCampaign.campaign_id,
+                GoogleAdsCampaign.campaign_name,
+                func.max(GoogleAdsCampaign.date).label("last_date"),
+            )
+            .group_by(GoogleAdsCampaign.campaign_id, GoogleAdsCampaign.campaign_name)
+            .all()
+        )
+
+        mapping = {}
+        known_ids = set()
+        for r in sorted(rows, key=lambda r: (r.last_date, r.campaign_id)):
+            norm_id = self._normalize_campaign_id(r.campaign_id)
+            known_ids.add(norm_id)
+            if r.campaign_name:
+                mapping[self._normalize_name(r.campaign_name)] = norm_id
+        return mapping, known_ids
+
+    def _resolve(self, gad: Optional[str], utm: Optional[str], name_map: Dict[str, str], known_ids: Set[str]) -> Dict:
+        """Index columns for one order's gad_campaign_id / utm_campaign."""
+        norm_gad = self._normalize_campaign_id(gad) if gad else None
+        utm_name = self._normalize_name(utm) if utm else None
+        utm_id = name_map.get(utm_name) if utm_name else None
+        campaign_id, tier = self._best_match(norm_gad, utm_id, known_ids)
+        return {
+            "gad_campaign_id": norm_gad,
+            "utm_name": utm_name,
+            "utm_campaign_id": utm_id,
+            "campaign_id": campaign_id,
+            "match_tier": tier,
         }
 
+    @staticmethod
+    def _best_match(norm_gad: Optional[str], utm_id: Optional[str], known_ids: Set[str]):
+        if norm_gad and norm_gad in known_ids:
+            return norm_gad, TIER_GAD
+        if utm_id:
+            return utm_id, TIER_UTM
+        return None, None
+
     @staticmethod
     def _normalize_campaign_id(campaign_id: str) -> str:
         """
@@ -0,0 +1,416 @@
+"""
+Shopify Webhook Service
+
+Incremental Shopify change feed. The /webhooks/shopify endpoint verifies the
+HMAC signature and enqueues each delivery in shopify_webhook_events;
+process_pending() drains the queue through the same normalize / validate /
+save path the polling sync uses (DataSyncService._save_shopify_orders and
+_save_shopify_refunds), so order items, refund rollups and the daily sales
+fact stay in step without re-fetching a day of orders.
+
+Handled topics: orders/create, orders/updated, refunds/create and
+inventory_levels/update (per-location levels, applied to the variant total
+as deltas). With SHOPIFY_WEBHOOKS_ENABLED the monitoring loop only runs the
+full Shopify poll every SHOPIFY_RECONCILE_MINUTES as a reconciliation sweep
+for missed deliveries.
+"""
+import base64
+import hashlib
+import hmac
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.base import SessionLocal
+from app.models.shopify import ShopifyInventory, ShopifyInventoryLevel, ShopifyWebhookEvent
+from app.utils.logger import log
+
+
+ORDER_TOPICS = ("orders/create", "orders/updated")
+REFUND_TOPIC = "refunds/create"
+INVENTORY_TOPIC = "inventory_levels/update"
+SUPPORTED_TOPICS = ORDER_TOPICS + (REFUND_TOPIC, INVENTORY_TOPIC)
+
+BATCH_SIZE = 500
+MAX_ATTEMPTS = 5
+RETENTION_DAYS = 7
+
+# One drain at a time per process (webhook background task vs monitoring loop)
+_drain_lock = threading.Lock()
+
+
+def verify_webhook_hmac(body: bytes, signature: Optional[str], secret: str) -> bool:
+    """Check X-Shopify-Hmac-Sha256 (base64 HMAC-SHA256 of the raw body)."""
+    if not signature or not secret:
+        return False
+    digest = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).digest()
+    return hmac.compare_digest(base64.b64encode(digest).decode(), signature.strip())
+
+
+def _float(value) -> float:
+    try:
+        return float(value) if value not in (None, "") else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def normalize_order(payload: Dict) -> Dict:
+    """Map an order webhook payload to ShopifyConnector._fetch_orders' shape."""
+    shipping = 0.0
+    shipping_set = payload.get("total_shipping_price_set") or {}
+    if shipping_set.get("shop_money"):
+        shipping = _float(shipping_set["shop_money"].get("amount"))
+    elif payload.get("shipping_lines"):
+        shipping = sum(_float(line.get("price")) for line in payload["shipping_lines"])
+
+    original_price = _float(payload.get("total_price"))
+    current_price = payload.get("current_total_price")
+    customer = payload.get("customer") or {}
+    line_items = payload.get("line_items") or []
+    gateways = payload.get("payment_gateway_names") or []
+
+    return {
+        "id": payload.get("id"),
+        "order_number": payload.get("order_number"),
+        "email": payload.get("email"),
+        "total_price": original_price,
+        "current_total_price": _float(current_price) if current_price not in (None, "") else original_price,
+        "subtotal_price": _float(payload.get("subtotal_price")),
+        "current_subtotal_price": _float(payload.get("current_subtotal_price")) if payload.get("current_subtotal_price") else None,
+        "total_tax": _float(payload.get("total_tax")),
+        "total_discounts": _float(payload.get("total_discounts")),
+        "total_shipping": shipping,
+        "currency": payload.get("currency"),
+        "financial_status": payload.get("financial_status"),
+        "fulfillment_status": payload.get("fulfillment_status"),
+        "created_at": payload.get("created_at"),
+        "updated_at": payload.get("updated_at"),
+        "processed_at": payload.get("processed_at"),
+        "cancelled_at": payload.get("cancelled_at"),
+        "cancel_reason": payload.get("cancel_reason"),
+        "customer_id": customer.get("id"),
+        "line_items_count": len(line_items),
+        "line_items": [
+            {
+                "id": item.get("id"),
+                "title": item.get("title"),
+                "quantity": item.get("quantity"),
+                "price": _float(item.get("price")),
+                "total_discount": _float(item.get("total_discount")),
+                "sku": item.get("sku"),
+                "variant_id": item.get("variant_id"),
+                "product_id": item.get("product_id"),
+                "vendor": item.get("vendor"),
+            }
+            for item in line_items
+        ],
+        "source_name": payload.get("source_name"),
+        "referring_site": payload.get("referring_site"),
+        "landing_site": payload.get("landing_site"),
+        "tags": payload.get("tags"),
+        "note": payload.get("note"),
+        "gateway": payload.get("gateway") or (gateways[0] if gateways else None),
+    }
+
+
+def normalize_refund(payload: Dict) -> Dict:
+    """Map a refund webhook payload to ShopifyConnector._fetch_refunds' shape."""
+    items = []
+    for item in payload.get("refund_line_items") or []:
+        line_item = item.get("line_item") or {}
+        items.append({
+            "line_item_id": item.get("line_item_id"),
+            "quantity": item.get("quantity"),
+            "subtotal": _float(item.get("subtotal")),
+            "total_tax": _float(item.get("total_tax")),
+            "sku": line_item.get("sku"),
+            "product_id": line_item.get("product_id"),
+        })
+    return {
+        "id": payload.get("id"),
+        "order_id": payload.get("order_id"),
+        "created_at": payload.get("created_at"),
+        "processed_at": payload.get("processed_at"),
+        "note": payload.get("note"),
+        "refund_line_items": items,
+        "total_refunded": sum(i["subtotal"] + i["total_tax"] for i in items),
+    }
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """Shopify ISO-8601 timestamp as naive UTC, or None."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _resource_id(topic: str, payload: Dict) -> Optional[int]:
+    key = "inventory_item_id" if topic == INVENTORY_TOPIC else "id"
+    value = payload.get(key)
+    return int(value) if value else None
+
+
+class ShopifyWebhookService:
+    """Queues verified Shopify webhooks and applies them incrementally"""
+
+    def __init__(self, db: Session, data_sync=None):
+        self.db = db
+        self._data_sync = data_sync
+
+    @property
+    def data_sync(self):
+        if self._data_sync is None:
+            from app.services.data_sync_service import DataSyncService
+            self._data_sync = DataSyncService()
+        return self._data_sync
+
+    def enqueue(
+        self,
+        topic: str,
+        payload: Dict,
+        webhook_id: Optional[str] = None,
+        shop_domain: Optional[str] = None,
+    ) -> Optional[ShopifyWebhookEvent]:
+        """Store a delivery for processing; returns None for a redelivered webhook_id."""
+        if webhook_id and self.db.query(ShopifyWebhookEvent.id).filter(
+            ShopifyWebhookEvent.webhook_id == webhook_id
+        ).first():
+            return None
+
+        event = ShopifyWebhookEvent(
+            webhook_id=webhook_id,
+            topic=topic,
+            shop_domain=shop_domain,
+            resource_id=_resource_id(topic, payload),
+            payload=payload,
+            status="pending",
+            received_at=datetime.utcnow(),
+        )
+        self.db.add(event)
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Concurrent redelivery of the same webhook
+            self.db.rollback()
+            return None
+        return event
+
+    def process_pending(self, limit: int = BATCH_SIZE) -> Dict:
+        """
+        Apply up to `limit` pending events, oldest first.
+
+        Orders and refunds go through one save call per topic so the rollup
+        and sales fact refreshes run once per batch. Events that fail are
+        retried on later drains, up to MAX_ATTEMPTS.
+        """
+        result = {"events": 0, "orders": 0, "refunds": 0, "inventory": 0, "failed": 0}
+        if not _drain_lock.acquire(blocking=False):
+            return result
+        try:
+            events = (
+                self.db.query(ShopifyWebhookEvent)
+                .filter(ShopifyWebhookEvent.status == "pending")
+                .order_by(ShopifyWebhookEvent.id)
+                .limit(limit)
+                .all()
+            )
+            if not events:
+                return result
+            result["events"] = len(events)
+
+            failed: Dict[int, str] = {}
+            for key, topics, apply in (
+                ("orders", ORDER_TOPICS, self._apply_orders),
+                ("refunds", (REFUND_TOPIC,), self._apply_refunds),
+                ("inventory", (INVENTORY_TOPIC,), self._apply_inventory),
+            ):
+                batch = [e for e in events if e.topic in topics]
+                if not batch:
+                    continue
+                try:
+                    result[key] = apply(batch, failed)
+                except Exception as e:
+                    self.db.rollback()
+                    log.warning(f"Applying Shopify {key} webhooks failed: {e}")
+                    failed.update({event.id: str(e) for event in batch})
+
+            now = datetime.utcnow()
+            for event in events:
+                if event.topic not in SUPPORTED_TOPICS:
+                    failed[event.id] = f"Unsupported topic {event.topic}"
+                event.attempts = (event.attempts or 0) + 1
+                if event.id in failed:
+                    event.error = failed[event.id][:2000]
+                    event.status = "failed" if event.attempts >= MAX_ATTEMPTS else "pending"
+                else:
+                    event.error = None
+                    event.status = "processed"
+                    event.processed_at = now
+            self.db.commit()
+            result["failed"] = len(failed)
+
+            log.info(
+                f"Shopify webhooks applied: {len(events)} events "
+                f"({result['orders']} orders, {result['refunds']} refunds, "
+                f"{result['inventory']} inventory levels, {len(failed)} failed)"
+            )
+            return result
+        finally:
+            _drain_lock.release()
+
+    @staticmethod
+    def _latest_per_resource(events: List[ShopifyWebhookEvent], stamp_key: str) -> Dict[int, Dict]:
+        """Latest payload per resource id; Shopify may deliver out of order."""
+        latest: Dict[int, Dict] = {}
+        for event in events:
+            rid = event.resource_id
+            if rid is None:
+                continue
+            current = latest.get(rid)
+            if current is None or str(event.payload.get(stamp_key) or "") >= str(current.get(stamp_key) or ""):
+                latest[rid] = event.payload
+        return latest
+
+    def _apply_orders(self, events: List[ShopifyWebhookEvent], failed: Dict[int, str]) -> int:
+        orders = [normalize_order(p) for p in self._latest_per_resource(events, "updated_at").values()]
+        save = self.data_sync._save_shopify_orders({"orders": {"items": orders}})
+
+        failed_ids = set(save.get("failed_ids") or [])
+        batch_failed = save["failed"] and not save["created"] and not save["updated"] and not failed_ids
+        for event in events:
+            if event.resource_id is None:
+                failed[event.id] = "Order payload has no id"
+            elif batch_failed:
+                failed[event.id] = "Order batch save failed"
+            elif str(event.resource_id) in failed_ids:
+                failed[event.id] = "Order failed validation or save"
+        return save["created"] + save["updated"]
+
+    def _apply_refunds(self, events: List[ShopifyWebhookEvent], failed: Dict[int, str]) -> int:
+        refunds = [normalize_refund(p) for p in self._latest_per_resource(events, "created_at").values()]
+        save = self.data_sync._save_shopify_refunds({"refunds": {"items": refunds}})
+
+        batch_failed = save["processed"] and save["failed"] >= save["processed"]
+        for event in events:
+            if event.resource_id is None:
+                failed[event.id] = "Refund payload has no id"
+            elif batch_failed:
+                failed[event.id] = "Refund batch save failed"
+        return save["created"] + save["updated"]
+
+    def _apply_inventory(self, events: List[ShopifyWebhookEvent], failed: Dict[int, str]) -> int:
+        """
+        Update stock for inventory items already in shopify_inventory.
+
+        Each payload is one location's `available`, while inventory_quantity
+        is the variant total across locations. The last level per location
+        is kept in shopify_inventory_levels and the total moves by the change
+        at that location. A location's first report after a full inventory
+        sync only records its baseline, since the sync carries totals, not
+        per-location levels. Payloads without a location_id are treated as
+        the whole item's level.
+
+        Unknown items are left to the next full inventory sync, which also
+        brings the product/variant details the webhook doesn't carry.
+        """
+        latest: Dict[tuple, Dict] = {}
+        for event in events:
+            if event.resource_id is None:
+                failed[event.id] = "Inventory payload has no inventory_item_id"
+                continue
+            if event.payload.get("available") is None:
+                continue
+            key = (event.resource_id, event.payload.get("location_id"))
+            current = latest.get(key)
+            if current is None or str(event.payload.get("updated_at") or "") >= str(current.get("updated_at") or ""):
+                latest[key] = event.payload
+        if not latest:
+            return 0
+
+        item_ids = {item_id for item_id, _ in latest}
+        rows = {
+            row.shopify_inventory_item_id: row
+            for row in self.db.query(ShopifyInventory).filter(
+                ShopifyInventory.shopify_inventory_item_id.in_(list(item_ids))
+            )
+        }
+        levels = {
+            (level.shopify_inventory_item_id, level.location_id): level
+            for level in self.db.query(ShopifyInventoryLevel).filter(
+                ShopifyInventoryLevel.shopify_inventory_item_id.in_(list(rows))
+            )
+        } if rows else {}
+
+        now = datetime.utcnow()
+        touched = set()
+        for (item_id, location_id), payload in latest.items():
+            row = rows.get(item_id)
+            if row is None:
+                continue
+            available = int(payload["available"])
+            if location_id is None:
+                row.inventory_quantity = available
+            else:
+                location_id = int(location_id)
+                level = levels.get((item_id, location_id))
+                if level is None:
+                    self.db.add(ShopifyInventoryLevel(
+                        shopify_inventory_item_id=item_id, location_id=location_id,
+                        available=available, updated_at=_parse_timestamp(payload.get("updated_at")),
+                    ))
+                else:
+                    row.inventory_quantity = (row.inventory_quantity or 0) + available - level.available
+                    level.available = available
+                    level.updated_at = _parse_timestamp(payload.get("updated_at"))
+            row.updated_at = now
+            row.synced_at = now
+            touched.add(item_id)
+        return len(touched)
+
+    def prune(self, days: int = RETENTION_DAYS) -> int:
+        """Delete processed events older than `days`."""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        deleted = self.db.query(ShopifyWebhookEvent).filter(
+            ShopifyWebhookEvent.status == "processed",
+            ShopifyWebhookEvent.received_at < cutoff,
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted or 0
+
+    def pending_count(self) -> int:
+        return self.db.query(ShopifyWebhookEvent).filter(ShopifyWebhookEvent.status == "pending").count()
+
+
+def drain_shopify_webhooks(data_sync=None) -> Dict:
+    """Apply pending webhook events in a fresh session (background task / monitoring loop)."""
+    db = SessionLocal()
+    try:
+        return ShopifyWebhookService(db, data_sync).process_pending()
+    except Exception as e:
+        db.rollback()
+        log.error(f"Error applying Shopify webhooks: {e}")
+        return {"events": 0, "failed": 0, "error": str(e)}
+    finally:
+        db.close()
+
+
+def prune_shopify_webhooks(days: int = RETENTION_DAYS) -> int:
+    """Delete old processed events (run with each reconciliation sweep)."""
+    db = SessionLocal()
+    try:
+        return ShopifyWebhookService(db).prune(days)
+    except Exception as e:
+        db.rollback()
+        log.error(f"Error pruning Shopify webhooks: {e}")
+        return 0
+    finally:
+        db.close()
@@ -676,25 +676,34 @@ class StrategicIntelligenceService:
             # Customer counts
             total_customers = self.db.query(func.count(ShopifyCustomer.id)).scalar() or 0
 
-            # At-risk: use RFM-based calculation (the is_at_risk boolean is not populated)
-            # Count customers whose last order was 90-365 days ago (at-risk window)
-            from sqlalchemy import distinct
-            cutoff_at_risk = datetime.now() - timedelta(days=90)
-            cutoff_lost = datetime.now() - timedelta(days=365)
-            at_risk = self.db.query(func.count(distinct(ShopifyOrder.customer_id))).filter(
-                ShopifyOrder.customer_id.isnot(None),
-            ).filter(
-                ~ShopifyOrder.customer_id.in_(
-                    self.db.query(ShopifyOrder.customer_id).filter(
-                        ShopifyOrder.created_at >= cutoff_at_risk
-                    )
-                ),
-                ShopifyOrder.customer_id.in_(
-                    self.db.query(ShopifyOrder.customer_id).filter(
-                        ShopifyOrder.created_at >= cutoff_lost
-                    )
-                ),
-            ).scalar() or 0
+            # At-risk: the churn scoring job's is_at_risk flag once customers are scored
+            scored = self.db.query(ShopifyCustomer.id).filter(
+                ShopifyCustomer.churn_probability.isnot(None)
+            ).first() is not None
+            if scored:
+                at_risk = self.db.query(func.count(ShopifyCustomer.id)).filter(
+                    ShopifyCustomer.is_at_risk.is_(True)
+                ).scalar() or 0
+            else:
+                # Not scored yet: RFM-based calculation
+                # Count customers whose last order was 90-365 days ago (at-risk window)
+                from sqlalchemy import distinct
+                cutoff_at_risk = datetime.now() - timedelta(days=90)
+                cutoff_lost = datetime.now() - timedelta(days=365)
+                at_risk = self.db.query(func.count(distinct(ShopifyOrder.customer_id))).filter(
+                    ShopifyOrder.customer_id.isnot(None),
+                ).filter(
+                    ~ShopifyOrder.customer_id.in_(
+                        self.db.query(ShopifyOrder.customer_id).filter(
+                            ShopifyOrder.created_at >= cutoff_at_risk
+                        )
+                    ),
+                    ShopifyOrder.customer_id.in_(
+                        self.db.query(ShopifyOrder.customer_id).filter(
+                            ShopifyOrder.created_at >= cutoff_lost
+                        )
+                    ),
+                ).scalar() or 0
 
             snapshot['total_customers'] = total_customers
             snapshot['at_risk_customers'] = at_risk
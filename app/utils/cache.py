@@ -7,6 +7,7 @@ _MISS = object()
 
 # Which cache key prefixes depend on which data source.
 # Used by clear_for_source() so a Shopify sync doesn't nuke SEO caches etc.
+# Brand detail ("brand_") spans sales, ads, pricing, search and GA4 panels.
 _SOURCE_PREFIXES: dict[str, list[str]] = {
     "shopify": [
         "finance_", "perf_summary", "ml_drivers", "ml_tracking",
@@ -14,10 +15,11 @@ _SOURCE_PREFIXES: dict[str, list[str]] = {
         "ml_stock_health", "pricing_unmatchable", "pricing_brand_summary",
         "brand_", "sw_", "ci_",
     ],
-    "ga4": ["perf_summary", "ml_drivers", "ml_tracking"],
-    "search_console": ["seo_"],
-    "google_ads": ["ads:"],
-    "cost_sheet": ["pricing_", "finance_"],
+    "ga4": ["perf_summary", "ml_drivers", "ml_tracking", "brand_"],
+    "search_console": ["seo_", "brand_"],
+    "google_ads": ["ads:", "brand_"],
+    "cost_sheet": ["pricing_", "finance_", "brand_"],
+    "caprice": ["pricing_", "brand_"],
     "merchant_center": ["mc_"],
 }
 
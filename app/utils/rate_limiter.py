@@ -0,0 +1,65 @@
+"""
+Async rate limiting for quota-bound APIs.
+
+A token bucket shared by every worker that talks to the same API quota.
+Workers call acquire() before each request; when the API answers 429 the
+worker calls penalize() so *all* workers back off together instead of
+each one hammering the quota on its own retry schedule.
+"""
+import asyncio
+import time
+from typing import Optional
+
+from app.utils.logger import log
+
+
+class AsyncRateLimiter:
+    """Token bucket limiter (requests per period) with a shared cooldown."""
+
+    def __init__(self, rate: float, per: float = 60.0, burst: Optional[int] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.per = per
+        self.capacity = float(burst if burst is not None else max(1, int(rate // 10)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._cooldown_until = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def interval(self) -> float:
+        """Seconds per token."""
+        return self.per / self.rate
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed / self.interval)
+            self._updated = now
+
+    async def acquire(self) -> float:
+        """Wait for a token; returns the seconds spent waiting."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._cooldown_until:
+                    delay = self._cooldown_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return waited
+                    delay = (1 - self._tokens) * self.interval
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def penalize(self, seconds: float) -> None:
+        """Pause every caller for `seconds` (e.g. after a 429) and drain the bucket."""
+        until = time.monotonic() + seconds
+        if until > self._cooldown_until:
+            self._cooldown_until = until
+            self._tokens = 0.0
+            self._updated = until
+            log.warning(f"Rate limit hit — pausing all requests for {seconds:.0f}s")
@@ -131,6 +131,7 @@ def main():
             "base_model": 0,
             "no_match": 0,
         }
+        costed_dates = set()
 
         while offset < total:
             items = (
@@ -155,6 +156,7 @@ def main():
 
                 if cost is not None:
                     item.cost_per_item = cost
+                    costed_dates.add(item.order_date.date())
 
                 stats[match_type] += 1
                 stats["processed"] += 1
@@ -174,6 +176,12 @@ def main():
         logger.info(f"  Total matched:           {matched} ({matched/max(stats['processed'],1)*100:.1f}%)")
         logger.info(f"  No match:                {stats['no_match']} ({stats['no_match']/max(stats['processed'],1)*100:.1f}%)")
 
+        # COGS feeds the daily sales fact table — refresh the days we costed
+        if costed_dates:
+            from app.services.sales_fact_service import SalesFactService
+            refreshed = SalesFactService(db).refresh_dates(costed_dates)
+            logger.info(f"  Sales fact refreshed:    {refreshed['runs']} date runs")
+
     finally:
         db.close()
 
@@ -98,6 +98,16 @@ def backfill_order_items():
         final_count = db.query(func.count(ShopifyOrderItem.id)).scalar() or 0
         print(f"Final order items count: {final_count}")
 
+        # Rebuild the per-day product sales rollup from the fresh items
+        from app.services.product_sales_rollup_service import ProductSalesRollupService
+        rebuilt = ProductSalesRollupService(db).rebuild()
+        print(f"Rebuilt product sales rollup: {rebuilt['months_rebuilt']} months")
+
+        # ...and the daily sales fact table behind brand/finance reporting
+        from app.services.sales_fact_service import SalesFactService
+        rebuilt = SalesFactService(db).rebuild()
+        print(f"Rebuilt sales fact table: {rebuilt['months_rebuilt']} months")
+
     except Exception as e:
         print(f"Error: {e}")
         db.rollback()
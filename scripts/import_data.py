@@ -24,7 +24,7 @@ from decimal import Decimal, InvalidOperation
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pandas as pd
-from sqlalchemy import text
+from sqlalchemy import insert, text, update
 
 from app.models.base import SessionLocal, engine, Base
 from app.models.competitive_pricing import CompetitivePricing
@@ -183,13 +183,158 @@ def _get_column_map(format_id: int, df_columns) -> dict:
     return {k: v for k, v in base_map.items() if k in col_set}
 
 
-def import_caprice_file(file_path: str, db) -> dict:
+STRING_FIELDS = ('match_rule', 'vendor', 'variant_sku', 'title')
+# Flags calculate_flags() only sets when their inputs are present
+OPTIONAL_FLAGS = ('is_losing_money', 'is_below_minimum', 'is_above_rrp')
+MERGE_CHUNK_SIZE = 5000
+
+
+def read_caprice_frame(file_path: str) -> pd.DataFrame:
+    """
+    Read a Caprice Excel file into a typed frame keyed by DB field names.
+
+    Columns are mapped for the detected format and cleaned column-wise:
+    prices are coerced to numbers (unparseable values become NULL) and text
+    fields to strings. variant_id is left as read so prepare_caprice_rows()
+    can tell a missing ID (skipped) from an unparseable one (error). Every
+    row is kept; see prepare_caprice_rows() for skipping and de-duplication.
+    """
+    sheet_name, format_id = _detect_sheet_and_format(file_path)
+    df = pd.read_excel(file_path, sheet_name=sheet_name)
+    total_rows = len(df)
+
+    column_map = _get_column_map(format_id, df.columns)
+    # Several Excel headers can map to one field; the last one present wins
+    fields = {}
+    for excel_col, field in column_map.items():
+        fields[field] = excel_col
+    df = pd.DataFrame({field: df[excel_col] for field, excel_col in fields.items()}, index=df.index)
+
+    for field in df.columns:
+        if field == 'variant_id':
+            continue
+        if field in STRING_FIELDS:
+            df[field] = df[field].astype(str).where(df[field].notna(), None)
+        else:
+            df[field] = pd.to_numeric(df[field], errors='coerce')
+    if 'variant_id' not in df.columns:
+        df['variant_id'] = pd.Series(float('nan'), index=df.index)
+
+    print(f"  Rows in file: {total_rows:,} (format {format_id}, sheet '{sheet_name}')")
+    return df
+
+
+def prepare_caprice_rows(df: pd.DataFrame) -> tuple[pd.DataFrame, int, int]:
+    """
+    Drop rows without a variant ID, keep the first row per variant and
+    compute the alert flags column-wise (same rules as
+    CompetitivePricing.calculate_flags).
+
+    A flag whose inputs are missing is left as None (not computed), like
+    calculate_flags() leaving the attribute untouched: merge_caprice_rows()
+    then keeps the stored value, or the column default for new rows.
+
+    Returns (rows, skipped, errors); errors are rows whose variant ID is
+    present but not a number.
+    """
+    total = len(df)
+    raw_ids = df['variant_id']
+    variant_ids = pd.to_numeric(raw_ids, errors='coerce')
+    present = raw_ids.notna() & (raw_ids.astype(str).str.strip() != '')
+    errors = int((present & variant_ids.isna()).sum())
+
+    df = df.assign(variant_id=variant_ids)
+    df = df[variant_ids.notna() & (variant_ids != 0)].copy()
+    df['variant_id'] = df['variant_id'].astype('int64')
+    df = df.drop_duplicates(subset=['variant_id'], keep='first')
+
+    def num(field):
+        return df[field] if field in df.columns else pd.Series(float('nan'), index=df.index)
+
+    profit = num('profit_amount')
+    current = num('current_price')
+    nett = num('nett_cost')
+    minimum = num('minimum_price')
+    rrp = num('rrp')
+
+    def is_set(s):
+        return s.notna() & (s != 0)
+
+    def flag(value, computed):
+        return value.astype(object).where(computed, None)
+
+    has_price = is_set(current)
+    df['is_losing_money'] = flag(
+        profit.lt(0).where(profit.notna(), current.lt(nett)),
+        profit.notna() | (has_price & is_set(nett)),
+    )
+    df['is_below_minimum'] = flag(current.lt(minimum), has_price & is_set(minimum))
+    df['is_above_rrp'] = flag(current.gt(rrp), has_price & is_set(rrp))
+    df['has_no_cost'] = nett.isna()
+
+    return df, total - len(df) - errors, errors
+
+
+def merge_caprice_rows(db, df: pd.DataFrame, pricing_date: date, source_file: str) -> tuple[int, int]:
+    """
+    Merge prepared rows into competitive_pricing on (variant_id, pricing_date).
+
+    Existing rows for the date are looked up once; new variants are bulk
+    inserted and existing ones bulk updated by primary key (only the
+    columns present in the file are written), in a single transaction.
+
+    Returns (imported, updated).
+    """
+    existing = dict(
+        db.query(CompetitivePricing.variant_id, CompetitivePricing.id)
+        .filter(CompetitivePricing.pricing_date == pricing_date)
+        .all()
+    )
+
+    df = df.assign(pricing_date=pricing_date, source_file=source_file,
+                   import_date=datetime.now(timezone.utc))
+    df['id'] = df['variant_id'].map(existing).astype('Int64')
+    df = df.astype(object).where(df.notna(), None)
+
+    is_new = df['id'].isna()
+    # New rows: uncomputed flags take the column default (False)
+    new_rows = df[is_new].drop(columns=['id']).to_dict('records')
+    for row in new_rows:
+        for field in OPTIONAL_FLAGS:
+            if row.get(field, False) is None:
+                row[field] = False
+
+    # Existing rows: uncomputed flags keep their stored value. Bulk updates
+    # need one column set per statement, so group rows by which flags are set.
+    changed_groups: dict[tuple, list] = {}
+    for row in df[~is_new].to_dict('records'):
+        unset = tuple(f for f in OPTIONAL_FLAGS if f in row and row[f] is None)
+        for field in unset:
+            del row[field]
+        changed_groups.setdefault(unset, []).append(row)
+
+    try:
+        for offset in range(0, len(new_rows), MERGE_CHUNK_SIZE):
+            db.execute(insert(CompetitivePricing), new_rows[offset:offset + MERGE_CHUNK_SIZE])
+        for changed_rows in changed_groups.values():
+            for offset in range(0, len(changed_rows), MERGE_CHUNK_SIZE):
+                db.execute(update(CompetitivePricing), changed_rows[offset:offset + MERGE_CHUNK_SIZE])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return len(new_rows), sum(len(rows) for rows in changed_groups.values())
+
+
+def import_caprice_file(file_path: str, db, frame: pd.DataFrame | None = None) -> dict:
     """
     Import a Caprice pricing log Excel file
 
     Args:
         file_path: Path to the Excel file
         db: Database session
+        frame: Typed frame already read from the file (see read_caprice_frame)
 
     Returns:
         Dict with import results
@@ -208,114 +353,14 @@ def import_caprice_file(file_path: str, db) -> dict:
     print(f"Pricing Date: {pricing_date}")
     print(f"{'='*60}")
 
-    # Check if we already have data for this date
-    existing_count = db.query(CompetitivePricing).filter(
-        CompetitivePricing.pricing_date == pricing_date
-    ).count()
-
-    if existing_count > 0:
-        print(f"  Found {existing_count:,} existing records for {pricing_date}")
-        print(f"  Will update existing records")
-
-    # Auto-detect sheet name and format
-    try:
-        sheet_name, format_id = _detect_sheet_and_format(file_path)
-    except Exception as e:
-        return {"success": False, "error": f"Failed to detect format: {e}"}
-
-    # Read the Excel file with detected sheet
-    try:
-        df = pd.read_excel(file_path, sheet_name=sheet_name)
-    except Exception as e:
-        return {"success": False, "error": f"Failed to read file: {e}"}
-
-    print(f"  Rows in file: {len(df):,} (format {format_id}, sheet '{sheet_name}')")
-
-    # Get column mapping for this format
-    column_map = _get_column_map(format_id, df.columns)
-
-    # Determine variant ID column name
-    variant_id_col = 'variantId' if 'variantId' in df.columns else 'Variant ID'
-
-    imported = 0
-    updated = 0
-    skipped = 0
-    errors = 0
-
-    source_filename = filename
-    import_time = datetime.now(timezone.utc)
-
-    # Track variant IDs we've seen in this file to handle duplicates
-    seen_variants = set()
-
-    for idx, row in df.iterrows():
+    if frame is None:
         try:
-            # Skip rows without variant ID
-            variant_id = row.get(variant_id_col)
-            if pd.isna(variant_id) or not variant_id:
-                skipped += 1
-                continue
-
-            variant_id = int(variant_id)
-
-            # Skip duplicate variant IDs within same file
-            if variant_id in seen_variants:
-                skipped += 1
-                continue
-            seen_variants.add(variant_id)
-
-            # Check if exists for this date
-            existing = db.query(CompetitivePricing).filter(
-                CompetitivePricing.variant_id == variant_id,
-                CompetitivePricing.pricing_date == pricing_date
-            ).first()
-
-            if existing:
-                pricing = existing
-                updated += 1
-            else:
-                pricing = CompetitivePricing(
-                    variant_id=variant_id,
-                    pricing_date=pricing_date
-                )
-                db.add(pricing)
-                imported += 1
-
-            # Map columns
-            for excel_col, model_field in column_map.items():
-                if excel_col in row.index:
-                    value = row[excel_col]
-
-                    # Handle different field types
-                    if model_field == 'variant_id':
-                        continue  # Already set
-                    elif model_field in ['match_rule', 'vendor', 'variant_sku', 'title']:
-                        # String fields
-                        setattr(pricing, model_field, str(value) if pd.notna(value) else None)
-                    else:
-                        # Decimal fields
-                        setattr(pricing, model_field, parse_decimal(value))
-
-            # Set metadata
-            pricing.source_file = source_filename
-            pricing.import_date = import_time
-
-            # Calculate flags
-            pricing.calculate_flags()
-
-            # Commit every 1000 rows
-            if (imported + updated) % 1000 == 0:
-                db.commit()
-                print(f"  Progress: {imported + updated:,} processed...")
-
+            frame = read_caprice_frame(file_path)
         except Exception as e:
-            errors += 1
-            db.rollback()  # Rollback failed transaction
-            if errors <= 3:
-                print(f"  Error row {idx}: {str(e)[:100]}")
+            return {"success": False, "error": f"Failed to read file: {e}"}
 
-    # Final commit
-    db.commit()
+    rows, skipped, errors = prepare_caprice_rows(frame)
+    imported, updated = merge_caprice_rows(db, rows, pricing_date, filename)
 
     # Summary
     print(f"\n  RESULTS for {pricing_date}:")
@@ -5,6 +5,13 @@ Migrate all data from SQLite (ml_audit.db) to Postgres (Neon).
 Safe to re-run: truncates each target table before inserting.
 Copies data in batches to stay within memory limits.
 
+The default "copy" mode streams rows through Postgres COPY FROM STDIN (CSV)
+in keyset chunks ordered by SQLite rowid, loads tables with no foreign-key
+dependency on each other concurrently, drops secondary indexes for the
+load and rebuilds them afterwards, and reports rows/sec per table. Progress
+is checkpointed per chunk so --resume carries on from the last committed
+rowid. "insert" mode is the original batched INSERT path.
+
 Usage:
     # Dry-run (show tables and row counts, no writes)
     python scripts/migrate_sqlite_to_postgres.py --dry-run
@@ -12,19 +19,30 @@ Usage:
     # Full migration
     DATABASE_URL=postgresql://... python scripts/migrate_sqlite_to_postgres.py
 
+    # Continue an interrupted run from its checkpoint
+    DATABASE_URL=postgresql://... python scripts/migrate_sqlite_to_postgres.py --resume
+
     # Migrate specific tables only
     python scripts/migrate_sqlite_to_postgres.py --tables shopify_orders shopify_order_items
 """
 import argparse
+import csv
+import io
+import json
 import os
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.pool import NullPool
 
 SQLITE_PATH = os.path.join(os.path.dirname(__file__), "..", "ml_audit.db")
+CHECKPOINT_PATH = os.path.join(os.path.dirname(__file__), "..", ".migrate_checkpoint.json")
 BATCH_SIZE = 2000
+COPY_CHUNK_ROWS = 50000
+COPY_NULL = "\\N"
 
 # Tables to skip (not real data, or Alembic-managed)
 SKIP_TABLES = {"alembic_version", "__caprice_import_test"}
@@ -39,8 +57,8 @@ def get_src_engine():
     )
 
 
-def get_dst_engine(pg_url: str):
-    return create_engine(pg_url, pool_pre_ping=True, pool_size=5, max_overflow=10)
+def get_dst_engine(pg_url: str, workers: int = 1):
+    return create_engine(pg_url, pool_pre_ping=True, pool_size=max(5, workers), max_overflow=10)
 
 
 def get_table_counts(engine, tables: list[str]) -> dict[str, int]:
@@ -150,11 +168,228 @@ def migrate_table(src_engine, dst_engine, table: str, resume: bool = False) -> i
     return copied
 
 
+# ── COPY mode ─────────────────────────────────────────────────────
+
+
+class Checkpoint:
+    """Per-table progress (last copied rowid, saved index DDL) in a JSON file."""
+
+    def __init__(self, path: str, fresh: bool):
+        self.path = path
+        self._lock = threading.Lock()
+        self.tables = {}
+        if not fresh and os.path.exists(path):
+            with open(path) as f:
+                self.tables = json.load(f).get("tables", {})
+
+    def get(self, table: str) -> dict:
+        with self._lock:
+            return dict(self.tables.get(table, {}))
+
+    def update(self, table: str, **values):
+        with self._lock:
+            self.tables.setdefault(table, {}).update(values)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({"sqlite_path": os.path.abspath(SQLITE_PATH), "tables": self.tables}, f, indent=1)
+            os.replace(tmp, self.path)
+
+
+def _copy_value(v):
+    if v is None:
+        return COPY_NULL
+    if isinstance(v, (bytes, bytearray, memoryview)):
+        return "\\x" + bytes(v).hex()
+    return v
+
+
+def _secondary_indexes(conn, table: str) -> list[list[str]]:
+    """[name, CREATE INDEX statement] for indexes not backing a PK/unique constraint."""
+    rows = conn.execute(text("""
+        SELECT i.indexname, i.indexdef
+        FROM pg_indexes i
+        WHERE i.schemaname = current_schema()
+          AND i.tablename = :t
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint c
+              WHERE c.conname = i.indexname AND c.connamespace = to_regnamespace(current_schema())
+          )
+    """), {"t": table})
+    return [[r[0], r[1]] for r in rows]
+
+
+def _load_waves(dst_engine, tables: list[str]) -> list[list[str]]:
+    """Group tables so each wave only references tables loaded in earlier waves."""
+    insp = inspect(dst_engine)
+    pg_tables = set(insp.get_table_names())
+    wanted = set(tables)
+    deps = {}
+    for t in tables:
+        refs = set()
+        if t in pg_tables:
+            for fk in insp.get_foreign_keys(t):
+                ref = fk.get("referred_table")
+                if ref and ref != t and ref in wanted:
+                    refs.add(ref)
+        deps[t] = refs
+
+    waves, done = [], set()
+    remaining = list(tables)
+    while remaining:
+        ready = [t for t in remaining if deps[t] <= done]
+        if not ready:  # dependency cycle: load the rest together
+            ready = remaining
+        waves.append(ready)
+        done.update(ready)
+        remaining = [t for t in remaining if t not in done]
+    return waves
+
+
+def copy_table(src_engine, dst_engine, table: str, checkpoint: Checkpoint) -> dict:
+    """
+    Stream one table into Postgres with COPY, resuming after the
+    checkpointed rowid. Returns {"copied", "seconds", "rows_per_sec"}
+    ("copied" is -1 when the table is skipped).
+    """
+    state = checkpoint.get(table)
+    if state.get("done"):
+        return {"copied": 0, "seconds": 0.0, "rows_per_sec": 0.0, "already_done": True}
+
+    with src_engine.connect() as src_conn:
+        info = list(src_conn.execute(text(f'PRAGMA table_info("{table}")')))
+    columns = [row[1] for row in info]
+    # An INTEGER PRIMARY KEY is SQLite's rowid, so its value doubles as the keyset position
+    pk = [row for row in info if row[5]]
+    rowid_col = pk[0][1] if len(pk) == 1 and str(pk[0][2]).upper() == "INTEGER" else None
+
+    insp = inspect(dst_engine)
+    if table not in insp.get_table_names():
+        print(f"  SKIP {table}: not in Postgres schema")
+        return {"copied": -1, "seconds": 0.0, "rows_per_sec": 0.0}
+    pg_cols = {c["name"] for c in insp.get_columns(table)}
+    common_cols = [c for c in columns if c in pg_cols]
+    if not common_cols:
+        print(f"  SKIP {table}: no common columns")
+        return {"copied": -1, "seconds": 0.0, "rows_per_sec": 0.0}
+
+    # Drop secondary indexes for the load (DDL saved first so a crash can rebuild them)
+    indexes = state.get("indexes")
+    with dst_engine.begin() as conn:
+        if indexes is None:
+            indexes = _secondary_indexes(conn, table)
+            checkpoint.update(table, indexes=indexes)
+        for name, _ddl in indexes:
+            conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+
+    col_list = ", ".join(f'"{c}"' for c in common_cols)
+    copy_sql = f"COPY \"{table}\" ({col_list}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+    select_sql = text(
+        f'SELECT rowid, {col_list} FROM "{table}" WHERE rowid > :last ORDER BY rowid LIMIT :n'
+    )
+
+    last_rowid = state.get("last_rowid", 0)
+    if state and rowid_col in common_cols:
+        # A chunk can commit before its checkpoint is written; never re-copy it
+        with dst_engine.connect() as conn:
+            copied_max = conn.execute(text(f'SELECT MAX("{rowid_col}") FROM "{table}"')).scalar()
+        last_rowid = max(last_rowid, copied_max or 0)
+    copied_before = state.get("rows", 0)
+    copied = 0
+    t0 = time.time()
+
+    raw = dst_engine.raw_connection()
+    try:
+        with src_engine.connect() as src_conn:
+            while True:
+                rows = src_conn.execute(select_sql, {"last": last_rowid, "n": COPY_CHUNK_ROWS}).fetchall()
+                if not rows:
+                    break
+                buf = io.StringIO()
+                writer = csv.writer(buf, lineterminator="\n")
+                for row in rows:
+                    writer.writerow([_copy_value(v) for v in row[1:]])
+                buf.seek(0)
+
+                cur = raw.cursor()
+                cur.copy_expert(copy_sql, buf)
+                cur.close()
+                raw.commit()
+
+                last_rowid = rows[-1][0]
+                copied += len(rows)
+                checkpoint.update(table, last_rowid=last_rowid, rows=copied_before + copied)
+    finally:
+        raw.close()
+
+    # Rebuild indexes and move the id sequence past the copied ids
+    with dst_engine.begin() as conn:
+        existing = {r[0] for r in conn.execute(
+            text("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :t"),
+            {"t": table},
+        )}
+        for name, ddl in indexes:
+            if name not in existing:
+                conn.execute(text(ddl))
+        if "id" in common_cols:
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM \"{table}\"), 0) + 1, false) "
+                f"WHERE pg_get_serial_sequence('\"{table}\"', 'id') IS NOT NULL"
+            ))
+
+    elapsed = time.time() - t0
+    checkpoint.update(table, done=True)
+    return {
+        "copied": copied_before + copied,
+        "seconds": round(elapsed, 1),
+        "rows_per_sec": round(copied / elapsed, 0) if elapsed > 0 else 0.0,
+    }
+
+
+def migrate_copy(src_engine, dst_engine, tables: list[str], resume: bool,
+                 workers: int, checkpoint_path: str) -> dict:
+    """COPY every table, independent tables concurrently. Returns {table: stats}."""
+    checkpoint = Checkpoint(checkpoint_path, fresh=not resume)
+
+    # Truncate every table starting from scratch up front, so a CASCADE can't
+    # wipe a table another worker has already loaded.
+    pg_tables = set(inspect(dst_engine).get_table_names())
+    fresh = [t for t in tables if t in pg_tables and not checkpoint.get(t)]
+    if fresh:
+        with dst_engine.begin() as conn:
+            conn.execute(text("TRUNCATE TABLE " + ", ".join(f'"{t}"' for t in fresh) + " CASCADE"))
+    if resume:
+        started = len(tables) - len(fresh)
+        print(f"  Resuming from {checkpoint_path} ({started} table(s) started or done)")
+
+    stats = {}
+    waves = _load_waves(dst_engine, tables)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for wave in waves:
+            futures = {t: pool.submit(copy_table, src_engine, dst_engine, t, checkpoint) for t in wave}
+            for table, future in futures.items():
+                result = future.result()
+                stats[table] = result
+                if result["copied"] < 0:
+                    continue
+                if result.get("already_done"):
+                    print(f"  {table}: already copied (checkpoint)")
+                else:
+                    print(f"  {table}: OK ({result['copied']:,} rows, {result['seconds']:.1f}s, "
+                          f"{result['rows_per_sec']:,.0f} rows/s)")
+    return stats
+
+
 def main():
     parser = argparse.ArgumentParser(description="Migrate SQLite → Postgres")
     parser.add_argument("--dry-run", action="store_true", help="Show counts only")
-    parser.add_argument("--resume", action="store_true", help="Skip truncate, use ON CONFLICT DO NOTHING")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the checkpoint (copy) / ON CONFLICT DO NOTHING (insert)")
     parser.add_argument("--tables", nargs="+", help="Migrate specific tables only")
+    parser.add_argument("--mode", choices=["copy", "insert"], default="copy",
+                        help="COPY FROM STDIN (default) or batched INSERT")
+    parser.add_argument("--workers", type=int, default=4, help="Tables copied concurrently (copy mode)")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="Checkpoint file for --resume (copy mode)")
     args = parser.parse_args()
 
     pg_url = os.environ.get("DATABASE_URL", "")
@@ -168,7 +403,7 @@ def main():
 
     # Connect
     src = get_src_engine()
-    dst = get_dst_engine(pg_url) if pg_url else None
+    dst = get_dst_engine(pg_url, args.workers) if pg_url else None
 
     # Get source tables
     with src.connect() as conn:
@@ -205,17 +440,25 @@ def main():
     start = time.time()
     results = {}
 
-    for table in sorted(non_empty, key=lambda x: non_empty[x]):
-        count = non_empty[table]
-        print(f"  {table} ({count:,} rows)...", end=" ", flush=True)
-        t0 = time.time()
-        copied = migrate_table(src, dst, table, resume=args.resume)
-        elapsed = time.time() - t0
-        if copied >= 0:
-            print(f"OK ({copied:,} copied, {elapsed:.1f}s)")
-            results[table] = copied
-        else:
-            results[table] = 0
+    if args.mode == "copy":
+        stats = migrate_copy(
+            src, dst, sorted(non_empty, key=lambda x: non_empty[x]),
+            resume=args.resume, workers=args.workers, checkpoint_path=args.checkpoint,
+        )
+        results = {t: max(s["copied"], 0) for t, s in stats.items()}
+    else:
+        for table in sorted(non_empty, key=lambda x: non_empty[x]):
+            count = non_empty[table]
+            print(f"  {table} ({count:,} rows)...", end=" ", flush=True)
+            t0 = time.time()
+            copied = migrate_table(src, dst, table, resume=args.resume)
+            elapsed = time.time() - t0
+            if copied >= 0:
+                rate = copied / elapsed if elapsed > 0 else 0
+                print(f"OK ({copied:,} copied, {elapsed:.1f}s, {rate:,.0f} rows/s)")
+                results[table] = copied
+            else:
+                results[table] = 0
 
     total_time = time.time() - start
 
@@ -243,6 +486,8 @@ def main():
 
     if ok:
         print("\nAll counts match. Migration successful.")
+        if args.mode == "copy" and os.path.exists(args.checkpoint):
+            os.remove(args.checkpoint)
     else:
         print("\nWARNING: Some counts don't match. Check tables above.")
         sys.exit(1)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Rebuild Search Console rollup tables from raw query/page history.
+
+Populates search_console_query_daily, search_console_page_daily and
+search_console_query_page_rollups. Run once after deploying the rollup
+tables (the daily sync keeps them fresh afterwards), or after a manual
+backfill that bypassed DataSyncService.
+
+Pass --reclassify after changing GSC_BRAND_TERMS to recompute the stored
+brand / spam / non_brand query_class on every row first.
+
+Usage:
+    python scripts/rebuild_search_console_rollups.py
+    python scripts/rebuild_search_console_rollups.py --start 2025-01-01 --end 2025-03-31
+    python scripts/rebuild_search_console_rollups.py --reclassify
+"""
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.base import SessionLocal, init_db
+from app.services.search_console_rollup_service import SearchConsoleRollupService
+from app.services.query_classifier import backfill_query_classes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild Search Console rollups")
+    parser.add_argument("--start", help="Start date (YYYY-MM-DD), defaults to earliest raw row")
+    parser.add_argument("--end", help="End date (YYYY-MM-DD), defaults to latest raw row")
+    parser.add_argument("--reclassify", action="store_true",
+                        help="Reclassify every query against current brand terms before rebuilding")
+    args = parser.parse_args()
+
+    start = datetime.strptime(args.start, "%Y-%m-%d").date() if args.start else None
+    end = datetime.strptime(args.end, "%Y-%m-%d").date() if args.end else None
+
+    init_db()
+    db = SessionLocal()
+    try:
+        counts = backfill_query_classes(db, only_missing=not args.reclassify)
+        print(f"Classified queries: {counts}")
+        result = SearchConsoleRollupService(db).rebuild(start, end)
+        print(f"Rebuilt {result['months_rebuilt']} months of Search Console rollups")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Verify shopify_order_items.refunded_quantity / refunded_amount against
+shopify_refund_line_items.
+
+Reports order items whose materialized refund totals disagree with the raw
+refund rows, and refund rows that point at no known order item. The same
+check runs nightly from the scheduler (with --fix).
+
+Usage:
+    python scripts/verify_refund_rollup.py             # report only
+    python scripts/verify_refund_rollup.py --fix       # recompute drifted items
+    python scripts/verify_refund_rollup.py --rebuild   # recompute every item
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.base import SessionLocal, init_db
+from app.services.refund_rollup_service import RefundRollupService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify materialized refund totals per line item")
+    parser.add_argument("--fix", action="store_true", help="Recompute order items that disagree")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute every order item first")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        service = RefundRollupService(db)
+        if args.rebuild:
+            rebuilt = service.rebuild()
+            print(f"Rebuilt refund totals on {rebuilt['rows']} order items in {rebuilt['duration_seconds']}s")
+
+        result = service.verify(fix=args.fix)
+        print(f"Checked {result['checked']} order items: {result['mismatched']} mismatched, "
+              f"{result['fixed']} fixed, {result['orphan_refund_lines']} orphan refund lines")
+        for row in result["sample"]:
+            print(f"  line_item {row['line_item_id']}: "
+                  f"{row['refunded_quantity']} / ${row['refunded_amount']:.2f} materialized vs "
+                  f"{row['raw_quantity']} / ${row['raw_amount']:.2f} raw")
+        if result["mismatched"] and not args.fix:
+            sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
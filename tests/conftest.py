@@ -1,8 +1,56 @@
 import sys
 from pathlib import Path
 
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+
+def _memory_engine(models, shared=False):
+    """In-memory SQLite engine with the models' tables (every table if none given)."""
+    if shared:
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine("sqlite://")
+    if models:
+        for model in models:
+            model.__table__.create(bind=engine)
+    else:
+        import app.models  # noqa: F401  (registers every table on Base.metadata)
+        from app.models.base import Base
+        Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def sqlite_session():
+    """
+    sqlite_session(Model, ...) -> a session on a fresh in-memory database
+    holding those models' tables. Sessions are closed on teardown.
+    """
+    sessions = []
+
+    def make(*models):
+        session = sessionmaker(bind=_memory_engine(models))()
+        sessions.append(session)
+        return session
+
+    yield make
+    for session in sessions:
+        session.close()
+
+
+@pytest.fixture
+def sqlite_sessionmaker():
+    """
+    sqlite_sessionmaker(Model, ...) -> a sessionmaker whose sessions share
+    one in-memory connection, for code that opens its own sessions or runs
+    in another thread.
+    """
+    return lambda *models: sessionmaker(bind=_memory_engine(models, shared=True))
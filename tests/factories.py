@@ -0,0 +1,44 @@
+"""Row builders shared by the database-backed tests."""
+from decimal import Decimal
+
+from app.models.shopify import ShopifyOrder, ShopifyOrderItem
+
+
+def add_order(db, order_id, when, total, refunded=0, status="paid"):
+    """ShopifyOrder placed, processed and synced at `when`, with subtotal = total."""
+    total = Decimal(str(total))
+    db.add(ShopifyOrder(
+        shopify_order_id=order_id, order_number=order_id, financial_status=status,
+        created_at=when, processed_at=when, updated_at=when, synced_at=when,
+        total_price=total, subtotal_price=total, total_refunded=Decimal(str(refunded)),
+    ))
+
+
+def add_order_item(db, order_id, when, product_id, qty, price, line_id=None, vendor=None,
+                   sku=None, title=None, cost=None, discount=0, status="paid"):
+    """ShopifyOrderItem for `qty` units of a product at `price` each."""
+    price = Decimal(str(price))
+    db.add(ShopifyOrderItem(
+        shopify_order_id=order_id, line_item_id=line_id, order_date=when,
+        vendor=vendor, shopify_product_id=product_id, sku=sku or f"SKU-{product_id}",
+        title=title or f"Product {product_id}", quantity=qty, price=price,
+        total_price=price * qty, total_discount=Decimal(str(discount)),
+        cost_per_item=Decimal(str(cost)) if cost is not None else None,
+        financial_status=status,
+    ))
+
+
+def order_payload(order_id, line_items, status="partially_refunded", **fields):
+    """Shopify REST order placed 2026-03-10, as the sync and webhooks receive it."""
+    return {
+        "id": order_id, "order_number": order_id, "financial_status": status,
+        "total_price": "200.00", "subtotal_price": "200.00",
+        "created_at": "2026-03-10T09:00:00Z", "processed_at": "2026-03-10T09:00:00Z",
+        "line_items": line_items, **fields,
+    }
+
+
+def line_item_payload(line_id, qty=2, price="100.00"):
+    """Shopify REST line item for the Acme basin tap (product 7)."""
+    return {"id": line_id, "product_id": 7, "sku": "TAP-1", "title": "Basin Tap",
+            "vendor": "Acme", "quantity": qty, "price": price, "total_discount": "0"}
@@ -0,0 +1,94 @@
+"""
+Incremental ad spend processing.
+
+Covers AdSpendProcessor.process: the first run (no stored rows) is a full
+rebuild, a run with no changes does no work, a run after one campaign is
+marked dirty recomputes only that campaign and leaves the others' waste
+and performance rows alone, and full=True rebuilds everything.
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.ad_spend import (
+    AdSpendDirtyCampaign, AdSpendOptimization, AdWaste, CampaignPerformance, ProductAdPerformance,
+)
+from app.models.business_expense import MonthlyPL
+from app.models.ga4_data import GA4DailySummary, GA4LandingPage
+from app.models.google_ads_data import GoogleAdsCampaign, GoogleAdsProductPerformance
+from app.models.merchant_center_data import MerchantCenterDisapproval
+from app.models.product import Product
+from app.models.product_cost import ProductCost
+from app.models.search_console_data import SearchConsoleQuery
+from app.models.shopify import ShopifyOrder, ShopifyOrderAttribution, ShopifyOrderItem
+from app.services.ad_spend_changes import SOURCE_GOOGLE_ADS, mark_dirty
+from app.services.ad_spend_processor import AdSpendProcessor
+
+
+END = date(2026, 3, 31)
+
+
+@pytest.fixture
+def db(sqlite_session):
+    session = sqlite_session(GoogleAdsCampaign, GoogleAdsProductPerformance, CampaignPerformance,
+                             AdWaste, AdSpendOptimization, ProductAdPerformance,
+                             AdSpendDirtyCampaign, MonthlyPL, Product, ProductCost, ShopifyOrder,
+                             ShopifyOrderItem, ShopifyOrderAttribution, SearchConsoleQuery,
+                             GA4LandingPage, GA4DailySummary, MerchantCenterDisapproval)
+    for n in range(3):
+        for i in range(30):
+            session.add(GoogleAdsCampaign(
+                campaign_id=f"c{n}", campaign_name=f"Campaign {n}", campaign_status="ENABLED",
+                date=END - timedelta(days=i), cost_micros=20_000_000, clicks=10, impressions=400,
+                conversions=0, conversions_value=0,
+            ))
+    session.commit()
+    return session
+
+
+def _waste_campaigns(db):
+    return sorted(w.campaign_id for w in db.query(AdWaste).filter(AdWaste.status == "active"))
+
+
+def test_only_marked_campaigns_are_recomputed(db):
+    processor = AdSpendProcessor(db)
+
+    first = processor.process(days=30)
+    assert first["mode"] == "full" and first["campaigns_processed"] == 3
+    assert _waste_campaigns(db) == ["c0", "c1", "c2"]
+
+    idle = processor.process(days=30)
+    assert idle["campaigns_processed"] == 0 and idle["campaigns_in_window"] == 3
+
+    # c1 starts converting; only its import marks it dirty
+    row = db.query(GoogleAdsCampaign).filter_by(campaign_id="c1", date=END).one()
+    row.conversions, row.conversions_value = 5, 2000
+    mark_dirty(db, [("c1", END)], SOURCE_GOOGLE_ADS)
+    db.commit()
+    stamp = {cp.campaign_id: cp.analyzed_at for cp in db.query(CampaignPerformance)}
+
+    result = processor.process(days=30)
+    assert result["mode"] == "incremental" and result["campaigns_processed"] == 1
+    assert result["waste_detected"]["cleared"] == 1
+    assert _waste_campaigns(db) == ["c0", "c2"]
+    assert db.query(AdSpendDirtyCampaign).count() == 0
+
+    after = {cp.campaign_id: cp for cp in db.query(CampaignPerformance)}
+    assert after["c0"].analyzed_at == stamp["c0"] and after["c2"].analyzed_at == stamp["c2"]
+    assert after["c1"].google_conversions == 5
+
+    full = processor.process(days=30, full=True)
+    assert full["mode"] == "full" and full["campaigns_processed"] == 3
+    assert _waste_campaigns(db) == ["c0", "c2"]
+
+
+def test_window_change_recomputes_everything(db):
+    processor = AdSpendProcessor(db)
+    processor.process(days=30)
+    assert processor.process(days=14)["mode"] == "full"
+
+    db.add(GoogleAdsCampaign(campaign_id="c0", campaign_name="Campaign 0", date=END + timedelta(days=1),
+                             cost_micros=20_000_000, clicks=10, impressions=400, conversions=0))
+    db.commit()
+    # The window end moved, so every stored row is for a stale period
+    assert processor.process(days=14)["campaigns_processed"] == 3
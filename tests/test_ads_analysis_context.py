@@ -0,0 +1,96 @@
+"""
+Shared Ads analysis context.
+
+Covers AdsAnalysisContext and run_sections: every enhanced-dashboard section
+computed from the context on a thread pool returns exactly what the same
+section returns from per-campaign database queries, and an attached
+context serves all section reads without touching the session.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.models.ad_spend import CampaignPerformance
+from app.models.business_expense import MonthlyPL
+from app.models.google_ads_data import GoogleAdsCampaign
+from app.services.ad_spend_service import AdSpendService
+from app.services.ads_analysis_context import run_sections
+
+
+END = date(2026, 3, 31)
+
+
+@pytest.fixture
+def db(sqlite_sessionmaker):
+    session = sqlite_sessionmaker(CampaignPerformance, GoogleAdsCampaign, MonthlyPL)()
+
+    session.add(MonthlyPL(month=date(2026, 2, 1), overhead_per_order=Decimal("12.50")))
+    for n, (ctype, strategy) in enumerate([("search", "brand_defense"), ("performance_max", "unknown"),
+                                           ("shopping", "prospecting")]):
+        cid = f"c{n}"
+        session.add(CampaignPerformance(
+            campaign_id=cid, campaign_name=f"Campaign {n}", campaign_type=ctype, period_days=14,
+            is_active=True, total_spend=1000 * (n + 1), total_clicks=500 + n, total_impressions=9000,
+            actual_conversions=20 + n, actual_revenue=4000 + 900 * n, true_profit=800 - 300 * n,
+            true_roas=4.0 - n, google_roas=5.0 - n, google_conversion_value=5000, click_through_rate=0.05,
+            strategy_type=strategy,
+        ))
+        for i in range(60):
+            day = END - timedelta(days=i)
+            spike = 3 if (n == 1 and i < 7) else 1
+            session.add(GoogleAdsCampaign(
+                campaign_id=cid, campaign_name=f"Campaign {n}", date=day,
+                cost_micros=(40 + n * 10 + i % 9) * 1_000_000 * spike, clicks=30 + i % 5 + n,
+                impressions=900 + i * 3, conversions=2 + (i % 4), conversions_value=150.0 + i * 4 + n * 20,
+                search_impression_share=None if i % 6 == 0 else 55.0 + n,
+                search_rank_lost_impression_share=None if n == 2 else 10.0 + (i < 20) * 5,
+            ))
+    session.commit()
+    yield session
+    session.close()
+
+
+SECTIONS = {
+    "campaigns": lambda s, d: s.get_campaign_performance(d),
+    "health_scores": lambda s, d: s.calculate_health_scores(d),
+    "deep_metrics": lambda s, d: s.get_campaign_deep_metrics(d),
+    "concentration": lambda s, d: s.calculate_concentration_risk(d),
+    "break_even": lambda s, d: s.calculate_break_even(d),
+    "diminishing_returns": lambda s, d: s.analyze_diminishing_returns(d * 3),
+    "competitor_pressure": lambda s, d: s.calculate_competitor_pressure(d * 3),
+    "type_comparison": lambda s, d: s.compare_campaign_types(d),
+    "anomalies": lambda s, d: s.detect_anomalies(d),
+    "forecast": lambda s, d: s.forecast_performance(d * 3),
+    "google_vs_reality": lambda s, d: s.get_google_vs_reality(d),
+}
+
+
+def _sort(value):
+    """Campaign-keyed section lists come from GROUP BY without a defined order."""
+    if isinstance(value, list) and value and isinstance(value[0], dict) and "campaign_id" in value[0]:
+        return sorted(value, key=lambda v: (v["campaign_id"], v.get("metric", "")))
+    return value
+
+
+def test_context_sections_match_database_sections(db):
+    days = 14
+    service = AdSpendService(db)
+    direct, _ = run_sections({name: (lambda f=f: f(service, days)) for name, f in SECTIONS.items()}, workers=1)
+
+    shared = AdSpendService(db)
+    ctx = shared.load_analysis_context(days)
+    assert ctx.end_date == END and ctx.start_date == END - timedelta(days=days * 3 - 1)
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    results, timings = run_sections({name: (lambda f=f: f(shared, days)) for name, f in SECTIONS.items()}, workers=4)
+    assert statements == []
+    shared.detach_analysis_context()
+
+    assert set(timings) == set(SECTIONS)
+    for name in SECTIONS:
+        assert _sort(results[name]) == _sort(direct[name]), name
+    assert any(a["campaign_id"] == "c1" and a["metric"] == "Spend" for a in results["anomalies"])
+    assert results["break_even"][0]["overhead_per_order"] == 12.5
@@ -0,0 +1,59 @@
+"""
+Batched Ads analytics kernels.
+
+Covers app.services.ads_analytics: least squares for many series at once
+against per-series fits, searchsorted percentile ranks against counting,
+and per-group period metrics from daily rows.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.services.ads_analysis_context import daily_frame
+from app.services.ads_analytics import (
+    iso_weeks, linear_trend, percentile_rank, period_metrics, safe_ratio, trend_labels,
+)
+
+
+def test_linear_trend_matches_per_series_fit():
+    rng = np.random.default_rng(7)
+    x = np.arange(12)
+    y = rng.normal(100, 20, size=(50, 12)) + np.outer(rng.normal(0, 5, 50), x)
+    y[3] = 42.0  # constant series
+
+    slopes, intercepts, r_squared = linear_trend(x, y)
+    for k in range(len(y)):
+        m, b = np.polyfit(x, y[k], 1)
+        assert np.isclose(slopes[k], m, atol=1e-9) and np.isclose(intercepts[k], b)
+    assert r_squared[3] == 0 and np.isclose(slopes[3], 0, atol=1e-12)
+    assert np.isclose(r_squared[0], np.corrcoef(x, y[0])[0, 1] ** 2)
+
+    assert [a.tolist() for a in linear_trend([5], [[1.0]])] == [[0], [0], [0]]
+    assert [a.tolist() for a in linear_trend([2, 2], [[1.0, 3.0]])] == [[0], [2.0], [0]]
+
+
+def test_percentile_rank_and_labels():
+    values = [0.05, 0.0, 0.05, 0.2, 0.01]
+    expected = [sum(v < x for v in values) / len(values) for x in values]
+    assert percentile_rank(values).tolist() == expected
+    assert percentile_rank([]).size == 0
+
+    assert safe_ratio([1, 2, 3], [2, 0, -1]).tolist() == [0.5, 0, 0]
+    assert trend_labels([1.2, 0.5, 1.0, 5], [1.0, 1.0, 1.0, 0]).tolist() == ["rising", "falling", "stable", "stable"]
+
+
+def test_period_metrics_per_campaign_week():
+    start = date(2026, 3, 2)  # a Monday
+    rows = [
+        ("c1", "One", start + timedelta(days=i), 2_000_000, 10, 200, 1.0, 50.0, None, None)
+        for i in range(10)
+    ] + [("c2", "Two", start, None, 0, 0, None, None, 40.0, None)]
+    frame = daily_frame(rows)
+    frame["week"] = iso_weeks(frame["date"])[1]
+
+    weekly = period_metrics(frame, ["campaign_id", "week"])
+    assert weekly.loc[("c1", 10)].to_dict() == {"avg_cpc": 0.2, "avg_ctr": 0.05, "conv_rate": 0.1, "cpa": 2.0, "aov": 50.0}
+    assert weekly.loc[("c2", 10)].tolist() == [0.0] * 5
+    assert sorted(weekly.loc["c1"].index) == [10, 11]
+    assert isinstance(period_metrics(frame.iloc[:0], ["campaign_id"]), pd.DataFrame)
@@ -0,0 +1,108 @@
+"""
+Vectorized multi-series anomaly detection.
+
+Covers AnomalyDetector.detect_series_anomalies against a per-series rolling
+z-score loop, wide and long inputs, per-family Isolation Forest scoring in
+worker processes and MLIntelligenceService.detect_anomalies persisting the
+batch results.
+"""
+import math
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.ml.anomaly_detection import AnomalyDetector
+from app.models.ga4_data import GA4DailySummary
+from app.models.ml_intelligence import MLAnomaly
+from app.models.shopify import ShopifyOrder
+from app.services.ml_intelligence_service import MLIntelligenceService
+
+
+def _loop_anomalies(values, window, lookback, threshold=2.5):
+    """Per-series reference: the preceding-window z-score, one point at a time."""
+    if len(values) < window + lookback:
+        return {}
+    found = {}
+    for i in range(max(window, len(values) - lookback), len(values)):
+        base = values[i - window:i]
+        mean = sum(base) / window
+        std = math.sqrt(sum((v - mean) ** 2 for v in base) / (window - 1))
+        if std and abs((values[i] - mean) / std) >= threshold:
+            found[i] = (values[i] - mean) / std
+    return found
+
+
+def test_batch_matches_per_series_loop():
+    rng = np.random.default_rng(7)
+    start = date(2026, 1, 1)
+    rows, series = [], {}
+    for n in range(60):
+        length = 20 + n % 40  # ragged histories, some too short to check
+        values = list(rng.normal(100, 10, length))
+        if n % 5 == 0:
+            values[-3] *= 3
+        series[f"c{n}"] = values
+        for i, v in enumerate(values):
+            rows.append({"campaign_id": f"c{n}", "date": start + timedelta(days=60 - length + i), "cost": v})
+
+    found = AnomalyDetector().detect_series_anomalies(
+        pd.DataFrame(rows), value_column="cost", series_columns=["campaign_id"],
+        baseline_window=7, lookback_days=14,
+    )
+
+    expected = {}
+    for key, values in series.items():
+        for i, z in _loop_anomalies(values, 7, 14).items():
+            expected[(key, start + timedelta(days=60 - len(values) + i))] = z
+    got = {(r.campaign_id, r.date): r.z_score for r in found.itertuples()}
+    assert got.keys() == expected.keys() and len(got) >= 12
+    assert all(abs(got[k] - expected[k]) < 1e-9 for k in got)
+    assert set(found["direction"]) <= {"spike", "drop"}
+
+
+def test_wide_frame_and_family_scoring():
+    detector = AnomalyDetector(sensitivity=0.05)
+    days = pd.date_range("2026-01-01", periods=40).date
+    wide = pd.DataFrame({"revenue": np.linspace(100, 140, 40), "orders": [10.0, 12.0] * 20}, index=days)
+    wide.iloc[-1, 1] = 40.0
+    found = detector.detect_series_anomalies(wide, baseline_window=7, lookback_days=14)
+    assert list(found["metric"]) == ["orders"]
+    assert found.iloc[0]["date"] == days[-1] and found.iloc[0]["severity"] == "critical"
+
+    rng = np.random.default_rng(1)
+    rows = [
+        {"brand": brand, "sku": f"{brand}-{n}", "date": d, "units": float(rng.poisson(20))}
+        for brand in ("Acme", "Zenith") for n in range(5) for d in days
+    ]
+    points = detector.score_series(pd.DataFrame(rows), "units", ["brand", "sku"], baseline_window=7)
+    scored = detector.score_series_families(points, "brand", workers=2)
+    assert scored["anomaly_score"].notna().sum() == 2 * 5 * (40 - 7)
+    assert 0 < scored["is_outlier"].sum() < len(scored)
+
+
+def test_pipeline_detects_and_upserts(sqlite_session):
+    db = sqlite_session(ShopifyOrder, GA4DailySummary, MLAnomaly)
+
+    today = date.today()
+    for i in range(45):
+        day = today - timedelta(days=44 - i)
+        count = 30 if i == 44 else 5 + i % 2
+        for n in range(count):
+            db.add(ShopifyOrder(shopify_order_id=i * 100 + n, order_number=str(i * 100 + n),
+                                financial_status="paid", total_price=100,
+                                created_at=datetime.combine(day, datetime.min.time()) + timedelta(hours=9)))
+        db.add(GA4DailySummary(date=day, sessions=1000 + (i % 3) * 10))
+    db.commit()
+
+    service = MLIntelligenceService(db)
+    result = service.detect_anomalies(history_days=90)
+    assert result["by_metric"]["orders"] == 2 and result["by_metric"]["revenue"] == 2
+    assert result["by_metric"]["sessions"] == 0
+    latest = db.query(MLAnomaly).filter_by(metric="orders", baseline_window=7).one()
+    assert (latest.date, latest.direction, latest.actual_value) == (today, "spike", 30.0)
+
+    # Re-running updates the same rows instead of inserting duplicates
+    service.detect_anomalies(history_days=90)
+    assert db.query(MLAnomaly).count() == result["anomalies_upserted"]
+    db.close()
@@ -0,0 +1,51 @@
+"""
+Brand detail precompute.
+
+Covers BrandIntelligenceService.precompute_top_brand_details: the cached
+payload equals a cold get_brand_detail result, a warm call is served from
+the cache, and an Ads or cost-sheet sync invalidates it.
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.services.brand_intelligence_service import BrandIntelligenceService
+from app.services.sales_fact_service import SalesFactService
+from app.utils.cache import clear_cache, clear_for_source
+
+from factories import add_order_item
+
+
+@pytest.fixture
+def db(sqlite_session):
+    clear_cache()
+    session = sqlite_session()
+    day = datetime(2026, 3, 10, 11, 0)
+    for i in range(40):
+        add_order_item(session, 101 + i, day - timedelta(days=i), i % 4 + 1, 1 + i % 3, 100,
+                       line_id=i + 1, vendor="Acme" if i % 3 else "Zenith", cost=40)
+    session.commit()
+    SalesFactService(session).refresh(date(2026, 1, 1), date(2026, 3, 31))
+    yield session
+    clear_cache()
+
+
+def test_precomputed_detail_matches_cold_and_serves_warm(db, monkeypatch):
+    service = BrandIntelligenceService(db)
+    cold = service.get_brand_detail("Acme", 30)
+
+    assert service.precompute_top_brand_details(top_k=2)["brands"] == 2
+
+    def no_recompute(*args, **kwargs):
+        raise AssertionError("warm call recomputed brand detail")
+
+    monkeypatch.setattr(BrandIntelligenceService, "_detail_aggregates", no_recompute)
+    assert service.get_brand_detail("Acme", 30) == cold
+
+    for source in ("google_ads", "cost_sheet"):
+        monkeypatch.undo()
+        service.precompute_top_brand_details(top_k=2)
+        clear_for_source(source)
+        monkeypatch.setattr(BrandIntelligenceService, "_detail_aggregates", no_recompute)
+        with pytest.raises(AssertionError):
+            service.get_brand_detail("Acme", 30)
@@ -0,0 +1,95 @@
+"""
+Pooled brand report PDF rendering.
+
+Covers BrandReportRenderService: versioned artifact keys, pre-rendering in
+the worker pool, cache hits on unchanged data and re-render after a new
+pricing import, with the pre-render payload read from the new rows rather
+than a brand report cached before the import.
+"""
+import asyncio
+from datetime import date, datetime
+
+import pytest
+
+from app.api.pricing_impact import brand_report_data, build_brand_report
+from app.models.competitive_pricing import CompetitivePricing
+from app.services.brand_report_render_service import BrandReportRenderService, shutdown_render_pool
+from app.utils.cache import clear_cache
+
+
+@pytest.fixture
+def db(sqlite_session):
+    clear_cache()
+    return sqlite_session(CompetitivePricing)
+    shutdown_render_pool()
+    clear_cache()
+
+
+def _price(db, variant_id, vendor, pricing_date, imported_at):
+    db.add(CompetitivePricing(variant_id=variant_id, vendor=vendor, pricing_date=pricing_date,
+                              title=f"{vendor} basin", import_date=imported_at))
+
+
+def _payload(brand):
+    return {
+        "brand": brand, "snapshot_date": "2026-03-10", "total_skus": 1,
+        "kpis": {"avg_market_discount_pct": 5.0, "skus_below_floor": 0},
+        "monthly_trends": [{"month_name": "Mar 2026", "avg_discount_pct": 5.0, "skus_below_floor": 0}],
+    }
+
+
+def test_prerender_caches_until_data_changes(db):
+    _price(db, 1, "Acme", date(2026, 3, 10), datetime(2026, 3, 10, 13))
+    _price(db, 2, "Zenith", date(2026, 3, 10), datetime(2026, 3, 10, 13))
+    db.commit()
+
+    built = []
+
+    def build(brand):
+        built.append(brand)
+        return {"brand": brand, "error": "Brand not found"} if brand == "Zenith" else _payload(brand)
+
+    result = BrandReportRenderService(db).prerender(["Acme", "Zenith", "Nobody"], build)
+    assert result == {"rendered": 1, "cached": 0, "failed": 0}
+    pdf = BrandReportRenderService(db).get_cached_pdf("Acme")
+    assert pdf.startswith(b"%PDF")
+    assert BrandReportRenderService(db).get_cached_pdf("Nobody") is None
+
+    # Unchanged data: served from cache, no payload rebuilt
+    built.clear()
+    assert BrandReportRenderService(db).prerender(["Acme"], build)["cached"] == 1
+    assert built == []
+
+    # A new import moves the data version, so the old artifact is not served
+    _price(db, 3, "Acme", date(2026, 3, 11), datetime(2026, 3, 11, 13))
+    db.commit()
+    service = BrandReportRenderService(db)
+    assert service.get_cached_pdf("Acme") is None
+    rendered = asyncio.run(service.render("Acme", _payload("Acme")))
+    assert BrandReportRenderService(db).get_cached_pdf("Acme") == rendered
+
+
+def test_prerender_after_import_uses_new_prices(db):
+    def snapshot(pricing_date, competitor_price):
+        db.add(CompetitivePricing(
+            variant_id=1, vendor="Acme", pricing_date=pricing_date, variant_sku="ACME-1",
+            title="Acme basin", rrp=200, minimum_price=150, current_price=180,
+            price_harveynorman=competitor_price, import_date=datetime.combine(pricing_date, datetime.min.time()),
+        ))
+        db.commit()
+
+    snapshot(date(2026, 3, 10), 170)
+    # The JSON endpoint caches the old payload (and latest date) for 5 minutes
+    assert build_brand_report(db, "Acme")["data"]["kpis"]["skus_below_floor"] == 0
+
+    snapshot(date(2026, 3, 11), 120)
+    payloads = []
+
+    def build(brand):
+        payloads.append(brand_report_data(db, brand))
+        return payloads[-1]
+
+    assert BrandReportRenderService(db).prerender(["Acme"], build)["rendered"] == 1
+    data = payloads[0]
+    assert data["snapshot_date"] == "2026-03-11"
+    assert data["kpis"]["skus_below_floor"] == 1 and data["kpis"]["total_gap_below_floor"] == 30.0
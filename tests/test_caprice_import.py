@@ -0,0 +1,97 @@
+"""
+Columnar Caprice pricing import.
+
+Covers import_caprice_file's vectorized cleaning, flag calculation (flags
+without inputs left unset, as calculate_flags does), error counting and
+bulk merge into competitive_pricing on (variant_id, pricing_date).
+
+Uses an in-memory SQLite database and generated .xlsx files.
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from app.models.competitive_pricing import CompetitivePricing
+from scripts.import_data import import_caprice_file
+
+
+@pytest.fixture
+def db(sqlite_session):
+    return sqlite_session(CompetitivePricing)
+
+
+def _write_sheet(path, rows):
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame(rows).to_excel(writer, sheet_name="Prices Today", index=False)
+    return str(path)
+
+
+ROWS = [
+    {"Variant ID": 11, "Vendor": "Acme", "Variant SKU": 123, "Current Cass Price": 90,
+     "Cass Minimum": 100, "RRP": 120, "NETT": 95, "Profit": -5, "binglee": 88},
+    {"Variant ID": 12, "Vendor": "Acme", "Variant SKU": "B-2", "Current Cass Price": 130,
+     "Cass Minimum": 100, "RRP": 120, "NETT": None, "Profit": None, "binglee": "n/a"},
+    {"Variant ID": 11, "Vendor": "Dupe", "Variant SKU": "X", "Current Cass Price": 1},
+    {"Variant ID": None, "Vendor": "No id"},
+    {"Variant ID": "abc", "Vendor": "Bad id"},
+]
+
+
+def test_import_cleans_flags_and_merges(db, tmp_path):
+    path = _write_sheet(tmp_path / "capricelog-13012026.xlsx", ROWS)
+
+    result = import_caprice_file(path, db)
+    assert result["success"]
+    assert result["pricing_date"] == date(2026, 1, 13)
+    assert (result["imported"], result["updated"], result["skipped"], result["errors"]) == (2, 0, 2, 1)
+
+    first = db.query(CompetitivePricing).filter_by(variant_id=11).one()
+    assert first.vendor == "Acme"
+    assert first.variant_sku == "123"
+    assert float(first.price_binglee) == 88
+    assert first.is_losing_money and first.is_below_minimum and not first.is_above_rrp
+    assert not first.has_no_cost
+
+    second = db.query(CompetitivePricing).filter_by(variant_id=12).one()
+    assert second.price_binglee is None
+    assert second.is_above_rrp and second.has_no_cost and not second.is_losing_money
+
+    # Same day again: existing rows are updated in place
+    ROWS_UPDATED = [dict(ROWS[0], **{"Current Cass Price": 110, "Profit": 15})]
+    path = _write_sheet(tmp_path / "capricelog-13012026-v2.xlsx", ROWS_UPDATED)
+    result = import_caprice_file(path, db)
+    assert (result["imported"], result["updated"]) == (0, 1)
+    db.expire_all()
+    first = db.query(CompetitivePricing).filter_by(variant_id=11).one()
+    assert float(first.current_price) == 110
+    assert not first.is_losing_money and not first.is_below_minimum
+    assert db.query(CompetitivePricing).count() == 2
+
+
+def test_flags_without_inputs_keep_stored_value(db, tmp_path):
+    path = _write_sheet(tmp_path / "capricelog-14012026.xlsx", [
+        {"Variant ID": 21, "Vendor": "Acme", "Current Cass Price": 90, "Cass Minimum": 100,
+         "RRP": 80, "NETT": 95},
+    ])
+    import_caprice_file(path, db)
+    row = db.query(CompetitivePricing).filter_by(variant_id=21).one()
+    assert row.is_losing_money and row.is_below_minimum and row.is_above_rrp
+
+    # Re-import without a price: calculate_flags() would not touch these flags
+    path = _write_sheet(tmp_path / "capricelog-14012026-v2.xlsx", [
+        {"Variant ID": 21, "Vendor": "Acme", "Current Cass Price": None, "Cass Minimum": 100,
+         "RRP": 80, "NETT": 95},
+        {"Variant ID": 22, "Vendor": "Acme", "Current Cass Price": None, "NETT": None},
+    ])
+    assert import_caprice_file(path, db)["errors"] == 0
+    db.expire_all()
+    row = db.query(CompetitivePricing).filter_by(variant_id=21).one()
+    assert row.current_price is None
+    assert row.is_losing_money and row.is_below_minimum and row.is_above_rrp
+
+    # New row with no inputs: column defaults (False), not NULL
+    new = db.query(CompetitivePricing).filter_by(variant_id=22).one()
+    assert (new.is_losing_money, new.is_below_minimum, new.is_above_rrp, new.has_no_cost) == (
+        False, False, False, True,
+    )
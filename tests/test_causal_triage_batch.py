@@ -0,0 +1,97 @@
+"""
+Batch causal triage.
+
+Covers CausalTriageService.diagnose_all: the same causes, scores and
+primary cause as per-campaign diagnose() (brand-keyword demand, site-wide
+fallback, auction pressure, attribution gap), with a query count that does
+not grow with the number of campaigns.
+"""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.models.ga4_data import GA4DailySummary, GA4LandingPage
+from app.models.google_ads_data import GoogleAdsCampaign
+from app.models.merchant_center_data import MerchantCenterDisapproval
+from app.models.search_console_data import SearchConsoleQuery
+from app.services.causal_triage import CausalTriageService
+
+
+START, END = date(2026, 3, 1), date(2026, 3, 28)
+BRANDS = ["Billi", "Rheem", "Zip Taps", "Nobrand"]
+
+
+def _seed(db, n_campaigns):
+    for i in range(28):
+        day = START + timedelta(days=i)
+        late = day >= START + timedelta(days=13)  # second half starts at the midpoint
+        for q, clicks in (("billi boiling tap", 40 if late else 100), ("rheem hot water", 50),
+                          ("ZIP hydrotap", 30 if late else 60), ("kitchen sinks", 80 if late else 200)):
+            db.add(SearchConsoleQuery(date=day, query=q, clicks=clicks, impressions=clicks * 20))
+        db.add(GA4LandingPage(date=day, landing_page="/", session_source="google", session_medium="cpc",
+                              sessions=500, conversions=10 if late else 20, bounce_rate=0.4))
+        for n in range(n_campaigns):
+            db.add(GoogleAdsCampaign(
+                campaign_id=f"c{n}", campaign_name=f"PM-AU {BRANDS[n % 4]}", date=day,
+                search_rank_lost_impression_share=(20.0 if late and n % 3 == 0 else 5.0),
+                search_budget_lost_impression_share=10.0, avg_cpc=1.0 + (0.5 if late and n % 2 else 0),
+                ctr=0.05,
+            ))
+    db.commit()
+
+
+def _campaigns(n_campaigns):
+    return [
+        {"campaign_id": f"c{n}", "campaign_name": f"PM-AU {BRANDS[n % 4]}",
+         "google_conversions": 10 + n, "actual_conversions": n}
+        for n in range(n_campaigns)
+    ]
+
+
+@pytest.fixture
+def make_db(sqlite_session):
+    def _make(n_campaigns):
+        session = sqlite_session(SearchConsoleQuery, GoogleAdsCampaign, GA4LandingPage, GA4DailySummary,
+                                 MerchantCenterDisapproval)
+        _seed(session, n_campaigns)
+        return session
+
+    return _make
+
+
+def _count_queries(db, fn):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    return result, len(statements)
+
+
+def test_batch_matches_per_campaign(make_db):
+    db = make_db(8)
+    service = CausalTriageService(db)
+    campaigns = _campaigns(8)
+
+    batch = service.diagnose_all(campaigns, START, END)
+    for c in campaigns:
+        single = service.diagnose(c["campaign_id"], START, END, c["google_conversions"],
+                                  c["actual_conversions"], campaign_name=c["campaign_name"])
+        assert batch[c["campaign_id"]] == single, c["campaign_name"]
+
+    demand = {c["cause"]: c for c in batch["c0"]["causes"]}["demand"]
+    assert demand["evidence"] == "SC clicks -54% (brand); SC impressions -54% (brand)"
+    # No SC queries for the brand — dampened site-wide fallback
+    assert {c["cause"]: c for c in batch["c3"]["causes"]}["demand"]["evidence"].endswith("(site-wide)")
+    assert {c["cause"]: c for c in batch["c0"]["causes"]}["auction_pressure"]["score"] == 0.75
+
+
+def test_query_count_is_constant(make_db):
+    small, large = make_db(4), make_db(40)
+    _, small_queries = _count_queries(small, lambda: CausalTriageService(small).diagnose_all(_campaigns(4), START, END))
+    result, large_queries = _count_queries(large, lambda: CausalTriageService(large).diagnose_all(_campaigns(40), START, END))
+    assert len(result) == 40
+    assert small_queries == large_queries
@@ -0,0 +1,120 @@
+"""
+Batch churn scoring.
+
+Covers ChurnScoringService.score_all: features built from grouped order and
+Klaviyo SQL match ChurnPredictor.predict on the equivalent per-customer
+dicts, scores are written back in chunks to shopify_customers
+(churn_probability, is_at_risk, days_since_last_order), and customers with
+no orders are left unscored.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.ml.churn_prediction import ChurnPredictor
+from app.ml.model_registry import ModelRegistry
+from app.models.klaviyo_data import KlaviyoProfile
+from app.models.shopify import ShopifyCustomer, ShopifyOrder
+from app.services.churn_scoring import ChurnScoringService
+
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+@pytest.fixture
+def db(sqlite_session):
+    session = sqlite_session(ShopifyCustomer, ShopifyOrder, KlaviyoProfile)
+
+    rng = np.random.default_rng(7)
+    order_id = 0
+    for n in range(150):
+        customer_id = 1000 + n * 3
+        created = NOW - timedelta(days=int(rng.integers(300, 900)))
+        session.add(ShopifyCustomer(
+            shopify_customer_id=customer_id, email=f"c{n}@example.com",
+            accepts_marketing=bool(n % 2), created_at=created,
+            # Synced counters lag behind orders; the job should use the orders
+            orders_count=0, total_spent=0,
+        ))
+        # A third of customers stopped ordering ~6 months ago
+        last_gap = int(rng.integers(150, 250)) if n % 3 == 0 else int(rng.integers(1, 60))
+        for k in range(int(rng.integers(1, 6))):
+            order_id += 1
+            session.add(ShopifyOrder(
+                shopify_order_id=order_id, customer_id=customer_id, customer_email=f"c{n}@example.com",
+                total_price=Decimal(f"{rng.uniform(40, 400):.2f}"),
+                created_at=NOW - timedelta(days=last_gap + k * 20),
+            ))
+        if n % 4:
+            session.add(KlaviyoProfile(
+                profile_id=f"p{n}", email=f"c{n}@example.com", total_opens=int(rng.integers(0, 5)),
+                last_open_date=NOW - timedelta(days=int(rng.integers(1, 90))),
+            ))
+    # Never ordered
+    session.add(ShopifyCustomer(shopify_customer_id=99999, email="lead@example.com", created_at=NOW))
+    session.commit()
+    return session
+
+
+def test_score_all_writes_risk_for_every_customer(db, tmp_path):
+    predictor = ChurnPredictor(registry=ModelRegistry(root=str(tmp_path)))
+    result = ChurnScoringService(db, predictor=predictor).score_all(chunk_size=40, train=True)
+
+    assert result["training"]["success"] and result["model_version"] == 1
+    assert result["customers_scored"] == 151 and result["chunks"] == 4
+
+    customers = {c.shopify_customer_id: c for c in db.query(ShopifyCustomer)}
+    lead = customers.pop(99999)
+    assert lead.churn_probability is None and not lead.is_at_risk
+
+    assert all(c.churn_probability is not None for c in customers.values())
+    assert sum(c.is_at_risk for c in customers.values()) == result["at_risk"] > 0
+    assert all(c.is_at_risk == (c.churn_probability >= result["threshold"]) for c in customers.values())
+
+    # Same scores as the per-customer dict path
+    orders = {}
+    for o in db.query(ShopifyOrder):
+        orders.setdefault(o.customer_id, []).append(o)
+    profiles = {p.email: p for p in db.query(KlaviyoProfile)}
+    records = []
+    for customer_id, c in customers.items():
+        placed = orders[customer_id]
+        spent = sum(float(o.total_price) for o in placed)
+        profile = profiles.get(c.email)
+        records.append({
+            'id': customer_id, 'created_at': c.created_at, 'accepts_marketing': c.accepts_marketing,
+            'last_order_date': max(o.created_at for o in placed), 'orders_count': len(placed),
+            'total_spent': spent, 'average_order_value': spent / len(placed),
+            'klaviyo_engaged': bool(profile and profile.total_opens),
+            'last_email_open_date': profile.last_open_date if profile else None,
+        })
+        assert c.days_since_last_order == (datetime.utcnow() - records[-1]['last_order_date']).days
+
+    expected = {p['customer_id']: p['churn_probability'] for p in predictor.predict(records)}
+    for customer_id, c in customers.items():
+        assert c.churn_probability == pytest.approx(expected[customer_id])
+
+
+def test_score_all_without_model_or_customers(db, tmp_path):
+    db.query(ShopifyOrder).delete()
+    db.query(ShopifyCustomer).delete()
+    db.commit()
+
+    predictor = ChurnPredictor(registry=ModelRegistry(root=str(tmp_path)))
+    result = ChurnScoringService(db, predictor=predictor).score_all()
+    assert result["customers_scored"] == 0 and not result["training"]["success"]
+
+
+def test_score_all_stops_when_model_does_not_load(db, tmp_path, monkeypatch):
+    predictor = ChurnPredictor(registry=ModelRegistry(root=str(tmp_path)))
+    service = ChurnScoringService(db, predictor=predictor)
+    service.score_all(train=True)
+    db.query(ShopifyCustomer).update({"churn_probability": None})
+    db.commit()
+
+    monkeypatch.setattr(predictor, "score_frame", lambda frame: None)
+    result = service.score_all()
+    assert result["customers_scored"] == 0 and result["at_risk"] == 0
+    assert db.query(ShopifyCustomer).filter(ShopifyCustomer.churn_probability.isnot(None)).count() == 0
@@ -0,0 +1,86 @@
+"""
+Batch monthly P&L.
+
+Covers FinanceService.calculate_pl_months (grouped per-source reads, one
+upsert pass) and refresh_pl recomputing closed months only when a source
+touched them.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models.business_expense import BusinessExpense, MonthlyPL
+from app.models.google_ads_data import GoogleAdsCampaign
+from app.models.shopify import ShopifyOrder, ShopifyOrderItem, ShopifySalesDailyFact
+from app.services.finance_service import FinanceService, _last_months
+
+from factories import add_order
+
+
+@pytest.fixture
+def db(sqlite_session):
+    return sqlite_session(ShopifyOrder, ShopifyOrderItem, ShopifySalesDailyFact,
+                          GoogleAdsCampaign, BusinessExpense, MonthlyPL)
+
+
+def _expense(db, month, category, amount):
+    db.add(BusinessExpense(month=month, category=category, description=category,
+                           amount=Decimal(str(amount))))
+
+
+def test_calculate_pl_months_groups_each_source_by_month(db):
+    add_order(db, 1, datetime(2026, 1, 10), 1000, refunded=100)
+    add_order(db, 2, datetime(2026, 1, 20), 500)
+    add_order(db, 3, datetime(2026, 2, 5), 300)
+    add_order(db, 4, datetime(2026, 2, 6), 999, status="voided")
+    db.add(GoogleAdsCampaign(campaign_id="c1", campaign_name="C1", date=date(2026, 2, 3),
+                             cost_micros=50_000_000))
+    _expense(db, date(2026, 1, 1), "payroll", 600)
+    _expense(db, date(2026, 1, 1), "rent", 100)
+    db.commit()
+
+    rows = FinanceService(db).calculate_pl_range(date(2026, 1, 1), date(2026, 3, 1))
+    by_month = {r["month"]: r for r in rows}
+    assert list(by_month) == ["2026-01", "2026-02", "2026-03"]
+
+    jan = by_month["2026-01"]
+    assert jan["net_revenue"] == 1400
+    assert jan["total_orders"] == 2
+    assert jan["total_expenses"] == 700
+    assert jan["overhead_per_order"] == 350
+
+    feb = by_month["2026-02"]
+    assert feb["net_revenue"] == 300
+    assert feb["ad_spend"] == 50
+    assert feb["overhead_per_order"] == 0
+    assert by_month["2026-03"]["total_orders"] == 0
+
+    # Recalculating one month updates its row in place
+    FinanceService(db).calculate_monthly_pl(date(2026, 1, 15))
+    assert db.query(MonthlyPL).count() == 3
+
+
+def test_refresh_pl_recomputes_only_touched_closed_months(db):
+    months = _last_months(3)
+    oldest, closed, current = months
+    long_ago = datetime.combine(oldest, datetime.min.time()) + timedelta(days=1)
+    add_order(db, 1, long_ago, 100)
+    add_order(db, 2, datetime.combine(closed, datetime.min.time()) + timedelta(days=1), 200)
+    db.commit()
+
+    service = FinanceService(db)
+    first = service.refresh_pl(3)
+    assert len(first["recomputed"]) == 3
+
+    # Nothing changed: only the open month is recomputed
+    assert service.refresh_pl(3)["recomputed"] == [current.strftime("%Y-%m")]
+
+    # An expense import for the oldest month makes it stale again
+    _expense(db, oldest, "rent", 50)
+    db.commit()
+    again = service.refresh_pl(3)
+    assert again["recomputed"] == [oldest.strftime("%Y-%m"), current.strftime("%Y-%m")]
+    assert again["months"][0]["total_expenses"] == 50
+
+    assert len(service.refresh_pl(3, force=True)["recomputed"]) == 3
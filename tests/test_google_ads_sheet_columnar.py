@@ -0,0 +1,123 @@
+"""
+Columnar Google Ads sheet import.
+
+Covers GoogleAdsSheetImportService._upsert_campaigns: column-wise parsing
+gives the same values as the scalar cell parsers, re-importing an
+unchanged sheet writes nothing, editing one cell updates (and marks
+dirty for AdSpendProcessor) only that campaign day, out-of-range values
+or a rejected row are counted as errored without failing the import, and
+unparseable cells are imported as 0 / blank with the row still written.
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from app.models.ad_spend import AdSpendDirtyCampaign
+from app.models.google_ads_data import GoogleAdsCampaign
+from app.models.shopify import ShopifyOrder, ShopifyOrderAttribution
+from app.services.google_ads_sheet_import import (
+    GoogleAdsSheetImportService, _parse_cost_dollars, _parse_cost_to_micros, _parse_date,
+    _parse_float, _parse_int, _parse_percentage,
+)
+
+
+HEADER = ["Day", "Campaign ID", "Campaign", "Campaign status", "Impr.", "Clicks", "Cost",
+          "Conversions", "Conv. value", "CTR", "Avg. CPC", "Search impr. share", "Search lost IS (rank)"]
+
+
+def _rows(n_campaigns=20, days=10):
+    rows = []
+    for c in range(n_campaigns):
+        for d in range(1, days + 1):
+            rows.append([
+                f"2026-03-{d:02d}", f"{1000 + c}.0" if c % 2 else str(1000 + c), f"Campaign {c}", "ENABLED",
+                f"{1234 + c * 1000:,}" if c % 3 else str(900 + d), str(40 + d), f"${c * 1.37 + d:,.2f}",
+                "--" if c == 4 else f"{d / 3:.2f}", f"{d * 17.5:.2f}", f"{2 + c / 10:.2f}%",
+                "" if c == 5 else f"$1.{d:02d}", "< 10%" if c == 6 else f"{50 + d}%", "--",
+            ])
+    rows.append(["", "999", "No date"])
+    rows.append(["not a date", "998", "Bad date"])
+    return rows
+
+
+@pytest.fixture
+def db(sqlite_session):
+    return sqlite_session(GoogleAdsCampaign, AdSpendDirtyCampaign, ShopifyOrder,
+                          ShopifyOrderAttribution)
+
+
+def _import(db, rows):
+    service = GoogleAdsSheetImportService(db)
+    return service._upsert_campaigns(rows, service._build_column_map(HEADER), db)
+
+
+def test_columnar_values_match_cell_parsers(db):
+    rows = _rows(8, 3)
+    counts = _import(db, rows)
+    assert counts["created"] == 24 and counts["skipped"] == 2
+
+    stored = {(r.campaign_id, r.date): r for r in db.query(GoogleAdsCampaign)}
+    for row in rows[:-2]:
+        cid = row[1][:-2] if row[1].endswith(".0") else row[1]
+        r = stored[(cid, _parse_date(row[0]))]
+        assert r.campaign_name == row[2] and r.campaign_status == row[3] and r.campaign_type is None
+        assert (r.impressions, r.clicks) == (_parse_int(row[4]), _parse_int(row[5]))
+        assert r.cost_micros == _parse_cost_to_micros(row[6])
+        assert (r.conversions, r.conversions_value) == (_parse_float(row[7]), _parse_float(row[8]))
+        assert r.ctr == _parse_percentage(row[9]) and r.avg_cpc == _parse_cost_dollars(row[10])
+        assert r.search_impression_share == _parse_percentage(row[11])
+        assert r.search_rank_lost_impression_share is None
+
+
+def test_unchanged_rows_are_not_written(db):
+    rows = _rows()
+    assert _import(db, rows)["created"] == 200
+    db.query(AdSpendDirtyCampaign).delete()
+    db.commit()
+
+    writes = []
+    listener = lambda conn, cursor, statement, *args: writes.append(statement) if not statement.startswith("SELECT") else None
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    counts = _import(db, [list(r) for r in rows])
+    event.remove(db.get_bind(), "before_cursor_execute", listener)
+    assert counts == {"created": 0, "updated": 0, "unchanged": 200, "skipped": 2, "errored": 0, "coerced": 0}
+    assert writes == []
+
+    rows[25][6] = "$999.00"              # Campaign 2, 2026-03-06
+    rows.append(["2026-03-11", "1000", "Campaign 0", "ENABLED", "1", "1", "$1", "0", "0", "1%", "$1", "", ""])
+    counts = _import(db, rows)
+    assert (counts["created"], counts["updated"], counts["unchanged"]) == (1, 1, 199)
+
+    row = db.query(GoogleAdsCampaign).filter_by(campaign_id="1002", date=date(2026, 3, 6)).one()
+    assert row.cost_micros == 999_000_000
+    marks = {(m.campaign_id, m.date) for m in db.query(AdSpendDirtyCampaign)}
+    assert marks == {("1002", date(2026, 3, 6)), ("1000", date(2026, 3, 11))}
+
+
+def test_overflowing_or_rejected_rows_are_counted_as_errored(db, monkeypatch):
+    rows = _rows(4, 2)
+    rows[0][4] = "lots"                  # Campaign 0 day 1: unparseable impressions, imported as 0
+    rows[0][8] = "€35.00"                # ... and conv. value, imported as 0
+    rows[2][5] = "9" * 12                # Campaign 1 day 1: clicks overflow INTEGER
+    rows[4][7] = "--"                    # "--" is a valid zero, not an error
+
+    original = db.bulk_insert_mappings
+
+    def reject_campaign_1003(mapper, mappings, *args, **kwargs):
+        if any(m["campaign_id"] == "1003" for m in mappings):
+            raise ValueError("rejected by database")
+        return original(mapper, mappings, *args, **kwargs)
+
+    monkeypatch.setattr(db, "bulk_insert_mappings", reject_campaign_1003)
+    counts = _import(db, rows)
+
+    # 8 rows: 1 overflowing, 2 rejected (Campaign 3), the rest written one by one after the failed batch
+    assert counts == {"created": 5, "updated": 0, "unchanged": 0, "skipped": 2, "errored": 3, "coerced": 1}
+    stored = {(r.campaign_id, r.date): r for r in db.query(GoogleAdsCampaign)}
+    assert set(stored) == {("1000", date(2026, 3, 1)), ("1000", date(2026, 3, 2)), ("1001", date(2026, 3, 2)),
+                           ("1002", date(2026, 3, 1)), ("1002", date(2026, 3, 2))}
+    coerced = stored[("1000", date(2026, 3, 1))]
+    assert (coerced.impressions, coerced.conversions_value, coerced.clicks) == (0, 0, 41)
+    assert coerced.cost_micros == 1_000_000
+    assert db.query(GoogleAdsCampaign).filter_by(campaign_id="1002", date=date(2026, 3, 1)).one().conversions == 0
@@ -0,0 +1,72 @@
+"""
+Hourly KPI store.
+
+Covers KpiTimeSeriesService: bucketing orders by hour and GA4/Ads rows by
+day, window sums over hour-aligned windows, per-day trend values and a
+refresh replacing the recent buckets after new rows land.
+"""
+from datetime import date, datetime
+
+import pytest
+
+from app.models.ga4_data import GA4TrafficSource
+from app.models.google_ads_data import GoogleAdsCampaign
+from app.models.klaviyo_data import KlaviyoCampaign
+from app.models.kpi_timeseries import KpiHourlyPoint
+from app.models.shopify import ShopifyOrder
+from app.models.transaction import AbandonedCheckout
+from app.services.kpi_timeseries_service import KpiTimeSeriesService
+
+from factories import add_order
+
+
+@pytest.fixture
+def db(sqlite_session):
+    return sqlite_session(ShopifyOrder, AbandonedCheckout, KlaviyoCampaign, GA4TrafficSource,
+                          GoogleAdsCampaign, KpiHourlyPoint)
+
+
+def test_refresh_buckets_and_readers(db):
+    day = date(2026, 3, 10)
+    add_order(db, 1, datetime(2026, 3, 10, 9, 15), 100)
+    add_order(db, 2, datetime(2026, 3, 10, 9, 45), 50)
+    add_order(db, 3, datetime(2026, 3, 10, 14, 5), 30)
+    add_order(db, 4, datetime(2026, 3, 10, 14, 6), 999, status="pending")
+    add_order(db, 5, datetime(2026, 3, 11, 8, 0), 70)
+    db.add(AbandonedCheckout(external_id="1", created_at=datetime(2026, 3, 10, 9, 30), recovered=False))
+    db.add(GA4TrafficSource(date=day, session_source="(all)", session_medium="(all)", sessions=400))
+    db.add(GA4TrafficSource(date=day, session_source="google", session_medium="organic", sessions=150))
+    db.add(GoogleAdsCampaign(campaign_id="c1", campaign_name="Search", date=day, campaign_status="ENABLED",
+                             impressions=1000, clicks=50, cost_micros=25_000_000, conversions_value=100))
+    db.add(GoogleAdsCampaign(campaign_id="c2", campaign_name="PMax", date=day, campaign_status="ENABLED",
+                             impressions=0, clicks=0, cost_micros=0, conversions_value=0))
+    db.commit()
+
+    store = KpiTimeSeriesService(db)
+    store.refresh(datetime(2026, 3, 9, 12))
+
+    points = {(p.metric, p.hour): p.value for p in db.query(KpiHourlyPoint).all()}
+    assert points[("net_revenue", datetime(2026, 3, 10, 9))] == 150
+    assert points[("orders", datetime(2026, 3, 10, 14))] == 1
+    assert points[("sessions", datetime(2026, 3, 10))] == 400
+    assert points[("ads_zero_impression_rows", datetime(2026, 3, 10))] == 1
+
+    # Hour-aligned window: 14:00 bucket onward on the 10th, excludes the 11th
+    sums = store.window_sums(["net_revenue", "orders", "abandoned_checkouts"],
+                             datetime(2026, 3, 10, 10), datetime(2026, 3, 11))
+    assert sums == {"net_revenue": 30.0, "orders": 1.0, "abandoned_checkouts": 0.0}
+    assert store.window_sums(["ads_cost_micros"], datetime(2026, 3, 10))["ads_cost_micros"] == 25_000_000
+
+    trend = store.daily_values(["gross_revenue", "organic_sessions"], datetime(2026, 3, 10))
+    assert trend["gross_revenue"] == {date(2026, 3, 10): 180.0, date(2026, 3, 11): 70.0}
+    assert trend["organic_sessions"] == {day: 150.0}
+
+    # A late order and a refund-driven status change replace the buckets
+    add_order(db, 6, datetime(2026, 3, 11, 8, 30), 20)
+    db.query(ShopifyOrder).filter_by(shopify_order_id=5).update({"financial_status": "refunded"})
+    db.commit()
+    store.refresh(datetime(2026, 3, 11, 6))
+    assert store.window_sums(["orders"], datetime(2026, 3, 11))["orders"] == 1
+    # Buckets before the refreshed day are untouched
+    assert store.window_sums(["orders"], datetime(2026, 3, 10), datetime(2026, 3, 11))["orders"] == 3
+    assert db.query(KpiHourlyPoint).filter(KpiHourlyPoint.hour < datetime(2026, 3, 10)).count() == 0
@@ -0,0 +1,76 @@
+"""
+Process-pool ML pipeline runner.
+
+Covers run_ml_pipeline: stages run in worker processes on their own
+sessions against a file-backed SQLite database, forecasts built from the
+shared Parquet metric frame match forecasts built from per-metric queries,
+and every stage reports wall / CPU / peak RSS metrics.
+"""
+import os
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import app.models.base as base
+from app.models.ga4_data import GA4DailySummary
+from app.models.ml_intelligence import MLAnomaly, MLForecast
+from app.models.shopify import ShopifyOrder
+from app.services.ml_intelligence_service import MLIntelligenceService
+from app.services.ml_pipeline_runner import PIPELINE_STAGES, run_ml_pipeline
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'ml.db'}"
+    engine = create_engine(url, poolclass=NullPool)
+    base.Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    # This process resolves these at call time; spawned workers build their
+    # own engine from DATABASE_URL
+    monkeypatch.setattr(base, "engine", engine)
+    monkeypatch.setattr(base, "SessionLocal", factory)
+    monkeypatch.setenv("DATABASE_URL", url)
+
+    db = factory()
+    today = date.today()
+    for i in range(1, 61):
+        day = today - timedelta(days=i)
+        db.add(GA4DailySummary(date=day, sessions=1000 + (i % 7) * 40 + (600 if i == 3 else 0)))
+        for n in range(3 + i % 4):
+            db.add(ShopifyOrder(
+                shopify_order_id=i * 10 + n, order_number=i * 10 + n, financial_status="paid",
+                total_price=Decimal(100 + n * 25 + i), subtotal_price=Decimal(90 + n * 25 + i),
+                created_at=datetime.combine(day, datetime.min.time()) + timedelta(hours=9 + n),
+            ))
+    db.commit()
+    db.close()
+    return factory
+
+
+@pytest.mark.parametrize("workers", [3, 1])
+def test_stages_run_in_workers_with_metrics(session_factory, workers):
+    results = run_ml_pipeline(workers=workers)
+
+    assert results["pipeline"]["workers"] == workers
+    assert results["forecasts"]["forecasts_generated"] == 90
+    assert "error" not in results["anomalies"]
+    for stage in PIPELINE_STAGES:
+        metrics = results["stage_metrics"][stage]
+        assert metrics["wall_seconds"] >= 0 and metrics["cpu_seconds"] >= 0 and metrics["peak_rss_mb"] > 0
+        assert (metrics["pid"] != os.getpid()) == (workers > 1)
+
+    # Forecasts from the shared Parquet frame equal forecasts from per-metric history queries
+    db = session_factory()
+    try:
+        stored = {(f.metric, f.horizon_days): f.predicted_value for f in db.query(MLForecast)}
+        service = MLIntelligenceService(db)
+        for metric in ("revenue", "orders", "sessions"):
+            for f in service._forecast_metric(metric, horizon=30):
+                assert stored[(metric, f["horizon_days"])] == f["predicted_value"]
+        assert db.query(MLAnomaly).count() == results["anomalies"]["anomalies_upserted"]
+    finally:
+        db.close()
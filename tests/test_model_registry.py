@@ -0,0 +1,153 @@
+"""
+Persisted model registry.
+
+Covers ModelRegistry versioning (refit only on a new fingerprint, old
+versions pruned, feature-schema mismatch refused, artifacts read from disk
+once per process, unique versions across concurrent processes),
+ChurnPredictor.train reusing the registered model for
+unchanged customer data, and AnomalyDetector's Isolation Forest being fit
+once per series in memory rather than versioned.
+"""
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml import anomaly_detection, model_registry
+from app.ml.anomaly_detection import AnomalyDetector
+from app.ml.churn_prediction import CHURN_MODEL_NAME, ChurnPredictor
+from app.ml.model_registry import ModelRegistry, fingerprint_frame
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(root=str(tmp_path), keep_versions=2)
+
+
+def _customers(n=120, seed=0):
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    return [
+        {
+            'id': i,
+            'email': f"c{i}@example.com",
+            'created_at': now - timedelta(days=int(rng.integers(200, 900))),
+            'last_order_date': now - timedelta(days=int(rng.integers(1, 200))),
+            'orders_count': int(rng.integers(1, 12)),
+            'total_spent': float(rng.uniform(50, 3000)),
+            'average_order_value': float(rng.uniform(40, 300)),
+            'accepts_marketing': bool(rng.integers(0, 2)),
+            'klaviyo_engaged': bool(rng.integers(0, 2)),
+            'last_email_open_date': now - timedelta(days=int(rng.integers(1, 120))),
+        }
+        for i in range(n)
+    ]
+
+
+def test_registry_versions_by_fingerprint(registry, monkeypatch):
+    fits = []
+
+    def train(value):
+        def fit():
+            fits.append(value)
+            return {'value': value}, {'fits': len(fits)}
+        return fit
+
+    a = fingerprint_frame(pd.DataFrame({'x': [1.0, 2.0, 3.0]}))
+    b = fingerprint_frame(pd.DataFrame({'x': [1.0, 2.0, 4.0]}))
+    assert a == fingerprint_frame(pd.DataFrame({'x': [1.0, 2.0, 3.0]}))
+
+    artifact, entry, retrained = registry.get_or_train('m', a, ['x'], train('a'))
+    assert retrained and entry['version'] == 1 and artifact == {'value': 'a'}
+
+    artifact, entry, retrained = registry.get_or_train('m', a, ['x'], train('again'))
+    assert not retrained and entry['version'] == 1 and fits == ['a']
+
+    registry.get_or_train('m', b, ['x'], train('b'))
+    registry.get_or_train('m', a, ['x'], train('a2'))
+    assert [e['version'] for e in registry.versions('m')] == [2, 3]
+    assert sorted(p.name for p in (registry.root / 'm').glob('*.joblib')) == ['v2.joblib', 'v3.joblib']
+
+    assert registry.load('m', ['x', 'y']) is None
+
+    # A fresh registry (e.g. another request) reuses the artifact this process already read
+    reads = []
+    monkeypatch.setattr(model_registry.joblib, 'load', lambda *a, **k: reads.append(a))
+    artifact, entry = ModelRegistry(root=str(registry.root.parent)).load('m', ['x'])
+    assert artifact == {'value': 'a2'} and entry['version'] == 3 and reads == []
+
+
+def _register_many(root, worker, count):
+    registry = ModelRegistry(root=root, keep_versions=100)
+    return [
+        registry.register('shared', {'worker': worker, 'n': n}, ['x'], f"{worker}-{n}")['version']
+        for n in range(count)
+    ]
+
+
+def test_register_from_concurrent_processes(tmp_path):
+    root = str(tmp_path)
+    with ProcessPoolExecutor(max_workers=4, mp_context=multiprocessing.get_context('fork')) as pool:
+        claimed = [v for f in [pool.submit(_register_many, root, w, 10) for w in range(4)] for v in f.result()]
+
+    assert sorted(claimed) == list(range(1, 41))
+    registry = ModelRegistry(root=root, keep_versions=100)
+    entries = registry.versions('shared')
+    assert [e['version'] for e in entries] == list(range(1, 41))
+    assert len({e['fingerprint'] for e in entries}) == 40
+    assert len(list((registry.root / 'shared').glob('*.joblib'))) == 40
+
+
+def test_churn_model_retrained_only_when_data_changes(registry):
+    customers = _customers()
+    for c in customers[:40]:
+        c['last_order_date'] = datetime.utcnow() - timedelta(days=150)
+
+    first = ChurnPredictor(registry=registry).train(customers)
+    assert first['success'] and first['retrained'] and first['model_version'] == 1
+
+    reordered = ChurnPredictor(registry=registry).train(list(reversed(customers)))
+    assert reordered['success'] and not reordered['retrained'] and reordered['model_version'] == 1
+    assert reordered['test_accuracy'] == first['test_accuracy']
+
+    scorer = ChurnPredictor(registry=registry)
+    predictions = scorer.predict(customers[:5])
+    assert len(predictions) == 5 and scorer.model_version == 1
+
+    customers[0]['orders_count'] += 1
+    changed = ChurnPredictor(registry=registry).train(customers)
+    assert changed['retrained'] and changed['model_version'] == 2
+    assert [e['version'] for e in registry.versions(CHURN_MODEL_NAME)] == [1, 2]
+
+
+def test_isolation_forest_fit_once_per_series(monkeypatch):
+    rng = np.random.default_rng(3)
+    values = rng.normal(100, 5, 60)
+    values[45] = 300
+    data = [{'date': f"2026-01-{i % 28 + 1:02d}", 'sessions': float(v)} for i, v in enumerate(values)]
+
+    fits = []
+    original = anomaly_detection.IForest.fit
+    monkeypatch.setattr(
+        anomaly_detection.IForest, 'fit',
+        lambda self, X, *a, **k: fits.append(len(X)) or original(self, X, *a, **k),
+    )
+    monkeypatch.setattr(anomaly_detection, '_forest_cache', OrderedDict())
+    monkeypatch.setattr(anomaly_detection, 'FOREST_CACHE_SIZE', 2)
+
+    detector = AnomalyDetector(sensitivity=0.05)
+    first = detector._detect_isolation_forest_anomalies(pd.DataFrame(data), 'sessions', 'date')
+    again = detector._detect_isolation_forest_anomalies(pd.DataFrame(data), 'sessions', 'date')
+
+    assert fits == [60]
+    assert first == again and any(a['value'] == 300 for a in first)
+
+    # Other series are fit in memory and the cache stays bounded
+    for shift in (1, 2):
+        shifted = [dict(d, sessions=d['sessions'] + shift) for d in data]
+        detector._detect_isolation_forest_anomalies(pd.DataFrame(shifted), 'sessions', 'date')
+    assert len(fits) == 3 and len(anomaly_detection._forest_cache) == 2
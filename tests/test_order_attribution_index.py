@@ -0,0 +1,105 @@
+"""
+Order → campaign attribution index.
+
+Covers ShopifyRevenueAttributionService: orders resolved into
+shopify_order_attribution (gad_campaign_id tier, utm_campaign name tier,
+unmatched), per-campaign revenue / COGS / SKU aggregates from grouped
+queries, backfill of orders saved before the index, and re-resolution
+when a campaign is renamed.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.models.ad_spend import AdSpendDirtyCampaign
+from app.models.google_ads_data import GoogleAdsCampaign
+from app.models.shopify import ShopifyOrder, ShopifyOrderAttribution, ShopifyOrderItem
+from app.services.shopify_revenue_attribution import ShopifyRevenueAttributionService
+
+
+START, END = date(2026, 3, 1), date(2026, 3, 31)
+
+
+@pytest.fixture
+def db(sqlite_session):
+    session = sqlite_session(ShopifyOrder, ShopifyOrderItem, ShopifyOrderAttribution,
+                             GoogleAdsCampaign, AdSpendDirtyCampaign)
+    for cid, name in (("111.0", "Brand - Search"), ("222", "Summer_Sale PMax")):
+        session.add(GoogleAdsCampaign(campaign_id=cid, campaign_name=name, date=date(2026, 3, 10)))
+    session.commit()
+    return session
+
+
+def _order(db, order_id, gad=None, utm=None, subtotal="100", current=None, status="paid",
+           cancelled=False, day=10, items=()):
+    db.add(ShopifyOrder(
+        shopify_order_id=order_id, order_number=order_id, financial_status=status,
+        total_price=Decimal(subtotal) + 10, subtotal_price=Decimal(subtotal),
+        current_subtotal_price=Decimal(current) if current is not None else None,
+        gad_campaign_id=gad, utm_campaign=utm,
+        created_at=datetime(2026, 3, day, 12), cancelled_at=datetime(2026, 3, day, 13) if cancelled else None,
+    ))
+    for n, (sku, qty, price, cost) in enumerate(items):
+        db.add(ShopifyOrderItem(
+            shopify_order_id=order_id, order_date=datetime(2026, 3, day, 12), line_item_id=order_id * 10 + n,
+            sku=sku, quantity=qty, price=Decimal(price), total_price=Decimal(price) * qty,
+            cost_per_item=Decimal(cost) if cost is not None else None,
+        ))
+
+
+def test_index_and_grouped_revenue(db):
+    service = ShopifyRevenueAttributionService(db)
+    _order(db, 1, gad="111", items=[("A", 2, "30", "10"), ("B", 1, "40", "50")])
+    _order(db, 2, gad="999", utm="summer-sale+pmax", current="0", subtotal="80",
+           items=[("C", 1, "80", None), ("", 3, "5", "1")])
+    _order(db, 3, utm="brand search", current="60")
+    _order(db, 4, utm="unknown campaign")
+    _order(db, 5, gad="111", status="pending")
+    _order(db, 6, gad="111", cancelled=True)
+    _order(db, 7, gad="222", day=5, items=[("A", 1, "30", "10")])
+    db.commit()
+    assert service.index_orders([1, 2, 3, 4, 5, 6]) == 6
+
+    index = {r.shopify_order_id: (r.campaign_id, r.match_tier) for r in db.query(ShopifyOrderAttribution)}
+    assert index[1] == ("111", "gad_campaign_id")
+    assert index[2] == ("222", "utm_campaign")
+    assert index[4] == (None, None)
+
+    result = service.get_campaign_revenue(["111.0", "222", "333"], START, END)
+    # Order 7 was never indexed; the query backfills it
+    assert db.query(ShopifyOrderAttribution).count() == 7
+    assert result["333"] is None
+    assert result["111.0"] == {
+        "order_count": 2,
+        "revenue": Decimal("160.00"),          # 100 + current subtotal 60
+        "product_costs": Decimal("70.00"),     # 2 x 10 + 1 x 50
+        "products_advertised": 2,
+        "avg_product_margin": round((160 - 70) / 160, 4),
+        "unprofitable_products_count": 1,
+    }
+    assert result["222"] == {
+        "order_count": 2,
+        "revenue": Decimal("180.00"),          # zero current subtotal falls through to 80
+        "product_costs": Decimal("13.00"),
+        "products_advertised": 2,              # C and A; blank SKU not counted
+        "avg_product_margin": round((180 - 13) / 180, 4),
+        "unprofitable_products_count": 0,
+    }
+
+
+def test_campaign_rename_reresolves_utm_tier(db):
+    service = ShopifyRevenueAttributionService(db)
+    _order(db, 1, utm="Spring Launch")
+    _order(db, 2, gad="222")
+    db.commit()
+    service.index_orders([1, 2])
+    assert service.get_campaign_revenue(["222", "333"], START, END)["333"] is None
+
+    db.add(GoogleAdsCampaign(campaign_id="333", campaign_name="Spring Launch", date=date(2026, 3, 20)))
+    db.commit()
+    assert service.reindex_campaign_names() == 1
+    assert service.reindex_campaign_names() == 0
+
+    result = service.get_campaign_revenue(["222", "333"], START, END)
+    assert result["333"]["order_count"] == 1 and result["222"]["order_count"] == 1
@@ -0,0 +1,77 @@
+"""
+Per-day product sales rollup.
+
+Covers ProductSalesRollupService refresh/aggregation over shopify_order_items
+and the monitoring product checks that now read from it.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.shopify import ShopifyOrder, ShopifyOrderItem, ShopifyProductSalesDaily
+from app.services.product_sales_rollup_service import ProductSalesRollupService
+
+from factories import add_order_item
+
+
+@pytest.fixture
+def Session(sqlite_sessionmaker):
+    return sqlite_sessionmaker(ShopifyOrder, ShopifyOrderItem, ShopifyProductSalesDaily)
+
+
+def test_refresh_aggregates_by_day_product_and_status(Session):
+    db = Session()
+    day = datetime(2026, 3, 10, 9, 30)
+    add_order_item(db, 1, day, 100, 2, 50)
+    add_order_item(db, 2, day.replace(hour=18), 100, 1, 50)
+    add_order_item(db, 3, day, 100, 1, 50, status="refunded")
+    add_order_item(db, 4, day + timedelta(days=1), 200, 4, 10)
+    db.commit()
+
+    rollup = ProductSalesRollupService(db)
+    result = rollup.refresh(day.date(), day.date() + timedelta(days=1))
+    assert result["rows"] == 3
+
+    sales = rollup.get_product_sales(day.date(), day.date() + timedelta(days=1))
+    assert sales["100"] == {"title": "Product 100", "units": 3, "revenue": 150.0}
+    assert sales["200"]["units"] == 4
+
+    row = db.query(ShopifyProductSalesDaily).filter_by(shopify_product_id=100, financial_status="paid").one()
+    assert row.order_count == 2
+
+    # Re-running is idempotent
+    rollup.refresh(day.date(), day.date())
+    assert db.query(ShopifyProductSalesDaily).count() == 3
+    db.close()
+
+
+def test_monitoring_breakout_reads_rollup(Session, monkeypatch):
+    from app.services import monitoring_service as ms
+
+    db = Session()
+    today = datetime.utcnow().replace(hour=1, minute=0, second=0, microsecond=0)
+    # Baseline: 1 unit/day for 7 days; current: 4 units/day for 3 days
+    order_id = 1
+    for offset in range(3, 10):
+        add_order_item(db, order_id, today - timedelta(days=offset), 100, 1, 20, title="Rain Shower")
+        order_id += 1
+    for offset in range(0, 3):
+        add_order_item(db, order_id, today - timedelta(days=offset), 100, 4, 20, title="Rain Shower")
+        order_id += 1
+    db.commit()
+    db.close()
+
+    monkeypatch.setattr(ms, "SessionLocal", Session)
+    svc = ms.MonitoringService.__new__(ms.MonitoringService)
+    svc._product_sales_refreshed_at = None
+    svc._product_sales_refresh_interval = timedelta(minutes=5)
+
+    breakout = asyncio.run(svc._find_breakout_products())
+    assert breakout["product_name"] == "Rain Shower"
+    assert breakout["velocity_increase"] == 4.0
+    assert breakout["total_units_sold"] == 12
+
+    changes = asyncio.run(svc._get_top_products_change())
+    assert changes["Rain Shower"]["current_units"] == 16
+    assert changes["Rain Shower"]["previous_units"] == 3
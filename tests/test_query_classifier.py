@@ -0,0 +1,115 @@
+"""
+Search query brand / spam classifier.
+
+Covers the compiled QueryClassifier (scalar and vectorized paths), the
+query_class backfill that brand / non-brand SQL filters rely on, and the
+shared exclusion predicate keeping unclassified rows.
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from app.models.search_console_data import (
+    SearchConsoleQuery, SearchConsolePage,
+    SearchConsoleQueryDaily, SearchConsolePageDaily, SearchConsoleQueryPageRollup,
+)
+from app.services.query_classifier import (
+    QueryClassifier, QUERY_CLASS_BRAND, QUERY_CLASS_SPAM, QUERY_CLASS_NON_BRAND,
+    backfill_query_classes, excluding_classes, parse_brand_terms,
+)
+from app.services.chat_data_service import ChatDataService
+from app.services.search_console_rollup_service import SearchConsoleRollupService
+from app.services.seo_service import SEOService
+
+
+QUERIES = [
+    "cass brothers basin",
+    "Cass Mixer",
+    "free casino bonus",
+    "cass casino",
+    "kitchen mixer tap",
+    "www.example.com",
+    "",
+    "shower rail 🔥",
+]
+
+
+@pytest.fixture
+def classifier():
+    return QueryClassifier(parse_brand_terms("cass, cass brothers ,,"))
+
+
+@pytest.fixture
+def db(sqlite_session):
+    return sqlite_session(SearchConsoleQuery, SearchConsolePage, SearchConsoleQueryDaily,
+                          SearchConsolePageDaily, SearchConsoleQueryPageRollup)
+
+
+def test_classify_brand_wins_over_spam(classifier):
+    assert classifier.classify("Cass Mixer") == QUERY_CLASS_BRAND
+    assert classifier.classify("cass casino") == QUERY_CLASS_BRAND
+    assert classifier.classify("free casino bonus") == QUERY_CLASS_SPAM
+    assert classifier.classify("www.example.com") == QUERY_CLASS_SPAM
+    assert classifier.classify("kitchen mixer tap") == QUERY_CLASS_NON_BRAND
+    assert classifier.classify("") == QUERY_CLASS_NON_BRAND
+
+
+def test_terms_are_matched_literally():
+    classifier = QueryClassifier(["a+b"], spam_fragments=[])
+    assert classifier.is_brand("buy a+b taps")
+    assert not classifier.is_brand("buy aab taps")
+    assert not classifier.is_spam("casino")
+
+
+def test_classify_series_matches_scalar(classifier):
+    series = pd.Series(QUERIES + [None])
+    vectorized = classifier.classify_series(series)
+    expected = [classifier.classify(q) for q in QUERIES] + [QUERY_CLASS_NON_BRAND]
+    assert vectorized.tolist() == expected
+
+
+def test_backfill_classifies_raw_and_rollup_rows(db, classifier):
+    d = date(2026, 3, 2)
+    for query in ("cass mixer", "casino slot", "basin tap"):
+        db.add(SearchConsoleQuery(
+            date=d, query=query, page="https://shop.test/p", clicks=1, impressions=10, position=3.0,
+        ))
+    db.commit()
+    SearchConsoleRollupService(db).refresh(d, d)
+
+    counts = backfill_query_classes(db, classifier=classifier)
+    assert counts == {QUERY_CLASS_BRAND: 1, QUERY_CLASS_SPAM: 1, QUERY_CLASS_NON_BRAND: 1}
+
+    for model in (SearchConsoleQuery, SearchConsoleQueryDaily, SearchConsoleQueryPageRollup):
+        classes = {r.query: r.query_class for r in db.query(model).all()}
+        assert classes == {
+            "cass mixer": QUERY_CLASS_BRAND,
+            "casino slot": QUERY_CLASS_SPAM,
+            "basin tap": QUERY_CLASS_NON_BRAND,
+        }
+
+    # Nothing left unclassified
+    assert sum(backfill_query_classes(db, classifier=classifier).values()) == 0
+
+
+def test_exclusion_keeps_unclassified_rows(db, classifier):
+    d = date(2026, 3, 2)
+    for query in ("cass mixer", "casino slot", "basin tap", "vanity unit"):
+        db.add(SearchConsoleQueryDaily(date=d, query=query, clicks=1, impressions=10, weighted_position_sum=30.0))
+    db.commit()
+    for query, query_class in (("cass mixer", QUERY_CLASS_BRAND), ("casino slot", QUERY_CLASS_SPAM),
+                               ("basin tap", QUERY_CLASS_NON_BRAND)):
+        db.query(SearchConsoleQueryDaily).filter_by(query=query).update({"query_class": query_class})
+
+    def kept(predicate):
+        return sorted(r.query for r in db.query(SearchConsoleQueryDaily).filter(predicate))
+
+    # "vanity unit" has not been classified yet; SEO and chat filters both keep it
+    seo = SEOService.__new__(SEOService)
+    assert kept(seo._non_brand(SearchConsoleQueryDaily)) == ["basin tap", "vanity unit"]
+    chat = ChatDataService.__new__(ChatDataService)
+    assert kept(chat._exclude_brand_predicate()) == ["basin tap", "casino slot", "vanity unit"]
+    assert kept(excluding_classes(SearchConsoleQueryDaily.query_class, QUERY_CLASS_SPAM)) == [
+        "basin tap", "cass mixer", "vanity unit",
+    ]
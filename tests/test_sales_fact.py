@@ -0,0 +1,149 @@
+"""
+Daily sales fact table.
+
+Covers SalesFactService refresh over shopify_order_items + refunds, and the
+brand intelligence / finance readers that now aggregate fact rows, and
+finance COGS falling back to order items while the table is unbuilt.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models.shopify import (
+    ShopifyOrder, ShopifyOrderItem, ShopifyRefundLineItem,
+    ShopifySalesDailyFact, ShopifyVendorOrdersDaily,
+)
+from app.services.refund_rollup_service import RefundRollupService
+from app.services.sales_fact_service import SalesFactService, date_runs, day_window
+
+from factories import add_order_item
+
+
+@pytest.fixture
+def db(sqlite_session):
+    return sqlite_session(ShopifyOrder, ShopifyOrderItem, ShopifyRefundLineItem,
+                          ShopifySalesDailyFact, ShopifyVendorOrdersDaily)
+
+
+def _refund(db, line_id, order_id, qty, amount):
+    db.add(ShopifyRefundLineItem(
+        shopify_refund_id=line_id * 10, shopify_order_id=order_id, line_item_id=line_id, quantity=qty,
+        subtotal=Decimal(str(amount)),
+    ))
+
+
+@pytest.fixture
+def sales(db):
+    day = datetime(2026, 3, 10, 11, 0)
+    add_order_item(db, 100, day, 1, 2, 100, line_id=1, vendor="Acme", cost=40, discount=10)
+    add_order_item(db, 100, day, 2, 1, 50, line_id=2, vendor="Acme")  # uncosted
+    add_order_item(db, 101, day, 1, 1, 100, line_id=3, vendor="Acme", cost=40)
+    add_order_item(db, 102, day + timedelta(days=1), 3, 3, 20, line_id=4, vendor="Zenith", cost=5)
+    add_order_item(db, 103, day, 1, 1, 100, line_id=5, vendor="Acme", cost=40, status="voided")
+    _refund(db, 1, 100, 1, 90)                                # refunded from day-1 order
+    db.commit()
+    RefundRollupService(db).refresh_line_items([1])
+    SalesFactService(db).refresh(date(2026, 3, 1), date(2026, 3, 31))
+    return day
+
+
+def test_refresh_rolls_up_refunds_and_cogs_by_order_date(db, sales):
+    row = db.query(ShopifySalesDailyFact).filter_by(
+        vendor="Acme", shopify_product_id=1, financial_status="paid").one()
+    assert row.units == 3
+    assert row.refund_units == 1
+    assert float(row.gross_revenue) == 300
+    assert float(row.net_revenue) == 300 - 10 - 90
+    assert float(row.cogs) == 120
+    assert float(row.refund_cogs) == 40
+    assert row.order_count == 2
+
+    orders = db.query(ShopifyVendorOrdersDaily).filter_by(vendor="Acme", financial_status="paid").one()
+    assert orders.order_count == 2
+
+    # Re-running a sub-range is idempotent
+    SalesFactService(db).refresh_dates([date(2026, 3, 10), date(2026, 3, 11)])
+    assert db.query(ShopifySalesDailyFact).count() == 4
+
+
+def test_brand_readers_use_fact(db, sales):
+    from app.services.brand_intelligence_service import BrandIntelligenceService
+
+    svc = BrandIntelligenceService(db)
+    start, end = datetime(2026, 3, 9, 12), datetime(2026, 3, 11, 12)
+    brands = {b["brand"]: b for b in svc._brand_aggregates(start, end)}
+    acme = brands["Acme"]
+    assert acme["revenue"] == 350 - 10 - 90
+    assert acme["units"] == 3
+    assert acme["orders"] == 2
+    assert acme["product_count"] == 2
+    assert acme["total_cogs"] == 80
+    assert acme["cost_coverage_pct"] == 75.0
+    assert brands["Zenith"]["revenue"] == 60
+
+    totals = svc._brand_totals("Acme", start, end)
+    assert totals["gross_revenue"] == 350
+    assert totals["refunds"] == 90
+    assert svc._total_revenue(start, end) == 310
+
+    products = {p["product_id"]: p for p in svc._product_breakdown("Acme", start, end)}
+    assert products[1]["units"] == 2
+    assert products[1]["avg_price"] == 100
+
+
+def test_finance_cogs_reads_fact(db, sales):
+    from app.services.finance_service import FinanceService
+
+    # Same definition as before: every costed line item, regardless of status
+    assert FinanceService(db)._cogs_by_month(date(2026, 3, 1), date(2026, 4, 1)) == {
+        date(2026, 3, 1): Decimal("175"),
+    }
+
+
+def test_finance_cogs_falls_back_to_order_items_without_rebuild(db, monkeypatch):
+    from app.services.finance_service import FinanceService
+
+    add_order_item(db, 100, datetime(2026, 3, 10, 11), 1, 2, 100, line_id=1, vendor="Acme", cost=40)
+    add_order_item(db, 101, datetime(2026, 4, 2, 9), 2, 1, 50, line_id=2, vendor="Acme", cost=15)
+    add_order_item(db, 102, datetime(2026, 4, 3, 9), 2, 1, 50, line_id=3, vendor="Acme")
+    db.commit()
+
+    def no_rebuild(self):
+        raise AssertionError("request path rebuilt the fact table")
+
+    monkeypatch.setattr(SalesFactService, "rebuild", no_rebuild)
+    assert FinanceService(db)._cogs_by_month(date(2026, 3, 1), date(2026, 5, 1)) == {
+        date(2026, 3, 1): Decimal("80"), date(2026, 4, 1): Decimal("15"),
+    }
+    assert db.query(ShopifySalesDailyFact).count() == 0
+
+
+def test_window_helpers():
+    assert day_window(datetime(2026, 3, 1, 9), datetime(2026, 3, 31, 9)) == (date(2026, 3, 2), date(2026, 3, 31))
+    assert day_window(datetime(2026, 3, 1), datetime(2026, 4, 1)) == (date(2026, 3, 1), date(2026, 3, 31))
+    assert date_runs([date(2026, 1, 3), date(2026, 1, 1), date(2026, 1, 2), date(2026, 2, 1)]) == [
+        (date(2026, 1, 1), date(2026, 1, 3)), (date(2026, 2, 1), date(2026, 2, 1)),
+    ]
+
+
+def test_batched_brand_aggregates_match_single_brand(db, sales):
+    from app.services.brand_intelligence_service import BrandIntelligenceService
+
+    svc = BrandIntelligenceService(db)
+    start, end = datetime(2026, 3, 9, 12), datetime(2026, 3, 11, 12)
+    brands = ["Acme", "Zenith", "Nobody"]
+
+    totals = svc._brand_totals_many(brands, start, end)
+    products = svc._product_breakdown_many(brands, start, end)
+    for brand in brands:
+        assert totals[brand] == BrandIntelligenceService(db)._brand_totals(brand, start, end)
+        assert products[brand] == BrandIntelligenceService(db)._product_breakdown(brand, start, end)
+    assert totals["Nobody"]["revenue"] == 0
+    assert products["Nobody"] == []
+
+    comparison = {b["brand"]: b for b in svc.get_brand_comparison(brands, period_days=30)["brands"]}
+    march = comparison["Acme"]["monthly"][2]
+    assert march["this_year"] == 250
+    assert comparison["Zenith"]["revenue"] == 60
+    assert comparison["Nobody"]["revenue_yoy_pct"] is None
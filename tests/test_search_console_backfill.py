@@ -0,0 +1,175 @@
+"""
+Resumable concurrent Search Console backfill.
+
+Drives DataSyncService.backfill_search_console against a fake connector and
+an in-memory SQLite database: windows run concurrently, each completed
+window is checkpointed on the DataSyncLog row, and a rerun only fetches the
+windows that did not finish. A "running" backfill is only taken over once
+its heartbeat is stale.
+"""
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from app.models.analytics import DataSyncLog
+from app.models.search_console_data import (
+    SearchConsoleQuery, SearchConsolePage,
+    SearchConsoleQueryDaily, SearchConsolePageDaily, SearchConsoleQueryPageRollup,
+)
+from app.services import data_sync_service as dss
+from app.utils.rate_limiter import AsyncRateLimiter
+
+
+class FakeConnector:
+    """Stands in for SearchConsoleConnector; fails chosen windows once."""
+
+    calls = []
+    fail_once = set()
+
+    def __init__(self):
+        self.service = None
+        self.rate_limiter = None
+
+    async def connect(self):
+        self.service = object()
+        return True
+
+    async def _sync_window_with_retry(self, start_date, end_date, max_retries=3):
+        await self.rate_limiter.acquire()
+        key = start_date.date().isoformat()
+        FakeConnector.calls.append(key)
+        if key in FakeConnector.fail_once:
+            FakeConnector.fail_once.discard(key)
+            return {"success": False, "error": "HttpError 503"}
+
+        queries, pages = [], []
+        day = start_date
+        while day <= end_date:
+            d = day.strftime("%Y-%m-%d")
+            queries.append({"date": d, "query": "basin tap", "clicks": 2, "impressions": 40, "ctr": 0.05, "position": 4.0})
+            pages.append({"date": d, "page": "https://shop.test/basin", "clicks": 2, "impressions": 40, "ctr": 0.05, "position": 4.0})
+            day += timedelta(days=1)
+        return {
+            "success": True,
+            "queries": len(queries),
+            "pages": len(pages),
+            "data": {
+                "query_performance": {"queries": queries, "total_queries": len(queries)},
+                "page_performance": {"pages": pages, "total_pages": len(pages)},
+            },
+        }
+
+
+@pytest.fixture
+def service(sqlite_sessionmaker, monkeypatch):
+    Session = sqlite_sessionmaker(DataSyncLog, SearchConsoleQuery, SearchConsolePage,
+                                  SearchConsoleQueryDaily, SearchConsolePageDaily,
+                                  SearchConsoleQueryPageRollup)
+
+    monkeypatch.setattr(dss, "SessionLocal", Session)
+    monkeypatch.setattr(dss, "SearchConsoleConnector", FakeConnector)
+    FakeConnector.calls = []
+    FakeConnector.fail_once = set()
+
+    svc = dss.DataSyncService.__new__(dss.DataSyncService)
+    return svc, Session
+
+
+def _run(svc, **kwargs):
+    return asyncio.run(svc.backfill_search_console(
+        months=1, window_days=6, delay_between_windows=0, concurrency=3, **kwargs
+    ))
+
+
+def test_backfill_checkpoints_and_resumes_failed_windows(service):
+    svc, Session = service
+    now = dss.datetime.now()
+    windows = svc._search_console_backfill_windows(now - timedelta(days=30), now - timedelta(days=3), 6)
+    failing = windows[1][0].date().isoformat()
+    FakeConnector.fail_once = {failing}
+
+    first = _run(svc)
+    assert first["windows_failed"] == 1
+    assert first["windows_processed"] == first["windows_total"] - 1
+
+    db = Session()
+    sync_log = db.query(DataSyncLog).one()
+    assert sync_log.status == "partial"
+    assert failing not in sync_log.error_details["checkpoint"]["completed_windows"]
+    db.close()
+
+    FakeConnector.calls = []
+    second = _run(svc)
+    assert second["resumed"] is True
+    assert second["sync_log_id"] == first["sync_log_id"]
+    assert FakeConnector.calls == [failing]
+    assert second["windows_skipped"] == first["windows_total"] - 1
+    assert second["success"] is True
+
+    db = Session()
+    assert db.query(DataSyncLog).one().status == "success"
+    # Every day stored exactly once (bulk path replaces, never duplicates)
+    dates = [r.date for r in db.query(SearchConsoleQuery).all()]
+    assert len(dates) == len(set(dates))
+    assert db.query(SearchConsoleQuery).filter(SearchConsoleQuery.query_class.is_(None)).count() == 0
+    assert db.query(SearchConsoleQueryDaily).count() == len(dates)
+    db.close()
+
+
+def test_running_backfill_resumed_only_when_heartbeat_is_stale(service):
+    svc, Session = service
+    checkpoint = {"months": 1, "window_days": 6, "completed_windows": []}
+    now = dss.datetime.utcnow()
+    db = Session()
+    for status, heartbeat in (("running", now - timedelta(minutes=5)), ("success", now - timedelta(hours=3))):
+        db.add(DataSyncLog(
+            source="search_console", sync_type="backfill", status=status, started_at=now - timedelta(hours=1),
+            error_details={"checkpoint": checkpoint, "heartbeat_at": heartbeat.isoformat()},
+        ))
+    db.commit()
+
+    # Live run: not resumed (and finished runs never are)
+    assert svc._find_search_console_checkpoint(1, 6) is None
+
+    running = db.query(DataSyncLog).filter(DataSyncLog.status == "running").one()
+    running.error_details = {"checkpoint": checkpoint, "heartbeat_at": (now - timedelta(hours=1)).isoformat()}
+    db.commit()
+    assert svc._find_search_console_checkpoint(1, 6).id == running.id
+    db.close()
+
+
+def test_bulk_window_save_replaces_existing_days(service):
+    svc, Session = service
+    data = {
+        "query_performance": {"queries": [
+            {"date": "2026-02-01", "query": "shower rail", "clicks": 1, "impressions": 10, "ctr": 0.1, "position": 3.0},
+            {"date": "2026-02-01", "query": "shower rail", "clicks": 5, "impressions": 20, "ctr": 0.25, "position": 2.0},
+        ]},
+        "page_performance": {"pages": [
+            {"date": "2026-02-01", "page": "https://shop.test/rail", "clicks": 5, "impressions": 20, "ctr": 0.25, "position": 2.0},
+            {"date": "2026-02-01", "page": None},
+        ]},
+    }
+    first = svc._bulk_save_search_console_window(data)
+    assert first["queries_saved"] == 1 and first["pages_saved"] == 1
+    assert first["failed"] == 1
+
+    second = svc._bulk_save_search_console_window(data)
+    assert second["replaced"] == 2
+
+    db = Session()
+    row = db.query(SearchConsoleQuery).one()
+    assert row.clicks == 5
+    assert db.query(SearchConsolePage).count() == 1
+    db.close()
+
+
+def test_rate_limiter_penalty_pauses_callers():
+    async def scenario():
+        limiter = AsyncRateLimiter(rate=6000, per=60.0, burst=1)
+        await limiter.acquire()
+        limiter.penalize(0.05)
+        return await limiter.acquire()
+
+    assert asyncio.run(scenario()) >= 0.04
@@ -0,0 +1,144 @@
+"""
+Search Console rollup tables.
+
+Covers the incremental refresh in SearchConsoleRollupService and the
+impression-weighted aggregates the SEO dashboard reads back from it,
+including cannibalization over a window that starts mid-week.
+"""
+from datetime import date, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import func
+
+from app.models.search_console_data import (
+    SearchConsoleQuery, SearchConsolePage,
+    SearchConsoleQueryDaily, SearchConsolePageDaily, SearchConsoleQueryPageRollup,
+)
+from app.services.search_console_rollup_service import (
+    SearchConsoleRollupService, GRAIN_WEEK, GRAIN_MONTH, period_bounds, weighted_position,
+)
+
+
+@pytest.fixture
+def db(sqlite_session):
+    return sqlite_session(SearchConsoleQuery, SearchConsolePage, SearchConsoleQueryDaily,
+                          SearchConsolePageDaily, SearchConsoleQueryPageRollup)
+
+
+def _add_query(db, d, query, page, clicks, impressions, position):
+    db.add(SearchConsoleQuery(
+        date=d, query=query, page=page, clicks=clicks, impressions=impressions,
+        ctr=clicks / impressions if impressions else 0, position=position,
+    ))
+
+
+def test_period_bounds_cover_partial_periods():
+    weeks = period_bounds(GRAIN_WEEK, date(2026, 1, 7), date(2026, 1, 13))
+    assert weeks == [
+        (date(2026, 1, 5), date(2026, 1, 11)),
+        (date(2026, 1, 12), date(2026, 1, 18)),
+    ]
+    months = period_bounds(GRAIN_MONTH, date(2025, 12, 30), date(2026, 1, 2))
+    assert months == [
+        (date(2025, 12, 1), date(2025, 12, 31)),
+        (date(2026, 1, 1), date(2026, 1, 31)),
+    ]
+
+
+def test_refresh_builds_weighted_daily_and_period_rollups(db):
+    d = date(2026, 1, 7)
+    _add_query(db, d, "basin tap", "https://shop.test/a", 10, 100, 2.0)
+    _add_query(db, d, "basin tap", "https://shop.test/b", 0, 300, 10.0)
+    _add_query(db, d + timedelta(days=1), "basin tap", "https://shop.test/a", 5, 100, 4.0)
+    db.add(SearchConsolePage(date=d, page="https://shop.test/a", clicks=10, impressions=100, position=2.0))
+    db.commit()
+
+    result = SearchConsoleRollupService(db).refresh(d, d + timedelta(days=1))
+    assert result["query_daily_rows"] == 2
+    assert result["page_daily_rows"] == 1
+
+    Q = SearchConsoleQueryDaily
+    row = db.query(
+        func.sum(Q.clicks), func.sum(Q.impressions), weighted_position(Q)
+    ).filter(Q.query == "basin tap", Q.date == d).one()
+    # (2*100 + 10*300) / 400 — not the unweighted mean of 6.0
+    assert row[0] == 10 and row[1] == 400
+    assert row[2] == pytest.approx(8.0)
+
+    weekly = db.query(SearchConsoleQueryPageRollup).filter_by(grain=GRAIN_WEEK).all()
+    assert {(r.period_start, r.page, r.clicks) for r in weekly} == {
+        (date(2026, 1, 5), "https://shop.test/a", 15),
+        (date(2026, 1, 5), "https://shop.test/b", 0),
+    }
+    monthly = db.query(SearchConsoleQueryPageRollup).filter_by(grain=GRAIN_MONTH).all()
+    assert {r.period_start for r in monthly} == {date(2026, 1, 1)}
+
+
+def test_refresh_is_idempotent_and_picks_up_revisions(db):
+    d = date(2026, 2, 3)
+    _add_query(db, d, "shower rail", "https://shop.test/rail", 3, 50, 6.0)
+    db.commit()
+    svc = SearchConsoleRollupService(db)
+    svc.refresh(d, d)
+
+    raw = db.query(SearchConsoleQuery).one()
+    raw.clicks = 7
+    db.commit()
+    svc.refresh(d, d)
+
+    assert db.query(SearchConsoleQueryDaily).count() == 1
+    assert db.query(SearchConsoleQueryDaily).one().clicks == 7
+    week = db.query(SearchConsoleQueryPageRollup).filter_by(grain=GRAIN_WEEK).one()
+    assert week.clicks == 7
+
+
+def test_seo_service_reads_position_distribution_from_rollups(db):
+    from app.services.seo_service import SEOService
+
+    today = date.today()
+    _add_query(db, today, "kitchen mixer", "https://shop.test/mixer", 20, 400, 2.0)
+    _add_query(db, today, "mixer tap black", "https://shop.test/mixer", 2, 100, 14.0)
+    db.commit()
+
+    settings = MagicMock(gsc_brand_terms="")
+    with patch("app.services.seo_service.get_settings", return_value=settings):
+        svc = SEOService(db)
+
+    # Before refresh the dashboard sees nothing — it no longer scans raw rows
+    assert svc.get_position_distribution(days=7)["buckets"]["1-3"] == 0
+
+    SearchConsoleRollupService(db).refresh(today, today)
+    dist = svc.get_position_distribution(days=7)
+    assert dist["buckets"] == {"1-3": 1, "4-10": 0, "11-20": 1, "20+": 0}
+
+    trends = svc.get_monthly_trends(months=2)
+    assert len(trends) == 2
+    assert trends[-1]["clicks"] == 22
+    assert trends[-1]["impressions"] == 500
+
+
+def test_cannibalization_window_starts_mid_week(db):
+    from app.services.seo_service import SEOService
+
+    today = date.today()
+    # Window start on a Wednesday, so its ISO week begins two days earlier
+    days = 30 + (today - timedelta(days=30)).weekday() - 2
+    if days < 30:
+        days += 7
+    start = today - timedelta(days=days)
+    assert start.weekday() == 2
+
+    # "basin tap": second page only ranked on the Tuesday before the window
+    _add_query(db, start + timedelta(days=8), "basin tap", "https://shop.test/a", 12, 100, 3.0)
+    _add_query(db, start - timedelta(days=1), "basin tap", "https://shop.test/b", 20, 100, 3.0)
+    # "vanity unit": one page in the leading partial week, one in a full week
+    _add_query(db, start, "vanity unit", "https://shop.test/v1", 6, 100, 5.0)
+    _add_query(db, start + timedelta(days=12), "vanity unit", "https://shop.test/v2", 6, 100, 5.0)
+    db.commit()
+    SearchConsoleRollupService(db).refresh(start - timedelta(days=2), today)
+
+    settings = MagicMock(gsc_brand_terms="")
+    with patch("app.services.seo_service.get_settings", return_value=settings):
+        svc = SEOService(db)
+    assert svc._get_cannibalization(days) == [{"query": "vanity unit", "page_count": 2, "clicks": 12}]
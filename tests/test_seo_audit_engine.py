@@ -0,0 +1,141 @@
+"""
+Concurrent SEO audit engine.
+
+Covers extract_page (single lxml walk) on a product page, and
+SEOAnalyzer.audit_site_async against a local threaded HTTP server: every
+URL is audited, no host sees more than the per-host limit of concurrent
+requests, a missing page is reported as an error, and a re-audit
+revalidates with If-None-Match and reuses cached parses (304s). Pages
+without an ETag are parsed every time.
+"""
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.ml.seo_analyzer import SEOAnalyzer, extract_page
+from app.utils.cache import clear_cache
+
+
+def _product_html(n: int) -> bytes:
+    words = " ".join(f"feature{i}" for i in range(320))
+    return f"""<!DOCTYPE html>
+<html><head>
+  <title>Product {n} - Brushed Brass Kitchen Mixer Tap</title>
+  <meta name="description" content="{'Solid brass mixer with ceramic cartridge. ' * 3}">
+  <meta name="viewport" content="width=device-width, initial-scale=1">
+  <link rel="canonical" href="/products/{n}">
+  <script type="application/ld+json">{{"@type": "Product"}}</script>
+  <script>var hidden = "not counted";</script>
+</head><body>
+  <h1>Product <em>{n}</em></h1><h2>Specifications</h2><h2>Reviews</h2><h3>Warranty</h3>
+  <img src="/a.jpg" alt="Front"><img src="/b.jpg"><img src="/c.jpg" alt="Side" title="Side">
+  <a href="/">Home</a><a href="/collections/taps">Taps</a><a href="/products/{n + 1}">Next</a>
+  <a href="https://reviews.example.com/" rel="noopener nofollow">Reviews</a><a href="#top">Top</a>
+  <!-- comment words --><p>{words}</p>
+</body></html>""".encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            server.delay.wait(0.005)
+            if self.path == "/missing":
+                return self._send(404, b"not found")
+            n = int(self.path.rsplit("/", 1)[-1])
+            etag = None if self.path.startswith("/plain/") else f'"v{n}"'
+            if etag and self.headers.get("If-None-Match") == etag:
+                server.not_modified += 1
+                return self._send(304, b"", etag)
+            self._send(200, _product_html(n), etag)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    clear_cache()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.delay = threading.Event()
+    server.in_flight = server.max_in_flight = server.not_modified = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    clear_cache()
+
+
+def test_extract_page_single_pass():
+    page = extract_page(_product_html(7), "https://shop.example.com/products/7")
+
+    assert page["title"]["text"] == "Product 7 - Brushed Brass Kitchen Mixer Tap"
+    assert page["title"]["optimal_length"] and page["meta_description"]["exists"]
+    assert page["headings"]["headings"] == {"h1": ["Product 7"], "h2": ["Specifications", "Reviews"], "h3": ["Warranty"]}
+    assert page["images"]["total_images"] == 3 and page["images"]["images_without_alt"] == 1
+    assert page["links"] == {
+        "total_links": 5, "internal_links": 3, "external_links": 1, "nofollow_links": 1,
+        "has_sufficient_internal_links": True,
+    }
+    # Title, headings, links, paragraph; script text and comments are not content.
+    # Text is joined like BeautifulSoup's get_text(), so adjacent tags run together
+    # ("7SpecificationsReviewsWarranty", "HomeTapsNext", "ReviewsTop").
+    assert page["content"]["word_count"] == 8 + 2 + 2 + 320
+    assert page["head"]["has_canonical"] and page["head"]["has_schema_markup"]
+    assert "width=device-width" in page["head"]["viewport_content"]
+
+
+def test_concurrent_audit_with_etag_cache(site):
+    server, base = site
+    urls = [f"{base}/products/{n}" for n in range(120)] + [f"{base}/missing"]
+    analyzer = SEOAnalyzer()
+
+    first = asyncio.run(analyzer.audit_site_async(urls, concurrency=20, per_host=4))
+    assert first["total_pages_analyzed"] == 121 and first["pages_from_cache"] == 0
+    assert 1 < server.max_in_flight <= 4
+
+    pages = {p["url"]: p for p in first["pages"]}
+    assert "404" in pages[f"{base}/missing"]["error"]
+    product = pages[f"{base}/products/3"]
+    assert product["status_code"] == 200 and product["headings"]["h1_count"] == 1
+    assert product["content"]["sufficient_content"] and not product["technical"]["has_ssl"]
+    assert product["performance"]["page_size_bytes"] == len(_product_html(3))
+
+    again = asyncio.run(analyzer.audit_site_async(urls, concurrency=20, per_host=4))
+    assert server.not_modified == 120 and again["pages_from_cache"] == 120
+    cached = {p["url"]: p for p in again["pages"]}[f"{base}/products/3"]
+    assert cached["score"] == product["score"] and cached["headings"] == product["headings"]
+    assert cached["performance"]["page_size_bytes"] == product["performance"]["page_size_bytes"]
+
+
+def test_pages_without_etag_are_reparsed(site):
+    server, base = site
+    urls = [f"{base}/plain/{n}" for n in range(5)]
+    analyzer = SEOAnalyzer()
+
+    analyzer.audit_site(urls)
+    summary = analyzer.audit_site(urls)
+    assert server.not_modified == 0 and summary["pages_from_cache"] == 0
+    assert all(p["title"]["exists"] for p in summary["pages"])
@@ -0,0 +1,122 @@
+"""
+Batched Search Console lookups in SEOService.
+
+The opportunity finders resolve top pages / top queries and 6-month
+sparklines for the whole candidate set in one query. These tests pin the
+batched resolvers to the same answers the old one-query-per-key helpers
+produced.
+"""
+import asyncio
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import event
+
+from app.models.search_console_data import SearchConsoleQuery, SearchConsoleQueryPageRollup
+from app.services.seo_service import SEOService
+
+
+START = date(2026, 1, 1)
+END = date(2026, 1, 28)
+
+
+@pytest.fixture
+def db(sqlite_session):
+    session = sqlite_session(SearchConsoleQuery)
+
+    rows = [
+        # query, page, clicks, impressions, position
+        ("kitchen mixer", "https://shop.test/products/mixer-a", 40, 900, 4.0),
+        ("kitchen mixer", "https://shop.test/products/mixer-b", 10, 400, 6.0),
+        ("kitchen mixer", "https://shop.test/products/mixer-a?variant=1", 5, 100, 5.0),
+        ("basin tap", "https://shop.test/products/basin-tap/", 25, 600, 3.0),
+        ("basin tap", "https://shop.test/products/mixer-a", 3, 80, 9.0),
+        ("cass mixer", "https://shop.test/products/mixer-a", 30, 300, 1.2),
+        ("mixer tap black", "https://shop.test/products/mixer-a", 12, 200, 7.0),
+        ("shower rail", "https://shop.test/products/mixer-a-rail", 90, 2000, 2.0),
+    ]
+    for query, page, clicks, impressions, position in rows:
+        session.add(SearchConsoleQuery(
+            date=date(2026, 1, 10), query=query, page=page, clicks=clicks,
+            impressions=impressions, ctr=clicks / impressions, position=position,
+        ))
+    session.commit()
+    return session
+
+
+@pytest.fixture
+def svc(db):
+    settings = MagicMock(gsc_brand_terms="cass")
+    with patch("app.services.seo_service.get_settings", return_value=settings):
+        return SEOService(db)
+
+
+def test_top_pages_for_queries_matches_single_lookup(svc):
+    batched = svc._get_top_pages_for_queries(["kitchen mixer", "basin tap", "missing"], START, END)
+
+    assert batched == {
+        "kitchen mixer": "https://shop.test/products/mixer-a",
+        "basin tap": "https://shop.test/products/basin-tap/",
+    }
+    for query in ("kitchen mixer", "basin tap", "missing"):
+        assert svc._get_top_page_for_query(query, START, END) == batched.get(query)
+
+
+def test_top_pages_for_queries_is_one_statement(svc, db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda *args: statements.append(args[2]))
+
+    svc._get_top_pages_for_queries(["kitchen mixer", "basin tap", "shower rail"], START, END)
+
+    assert len(statements) == 1
+
+
+def test_top_queries_for_pages_merges_variants_and_skips_brand(svc):
+    pages = [
+        "https://shop.test/products/mixer-a",
+        "https://shop.test/products/basin-tap",
+    ]
+    batched = svc._get_top_queries_for_pages(pages, START, END)
+
+    mixer = [q["query"] for q in batched["https://shop.test/products/mixer-a"]]
+    # Brand query filtered; prefix-only match (mixer-a-rail) excluded
+    assert "cass mixer" not in mixer
+    assert "shower rail" not in mixer
+    assert mixer[0] == "kitchen mixer"
+    assert len(mixer) <= 3
+
+    basin = batched["https://shop.test/products/basin-tap"]
+    assert [q["query"] for q in basin] == ["basin tap"]
+
+    single = asyncio.run(svc._get_top_queries_for_page(pages[0], START, END))
+    assert single == batched[pages[0]]
+
+
+def test_sparklines_for_queries_is_one_statement(svc, db):
+    SearchConsoleQueryPageRollup.__table__.create(bind=db.get_bind())
+    months = svc._recent_month_starts(6)
+    for i, month in enumerate(months[-3:]):
+        for query, page, clicks in (
+            ("kitchen mixer", "https://shop.test/products/mixer-a", 10 * (i + 1)),
+            ("kitchen mixer", "https://shop.test/products/mixer-b", 1),
+            ("basin tap", "https://shop.test/products/basin-tap/", i),
+        ):
+            db.add(SearchConsoleQueryPageRollup(grain="month", period_start=month, query=query, page=page,
+                                                clicks=clicks, impressions=100, weighted_position_sum=400.0))
+    db.commit()
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda *args: statements.append(args[2]))
+    batched = svc._compute_sparklines_for_queries(["kitchen mixer", "basin tap", "missing"])
+    assert len(statements) == 1
+
+    assert batched == {
+        "kitchen mixer": [0, 0, 0, 11, 21, 31],
+        "basin tap": [0, 0, 0, 0, 1, 2],
+        "missing": [0] * 6,
+    }
+    for query in batched:
+        assert svc._compute_sparkline_query(query) == batched[query]
@@ -0,0 +1,134 @@
+"""
+Shopify webhook change feed.
+
+Covers HMAC verification, idempotent enqueueing by webhook id and
+ShopifyWebhookService draining orders, refunds and inventory levels through
+DataSyncService's save path, with per-location levels applied to the
+variant total as deltas.
+"""
+import base64
+import hashlib
+import hmac
+
+import pytest
+
+from app.models.shopify import (
+    ShopifyInventory, ShopifyInventoryLevel, ShopifyOrder, ShopifyOrderItem, ShopifyRefund, ShopifyRefundLineItem,
+    ShopifyProductSalesDaily, ShopifySalesDailyFact, ShopifyVendorOrdersDaily, ShopifyWebhookEvent,
+)
+from app.models.product_cost import ProductCost
+from app.services import data_sync_service as dss
+from app.services.shopify_webhook_service import ShopifyWebhookService, verify_webhook_hmac
+
+from factories import line_item_payload, order_payload
+
+
+@pytest.fixture
+def Session(sqlite_sessionmaker, monkeypatch):
+    Session = sqlite_sessionmaker(ShopifyOrder, ShopifyOrderItem, ShopifyRefund,
+                                  ShopifyRefundLineItem, ProductCost, ShopifyProductSalesDaily,
+                                  ShopifySalesDailyFact, ShopifyVendorOrdersDaily, ShopifyInventory,
+                                  ShopifyInventoryLevel, ShopifyWebhookEvent)
+    monkeypatch.setattr(dss, "SessionLocal", Session)
+    return Session
+
+
+def _order(status, updated_at, qty=2):
+    return order_payload(
+        1, [line_item_payload(11, qty)], status=status, order_number=1001, current_total_price="200.00",
+        total_shipping_price_set={"shop_money": {"amount": "15.00"}}, updated_at=updated_at,
+        customer={"id": 77},
+    )
+
+
+def test_hmac_verification():
+    body = b'{"id": 1}'
+    signature = base64.b64encode(hmac.new(b"secret", body, hashlib.sha256).digest()).decode()
+    assert verify_webhook_hmac(body, signature, "secret")
+    assert not verify_webhook_hmac(body + b" ", signature, "secret")
+    assert not verify_webhook_hmac(body, signature, "other")
+    assert not verify_webhook_hmac(body, None, "secret")
+
+
+def test_drain_applies_changes_through_save_path(Session):
+    db = Session()
+    db.add(ShopifyInventory(shopify_inventory_item_id=900, sku="TAP-1", inventory_quantity=10))
+    db.commit()
+
+    data_sync = dss.DataSyncService.__new__(dss.DataSyncService)
+    service = ShopifyWebhookService(db, data_sync)
+    assert service.enqueue("orders/create", _order("paid", "2026-03-10T09:00:00Z"), webhook_id="w1")
+    assert service.enqueue("orders/create", _order("paid", "2026-03-10T09:00:00Z"), webhook_id="w1") is None
+    # Delivered out of order: the later update still wins
+    service.enqueue("orders/updated", _order("partially_refunded", "2026-03-12T09:00:00Z"), webhook_id="w3")
+    service.enqueue("orders/updated", _order("paid", "2026-03-11T09:00:00Z"), webhook_id="w2")
+    service.enqueue("refunds/create", {
+        "id": 501, "order_id": 1, "created_at": "2026-03-12T09:00:00Z",
+        "refund_line_items": [{"line_item_id": 11, "quantity": 1, "subtotal": "100.00", "total_tax": "0.00",
+                               "line_item": {"sku": "TAP-1", "product_id": 7}}],
+    }, webhook_id="w4")
+    service.enqueue("inventory_levels/update", {"inventory_item_id": 900, "available": 4}, webhook_id="w5")
+    service.enqueue("inventory_levels/update", {"inventory_item_id": 999, "available": 1}, webhook_id="w6")
+
+    result = service.process_pending()
+    assert result["events"] == 6
+    assert (result["orders"], result["refunds"], result["inventory"], result["failed"]) == (1, 1, 1, 0)
+    assert service.pending_count() == 0
+
+    check = Session()
+    order = check.query(ShopifyOrder).one()
+    assert order.financial_status == "partially_refunded"
+    assert float(order.total_shipping) == 15 and order.customer_id == 77
+    item = check.query(ShopifyOrderItem).one()
+    assert (item.refunded_quantity, float(item.refunded_amount)) == (1, 100.0)
+    assert float(check.query(ShopifySalesDailyFact).one().refunds) == 100.0
+    assert check.query(ShopifyInventory).one().inventory_quantity == 4
+    check.close()
+
+    # Nothing left to apply
+    assert service.process_pending()["events"] == 0
+    db.close()
+
+
+def test_inventory_levels_from_two_locations(Session):
+    db = Session()
+    # Variant total across both locations, from the full inventory sync
+    db.add(ShopifyInventory(shopify_inventory_item_id=900, sku="TAP-1", inventory_quantity=10))
+    db.commit()
+    service = ShopifyWebhookService(db, dss.DataSyncService.__new__(dss.DataSyncService))
+
+    def level(webhook_id, location_id, available, updated_at):
+        service.enqueue("inventory_levels/update", {
+            "inventory_item_id": 900, "location_id": location_id,
+            "available": available, "updated_at": updated_at,
+        }, webhook_id=webhook_id)
+
+    # First report per location sets its baseline; the total is unchanged
+    level("a1", 1, 6, "2026-03-10T09:00:00Z")
+    level("b1", 2, 4, "2026-03-10T09:00:00Z")
+    assert service.process_pending()["inventory"] == 1
+    assert db.query(ShopifyInventory).one().inventory_quantity == 10
+
+    # Location 1 sells two, location 2 restocks three (its older update arrives late)
+    level("a2", 1, 4, "2026-03-10T10:00:00Z")
+    level("b3", 2, 7, "2026-03-10T11:00:00Z")
+    level("b2", 2, 5, "2026-03-10T10:30:00Z")
+    assert service.process_pending()["failed"] == 0
+    db.expire_all()
+    assert db.query(ShopifyInventory).one().inventory_quantity == 4 + 7
+    assert {(lv.location_id, lv.available) for lv in db.query(ShopifyInventoryLevel)} == {(1, 4), (2, 7)}
+    db.close()
+
+
+def test_failed_events_are_retried_then_parked(Session):
+    db = Session()
+    service = ShopifyWebhookService(db, dss.DataSyncService.__new__(dss.DataSyncService))
+    service.enqueue("orders/create", {"line_items": []}, webhook_id="bad")
+
+    for _ in range(4):
+        assert service.process_pending()["failed"] == 1
+    assert service.pending_count() == 1
+    service.process_pending()
+    event = db.query(ShopifyWebhookEvent).one()
+    assert (event.status, event.attempts) == ("failed", 5)
+    db.close()